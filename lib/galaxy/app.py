@@ -64,6 +64,7 @@ from galaxy.util import (
 )
 from galaxy.util.task import IntervalTask
 from galaxy.visualization.data_providers.registry import DataProviderRegistry
+from galaxy.visualization.data_providers.tile_cache import tile_cache_from_config
 from galaxy.visualization.genomes import Genomes
 from galaxy.visualization.plugins.registry import VisualizationsRegistry
 from galaxy.web import url_for
@@ -243,7 +244,7 @@ class UniverseApplication(StructuredApp, GalaxyManagerApplication):
         # Genomes
         self.genomes = self._register_singleton(Genomes)
         # Data providers registry.
-        self.data_provider_registry = self._register_singleton(DataProviderRegistry)
+        self.data_provider_registry = self._register_singleton(DataProviderRegistry, DataProviderRegistry(tile_cache=tile_cache_from_config(self.config)))
 
         # Initialize error report plugins.
         self.error_reports = self._register_singleton(ErrorReports, ErrorReports(self.config.error_report_file, app=self))
@@ -321,6 +322,15 @@ class UniverseApplication(StructuredApp, GalaxyManagerApplication):
                 time_execution=True)
             self.application_stack.register_postfork_function(self.prune_history_audit_task.start)
             self.haltables.append(("HistoryAuditTablePruneTask", self.prune_history_audit_task.shutdown))
+        if not self.config.enable_celery_tasks and self.config.disk_usage_reconcile_interval > 0:
+            self.reconcile_disk_usage_task = IntervalTask(
+                func=lambda: galaxy.model.User.reconcile_disk_usage(self.model.session),
+                name="DiskUsageReconcileTask",
+                interval=self.config.disk_usage_reconcile_interval,
+                immediate_start=False,
+                time_execution=True)
+            self.application_stack.register_postfork_function(self.reconcile_disk_usage_task.start)
+            self.haltables.append(("DiskUsageReconcileTask", self.reconcile_disk_usage_task.shutdown))
         # Start the job manager
         self.application_stack.register_postfork_function(self.job_manager.start)
         self.proxy_manager = ProxyManager(self.config)
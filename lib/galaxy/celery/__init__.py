@@ -60,16 +60,31 @@ def get_history_audit_table_prune_interval():
         return 3600
 
 
+def get_disk_usage_reconcile_interval():
+    config = get_config()
+    if config:
+        return config.disk_usage_reconcile_interval
+    else:
+        return 0
+
+
 broker = get_broker()
 celery_app = Celery('galaxy', broker=broker, include=['galaxy.celery.tasks'])
+beat_schedule = {}
 prune_interval = get_history_audit_table_prune_interval()
 if prune_interval > 0:
-    celery_app.conf.beat_schedule = {
-        'prune-history-audit-table': {
-            'task': 'galaxy.celery.tasks.prune_history_audit_table',
-            'schedule': prune_interval,
-        },
+    beat_schedule['prune-history-audit-table'] = {
+        'task': 'galaxy.celery.tasks.prune_history_audit_table',
+        'schedule': prune_interval,
+    }
+reconcile_interval = get_disk_usage_reconcile_interval()
+if reconcile_interval > 0:
+    beat_schedule['reconcile-user-disk-usage'] = {
+        'task': 'galaxy.celery.tasks.reconcile_user_disk_usage',
+        'schedule': reconcile_interval,
     }
+if beat_schedule:
+    celery_app.conf.beat_schedule = beat_schedule
 celery_app.conf.timezone = 'UTC'
 
 
@@ -56,6 +56,19 @@ def set_metadata(hda_manager: HDAManager, ldda_manager: LDDAManager, dataset_id,
     dataset.datatype.set_meta(dataset)
 
 
+@celery_app.task(ignore_result=True)
+@galaxy_task
+def build_dataset_line_index(hda_manager: HDAManager, ldda_manager: LDDAManager, dataset_id, model_class='HistoryDatasetAssociation'):
+    """Build the line index of a large tabular dataset, requests only read existing indexes."""
+    if model_class == 'HistoryDatasetAssociation':
+        dataset = hda_manager.by_id(dataset_id)
+    elif model_class == 'LibraryDatasetDatasetAssociation':
+        dataset = ldda_manager.by_id(dataset_id)
+    timer = ExecutionTimer()
+    if dataset.datatype.get_line_index(dataset, build=True):
+        log.debug(f"Built line index of {model_class} {dataset_id} {timer}")
+
+
 @celery_app.task(ignore_result=True)
 @galaxy_task
 def export_history(
@@ -83,3 +96,14 @@ def prune_history_audit_table(sa_session: scoped_session):
     timer = ExecutionTimer()
     model.HistoryAudit.prune(sa_session)
     log.debug(f"Successfully pruned history_audit table {timer}")
+
+
+@celery_app.task(ignore_result=True)
+@galaxy_task
+def reconcile_user_disk_usage(sa_session: scoped_session):
+    """Recalculate all users' disk usage and correct users whose usage drifted."""
+    timer = ExecutionTimer()
+    drifted = model.User.reconcile_disk_usage(sa_session)
+    for user_id, recorded, calculated in drifted:
+        log.info(f"Corrected disk usage of user {user_id} from {recorded} to {calculated}")
+    log.debug(f"Reconciled user disk usage, {len(drifted)} users corrected {timer}")
@@ -30,6 +30,7 @@ from galaxy.containers import parse_containers_config
 from galaxy.exceptions import ConfigurationError
 from galaxy.model import mapping
 from galaxy.model.database_utils import database_exists
+from galaxy.model.job_metrics import parse_rollup_metrics
 from galaxy.model.tool_shed_install.migrate.check import create_or_verify_database as tsi_create_or_verify_database
 from galaxy.util import (
     ExecutionTimer,
@@ -836,6 +837,10 @@ class GalaxyAppConfiguration(BaseAppConfiguration, CommonConfigurationMixin):
         # Logging configuration with logging.config.configDict:
         # Statistics and profiling with statsd
         self.statsd_host = kwargs.get('statsd_host', '')
+        try:
+            self.job_metric_rollup_metrics = parse_rollup_metrics(self.job_metric_rollups)
+        except ValueError as e:
+            raise ConfigurationError(f"Invalid job_metric_rollups option: {unicodify(e)}")
 
         ie_dirs = self.interactive_environment_plugins_directory
         self.gie_dirs = [d.strip() for d in (ie_dirs.split(",") if ie_dirs else [])]
@@ -1157,8 +1162,12 @@ class ConfiguresGalaxyMixin:
         from galaxy.tool_util.deps import containers
         from galaxy.tool_util.deps.dependencies import AppInfo
         import galaxy.tools.search
+        from galaxy.tools.parameters.dynamic_options import options_table_cache
+        from galaxy.util.template import template_cache
 
         self.citations_manager = CitationsManager(self)
+        template_cache.resize(self.config.tool_template_cache_size)
+        options_table_cache.resize(self.config.tool_dynamic_options_cache_size)
 
         from galaxy.managers.tools import DynamicToolManager
         self.dynamic_tools_manager = DynamicToolManager(self)
@@ -1179,6 +1188,7 @@ class ConfiguresGalaxyMixin:
             involucro_path=self.config.involucro_path,
             involucro_auto_init=self.config.involucro_auto_init,
             mulled_channels=self.config.mulled_channels,
+            container_resolution_cache_ttl=self.config.container_resolution_cache_ttl,
         )
         mulled_resolution_cache = None
         if self.config.mulled_resolution_cache_type:
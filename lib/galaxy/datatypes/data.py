@@ -14,6 +14,7 @@ from markupsafe import escape
 from galaxy import util
 from galaxy.datatypes.metadata import MetadataElement  # import directly to maintain ease of use in Datatype class definitions
 from galaxy.datatypes.sniff import build_sniff_from_prefix
+from galaxy.datatypes.util import tabular_scan
 from galaxy.util import (
     compression_utils,
     FILENAME_VALID_CHARS,
@@ -827,24 +828,10 @@ class Text(Data):
         Count the number of lines of data in dataset,
         skipping all blank lines and comments.
         """
-        CHUNK_SIZE = 2 ** 15  # 32Kb
-        data_lines = 0
-        with compression_utils.get_fileobj(dataset.file_name) as in_file:
-            # FIXME: Potential encoding issue can prevent the ability to iterate over lines
-            # causing set_meta process to fail otherwise OK jobs. A better solution than
-            # a silent try/except is desirable.
-            try:
-                while True:
-                    line = in_file.readline(CHUNK_SIZE)
-                    if not line:
-                        break
-                    line = line.strip()
-                    if line and not line.startswith('#'):
-                        data_lines += 1
-            except UnicodeDecodeError:
-                log.error(f'Unable to count lines in file {dataset.file_name}')
-                data_lines = None
-        return data_lines
+        # FIXME: Potential encoding issue can prevent the ability to iterate over lines
+        # causing set_meta process to fail otherwise OK jobs. A better solution than
+        # a silent None is desirable.
+        return tabular_scan.count_data_lines(dataset.file_name)
 
     def set_peek(self, dataset, line_count=None, is_multi_byte=False, WIDTH=256, skipchars=None, line_wrap=True, **kwd):
         """
@@ -852,7 +839,13 @@ class Text(Data):
         """
         if not dataset.dataset.purged:
             # The file must exist on disk for the get_file_peek() method
-            dataset.peek = get_file_peek(dataset.file_name, WIDTH=WIDTH, skipchars=skipchars, line_wrap=line_wrap)
+            peek = None
+            if WIDTH == tabular_scan.PEEK_WIDTH and not skipchars and not line_wrap:
+                # Reuse the peek computed while setting tabular metadata
+                peek = tabular_scan.cached_peek(dataset.file_name)
+            if peek is None:
+                peek = get_file_peek(dataset.file_name, WIDTH=WIDTH, skipchars=skipchars, line_wrap=line_wrap)
+            dataset.peek = peek
             if line_count is None:
                 # See if line_count is stored in the metadata
                 if dataset.metadata.data_lines:
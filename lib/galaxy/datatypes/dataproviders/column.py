@@ -2,12 +2,27 @@
 Providers that provide lists of lists generally where each line of a source
 is further subdivided into multiple data (e.g. columns from a line).
 """
+import io
+import itertools
+import json
 import logging
+import operator
 import re
 from urllib.parse import unquote_plus
 
+import numpy
+
+from galaxy.util.json import safe_dumps
 from . import line
 
+try:
+    import pyarrow
+    import pyarrow.ipc
+    ARROW_AVAILABLE = True
+except ImportError:
+    pyarrow = None
+    ARROW_AVAILABLE = False
+
 _TODO = """
 move ColumnarDataProvider parsers to more sensible location
 
@@ -15,6 +30,17 @@ TransposedColumnarDataProvider: provides each column as a single array
     - see existing visualizations/dataprovider/basic.ColumnDataProvider
 """
 
+# encodes rows as JSON lines, rows with NaN or Infinity are encoded with safe_dumps
+JSON_LINE_ENCODER = json.JSONEncoder(allow_nan=False)
+NUMERIC_FILTER_OPS = {
+    'lt': operator.lt,
+    'le': operator.le,
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'ge': operator.ge,
+    'gt': operator.gt,
+}
+
 log = logging.getLogger(__name__)
 
 
@@ -247,6 +273,9 @@ class ColumnarDataProvider(line.RegexLineDataProvider):
             # 'gffstrand': # -, +, ?, or '.' for None, etc.
         }
 
+    def provides_data_lines(self):
+        return super().provides_data_lines() and not self.column_filters
+
     def filter(self, line):
         line = super().filter(line)
         if line is None:
@@ -353,3 +382,376 @@ class DictDataProvider(ColumnarDataProvider):
         for column_values in parent_gen:
             map = dict(zip(self.column_names, column_values))
             yield map
+
+
+# ----------------------------------------------------------------------------- block/vectorized providers
+class ColumnBlock:
+    """
+    A block of rows from a columnar source held as one array per column and
+    a mask for each array marking which values are present (not `None`).
+    """
+
+    def __init__(self, columns, masks, count, lengths=None):
+        self.columns = columns
+        self.masks = masks
+        self.count = count
+        # the number of columns of each row when all columns are provided
+        self.lengths = lengths
+
+    def __len__(self):
+        return self.count
+
+    def take(self, selector):
+        """
+        Return a block of the rows selected by the boolean array or slice `selector`.
+        """
+        lengths = self.lengths[selector] if self.lengths is not None else None
+        count = len(range(self.count)[selector]) if isinstance(selector, slice) else int(selector.sum())
+        return ColumnBlock([column[selector] for column in self.columns],
+                           [mask[selector] for mask in self.masks], count, lengths=lengths)
+
+    def column(self, index):
+        """
+        Return the array and mask of column `index` (an index into the provided
+        columns) or `None, None` if there is no such column.
+        """
+        try:
+            return self.columns[index], self.masks[index]
+        except IndexError:
+            return None, None
+
+    def column_values(self, index):
+        """
+        Return the values of column `index` as a list with `None` for missing values.
+        """
+        values = self.columns[index].tolist()
+        mask = self.masks[index]
+        if not mask.all():
+            for missing in numpy.flatnonzero(~mask).tolist():
+                values[missing] = None
+        return values
+
+    def rows(self):
+        """
+        Return the rows of this block as lists of values.
+        """
+        if not self.columns:
+            return [[] for _ in range(len(self))]
+        rows = [list(row) for row in zip(*(self.column_values(index) for index in range(len(self.columns))))]
+        if self.lengths is not None:
+            rows = [row[:length] for row, length in zip(rows, self.lengths.tolist())]
+        return rows
+
+
+class ColumnBlockDataProvider(ColumnarDataProvider):
+    """
+    Data provider that reads blocks of lines from its source into typed column
+    arrays and applies the filters of a ColumnarDataProvider to whole columns.
+
+    Takes the parameters of ColumnarDataProvider (and provides the same rows)
+    but parses the columns of `block_size` lines at a time, so it's suited to
+    provide many rows. Rows can also be provided as JSON lines
+    (`json_lines`) or as an Arrow IPC stream (`arrow_ipc`, requires pyarrow).
+    """
+    settings = {
+        'block_size': 'int',
+    }
+    DEFAULT_BLOCK_SIZE = 10000
+    # column types whose default parsers numpy can apply to whole columns
+    NUMERIC_DTYPES = {
+        'int': (int, numpy.int64),
+        'float': (float, numpy.float64),
+    }
+
+    def __init__(self, source, block_size=DEFAULT_BLOCK_SIZE, **kwargs):
+        """
+        :param block_size: the number of lines to read and parse at a time.
+            Optional: defaults to 10000.
+        :type block_size: int
+
+        .. seealso:: ColumnarDataProvider
+        """
+        super().__init__(source, **kwargs)
+        self.block_size = max(block_size or self.DEFAULT_BLOCK_SIZE, 1)
+
+    def __iter__(self):
+        for block in self.iter_blocks():
+            yield from block.rows()
+
+    def iter_blocks(self):
+        """
+        Iterate over blocks (ColumnBlock) of the rows passing all filters,
+        honoring `offset` and `limit`.
+        """
+        if self.limit is not None and self.limit <= 0:
+            return
+        self.seek_to_offset()
+        with self:
+            source = iter(self.source)
+            while True:
+                lines = list(itertools.islice(source, self.block_size))
+                if not lines:
+                    break
+                self.num_data_read += len(lines)
+                block = self.filter_block(self.parse_block(self.filter_lines(lines)))
+                num_valid = len(block)
+                if not num_valid:
+                    continue
+                # skip the rows before offset
+                skip = max(self.offset - self.num_valid_data_read, 0)
+                self.num_valid_data_read += num_valid
+                if skip >= num_valid:
+                    continue
+                end = num_valid
+                if self.limit is not None:
+                    end = min(end, skip + self.limit - self.num_data_returned)
+                if skip or end < num_valid:
+                    block = block.take(slice(skip, end))
+                self.num_data_returned += len(block)
+                yield block
+                if self.limit is not None and self.num_data_returned >= self.limit:
+                    break
+
+    def filter_lines(self, lines):
+        """
+        Return the lines that pass the line filters of FilteredLineDataProvider
+        and RegexLineDataProvider (stripped as they would be).
+        """
+        if self.strip_lines:
+            lines = [line.strip() for line in lines]
+        elif self.strip_newlines:
+            lines = [line.strip('\n') for line in lines]
+        if not self.provide_blank:
+            lines = [line for line in lines if line != '']
+        if self.comment_char:
+            lines = [line for line in lines if not line.startswith(self.comment_char)]
+        if self.filter_fn:
+            lines = [line for line in map(self.filter_fn, lines) if line is not None]
+        if self.compiled_regex_list:
+            lines = [line for line in lines if self.filter_by_regex(line) is not None]
+        return lines
+
+    def parse_block(self, lines):
+        """
+        Split `lines` into the selected columns and parse each column.
+        """
+        rows = [line.split(self.deliminator) for line in lines]
+        lengths = numpy.fromiter(map(len, rows), dtype=numpy.int64, count=len(rows))
+        shortest = int(lengths.min()) if len(rows) else 0
+        selected_indeces = self.selected_column_indeces
+        if not selected_indeces:
+            selected_indeces = range(int(lengths.max()) if len(rows) else 0)
+        else:
+            lengths = None
+        columns = []
+        masks = []
+        for parser_index, column_index in enumerate(selected_indeces):
+            complete = -shortest <= column_index < shortest
+            if complete:
+                raw = list(map(operator.itemgetter(column_index), rows))
+            else:
+                raw = [row[column_index] if -len(row) <= column_index < len(row) else None for row in rows]
+            column, mask = self.parse_column(raw, self.get_column_type(parser_index), complete=complete)
+            columns.append(column)
+            masks.append(mask)
+        return ColumnBlock(columns, masks, len(rows), lengths=lengths)
+
+    def parse_column(self, values, column_type, complete=False):
+        """
+        Parse a list of column values (`None` where a row has no such column,
+        `complete` if no row lacks it) as `column_type`.
+
+        :returns: an array of the parsed values and a boolean array marking the
+            values that are present and could be parsed.
+        """
+        count = len(values)
+        parser = self.parsers.get(column_type)
+        default_parser, dtype = self.NUMERIC_DTYPES.get(column_type, (None, None))
+        if parser is not None and parser is default_parser:
+            try:
+                if complete:
+                    return numpy.fromiter(map(parser, values), dtype, count), numpy.ones(count, dtype=bool)
+                mask = numpy.fromiter((value is not None for value in values), bool, count)
+                column = numpy.zeros(count, dtype=dtype)
+                present = [value for value in values if value is not None]
+                column[mask] = numpy.fromiter(map(parser, present), dtype, len(present))
+                return column, mask
+            except (ValueError, OverflowError):
+                # parse the column value by value, unparsable values are None (as in parse_value)
+                pass
+        if column_type not in (None, 'str') and parser is not None:
+            values = [self.parse_value(value, column_type) if value is not None else None for value in values]
+            complete = False
+        column = numpy.empty(count, dtype=object)
+        column[:] = values
+        if complete:
+            return column, numpy.ones(count, dtype=bool)
+        return column, numpy.fromiter((value is not None for value in values), bool, count)
+
+    def filter_block(self, block):
+        """
+        Return the block of rows that pass all column filters.
+        """
+        if not self.column_filters or not len(block):
+            return block
+        selected = numpy.ones(len(block), dtype=bool)
+        for filter_fn in self.column_filters:
+            selected &= filter_fn(block)
+        return block if selected.all() else block.take(selected)
+
+    # filters are passed a ColumnBlock and return a boolean array of the rows passing
+    def create_numeric_filter(self, column, op, val):
+        """
+        Return a filter function comparing the column at index `column`
+        against `val` using the given op (lt, le, eq, ne, ge or gt).
+
+        .. seealso:: ColumnarDataProvider.create_numeric_filter
+        """
+        try:
+            val = float(val)
+        except ValueError:
+            return None
+        compare = NUMERIC_FILTER_OPS.get(op)
+        if compare is None:
+            return None
+
+        def numeric_filter(block):
+            selected = numpy.zeros(len(block), dtype=bool)
+            values, mask = block.column(column)
+            if values is not None and mask.any():
+                selected[mask] = compare(values[mask], val)
+            return selected
+        return numeric_filter
+
+    def create_string_filter(self, column, op, val):
+        """
+        Return a filter function matching the column at index `column` against
+        `val` using the given op (eq, has or re).
+
+        .. seealso:: ColumnarDataProvider.create_string_filter
+        """
+        if 'eq' == op:
+            return self._create_value_filter(column, lambda value: value == val)
+        elif 'has' == op:
+            return self._create_value_filter(column, lambda value: val in value)
+        elif 're' == op:
+            regex = re.compile(unquote_plus(val))
+            return self._create_value_filter(column, lambda value: regex.match(value) is not None)
+        return None
+
+    def create_list_filter(self, column, op, val):
+        """
+        Return a filter function matching the column at index `column` against
+        `val` using the given op (eq or has).
+
+        .. seealso:: ColumnarDataProvider.create_list_filter
+        """
+        if 'eq' == op:
+            val = self.parse_value(val, 'list')
+            return self._create_value_filter(column, lambda value: value == val)
+        elif 'has' == op:
+            return self._create_value_filter(column, lambda value: val in value)
+        return None
+
+    def _create_value_filter(self, column, predicate):
+        def value_filter(block):
+            selected = numpy.zeros(len(block), dtype=bool)
+            values, mask = block.column(column)
+            if values is not None:
+                for index in numpy.flatnonzero(mask).tolist():
+                    selected[index] = predicate(values[index])
+            return selected
+        return value_filter
+
+    def format_rows(self, block):
+        """
+        Return the rows of `block` as they are provided.
+        """
+        return block.rows()
+
+    def json_lines(self):
+        """
+        Iterate over the provided rows as JSON lines, one string per block.
+        """
+        for block in self.iter_blocks():
+            yield ''.join(f'{_json_line(row)}\n' for row in self.format_rows(block))
+
+    def arrow_column_names(self, column_count):
+        """
+        Return the names of the columns in the Arrow stream (c1, c2, ...).
+        """
+        indeces = self.selected_column_indeces or range(column_count)
+        return [f'c{index + 1}' for index in indeces]
+
+    def arrow_ipc(self):
+        """
+        Iterate over the provided rows as an Arrow IPC stream (one record batch
+        per block), yielding bytes.
+
+        :raises NotImplementedError: if pyarrow is not installed
+        """
+        if pyarrow is None:
+            raise NotImplementedError('Providing data as Arrow IPC stream requires the pyarrow package')
+        arrow_types = {
+            'int': pyarrow.int64(),
+            'float': pyarrow.float64(),
+            'bool': pyarrow.bool_(),
+        }
+        sink = io.BytesIO()
+        writer = None
+        for block in self.iter_blocks():
+            if writer is None:
+                column_count = len(block.columns)
+                names = self.arrow_column_names(column_count)
+                types = [arrow_types.get(self.get_column_type(index), pyarrow.string()) if self.parsers else pyarrow.string()
+                         for index in range(column_count)]
+                schema = pyarrow.schema(list(zip(names, types)))
+                writer = pyarrow.ipc.new_stream(sink, schema)
+            arrays = []
+            for index, arrow_type in enumerate(schema.types):
+                values = block.column_values(index) if index < len(block.columns) else [None] * len(block)
+                if arrow_type == pyarrow.string():
+                    values = [value if value is None else str(value) for value in values]
+                arrays.append(pyarrow.array(values, type=arrow_type))
+            writer.write_batch(pyarrow.record_batch(arrays, schema=schema))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+        if writer is not None:
+            writer.close()
+            yield sink.getvalue()
+
+
+def _json_line(row):
+    try:
+        return JSON_LINE_ENCODER.encode(row)
+    except ValueError:
+        return safe_dumps(row)
+
+
+class DictBlockDataProvider(ColumnBlockDataProvider):
+    """
+    ColumnBlockDataProvider that zips column_names and columns into a
+    dictionary as DictDataProvider does.
+    """
+    settings = {
+        'column_names': 'list:str',
+    }
+
+    def __init__(self, source, column_names=None, **kwargs):
+        """
+        .. seealso:: DictDataProvider
+        """
+        super().__init__(source, **kwargs)
+        self.column_names = column_names or []
+
+    def __iter__(self):
+        for block in self.iter_blocks():
+            yield from self.format_rows(block)
+
+    def format_rows(self, block):
+        return [dict(zip(self.column_names, row)) for row in block.rows()]
+
+    def arrow_column_names(self, column_count):
+        names = list(self.column_names[:column_count])
+        return names + super().arrow_column_names(column_count)[len(names):]
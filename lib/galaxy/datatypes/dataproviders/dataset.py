@@ -13,6 +13,7 @@ from bx import (
     wiggle as bx_wig
 )
 
+from galaxy.datatypes.util import line_index
 from galaxy.util import sqlite
 from . import (
     base,
@@ -55,6 +56,26 @@ class DatasetDataProvider(base.DataProvider):
         mode = 'rb' if dataset.datatype.is_binary else 'r'
         super().__init__(open(dataset.file_name, mode))
 
+    def seek_data_line(self, data_line_number):
+        """
+        Seek the dataset file to the closest line before its
+        `data_line_number`-th data line (lines that are neither blank nor
+        comments) known to the dataset's line index (see
+        TabularData.get_line_index), if the dataset has been indexed.
+
+        :returns: the number of lines and data lines skipped
+        """
+        get_line_index = getattr(self.dataset.datatype, 'get_line_index', None)
+        if get_line_index is None or self.dataset.datatype.is_binary or data_line_number < line_index.LINE_INDEX_INTERVAL:
+            return 0, 0
+        index = get_line_index(self.dataset)
+        if index is None or index.compressed:
+            # offsets are offsets into the uncompressed file
+            return 0, 0
+        line_number, data_line_number, offset = index.checkpoint_for_data_line(data_line_number)
+        self.source.seek(offset)
+        return line_number, data_line_number
+
     # TODO: this is a bit of a mess
     @classmethod
     def get_column_metadata_from_dataset(cls, dataset):
@@ -198,9 +219,7 @@ class DatasetColumnarDataProvider(column.ColumnarDataProvider):
         any metadata available.
         """
         dataset_source = DatasetDataProvider(dataset)
-        if not kwargs.get('column_types', None):
-            indeces = kwargs.get('indeces', None)
-            kwargs['column_types'] = dataset_source.get_metadata_column_types(indeces=indeces)
+        _set_column_settings_from_metadata(dataset_source, kwargs)
         super().__init__(dataset_source, **kwargs)
 
 
@@ -231,31 +250,63 @@ class DatasetDictDataProvider(column.DictDataProvider):
         +=================+-------------------------------+-----------------------+
         """
         dataset_source = DatasetDataProvider(dataset)
+        _set_dict_settings_from_metadata(dataset_source, kwargs)
+        super().__init__(dataset_source, **kwargs)
 
-        # TODO: getting too complicated - simplify at some lvl, somehow
-        # if no column_types given, get column_types from indeces (or all if indeces == None)
-        indeces = kwargs.get('indeces', None)
-        column_names = kwargs.get('column_names', None)
 
-        if not indeces and column_names:
-            # pull columns by name
-            indeces = kwargs['indeces'] = dataset_source.get_indeces_by_column_names(column_names)
+class DatasetColumnBlockDataProvider(column.ColumnBlockDataProvider):
+    """
+    ColumnBlockDataProvider using a DatasetDataProvider as its source and the
+    dataset's metadata for column_types (as DatasetColumnarDataProvider).
+    """
 
-        elif indeces and not column_names:
-            # pull using indeces, name with meta
-            column_names = kwargs['column_names'] = dataset_source.get_metadata_column_names(indeces=indeces)
+    def __init__(self, dataset, **kwargs):
+        dataset_source = DatasetDataProvider(dataset)
+        _set_column_settings_from_metadata(dataset_source, kwargs)
+        super().__init__(dataset_source, **kwargs)
 
-        elif not indeces and not column_names:
-            # pull all indeces and name using metadata
-            column_names = kwargs['column_names'] = dataset_source.get_metadata_column_names(indeces=indeces)
 
-        # if no column_types given, use metadata column_types
-        if not kwargs.get('column_types', None):
-            kwargs['column_types'] = dataset_source.get_metadata_column_types(indeces=indeces)
+class DatasetDictBlockDataProvider(column.DictBlockDataProvider):
+    """
+    DictBlockDataProvider using a DatasetDataProvider as its source and the
+    dataset's metadata for column_types and column_names (as
+    DatasetDictDataProvider).
+    """
 
+    def __init__(self, dataset, **kwargs):
+        dataset_source = DatasetDataProvider(dataset)
+        _set_dict_settings_from_metadata(dataset_source, kwargs)
         super().__init__(dataset_source, **kwargs)
 
 
+def _set_column_settings_from_metadata(dataset_source, kwargs):
+    # if no column_types given, use metadata column_types
+    if not kwargs.get('column_types', None):
+        indeces = kwargs.get('indeces', None)
+        kwargs['column_types'] = dataset_source.get_metadata_column_types(indeces=indeces)
+
+
+def _set_dict_settings_from_metadata(dataset_source, kwargs):
+    # TODO: getting too complicated - simplify at some lvl, somehow
+    # if no column_types given, get column_types from indeces (or all if indeces == None)
+    indeces = kwargs.get('indeces', None)
+    column_names = kwargs.get('column_names', None)
+
+    if not indeces and column_names:
+        # pull columns by name
+        indeces = kwargs['indeces'] = dataset_source.get_indeces_by_column_names(column_names)
+
+    elif indeces and not column_names:
+        # pull using indeces, name with meta
+        column_names = kwargs['column_names'] = dataset_source.get_metadata_column_names(indeces=indeces)
+
+    elif not indeces and not column_names:
+        # pull all indeces and name using metadata
+        column_names = kwargs['column_names'] = dataset_source.get_metadata_column_names(indeces=indeces)
+
+    _set_column_settings_from_metadata(dataset_source, kwargs)
+
+
 # ----------------------------------------------------------------------------- provides a bio-relevant datum
 class GenomicRegionDataProvider(column.ColumnarDataProvider):
     """
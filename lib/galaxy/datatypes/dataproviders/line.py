@@ -10,9 +10,6 @@ from . import base
 log = logging.getLogger(__name__)
 
 _TODO = """
-line offsets (skip to some place in a file) needs to work more efficiently than simply iterating till we're there
-    capture tell() when provider is done
-        def stop( self ): self.endpoint = source.tell(); raise StopIteration()
 a lot of the hierarchy here could be flattened since we're implementing pipes
 """
 
@@ -59,6 +56,33 @@ class FilteredLineDataProvider(base.LimitedOffsetDataProvider):
         self.provide_blank = provide_blank
         self.comment_char = comment_char
 
+    def __iter__(self):
+        self.seek_to_offset()
+        yield from super().__iter__()
+
+    def provides_data_lines(self):
+        """
+        Are the valid data of this provider the data lines of its source (the
+        lines that are neither blank nor comments), as counted by line indexes?
+        """
+        return (self.strip_lines and not self.provide_blank
+                and self.comment_char == self.DEFAULT_COMMENT_CHAR and self.filter_fn is None)
+
+    def seek_to_offset(self):
+        """
+        Skip the data lines before `offset` using the line index of the
+        source, if the source can seek to data lines (as DatasetDataProvider)
+        and `provides_data_lines`.
+        """
+        if not self.offset or self.num_data_read or not self.provides_data_lines():
+            return
+        # look up the class attribute - providers pass attributes of their sources through
+        if getattr(type(self.source), 'seek_data_line', None) is None:
+            return
+        lines, data_lines = self.source.seek_data_line(self.offset)
+        self.num_data_read += lines
+        self.num_valid_data_read += data_lines
+
     def filter(self, line):
         """
         Determines whether to provide line or not.
@@ -113,6 +137,9 @@ class RegexLineDataProvider(FilteredLineDataProvider):
         self.invert = invert
         # NOTE: no support for flags
 
+    def provides_data_lines(self):
+        return super().provides_data_lines() and not self.compiled_regex_list
+
     def filter(self, line):
         # NOTE: filter_fn will occur BEFORE any matching
         line = super().filter(line)
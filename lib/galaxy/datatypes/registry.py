@@ -5,6 +5,7 @@ Provides mapping between extensions and datatypes, mime-types, etc.
 import imp
 import logging
 import os
+from inspect import isclass
 from string import Template
 from typing import Dict
 
@@ -21,6 +22,7 @@ from . import (
     interval,
     qualityscore,
     sequence,
+    sniff,
     tabular,
     text,
     tracks,
@@ -51,6 +53,7 @@ class Registry:
         self.available_tracks = []
         self.set_external_metadata_tool = None
         self.sniff_order = []
+        self._sniff_dispatcher = None
         self.upload_file_formats = []
         # Datatype elements defined in local datatypes_conf.xml that contain display applications.
         self.display_app_containers = []
@@ -77,6 +80,7 @@ class Registry:
         self._edam_formats_mapping = None
         self._edam_data_mapping = None
         self._converters_by_datatype = {}
+        self._conversion_destinations = {}
         # Build sites
         self.build_sites = {}
         self.display_sites = {}
@@ -647,6 +651,9 @@ class Registry:
                     self.log.exception(f"Error deactivating converter from ({converter_path})")
                 else:
                     self.log.exception(f"Error loading converter ({converter_path})")
+        # Converters changed, reachability computed with the previous converters is stale
+        self._converters_by_datatype = {}
+        self._conversion_destinations = {}
 
     def load_display_applications(self, app, installed_repository_dict=None, deactivate=False):
         """
@@ -898,6 +905,11 @@ class Registry:
             ext = dataset_or_ext
             dataset = None
 
+        if converter_safe:
+            direct_match, converted_ext = self.get_conversion_destination(ext, accepted_formats)
+            converted_dataset = converted_ext and dataset and dataset.get_converted_files_by_type(converted_ext) or None
+            return direct_match, converted_ext, converted_dataset
+
         if self.get_datatype_by_extension(ext) is not None and self.get_datatype_by_extension(ext).matches_any(accepted_formats):
             return True, None, None
 
@@ -906,16 +918,37 @@ class Registry:
             if convert_ext_datatype is None:
                 self.log.warning(f"Datatype class not found for extension '{convert_ext}', which is used as target for conversion from datatype '{dataset.ext}'")
             elif convert_ext_datatype.matches_any(accepted_formats):
+                # Only conversions that have already been run are acceptable
                 converted_dataset = dataset and dataset.get_converted_files_by_type(convert_ext)
                 if converted_dataset:
-                    ret_data = converted_dataset
-                elif not converter_safe:
-                    continue
-                else:
-                    ret_data = None
-                return False, convert_ext, ret_data
+                    return False, convert_ext, converted_dataset
         return False, None, None
 
+    def get_conversion_destination(self, ext, accepted_formats):
+        """
+        Return ``(direct_match, converted_ext)`` for datasets of extension
+        ``ext`` and a parameter accepting ``accepted_formats``, i.e. whether
+        such datasets match directly or the extension they can be implicitly
+        converted to (None if they can't). Results are cached per extension
+        and set of accepted datatype classes.
+        """
+        key = (ext, frozenset(datatype if isclass(datatype) else datatype.__class__ for datatype in accepted_formats))
+        if key not in self._conversion_destinations:
+            destination = (False, None)
+            datatype = self.get_datatype_by_extension(ext)
+            if datatype is not None and datatype.matches_any(accepted_formats):
+                destination = (True, None)
+            else:
+                for convert_ext in self.get_converters_by_datatype(ext):
+                    convert_ext_datatype = self.get_datatype_by_extension(convert_ext)
+                    if convert_ext_datatype is None:
+                        self.log.warning(f"Datatype class not found for extension '{convert_ext}', which is used as target for conversion from datatype '{ext}'")
+                    elif convert_ext_datatype.matches_any(accepted_formats):
+                        destination = (False, convert_ext)
+                        break
+            self._conversion_destinations[key] = destination
+        return self._conversion_destinations[key]
+
     def get_composite_extensions(self):
         return [ext for (ext, d_type) in self.datatypes_by_extension.items() if d_type.composite_type is not None]
 
@@ -951,6 +984,17 @@ class Registry:
             self._edam_data_mapping = {k: v.edam_data for k, v in self.datatypes_by_extension.items()}
         return self._edam_data_mapping
 
+    @property
+    def sniff_dispatcher(self):
+        """
+        Return a :class:`galaxy.datatypes.sniff.SniffDispatcher` for the
+        current sniff order, recompiled if the sniff order changed.
+        """
+        dispatcher = self._sniff_dispatcher
+        if dispatcher is None or dispatcher.sniff_order != self.sniff_order:
+            dispatcher = self._sniff_dispatcher = sniff.SniffDispatcher(self.sniff_order)
+        return dispatcher
+
     def to_xml_file(self, path):
         if not self._registry_xml_string:
             registry_string_template = Template("""<?xml version="1.0"?>
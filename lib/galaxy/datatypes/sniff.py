@@ -7,6 +7,7 @@ import codecs
 import gzip
 import io
 import logging
+import multiprocessing
 import os
 import re
 import shutil
@@ -15,6 +16,7 @@ import sys
 import tempfile
 import urllib.request
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
 
 from galaxy import util
 from galaxy.util import compression_utils
@@ -30,6 +32,8 @@ from galaxy.util.checkers import (
 log = logging.getLogger(__name__)
 
 SNIFF_PREFIX_BYTES = int(os.environ.get("GALAXY_SNIFF_PREFIX_BYTES", None) or 2 ** 20)
+# Number of files sent to a sniffing worker process at once by guess_ext_batch
+SNIFF_BATCH_CHUNK_SIZE = 16
 
 
 def get_test_fname(fname):
@@ -258,6 +262,9 @@ def guess_ext(fname, sniff_order, is_binary=False):
     Returns an extension that can be used in the datatype factory to
     generate a data for the 'fname' file
 
+    ``sniff_order`` may also be a :class:`SniffDispatcher`, e.g. the
+    registry's ``sniff_dispatcher``.
+
     >>> from galaxy.datatypes.registry import example_datatype_registry_for_sample
     >>> datatypes_registry = example_datatype_registry_for_sample()
     >>> sniff_order = datatypes_registry.sniff_order
@@ -489,8 +496,54 @@ def guess_ext(fname, sniff_order, is_binary=False):
     return 'txt'  # default text data type file extension
 
 
+def guess_ext_batch(fnames, sniff_order, is_binary=False, processes=None):
+    """
+    Return the extensions guessed by :func:`guess_ext` for all ``fnames``.
+
+    ``is_binary`` may be a single value applying to all files or a list with
+    a value per file. Files are sniffed in a pool of ``processes`` worker
+    processes (defaults to the number of CPUs), or in this process if
+    ``processes`` is 1 or there is only a single file.
+    """
+    fnames = list(fnames)
+    if isinstance(is_binary, (list, tuple)):
+        assert len(is_binary) == len(fnames), "is_binary must have a value per file"
+        binaries = is_binary
+    else:
+        binaries = [is_binary] * len(fnames)
+    dispatcher = sniff_order if isinstance(sniff_order, SniffDispatcher) else SniffDispatcher(sniff_order)
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(fnames) < 2:
+        return [guess_ext(fname, dispatcher, file_is_binary) for fname, file_is_binary in zip(fnames, binaries)]
+    processes = min(processes, len(fnames))
+    # Forked workers inherit the dispatcher, other start methods have to pickle it once per worker
+    start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context(start_method),
+        initializer=_init_sniff_worker,
+        initargs=(dispatcher,),
+    ) as executor:
+        return list(executor.map(_sniff_worker_guess_ext, fnames, binaries, chunksize=SNIFF_BATCH_CHUNK_SIZE))
+
+
+_worker_sniff_dispatcher = None
+
+
+def _init_sniff_worker(dispatcher):
+    global _worker_sniff_dispatcher
+    _worker_sniff_dispatcher = dispatcher
+
+
+def _sniff_worker_guess_ext(fname, is_binary):
+    return guess_ext(fname, _worker_sniff_dispatcher, is_binary)
+
+
 def run_sniffers_raw(filename_or_file_prefix, sniff_order, is_binary=False):
     """Run through sniffers specified by sniff_order, return None of None match.
+
+    ``sniff_order`` may be a list of datatypes or a :class:`SniffDispatcher`
+    compiled from one, the latter should be used when sniffing many files.
     """
     if isinstance(filename_or_file_prefix, FilePrefix):
         fname = filename_or_file_prefix.filename
@@ -499,40 +552,76 @@ def run_sniffers_raw(filename_or_file_prefix, sniff_order, is_binary=False):
         fname = filename_or_file_prefix
         file_prefix = FilePrefix(filename_or_file_prefix)
 
-    file_ext = None
-    for datatype in sniff_order:
+    if not isinstance(sniff_order, SniffDispatcher):
+        sniff_order = SniffDispatcher(sniff_order)
+    for datatype, use_prefix in sniff_order.candidates(file_prefix.compressed_format, is_binary):
+        try:
+            if use_prefix:
+                if datatype.sniff_prefix(file_prefix):
+                    return datatype.file_ext
+            elif datatype.sniff(fname):
+                return datatype.file_ext
+        except Exception:
+            pass
+
+    return None
+
+
+class SniffDispatcher:
+    """
+    Sniff order compiled into the sniffers to run for each kind of file.
+
+    Which sniffers in a sniff order can match a file only depends on the
+    compression format detected from the file's magic bytes and on whether
+    the file is known to be binary. Rather than checking this for every
+    datatype and every file, the candidate sniffers are computed once per
+    kind of file and reused for all files of that kind.
+    """
+
+    def __init__(self, sniff_order):
+        self.sniff_order = list(sniff_order)
+        self._candidates = {}
+
+    def candidates(self, compressed_format, is_binary=False):
         """
-        Some classes may not have a sniff function, which is ok.  In fact,
-        Binary, Data, Tabular and Text are examples of classes that should never
-        have a sniff function. Since these classes are default classes, they contain
-        few rules to filter out data of other formats, so they should be called
-        from this function after all other datatypes in sniff_order have not been
-        successfully discovered.
+        Return ``(datatype, use_prefix)`` pairs in sniff order for the sniffers
+        that can match a file of this kind, ``use_prefix`` is set if the
+        datatype should be sniffed with ``sniff_prefix``.
         """
-        try:
+        key = (compressed_format, bool(is_binary))
+        candidates = self._candidates.get(key)
+        if candidates is None:
+            candidates = self._candidates[key] = self._compile(compressed_format, bool(is_binary))
+        return candidates
+
+    def _compile(self, compressed_format, is_binary):
+        candidates = []
+        for datatype in self.sniff_order:
+            """
+            Some classes may not have a sniff function, which is ok.  In fact,
+            Binary, Data, Tabular and Text are examples of classes that should never
+            have a sniff function. Since these classes are default classes, they contain
+            few rules to filter out data of other formats, so they should be called
+            from this function after all other datatypes in sniff_order have not been
+            successfully discovered.
+            """
             if hasattr(datatype, "sniff_prefix"):
                 datatype_compressed = getattr(datatype, "compressed", False)
-                if datatype_compressed and not file_prefix.compressed_format:
+                if datatype_compressed and not compressed_format:
                     continue
-                if not datatype_compressed and file_prefix.compressed_format:
+                if not datatype_compressed and compressed_format:
                     continue
-                if file_prefix.compressed_format and getattr(datatype, "compressed_format", None):
+                if compressed_format and getattr(datatype, "compressed_format", None):
                     # In this case go a step further and compare the compressed format detected
                     # to the expected.
-                    if file_prefix.compressed_format != datatype.compressed_format:
+                    if compressed_format != datatype.compressed_format:
                         continue
-                if datatype.sniff_prefix(file_prefix):
-                    file_ext = datatype.file_ext
-                    break
-            elif is_binary and not datatype.is_binary:
+                candidates.append((datatype, True))
+            elif is_binary and not getattr(datatype, "is_binary", False):
                 continue
-            elif datatype.sniff(fname):
-                file_ext = datatype.file_ext
-                break
-        except Exception:
-            pass
-
-    return file_ext
+            elif hasattr(datatype, "sniff"):
+                candidates.append((datatype, False))
+        return candidates
 
 
 def zip_single_fileobj(path):
@@ -764,7 +853,7 @@ def handle_uploaded_dataset_file_internal(
         is_binary = check_binary(converted_path)
         guessed_ext = ext
         if ext in AUTO_DETECT_EXTENSIONS:
-            guessed_ext = guess_ext(converted_path, sniff_order=datatypes_registry.sniff_order, is_binary=is_binary)
+            guessed_ext = guess_ext(converted_path, sniff_order=datatypes_registry.sniff_dispatcher, is_binary=is_binary)
             guessed_datatype = datatypes_registry.get_datatype_by_extension(guessed_ext)
             if not is_binary and guessed_datatype.is_binary:
                 # It's possible to have a datatype that is binary but not within the first 1024 bytes,
@@ -783,7 +872,7 @@ def handle_uploaded_dataset_file_internal(
                     os.unlink(converted_path)
                 converted_path = _converted_path
             if ext in AUTO_DETECT_EXTENSIONS:
-                ext = guess_ext(converted_path, sniff_order=datatypes_registry.sniff_order, is_binary=is_binary)
+                ext = guess_ext(converted_path, sniff_order=datatypes_registry.sniff_dispatcher, is_binary=is_binary)
         else:
             ext = guessed_ext
 
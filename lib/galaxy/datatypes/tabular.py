@@ -15,6 +15,7 @@ from json import dumps
 
 import pysam
 from markupsafe import escape
+from sqlalchemy.orm import object_session
 
 from galaxy import util
 from galaxy.datatypes import binary, data, metadata
@@ -25,6 +26,10 @@ from galaxy.datatypes.sniff import (
     iter_headers,
     validate_tabular,
 )
+from galaxy.datatypes.util import (
+    line_index,
+    tabular_scan,
+)
 from galaxy.util import compression_utils
 from . import dataproviders
 
@@ -47,6 +52,9 @@ class TabularData(data.Text):
     MetadataElement(name="column_types", default=[], desc="Column types", param=metadata.ColumnTypesParameter, readonly=True, visible=False, no_value=[])
     MetadataElement(name="column_names", default=[], desc="Column names", readonly=True, visible=False, optional=True, no_value=[])
     MetadataElement(name="delimiter", default='\t', desc="Data delimiter", readonly=True, visible=False, optional=True, no_value=[])
+    # Built in the background once the dataset is created (see galaxy.celery.tasks.build_dataset_line_index),
+    # not when setting metadata
+    MetadataElement(name="line_index", desc="Line offset index", param=metadata.FileParameter, file_ext="json", readonly=True, visible=False, optional=True, no_value=None, lazy=True)
 
     @abc.abstractmethod
     def set_meta(self, dataset, **kwd):
@@ -66,17 +74,85 @@ class TabularData(data.Text):
         except Exception:
             return False
 
+    def needs_line_index(self, dataset):
+        """
+        Return whether the dataset is large enough for a line index to be
+        built (see ``get_line_index``).
+        """
+        try:
+            return os.path.getsize(dataset.file_name) >= line_index.LINE_INDEX_MIN_SIZE
+        except OSError:
+            return False
+
+    def get_line_index(self, dataset, build=False):
+        """
+        Return the LineIndex of the dataset stored in its ``line_index``
+        metadata file. If there is none (or it's outdated) and ``build`` is
+        set, the index is built and stored first - this reads the whole
+        dataset, so it is only meant to be done in the background.
+
+        Returns None for datasets smaller than ``LINE_INDEX_MIN_SIZE`` and if
+        the index can't be stored. Indexes aren't built for gzip compressed
+        datasets compressed as a single member, there's no seek point to
+        start reading them from other than their start.
+        """
+        try:
+            size = os.path.getsize(dataset.file_name)
+        except OSError:
+            return None
+        if size < line_index.LINE_INDEX_MIN_SIZE:
+            return None
+        index_file = dataset.metadata.line_index
+        if index_file:
+            try:
+                index = line_index.LineIndex.load(index_file.file_name)
+                if index.size == size:
+                    return index
+            except Exception:
+                log.exception("Failed to load line index of dataset [%s]", dataset.id)
+        object_store = getattr(dataset.dataset, 'object_store', None)
+        if not build or object_store is None:
+            return None
+        try:
+            if compression_utils.is_gzip(dataset.file_name) and not line_index.is_multi_member_gzip(dataset.file_name):
+                return None
+            index = line_index.build_line_index(dataset.file_name)
+        except Exception:
+            log.exception("Failed to build line index of dataset [%s]", dataset.id)
+            return None
+        if not index_file:
+            index_file = dataset.metadata.spec['line_index'].param.new_file(dataset=dataset)
+        with tempfile.NamedTemporaryFile(mode='w', prefix='line_index_', delete=False) as f:
+            f.write(dumps(index.to_dict()))
+        try:
+            object_store.update_from_file(index_file,
+                                          file_name=f.name,
+                                          extra_dir='_metadata_files',
+                                          extra_dir_at_root=True,
+                                          alt_name=os.path.basename(index_file.file_name))
+        finally:
+            os.unlink(f.name)
+        dataset.metadata.line_index = index_file
+        sa_session = object_session(dataset)
+        if sa_session:
+            sa_session.flush()
+        return index
+
     def get_chunk(self, trans, dataset, offset=0, ck_size=None):
-        with compression_utils.get_fileobj(dataset.file_name) as f:
-            f.seek(offset)
+        offset = int(offset)
+        index = None
+        if offset and compression_utils.is_gzip(dataset.file_name):
+            # Uncompressed datasets can seek to any offset without an index,
+            # compressed ones are read from the start until their index is built
+            index = self.get_line_index(dataset)
+        with line_index.open_at_offset(dataset.file_name, offset, index) as f:
             ck_data = f.read(ck_size or trans.app.config.display_chunk_size)
-            if ck_data and ck_data[-1] != '\n':
-                cursor = f.read(1)
-                while cursor and cursor != '\n':
-                    ck_data += cursor
-                    cursor = f.read(1)
-            last_read = f.tell()
-        return dumps({'ck_data': util.unicodify(ck_data),
+            if ck_data and ck_data[-1:] != b'\n':
+                ck_data += f.readline()
+        last_read = offset + len(ck_data)
+        # Offsets are byte offsets, but chunks have universal newlines as when reading in text mode
+        ck_data = util.unicodify(ck_data).replace('\r\n', '\n').replace('\r', '\n')
+        return dumps({'ck_data': ck_data,
                       'offset': last_read,
                       'data_line_offset': self.data_line_offset,
                       })
@@ -256,6 +332,19 @@ class TabularData(data.Text):
         delimiter = dataset.metadata.delimiter
         return dataproviders.dataset.DatasetDictDataProvider(dataset, deliminator=delimiter, **settings)
 
+    @dataproviders.decorators.dataprovider_factory('column-block',
+                                                   dataproviders.column.ColumnBlockDataProvider.settings)
+    def column_block_dataprovider(self, dataset, **settings):
+        """Parses blocks of lines into typed columns, column settings default to dataset.metadata"""
+        delimiter = dataset.metadata.delimiter
+        return dataproviders.dataset.DatasetColumnBlockDataProvider(dataset, deliminator=delimiter, **settings)
+
+    @dataproviders.decorators.dataprovider_factory('dict-block', dataproviders.column.DictBlockDataProvider.settings)
+    def dict_block_dataprovider(self, dataset, **settings):
+        """Parses blocks of lines into typed columns, column settings default to dataset.metadata"""
+        delimiter = dataset.metadata.delimiter
+        return dataproviders.dataset.DatasetDictBlockDataProvider(dataset, deliminator=delimiter, **settings)
+
 
 @dataproviders.decorators.has_dataproviders
 class Tabular(TabularData):
@@ -288,121 +377,40 @@ class Tabular(TabularData):
            set_peek() method read the entire file to determine the number of lines in the file.
            Since metadata can now be processed on cluster nodes, we've merged the line count portion
            of the set_peek() processing here, and we now check the entire contents of the file.
+        4. The file is read in a single pass by ``tabular_scan.scan_tabular()``, which also computes the
+           peek that set_peek() reuses.
         """
-        # Store original skip value to check with later
-        requested_skip = skip
-        if skip is None:
-            skip = 0
-        column_type_set_order = ['int', 'float', 'list', 'str']  # Order to set column types in
-        default_column_type = column_type_set_order[-1]  # Default column type is lowest in list
-        column_type_compare_order = list(column_type_set_order)  # Order to compare column types
-        column_type_compare_order.reverse()
-
-        def type_overrules_type(column_type1, column_type2):
-            if column_type1 is None or column_type1 == column_type2:
-                return False
-            if column_type2 is None:
-                return True
-            for column_type in column_type_compare_order:
-                if column_type1 == column_type:
-                    return True
-                if column_type2 == column_type:
-                    return False
-            # neither column type was found in our ordered list, this cannot happen
-            raise ValueError(f"Tried to compare unknown column types: {column_type1} and {column_type2}")
-
-        def is_int(column_text):
-            # Don't allow underscores in numeric literals (PEP 515)
-            if '_' in column_text:
-                return False
-            try:
-                int(column_text)
-                return True
-            except ValueError:
-                return False
-
-        def is_float(column_text):
-            # Don't allow underscores in numeric literals (PEP 515)
-            if '_' in column_text:
-                return False
-            try:
-                float(column_text)
-                return True
-            except ValueError:
-                if column_text.strip().lower() == 'na':
-                    return True  # na is special cased to be a float
-                return False
-
-        def is_list(column_text):
-            return "," in column_text
-
-        def is_str(column_text):
-            # anything, except an empty string, is True
-            if column_text == "":
-                return False
-            return True
-
-        is_column_type = {}  # Dict to store column type string to checking function
-        for column_type in column_type_set_order:
-            is_column_type[column_type] = locals()[f"is_{column_type}"]
-
-        def guess_column_type(column_text):
-            for column_type in column_type_set_order:
-                if is_column_type[column_type](column_text):
-                    return column_type
-            return None
-
         data_lines = 0
         comment_lines = 0
         column_names = None
         column_types = []
-        first_line_column_types = [default_column_type]  # default value is one column of type str
+        first_line_column_types = [tabular_scan.DEFAULT_COLUMN_TYPE]  # default value is one column of type str
         if dataset.has_data():
             # NOTE: if skip > num_check_lines, we won't detect any metadata, and will use default
-            with compression_utils.get_fileobj(dataset.file_name) as dataset_fh:
-                i = 0
-                while True:
-                    line = dataset_fh.readline()
-                    if not line:
-                        break
-                    line = line.rstrip('\r\n')
-                    if i == 0:
-                        column_names = self.get_column_names(first_line=line)
-                    if i < skip or not line or line.startswith('#'):
-                        # We'll call blank lines comments
-                        comment_lines += 1
-                    else:
-                        data_lines += 1
-                        if max_guess_type_data_lines is None or data_lines <= max_guess_type_data_lines:
-                            fields = line.split('\t')
-                            for field_count, field in enumerate(fields):
-                                if field_count >= len(column_types):  # found a previously unknown column, we append None
-                                    column_types.append(None)
-                                column_type = guess_column_type(field)
-                                if type_overrules_type(column_type, column_types[field_count]):
-                                    column_types[field_count] = column_type
-                        if i == 0 and requested_skip is None:
-                            # This is our first line, people seem to like to upload files that have a header line, but do not
-                            # start with '#' (i.e. all column types would then most likely be detected as str).  We will assume
-                            # that the first line is always a header (this was previous behavior - it was always skipped).  When
-                            # the requested skip is None, we only use the data from the first line if we have no other data for
-                            # a column.  This is far from perfect, as
-                            # 1,2,3	1.1	2.2	qwerty
-                            # 0	0		1,2,3
-                            # will be detected as
-                            # "column_types": ["int", "int", "float", "list"]
-                            # instead of
-                            # "column_types": ["list", "float", "float", "str"]  *** would seem to be the 'Truth' by manual
-                            # observation that the first line should be included as data.  The old method would have detected as
-                            # "column_types": ["int", "int", "str", "list"]
-                            first_line_column_types = column_types
-                            column_types = [None for col in first_line_column_types]
-                    if max_data_lines is not None and data_lines >= max_data_lines:
-                        if dataset_fh.tell() != dataset.get_size():
-                            data_lines = None  # Clear optional data_lines metadata value
-                            comment_lines = None  # Clear optional comment_lines metadata value; additional comment lines could appear below this point
-                        break
-                    i += 1
+            # If skip is None the first line is treated as a header, people seem to like to upload files that have a
+            # header line, but do not start with '#' (i.e. all column types would then most likely be detected as
+            # str).  We only use the data from the first line if we have no other data for a column.  This is far
+            # from perfect, as
+            # 1,2,3	1.1	2.2	qwerty
+            # 0	0		1,2,3
+            # will be detected as
+            # "column_types": ["int", "int", "float", "list"]
+            # instead of
+            # "column_types": ["list", "float", "float", "str"]  *** would seem to be the 'Truth' by manual
+            # observation that the first line should be included as data.  The old method would have detected as
+            # "column_types": ["int", "int", "str", "list"]
+            scan = tabular_scan.scan_tabular(
+                dataset.file_name,
+                skip=skip,
+                max_data_lines=max_data_lines,
+                max_guess_type_data_lines=max_guess_type_data_lines,
+                get_column_names=self.get_column_names,
+            )
+            data_lines = scan.data_lines
+            comment_lines = scan.comment_lines
+            column_names = scan.column_names
+            column_types = scan.column_types
+            first_line_column_types = scan.first_line_column_types
 
         # we error on the larger number of columns
         # first we pad our column_types by using data from first line
@@ -413,7 +421,7 @@ class Tabular(TabularData):
         for i in range(len(column_types)):
             if column_types[i] is None:
                 if len(first_line_column_types) <= i or first_line_column_types[i] is None:
-                    column_types[i] = default_column_type
+                    column_types[i] = tabular_scan.DEFAULT_COLUMN_TYPE
                 else:
                     column_types[i] = first_line_column_types[i]
         # Set the discovered metadata values for the dataset
@@ -605,6 +613,17 @@ class Sam(Tabular):
         settings['comment_char'] = '@'
         return super().dataset_dict_dataprovider(dataset, **settings)
 
+    @dataproviders.decorators.dataprovider_factory('column-block',
+                                                   dataproviders.column.ColumnBlockDataProvider.settings)
+    def column_block_dataprovider(self, dataset, **settings):
+        settings['comment_char'] = '@'
+        return super().column_block_dataprovider(dataset, **settings)
+
+    @dataproviders.decorators.dataprovider_factory('dict-block', dataproviders.column.DictBlockDataProvider.settings)
+    def dict_block_dataprovider(self, dataset, **settings):
+        settings['comment_char'] = '@'
+        return super().dict_block_dataprovider(dataset, **settings)
+
     @dataproviders.decorators.dataprovider_factory('header', dataproviders.line.RegexLineDataProvider.settings)
     def header_dataprovider(self, dataset, **settings):
         dataset_source = dataproviders.dataset.DatasetDataProvider(dataset)
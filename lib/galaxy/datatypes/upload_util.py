@@ -56,7 +56,7 @@ def handle_upload(
         except sniff.InappropriateDatasetContentError as exc:
             raise UploadProblemException(exc)
     elif requested_ext == 'auto':
-        ext = sniff.guess_ext(path, registry.sniff_order, is_binary=is_binary)
+        ext = sniff.guess_ext(path, registry.sniff_dispatcher, is_binary=is_binary)
     else:
         ext = requested_ext
 
@@ -0,0 +1,261 @@
+"""
+Sparse line offset index for random access into large text datasets.
+
+A ``LineIndex`` records the offset of every ``interval``-th line of a file
+together with the number of data lines (lines that are neither blank nor
+comments, as counted by the line dataproviders) before it, so reading from a
+line or data line only needs to skip the lines after the closest checkpoint
+instead of all lines from the start of the file.
+
+Offsets are offsets into the uncompressed content. For gzip compressed files
+the index also records seek points - compressed offsets of gzip members and
+the uncompressed offset they start at. Decompression can only be started at
+the beginning of a member, so files compressed as many members (like BGZF
+files, whose blocks are gzip members) can be read from close to any offset,
+while files compressed as a single member still have to be decompressed from
+the start.
+
+Indexes of tabular datasets are built in the background after the dataset
+is created and kept in the ``line_index`` metadata file of the dataset (see
+``TabularData.get_line_index``).
+"""
+import bisect
+import gzip
+import json
+import logging
+import os
+import re
+import zlib
+from contextlib import contextmanager
+
+from galaxy.util import compression_utils
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2 ** 20  # 1MB
+LINE_INDEX_INTERVAL = 10000
+# Minimal number of uncompressed bytes between two seek points
+SEEK_POINT_SPACING = 2 ** 22  # 4MB
+# Datasets smaller than this are read from the start
+LINE_INDEX_MIN_SIZE = 2 ** 24  # 16MB
+LINE_INDEX_VERSION = 1
+GZIP_WBITS = zlib.MAX_WBITS | 16
+# Comment or blank line in a block of lines, see FilteredLineDataProvider.filter
+_COMMENT_OR_BLANK = re.compile(rb'^[^\S\n]*(?:#|$)', re.MULTILINE)
+
+
+class LineIndex:
+    """
+    Checkpoints (line number, data line number, offset) of every ``interval``-th
+    line of a file of ``size`` bytes (``compressed`` or not) and, for gzip
+    compressed files, seek points (uncompressed offset, compressed offset).
+    """
+
+    def __init__(self, size, lines, data_lines, checkpoints, seek_points=None, interval=LINE_INDEX_INTERVAL, compressed=False):
+        self.size = size
+        self.compressed = compressed
+        self.lines = lines
+        self.data_lines = data_lines
+        self.interval = interval
+        checkpoints = [(0, 0, 0)] + [tuple(checkpoint) for checkpoint in checkpoints if checkpoint[0]]
+        self.line_numbers, self.data_line_numbers, self.offsets = (list(values) for values in zip(*checkpoints))
+        self.seek_points = [tuple(seek_point) for seek_point in seek_points or []]
+
+    @property
+    def checkpoints(self):
+        return list(zip(self.line_numbers, self.data_line_numbers, self.offsets))
+
+    def checkpoint_for_line(self, line_number):
+        """
+        Return the checkpoint ``(line number, data line number, offset)`` of
+        the closest line starting at or before line ``line_number`` (counted
+        from 0).
+        """
+        i = bisect.bisect_right(self.line_numbers, line_number) - 1
+        return self.line_numbers[i], self.data_line_numbers[i], self.offsets[i]
+
+    def checkpoint_for_data_line(self, data_line_number):
+        """
+        Return the last checkpoint with at most ``data_line_number`` data lines
+        before it, skipping ``data_line_number`` data lines can start there.
+        """
+        i = bisect.bisect_right(self.data_line_numbers, data_line_number) - 1
+        return self.line_numbers[i], self.data_line_numbers[i], self.offsets[i]
+
+    def seek_point(self, offset):
+        """
+        Return the seek point ``(uncompressed offset, compressed offset)``
+        closest before the uncompressed ``offset``.
+        """
+        i = bisect.bisect_right(self.seek_points, (offset, float('inf'))) - 1
+        return self.seek_points[i] if i >= 0 else (0, 0)
+
+    def to_dict(self):
+        return {
+            'version': LINE_INDEX_VERSION,
+            'size': self.size,
+            'compressed': self.compressed,
+            'lines': self.lines,
+            'data_lines': self.data_lines,
+            'interval': self.interval,
+            'checkpoints': self.checkpoints,
+            'seek_points': self.seek_points,
+        }
+
+    @classmethod
+    def from_dict(cls, as_dict):
+        if as_dict.get('version') != LINE_INDEX_VERSION:
+            raise ValueError(f"Unsupported line index version [{as_dict.get('version')}]")
+        return cls(as_dict['size'], as_dict['lines'], as_dict['data_lines'], as_dict['checkpoints'],
+                   seek_points=as_dict['seek_points'], interval=as_dict['interval'], compressed=as_dict['compressed'])
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+class _LineIndexBuilder:
+    """
+    Counts the lines and data lines of the (uncompressed) data it is fed and
+    records a checkpoint every ``interval`` lines.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lines = 0
+        self.data_lines = 0
+        self.offset = 0  # offset of the first line not counted yet
+        self.fed = 0
+        self.checkpoints = []
+        self._pending = b''
+
+    def feed(self, data):
+        self.fed += len(data)
+        data = self._pending + data
+        end = data.rfind(b'\n')
+        if end == -1:
+            self._pending = data
+            return
+        self._add_lines(data, end)
+        self._pending = data[end + 1:]
+
+    def finish(self):
+        if self._pending:
+            # Last line without a newline
+            self._add_lines(self._pending, len(self._pending))
+            self._pending = b''
+
+    def _add_lines(self, data, end):
+        """Count the lines of ``data[:end]`` and the newline (if any) at ``end``."""
+        count = data.count(b'\n', 0, end) + 1
+        next_checkpoint = max(-(-self.lines // self.interval), 1) * self.interval
+        line = self.lines
+        position = 0
+        while next_checkpoint < self.lines + count:
+            for _ in range(next_checkpoint - line):
+                position = data.index(b'\n', position) + 1
+            line = next_checkpoint
+            data_lines = self.data_lines
+            if position:
+                # Leave the newline ending the last line before the checkpoint out, so it isn't matched as a blank line
+                data_lines += (line - self.lines) - _count_comments_or_blanks(data, position - 1)
+            self.checkpoints.append((line, data_lines, self.offset + position))
+            next_checkpoint += self.interval
+        self.data_lines += count - _count_comments_or_blanks(data, end)
+        self.lines += count
+        self.offset += min(end + 1, len(data))
+
+
+def _count_comments_or_blanks(data, end):
+    return sum(1 for _ in _COMMENT_OR_BLANK.finditer(data, 0, end))
+
+
+def _iter_gzip_members(f, chunk_size=CHUNK_SIZE):
+    """
+    Decompress the gzip file object ``f`` (opened in binary mode), yields
+    ``(data, None)`` for decompressed data and ``(b'', offset)`` whenever
+    another gzip member starts at the compressed ``offset``.
+    """
+    decompressor = zlib.decompressobj(GZIP_WBITS)
+    position = 0
+    while True:
+        raw = f.read(chunk_size)
+        if not raw:
+            break
+        position += len(raw)
+        while raw:
+            yield decompressor.decompress(raw), None
+            if not decompressor.eof:
+                break
+            raw = decompressor.unused_data
+            decompressor = zlib.decompressobj(GZIP_WBITS)
+            yield b'', position - len(raw)
+
+
+def is_multi_member_gzip(file_name, max_size=SEEK_POINT_SPACING, chunk_size=CHUNK_SIZE):
+    """
+    Return whether the gzip file ``file_name`` is compressed as several gzip
+    members (like BGZF files), i.e. whether a second member starts within
+    roughly its first ``max_size`` uncompressed bytes.
+    """
+    size = os.path.getsize(file_name)
+    decompressed = 0
+    with open(file_name, 'rb') as f:
+        for data, member_offset in _iter_gzip_members(f, chunk_size=chunk_size):
+            if member_offset is not None:
+                return member_offset < size
+            decompressed += len(data)
+            if decompressed >= max_size:
+                break
+    return False
+
+
+def build_line_index(file_name, interval=LINE_INDEX_INTERVAL, seek_point_spacing=SEEK_POINT_SPACING, chunk_size=CHUNK_SIZE):
+    """Read ``file_name`` (decompressing it if needed) and return its ``LineIndex``."""
+    size = os.path.getsize(file_name)
+    builder = _LineIndexBuilder(interval)
+    seek_points = None
+    if compression_utils.is_gzip(file_name):
+        compressed = True
+        seek_points = [(0, 0)]
+        with open(file_name, 'rb') as f:
+            for data, member_offset in _iter_gzip_members(f, chunk_size=chunk_size):
+                if member_offset is None:
+                    builder.feed(data)
+                elif member_offset < size and builder.fed - seek_points[-1][0] >= seek_point_spacing:
+                    seek_points.append((builder.fed, member_offset))
+    else:
+        compressed_format, f = compression_utils.get_fileobj_raw(file_name, 'rb')
+        compressed = compressed_format is not None
+        with f:
+            for data in iter(lambda: f.read(chunk_size), b''):
+                builder.feed(data)
+    builder.finish()
+    return LineIndex(size, builder.lines, builder.data_lines, builder.checkpoints,
+                     seek_points=seek_points, interval=interval, compressed=compressed)
+
+
+@contextmanager
+def open_at_offset(file_name, offset, index=None):
+    """
+    Open ``file_name`` for reading its uncompressed content as bytes,
+    positioned at the uncompressed ``offset``. Compressed files are
+    decompressed from the seek point of ``index`` closest to ``offset``, or
+    from the start without an index.
+    """
+    if index is not None and index.seek_points:
+        uncompressed_offset, compressed_offset = index.seek_point(offset)
+        with open(file_name, 'rb') as raw:
+            raw.seek(compressed_offset)
+            with gzip.GzipFile(fileobj=raw, mode='rb') as f:
+                f.seek(offset - uncompressed_offset)
+                yield f
+    else:
+        with compression_utils.get_fileobj(file_name, 'rb') as f:
+            f.seek(offset)
+            yield f
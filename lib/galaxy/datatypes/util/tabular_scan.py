@@ -0,0 +1,352 @@
+"""
+Single pass scanning of text and tabular datasets for metadata.
+
+Datasets are read in large chunks, so compressed datasets are decompressed
+and decoded once. Lines and comment lines are counted on whole chunks, column
+types are inferred column by column on blocks of lines - whole columns are
+checked against integer and float patterns before falling back to guessing
+the type of every field. The peek of a scanned tabular dataset is computed in
+the same pass and reused by ``Text.set_peek``.
+"""
+import logging
+import os
+import re
+import sys
+from collections import OrderedDict
+
+from galaxy.util import compression_utils
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2 ** 20  # 1MB
+COLUMN_TYPE_SET_ORDER = ['int', 'float', 'list', 'str']  # Order to set column types in
+DEFAULT_COLUMN_TYPE = COLUMN_TYPE_SET_ORDER[-1]  # Default column type is lowest in list
+COLUMN_TYPE_COMPARE_ORDER = list(reversed(COLUMN_TYPE_SET_ORDER))  # Order to compare column types
+PEEK_LINE_COUNT = 5
+PEEK_WIDTH = 256
+MAX_CACHED_PEEKS = 16
+
+# int() refuses to convert strings with more digits than the interpreter's limit
+_MAX_INT_DIGITS = getattr(sys, 'get_int_max_str_digits', lambda: 0)()
+_INT = r'[+-]?[0-9]{1,%d}' % _MAX_INT_DIGITS if _MAX_INT_DIGITS else r'[+-]?[0-9]+'
+_FLOAT = r'[+-]?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)(?:[eE][+-]?[0-9]+)?'
+# Columns (values joined by newlines) that int() or float() accept for every
+# value, these patterns are deliberately stricter than int() and float().
+_INT_COLUMN = re.compile(f'{_INT}(?:\n{_INT})*')
+_FLOAT_COLUMN = re.compile(f'{_FLOAT}(?:\n{_FLOAT})*')
+# Start of a comment line or a blank line in a tabular block
+_TABULAR_COMMENT_OR_BLANK = re.compile(r'^[#\n]', re.MULTILINE)
+# Comment or blank line in a text block, lines are stripped of whitespace
+_TEXT_COMMENT_OR_BLANK = re.compile(r'^[^\S\n]*(?:#|$)', re.MULTILINE)
+
+_peeks = OrderedDict()
+
+
+def is_int(column_text):
+    # Don't allow underscores in numeric literals (PEP 515)
+    if '_' in column_text:
+        return False
+    try:
+        int(column_text)
+        return True
+    except ValueError:
+        return False
+
+
+def is_float(column_text):
+    # Don't allow underscores in numeric literals (PEP 515)
+    if '_' in column_text:
+        return False
+    try:
+        float(column_text)
+        return True
+    except ValueError:
+        if column_text.strip().lower() == 'na':
+            return True  # na is special cased to be a float
+        return False
+
+
+def is_list(column_text):
+    return "," in column_text
+
+
+def is_str(column_text):
+    # anything, except an empty string, is True
+    if column_text == "":
+        return False
+    return True
+
+
+IS_COLUMN_TYPE = {
+    'int': is_int,
+    'float': is_float,
+    'list': is_list,
+    'str': is_str,
+}
+
+
+def type_overrules_type(column_type1, column_type2):
+    if column_type1 is None or column_type1 == column_type2:
+        return False
+    if column_type2 is None:
+        return True
+    for column_type in COLUMN_TYPE_COMPARE_ORDER:
+        if column_type1 == column_type:
+            return True
+        if column_type2 == column_type:
+            return False
+    # neither column type was found in our ordered list, this cannot happen
+    raise ValueError(f"Tried to compare unknown column types: {column_type1} and {column_type2}")
+
+
+def guess_column_type(column_text):
+    for column_type in COLUMN_TYPE_SET_ORDER:
+        if IS_COLUMN_TYPE[column_type](column_text):
+            return column_type
+    return None
+
+
+def guess_values_type(values):
+    """
+    Return the most general column type guessed for any of ``values``, i.e.
+    the same type as guessing the type of every value in turn.
+    """
+    joined = '\n'.join(values)
+    if _INT_COLUMN.fullmatch(joined):
+        return 'int'
+    if _FLOAT_COLUMN.fullmatch(joined):
+        return 'float'
+    if values and all(',' in value for value in values):
+        # neither int nor float, but not str either
+        return 'list'
+    column_type = None
+    for value in values:
+        value_type = guess_column_type(value)
+        if type_overrules_type(value_type, column_type):
+            column_type = value_type
+            if column_type == DEFAULT_COLUMN_TYPE:
+                break
+    return column_type
+
+
+def guess_column_types(column_types, lines, delimiter='\t'):
+    """Update ``column_types`` in place with the types guessed for ``lines``."""
+    rows = [line.split(delimiter) for line in lines]
+    if not rows:
+        return
+    widths = set(map(len, rows))
+    width = max(widths)
+    if len(column_types) < width:  # found previously unknown columns, we append None
+        column_types.extend([None] * (width - len(column_types)))
+    if len(widths) == 1:
+        columns = zip(*rows)
+    else:
+        columns = ([row[i] for row in rows if len(row) > i] for i in range(width))
+    for i, values in enumerate(columns):
+        if column_types[i] == DEFAULT_COLUMN_TYPE:
+            # Nothing can overrule the default type
+            continue
+        column_type = guess_values_type(values)
+        if type_overrules_type(column_type, column_types[i]):
+            column_types[i] = column_type
+
+
+class TabularScan:
+    """Metadata of a tabular dataset collected by ``scan_tabular``."""
+
+    def __init__(self):
+        self.data_lines = 0
+        self.comment_lines = 0
+        self.column_names = None
+        self.column_types = []
+        self.first_line_column_types = [DEFAULT_COLUMN_TYPE]  # default value is one column of type str
+        self.peek = None
+
+
+def scan_tabular(file_name, skip=None, max_data_lines=None, max_guess_type_data_lines=None, get_column_names=None, delimiter='\t', chunk_size=CHUNK_SIZE):
+    """
+    Count data and comment lines and guess column types of a tabular dataset
+    in a single pass, see ``Tabular.set_meta`` for the meaning of arguments.
+    Blank lines, lines starting with ``#`` and the first ``skip`` lines are
+    comment lines. If ``skip`` is None the first line is assumed to be a
+    header, its column types are kept in ``first_line_column_types``.
+
+    If the dataset has more data lines than ``max_data_lines``, ``data_lines``
+    and ``comment_lines`` of the result are None.
+    """
+    scan = TabularScan()
+    requested_skip = skip
+    skip = skip or 0
+    line_index = 0
+    peek_lines = []
+    with compression_utils.get_fileobj(file_name) as fh:
+        blocks = _iter_blocks(fh, chunk_size)
+        for block in blocks:
+            if len(peek_lines) < PEEK_LINE_COUNT:
+                _collect_peek_lines(block, peek_lines)
+            guessing = max_guess_type_data_lines is None or scan.data_lines < max_guess_type_data_lines
+            if line_index > skip and not guessing:
+                # Only lines need to be counted
+                line_count = block.count('\n') + (0 if block.endswith('\n') else 1)
+                comment_lines = len(_TABULAR_COMMENT_OR_BLANK.findall(block))
+                data_lines = line_count - comment_lines
+                if max_data_lines is None or scan.data_lines + data_lines < max_data_lines:
+                    scan.data_lines += data_lines
+                    scan.comment_lines += comment_lines
+                    line_index += line_count
+                    continue
+            lines = block.split('\n')
+            if block.endswith('\n'):
+                lines.pop()
+            remaining = _scan_lines(scan, lines, line_index, skip, requested_skip, max_data_lines, max_guess_type_data_lines, get_column_names, delimiter)
+            line_index += len(lines)
+            if remaining is not None:
+                # max_data_lines were read
+                if remaining or _collect_peek_lines(next(blocks, ''), peek_lines):
+                    scan.data_lines = None  # Clear optional data_lines metadata value
+                    scan.comment_lines = None  # Clear optional comment_lines metadata value; additional comment lines could appear below this point
+                break
+        # Only read as far as the peek needs
+        while len(peek_lines) < PEEK_LINE_COUNT and _collect_peek_lines(next(blocks, ''), peek_lines):
+            pass
+    if peek_lines:
+        peek = '\n'.join(line[:PEEK_WIDTH] for line, _ in peek_lines[:PEEK_LINE_COUNT])
+        scan.peek = peek + ('\n' if peek_lines[:PEEK_LINE_COUNT][-1][1] else '')
+    else:
+        scan.peek = ''
+    _cache_peek(file_name, scan.peek)
+    return scan
+
+
+def _scan_lines(scan, lines, line_index, skip, requested_skip, max_data_lines, max_guess_type_data_lines, get_column_names, delimiter):
+    """
+    Scan a block of lines starting at ``line_index``. Returns None if
+    ``max_data_lines`` haven't been reached, otherwise the number of lines of
+    the block that weren't scanned.
+    """
+    start = 0
+    # The first line may be a header and skipped lines are comments, scan these individually
+    while start < len(lines) and (line_index == 0 or line_index < skip):
+        line = lines[start]
+        if line_index == 0 and get_column_names:
+            scan.column_names = get_column_names(first_line=line)
+        if line_index < skip or not line or line.startswith('#'):
+            # We'll call blank lines comments
+            scan.comment_lines += 1
+        else:
+            scan.data_lines += 1
+            if max_guess_type_data_lines is None or scan.data_lines <= max_guess_type_data_lines:
+                guess_column_types(scan.column_types, [line], delimiter)
+            if line_index == 0 and requested_skip is None:
+                # This is our first line, people seem to like to upload files that have a header line, but do not
+                # start with '#' (i.e. all column types would then most likely be detected as str).  We will assume
+                # that the first line is always a header (this was previous behavior - it was always skipped).  When
+                # the requested skip is None, we only use the data from the first line if we have no other data for
+                # a column.
+                scan.first_line_column_types = scan.column_types
+                scan.column_types = [None for _ in scan.first_line_column_types]
+        start += 1
+        line_index += 1
+        if max_data_lines is not None and scan.data_lines >= max_data_lines:
+            return len(lines) - start
+    rest = lines[start:]
+    data = [line for line in rest if line and not line.startswith('#')]
+    remaining = None
+    if max_data_lines is not None and scan.data_lines + len(data) >= max_data_lines:
+        # Stop at the line reaching max_data_lines
+        data = data[:max_data_lines - scan.data_lines]
+        data_seen = 0
+        for end, line in enumerate(rest):
+            if line and not line.startswith('#'):
+                data_seen += 1
+                if data_seen == len(data):
+                    break
+        remaining = len(rest) - end - 1
+        rest = rest[:end + 1]
+    if max_guess_type_data_lines is None:
+        guess_column_types(scan.column_types, data, delimiter)
+    elif scan.data_lines < max_guess_type_data_lines:
+        guess_column_types(scan.column_types, data[:max_guess_type_data_lines - scan.data_lines], delimiter)
+    scan.data_lines += len(data)
+    scan.comment_lines += len(rest) - len(data)
+    return remaining
+
+
+def count_data_lines(file_name, chunk_size=CHUNK_SIZE):
+    """
+    Count the number of lines of data in a text dataset, skipping all blank
+    lines and comments. Returns None if the dataset can't be decoded.
+    """
+    data_lines = 0
+    with compression_utils.get_fileobj(file_name) as in_file:
+        try:
+            for block in _iter_blocks(in_file, chunk_size):
+                line_count = block.count('\n')
+                comment_lines = len(_TEXT_COMMENT_OR_BLANK.findall(block))
+                if block.endswith('\n'):
+                    # The pattern also matches the empty end of the block
+                    comment_lines -= 1
+                else:
+                    line_count += 1
+                data_lines += line_count - comment_lines
+        except UnicodeDecodeError:
+            log.error(f'Unable to count lines in file {file_name}')
+            data_lines = None
+    return data_lines
+
+
+def cached_peek(file_name):
+    """Return the peek computed when ``file_name`` was last scanned if it didn't change since."""
+    key = _peek_key(file_name)
+    if key is None:
+        return None
+    return _peeks.get(key)
+
+
+def _cache_peek(file_name, peek):
+    key = _peek_key(file_name)
+    if key is None:
+        return
+    _peeks[key] = peek
+    _peeks.move_to_end(key)
+    while len(_peeks) > MAX_CACHED_PEEKS:
+        _peeks.popitem(last=False)
+
+
+def _peek_key(file_name):
+    try:
+        stat = os.stat(file_name)
+    except OSError:
+        return None
+    return (file_name, stat.st_size, stat.st_mtime_ns)
+
+
+def _iter_blocks(fh, chunk_size):
+    """Read ``fh`` in blocks of complete lines, the last block may lack a trailing newline."""
+    remainder = ''
+    while True:
+        chunk = fh.read(chunk_size)
+        if not chunk:
+            if remainder:
+                yield remainder
+            return
+        chunk = remainder + chunk
+        end = chunk.rfind('\n')
+        if end == -1:
+            remainder = chunk
+            continue
+        remainder = chunk[end + 1:]
+        yield chunk[:end + 1]
+
+
+def _collect_peek_lines(block, peek_lines):
+    """Append the lines of ``block`` the peek needs to ``peek_lines``, returns ``block``."""
+    start = 0
+    while len(peek_lines) < PEEK_LINE_COUNT and start < len(block):
+        end = block.find('\n', start)
+        if end == -1:
+            peek_lines.append((block[start:], False))
+            break
+        peek_lines.append((block[start:end], True))
+        start = end + 1
+    return block
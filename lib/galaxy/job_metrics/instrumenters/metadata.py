@@ -0,0 +1,73 @@
+"""The module describes the ``metadata`` job metrics plugin."""
+import json
+import logging
+import os
+
+from . import (
+    INSTRUMENT_FILE_PREFIX,
+    InstrumentPlugin,
+)
+from .. import formatting
+
+log = logging.getLogger(__name__)
+
+# Written by galaxy.metadata.set_metadata to the job directory
+METADATA_TIMINGS_FILE_NAME = f"{INSTRUMENT_FILE_PREFIX}_metadata_timings"
+PROCESSES_KEY = "processes"
+WALL_SECONDS_KEY = "wall_seconds"
+DISCOVERED_COUNT_KEY = "discovered_count"
+DISCOVERED_SECONDS_KEY = "discovered_seconds"
+DISCOVERED_MAX_SECONDS_KEY = "discovered_max_seconds"
+OUTPUT_KEY_PREFIX = "output_"
+OUTPUT_KEY_SUFFIX = "_seconds"
+
+
+class MetadataPluginFormatter(formatting.JobMetricFormatter):
+
+    def format(self, key, value):
+        if key == PROCESSES_KEY:
+            return ("Metadata Processes", "%d" % int(value))
+        elif key == DISCOVERED_COUNT_KEY:
+            return ("Discovered Datasets", "%d" % int(value))
+        elif key == WALL_SECONDS_KEY:
+            return ("Metadata Runtime (Wall Clock)", _seconds_str(value))
+        elif key == DISCOVERED_SECONDS_KEY:
+            return ("Metadata Time for Discovered Datasets", _seconds_str(value))
+        elif key == DISCOVERED_MAX_SECONDS_KEY:
+            return ("Maximum Metadata Time for a Discovered Dataset", _seconds_str(value))
+        elif key.startswith(OUTPUT_KEY_PREFIX) and key.endswith(OUTPUT_KEY_SUFFIX):
+            output_name = key[len(OUTPUT_KEY_PREFIX):-len(OUTPUT_KEY_SUFFIX)]
+            return (f"Metadata Time for Output {output_name}", _seconds_str(value))
+        return super().format(key, value)
+
+
+class MetadataPlugin(InstrumentPlugin):
+    """ Collect the time setting metadata of a job's outputs took, per named
+    output and summed up over discovered datasets, as recorded by the
+    metadata collection of the job.
+    """
+    plugin_type = "metadata"
+    formatter = MetadataPluginFormatter()
+
+    def __init__(self, **kwargs):
+        pass
+
+    def job_properties(self, job_id, job_directory):
+        timings_path = os.path.join(job_directory, METADATA_TIMINGS_FILE_NAME)
+        if not os.path.exists(timings_path):
+            return {}
+        with open(timings_path) as f:
+            timings = json.load(f)
+        properties = {}
+        for key in (PROCESSES_KEY, WALL_SECONDS_KEY, DISCOVERED_COUNT_KEY, DISCOVERED_SECONDS_KEY, DISCOVERED_MAX_SECONDS_KEY):
+            properties[key] = timings.get(key)
+        for output_name, seconds in timings.get("outputs", {}).items():
+            properties[f"{OUTPUT_KEY_PREFIX}{output_name}{OUTPUT_KEY_SUFFIX}"] = seconds
+        return properties
+
+
+def _seconds_str(value):
+    return f"{float(value):.2f} seconds"
+
+
+__all__ = ('MetadataPlugin', )
@@ -58,6 +58,11 @@ from galaxy.jobs.mapper import (
 from galaxy.jobs.runners import BaseJobRunner, JobState
 from galaxy.metadata import get_metadata_compute_strategy
 from galaxy.model import store
+from galaxy.model.job_fingerprint import fingerprint_for_job
+from galaxy.model.job_metrics import (
+    update_job_metric_rollups,
+    write_job_metrics,
+)
 from galaxy.objectstore import ObjectStorePopulator
 from galaxy.structured_app import MinimalManagerApp
 from galaxy.tool_util.deps import requirements
@@ -318,6 +323,7 @@ class JobConfiguration(ConfiguresHandlers):
         self.handler_assignment_methods_configured = False
         self.handler_max_grab = None
         self.handler_ready_window_size = None
+        self.handler_ready_full_scan_interval = None
         self.destinations = {}
         self.default_destination_id = None
         self.tools = {}
@@ -410,6 +416,9 @@ class JobConfiguration(ConfiguresHandlers):
             log.info("Tag [%s] handlers: %s", tag, ', '.join(handlers))
         self.handler_ready_window_size = int(handling_config_dict.get(
             'ready_window_size', JobConfiguration.DEFAULT_HANDLER_READY_WINDOW_SIZE))
+        ready_full_scan_interval = handling_config_dict.get('ready_full_scan_interval', None)
+        if ready_full_scan_interval is not None:
+            self.handler_ready_full_scan_interval = int(ready_full_scan_interval)
 
         # Parse environments
         job_metrics = self.app.job_metrics
@@ -1311,6 +1320,7 @@ class JobWrapper(HasResourceParameters):
         # Might be AssertionError or other exception
         message = str(message)
         working_directory_exists = self.working_directory_exists()
+        paused_jobs = []
 
         # if the job was deleted, don't fail it
         if not job.state == job.states.DELETED:
@@ -1350,7 +1360,8 @@ class JobWrapper(HasResourceParameters):
                                   dataset.dataset.id)
                 # Pause any dependent jobs (and those jobs' outputs)
                 for dep_job_assoc in dataset.dependent_jobs:
-                    self.pause(dep_job_assoc.job, "Execution of this dataset's job is paused because its input datasets are in an error state.")
+                    if self.pause(dep_job_assoc.job, "Execution of this dataset's job is paused because its input datasets are in an error state."):
+                        paused_jobs.append(dep_job_assoc.job)
             job.set_final_state(job.states.ERROR, supports_skip_locked=self.app.application_stack.supports_skip_locked())
             job.command_line = unicodify(self.command_line)
             job.info = message
@@ -1363,6 +1374,7 @@ class JobWrapper(HasResourceParameters):
 
             self.sa_session.add(job)
             self.sa_session.flush()
+            self._notify_output_states_changed(job, *paused_jobs)
         else:
             for dataset_assoc in job.output_datasets:
                 dataset = dataset_assoc.dataset
@@ -1387,6 +1399,11 @@ class JobWrapper(HasResourceParameters):
         self.cleanup(delete_files=delete_files)
 
     def pause(self, job=None, message=None):
+        """
+        Pause a new job and its outputs, returns whether the job was paused.
+        The caller is expected to flush and notify the queue about the
+        outputs' new state (see ``_notify_output_states_changed``).
+        """
         if job is None:
             job = self.get_job()
         if message is None:
@@ -1399,6 +1416,8 @@ class JobWrapper(HasResourceParameters):
             log.debug("Pausing Job '%d', %s", job.id, message)
             job.set_state(job.states.PAUSED)
             self.sa_session.add(job)
+            return True
+        return False
 
     def is_ready_for_resubmission(self, job=None):
         if job is None:
@@ -1441,6 +1460,8 @@ class JobWrapper(HasResourceParameters):
         job.update_output_states(self.app.application_stack.supports_skip_locked())
         if flush:
             self.sa_session.flush()
+            if state in model.Job.terminal_states or state == model.Job.states.PAUSED:
+                self._notify_output_states_changed(job)
 
     def get_state(self):
         job = self.get_job()
@@ -1529,6 +1550,30 @@ class JobWrapper(HasResourceParameters):
         job.object_store_id = object_store_populator.object_store_id
         self._setup_working_directory(job=job)
 
+    def _notify_output_states_changed(self, *jobs):
+        # Let the handler queue check jobs waiting on these outputs without waiting for a full scan
+        dataset_states_changed = getattr(self.queue, 'dataset_states_changed', None)
+        if dataset_states_changed is not None:
+            dataset_states_changed([dataset_assoc.dataset.dataset.id for job in jobs for dataset_assoc in job.output_datasets + job.output_library_datasets])
+        # Wake workflow invocations waiting on these jobs
+        workflow_scheduling_manager = getattr(self.app, 'workflow_scheduling_manager', None)
+        if workflow_scheduling_manager is not None:
+            workflow_scheduling_manager.jobs_finished([job.id for job in jobs])
+
+    def _schedule_line_indexes(self, job):
+        # Line indexes of large tabular outputs are built in the background, displaying them only uses existing indexes
+        if not self.app.config.enable_celery_tasks:
+            return
+        from galaxy.celery.tasks import build_dataset_line_index
+        for dataset_assoc in job.output_datasets + job.output_library_datasets:
+            dataset = dataset_assoc.dataset
+            needs_line_index = getattr(dataset.datatype, 'needs_line_index', None)
+            try:
+                if dataset.state == dataset.states.OK and needs_line_index and needs_line_index(dataset):
+                    build_dataset_line_index.delay(dataset_id=dataset.id, model_class=dataset.__class__.__name__)
+            except Exception:
+                log.exception(f"Failed to schedule building the line index of dataset {dataset.id}")
+
     def _finish_dataset(self, output_name, dataset, job, context, final_job_state, remote_metadata_directory):
         implicit_collection_jobs = job.implicit_collection_jobs_association
         purged = dataset.dataset.purged
@@ -1728,6 +1773,7 @@ class JobWrapper(HasResourceParameters):
                         output_name, dataset, job, context, final_job_state, remote_metadata_directory
                     )
 
+        paused_jobs = []
         for dataset_assoc in output_dataset_associations:
             if job.states.ERROR == final_job_state:
                 log.debug("(%s) setting dataset %s state to ERROR", job.id, dataset_assoc.dataset.dataset.id)
@@ -1735,7 +1781,8 @@ class JobWrapper(HasResourceParameters):
                 dataset_assoc.dataset.dataset.state = model.Dataset.states.ERROR
                 # Pause any dependent jobs (and those jobs' outputs)
                 for dep_job_assoc in dataset_assoc.dataset.dependent_jobs:
-                    self.pause(dep_job_assoc.job, "Execution of this dataset's job is paused because its input datasets are in an error state.")
+                    if self.pause(dep_job_assoc.job, "Execution of this dataset's job is paused because its input datasets are in an error state."):
+                        paused_jobs.append(dep_job_assoc.job)
             else:
                 dataset_assoc.dataset.dataset.state = model.Dataset.states.OK
 
@@ -1799,6 +1846,13 @@ class JobWrapper(HasResourceParameters):
 
         self._fix_output_permissions()
 
+        if final_job_state == job.states.OK and job.copied_from_job_id is None:
+            # Record the fingerprint the job cache finds equivalent jobs by
+            try:
+                job.fingerprint = fingerprint_for_job(self.sa_session, job)
+            except Exception:
+                log.exception(f"Failed to compute fingerprint for job {self.job_id}")
+
         # Finally set the job state.  This should only happen *after* all
         # dataset creation, and will allow us to eliminate force_history_refresh.
         job.set_final_state(final_job_state, supports_skip_locked=self.app.application_stack.supports_skip_locked())
@@ -1806,6 +1860,9 @@ class JobWrapper(HasResourceParameters):
             # If job was composed of tasks, don't attempt to recollect statistics
             self._collect_metrics(job, job_metrics_directory)
         self.sa_session.flush()
+        self._notify_output_states_changed(job, *paused_jobs)
+        if job.state == job.states.OK:
+            self._schedule_line_indexes(job)
         if job.state == job.states.ERROR:
             self._report_error()
         cleanup_job = self.cleanup_job
@@ -1886,10 +1943,14 @@ class JobWrapper(HasResourceParameters):
         per_plugin_properties = self.app.job_metrics.collect_properties(job.destination_id, self.job_id, job_metrics_directory)
         if per_plugin_properties:
             log.info(f"Collecting metrics for {type(has_metrics).__name__} {getattr(has_metrics, 'id', None)} in {job_metrics_directory}")
-        for plugin, properties in per_plugin_properties.items():
-            for metric_name, metric_value in properties.items():
-                if metric_value is not None:
-                    has_metrics.add_metric(plugin, metric_name, metric_value)
+        numeric_metrics = write_job_metrics(self.sa_session, has_metrics, per_plugin_properties)
+        if has_metrics is job and numeric_metrics:
+            try:
+                rollup_metrics = self.app.config.job_metric_rollup_metrics
+                if rollup_metrics:
+                    update_job_metric_rollups(self.sa_session, job, numeric_metrics, rollup_metrics)
+            except Exception:
+                log.exception(f"Failed to update job metric rollups for job {self.job_id}")
 
     def get_output_sizes(self):
         sizes = []
@@ -2141,6 +2202,7 @@ class JobWrapper(HasResourceParameters):
                                                                         tool=self.tool,
                                                                         job=job,
                                                                         max_metadata_value_size=self.app.config.max_metadata_value_size,
+                                                                        parallel_metadata=self.app.config.parallel_metadata_collection,
                                                                         validate_outputs=self.validate_outputs,
                                                                         **kwds)
         if resolve_metadata_dependencies:
@@ -27,7 +27,11 @@ from galaxy.jobs import (
     TaskWrapper
 )
 from galaxy.jobs.mapper import JobNotReadyException
-from galaxy.util import unicodify
+from galaxy.jobs.readiness import JobReadinessTracker
+from galaxy.util import (
+    chunk_iterable,
+    unicodify,
+)
 from galaxy.util.custom_logging import get_logger
 from galaxy.util.monitors import Monitors
 from galaxy.web_stack.handlers import HANDLER_ASSIGNMENT_METHODS
@@ -179,6 +183,12 @@ class JobHandlerQueue(Monitors):
         self.waiting_jobs = []
         # Contains wrappers of jobs that are limited or ready (so they aren't created unnecessarily/multiple times)
         self.job_wrappers = {}
+        # Tracks which datasets waiting jobs are blocked on, so that not every
+        # iteration needs to scan all new jobs (only used with track_jobs_in_database)
+        self.readiness_tracker = None
+        full_scan_interval = self.app.job_config.handler_ready_full_scan_interval
+        if self.track_jobs_in_database and full_scan_interval:
+            self.readiness_tracker = JobReadinessTracker(full_scan_interval=full_scan_interval)
         name = "JobHandlerQueue.monitor_thread"
         self._init_monitor_thread(name, target=self.__monitor, config=app.config)
         self.job_grabber = None
@@ -336,44 +346,10 @@ class JobHandlerQueue(Monitors):
         if self.track_jobs_in_database:
             # Clear the session so we get fresh states for job and all datasets
             self.sa_session.expunge_all()
-            # Fetch all new jobs
-            hda_not_ready = self.sa_session.query(model.Job.id).enable_eagerloads(False) \
-                .join(model.JobToInputDatasetAssociation) \
-                .join(model.HistoryDatasetAssociation) \
-                .join(model.Dataset) \
-                .filter(and_(model.Job.state == model.Job.states.NEW,
-                             model.Dataset.state.in_(model.Dataset.non_ready_states))).subquery()
-            ldda_not_ready = self.sa_session.query(model.Job.id).enable_eagerloads(False) \
-                .join(model.JobToInputLibraryDatasetAssociation) \
-                .join(model.LibraryDatasetDatasetAssociation) \
-                .join(model.Dataset) \
-                .filter(and_(model.Job.state == model.Job.states.NEW,
-                             model.Dataset.state.in_(model.Dataset.non_ready_states))).subquery()
-            rank = func.rank().over(partition_by=model.Job.table.c.user_id,
-                                    order_by=model.Job.table.c.id).label('rank')
-            job_filter_conditions = (
-                (model.Job.state == model.Job.states.NEW),
-                (model.Job.handler == self.app.config.server_name),
-                ~model.Job.table.c.id.in_(hda_not_ready),
-                ~model.Job.table.c.id.in_(ldda_not_ready))
-            if self.app.config.user_activation_on:
-                job_filter_conditions = job_filter_conditions + (
-                    or_((model.Job.user_id == null()), (model.User.active == true())),)
-            if self.sa_session.bind.name == 'sqlite':
-                query_objects = (model.Job,)
+            if self.readiness_tracker is None or self.readiness_tracker.full_scan_due():
+                jobs_to_check = self.__full_scan_ready_jobs()
             else:
-                query_objects = (model.Job, rank)
-            ready_query = self.sa_session.query(*query_objects).enable_eagerloads(False) \
-                .outerjoin(model.User) \
-                .filter(and_(*job_filter_conditions)) \
-                .order_by(model.Job.id)
-            if self.sa_session.bind.name == 'sqlite':
-                jobs_to_check = ready_query.all()
-            else:
-                ranked = ready_query.subquery()
-                jobs_to_check = self.sa_session.query(model.Job) \
-                    .join(ranked, model.Job.id == ranked.c.id) \
-                    .filter(ranked.c.rank <= self.app.job_config.handler_ready_window_size).all()
+                jobs_to_check = self.__incremental_scan_ready_jobs()
             # Filter jobs with invalid input states
             jobs_to_check = self.__filter_jobs_with_invalid_input_states(jobs_to_check)
             # Fetch all "resubmit" jobs
@@ -434,6 +410,8 @@ class JobHandlerQueue(Monitors):
                 job_state = self.__check_job_state(job)
                 if job_state == JOB_WAIT:
                     new_waiting_jobs.append(job.id)
+                    if self.readiness_tracker is not None:
+                        self.readiness_tracker.defer(job.id)
                 elif job_state == JOB_INPUT_ERROR:
                     log.info("(%d) Job unable to run: one or more inputs in error state" % job.id)
                 elif job_state == JOB_INPUT_DELETED:
@@ -478,6 +456,155 @@ class JobHandlerQueue(Monitors):
         # Done with the session
         self.sa_session.remove()
 
+    def __full_scan_ready_jobs(self):
+        """
+        Query for all new jobs assigned to this handler whose inputs are ready,
+        limited to ``handler_ready_window_size`` jobs per user. If incremental
+        readiness tracking is enabled, also rebuild the tracker's view of which
+        jobs are blocked on which datasets.
+        """
+        scan_timer = self.app.execution_timer_factory.get_timer(
+            'internal.galaxy.jobs.handlers.ready_full_scan',
+            'Job handler full ready jobs scan complete.'
+        )
+        if self.readiness_tracker is not None:
+            # Read before querying for ready jobs, so that jobs created during
+            # the scan are picked up by the next incremental scan.
+            max_job_id = self.sa_session.query(func.max(model.Job.id)).scalar()
+        # Fetch all new jobs
+        hda_not_ready = self.sa_session.query(model.Job.id).enable_eagerloads(False) \
+            .join(model.JobToInputDatasetAssociation) \
+            .join(model.HistoryDatasetAssociation) \
+            .join(model.Dataset) \
+            .filter(and_(model.Job.state == model.Job.states.NEW,
+                         model.Dataset.state.in_(model.Dataset.non_ready_states))).subquery()
+        ldda_not_ready = self.sa_session.query(model.Job.id).enable_eagerloads(False) \
+            .join(model.JobToInputLibraryDatasetAssociation) \
+            .join(model.LibraryDatasetDatasetAssociation) \
+            .join(model.Dataset) \
+            .filter(and_(model.Job.state == model.Job.states.NEW,
+                         model.Dataset.state.in_(model.Dataset.non_ready_states))).subquery()
+        rank = func.rank().over(partition_by=model.Job.table.c.user_id,
+                                order_by=model.Job.table.c.id).label('rank')
+        job_filter_conditions = (
+            (model.Job.state == model.Job.states.NEW),
+            (model.Job.handler == self.app.config.server_name),
+            ~model.Job.table.c.id.in_(hda_not_ready),
+            ~model.Job.table.c.id.in_(ldda_not_ready))
+        if self.app.config.user_activation_on:
+            job_filter_conditions = job_filter_conditions + (
+                or_((model.Job.user_id == null()), (model.User.active == true())),)
+        if self.sa_session.bind.name == 'sqlite':
+            query_objects = (model.Job,)
+        else:
+            query_objects = (model.Job, rank)
+        ready_query = self.sa_session.query(*query_objects).enable_eagerloads(False) \
+            .outerjoin(model.User) \
+            .filter(and_(*job_filter_conditions)) \
+            .order_by(model.Job.id)
+        if self.sa_session.bind.name == 'sqlite':
+            jobs_to_check = ready_query.all()
+            window_saturated = False
+        else:
+            ranked = ready_query.subquery()
+            jobs_to_check = self.sa_session.query(model.Job) \
+                .join(ranked, model.Job.id == ranked.c.id) \
+                .filter(ranked.c.rank <= self.app.job_config.handler_ready_window_size).all()
+            window_saturated = self.__ready_window_saturated(jobs_to_check)
+        if self.readiness_tracker is not None:
+            self.readiness_tracker.reconcile(
+                self.__blocked_job_inputs(),
+                max_job_id or 0,
+                force_full_scan=window_saturated,
+            )
+            self.readiness_tracker.counters.record_full_scan(scan_timer.elapsed)
+            log.debug("Job readiness tracking: %s jobs blocked on inputs, %s", self.readiness_tracker.blocked_job_count, self.readiness_tracker.counters)
+        log.trace(scan_timer.to_str())
+        return jobs_to_check
+
+    def __ready_window_saturated(self, jobs):
+        """
+        Return True if any user filled the ready window, meaning there may be
+        more ready jobs that only a subsequent full scan would return.
+        """
+        window_size = self.app.job_config.handler_ready_window_size
+        jobs_per_user = defaultdict(int)
+        for job in jobs:
+            jobs_per_user[job.user_id] += 1
+        return any(count >= window_size for count in jobs_per_user.values())
+
+    def __incremental_scan_ready_jobs(self):
+        """
+        Only check jobs that were deferred on the previous iteration, jobs
+        waiting on datasets whose state changed in this process and jobs
+        created since the last scan. Jobs assigned to this handler by other
+        means (e.g. grabbed jobs older than the last scan) and datasets that
+        became ready in other processes are picked up by the next full scan.
+        """
+        scan_timer = self.app.execution_timer_factory.get_timer(
+            'internal.galaxy.jobs.handlers.ready_incremental_scan',
+            'Job handler incremental ready jobs scan complete.'
+        )
+        tracker = self.readiness_tracker
+        candidate_ids = tracker.pop_candidate_job_ids()
+        new_job_ids = [row[0] for row in self.sa_session.query(model.Job.id).enable_eagerloads(False)
+                       .filter(and_((model.Job.state == model.Job.states.NEW),
+                                    (model.Job.handler == self.app.config.server_name),
+                                    (model.Job.id > tracker.max_seen_job_id)))]
+        if new_job_ids:
+            tracker.max_seen_job_id = max(new_job_ids)
+            candidate_ids.update(new_job_ids)
+        jobs_to_check = []
+        if candidate_ids:
+            blocked_inputs = self.__blocked_job_inputs(candidate_ids)
+            tracker.track(blocked_inputs)
+            ready_ids = candidate_ids - {job_id for job_id, _ in blocked_inputs}
+            job_filter_conditions = (
+                (model.Job.state == model.Job.states.NEW),
+                (model.Job.handler == self.app.config.server_name))
+            if self.app.config.user_activation_on:
+                job_filter_conditions = job_filter_conditions + (
+                    or_((model.Job.user_id == null()), (model.User.active == true())),)
+            for chunk in chunk_iterable(sorted(ready_ids)):
+                jobs_to_check.extend(self.sa_session.query(model.Job).enable_eagerloads(False)
+                                     .outerjoin(model.User)
+                                     .filter(and_(model.Job.id.in_(chunk), *job_filter_conditions))
+                                     .order_by(model.Job.id).all())
+        tracker.counters.record_incremental_scan(scan_timer.elapsed)
+        log.trace(scan_timer.to_str())
+        return jobs_to_check
+
+    def __blocked_job_inputs(self, job_ids=None):
+        """
+        Return ``(job_id, dataset_id)`` pairs for new jobs assigned to this
+        handler with input datasets that are not ready yet.
+        """
+        blocked_inputs = []
+        job_id_chunks = [None] if job_ids is None else chunk_iterable(sorted(job_ids))
+        for chunk in job_id_chunks:
+            for job_to_input, input_association in [(model.JobToInputDatasetAssociation, model.HistoryDatasetAssociation),
+                                                    (model.JobToInputLibraryDatasetAssociation, model.LibraryDatasetDatasetAssociation)]:
+                q = self.sa_session.query(model.Job.id, model.Dataset.id).enable_eagerloads(False) \
+                    .join(job_to_input) \
+                    .join(input_association) \
+                    .join(model.Dataset) \
+                    .filter(and_(model.Job.state == model.Job.states.NEW,
+                                 model.Job.handler == self.app.config.server_name,
+                                 model.Dataset.state.in_(model.Dataset.non_ready_states)))
+                if chunk is not None:
+                    q = q.filter(model.Job.id.in_(chunk))
+                blocked_inputs.extend((job_id, dataset_id) for job_id, dataset_id in q)
+        return blocked_inputs
+
+    def dataset_states_changed(self, dataset_ids):
+        """
+        Notify the queue that the given datasets changed state (e.g. because
+        the job creating them finished or failed), so that jobs waiting on
+        them are checked on the next iteration. May be called from any thread.
+        """
+        if self.readiness_tracker is not None:
+            self.readiness_tracker.dataset_states_changed(dataset_ids)
+
     def __filter_jobs_with_invalid_input_states(self, jobs):
         """
         Takes  list of jobs and filters out jobs whose input datasets are in invalid state and
@@ -523,14 +650,20 @@ class JobHandlerQueue(Monitors):
                 jobs_to_pause[job_id].append(f"Input dataset '{hda_name}' is in error state")
             elif dataset_state != model.Dataset.states.OK:
                 jobs_to_ignore[job_id].append(f"Input dataset '{hda_name}' is in {dataset_state} state")
+        paused_dataset_ids = []
         for job_id in sorted(jobs_to_pause):
             pause_message = ", ".join(jobs_to_pause[job_id])
             pause_message = f"{pause_message}. To resume this job fix the input dataset(s)."
             job, job_wrapper = self.job_pair_for_id(job_id)
             try:
-                job_wrapper.pause(job=job, message=pause_message)
+                if job_wrapper.pause(job=job, message=pause_message):
+                    paused_dataset_ids.extend(dataset_assoc.dataset.dataset.id for dataset_assoc in job.output_datasets + job.output_library_datasets)
             except Exception:
                 log.exception("(%s) Caught exception while attempting to pause job.", job_id)
+        if paused_dataset_ids:
+            # Jobs waiting on the paused outputs get paused on the next iteration instead of the next full scan
+            self.sa_session.flush()
+            self.dataset_states_changed(paused_dataset_ids)
         for job_id in sorted(jobs_to_fail):
             fail_message = ", ".join(jobs_to_fail[job_id])
             job, job_wrapper = self.job_pair_for_id(job_id)
@@ -613,7 +746,7 @@ class JobHandlerQueue(Monitors):
 
         if state == JOB_READY:
             state = self.__check_user_jobs(job, job_wrapper)
-        if state == JOB_READY and self.app.quota_agent.is_over_quota(self.app, job, job_destination):
+        if state == JOB_READY and self.__is_over_quota(job, job_destination):
             return JOB_USER_OVER_QUOTA, job_destination
         # Check total walltime limits
         if (state == JOB_READY and "delta" in self.app.job_config.limits.total_walltime):
@@ -679,7 +812,18 @@ class JobHandlerQueue(Monitors):
         # All inputs ready to go.
         return None
 
+    def __is_over_quota(self, job, job_destination):
+        # Usage is read from the user's disk usage ledger, but resolving the
+        # quota walks the user's groups and quotas - only do that once per
+        # user per iteration.
+        if self.user_quota is None:
+            self.user_quota = {}
+        if job.user_id not in self.user_quota:
+            self.user_quota[job.user_id] = self.app.quota_agent.get_quota(job.user)
+        return self.app.quota_agent.is_over_quota(self.app, job, job_destination, quota=self.user_quota[job.user_id])
+
     def __clear_job_count(self):
+        self.user_quota = None
         self.user_job_count = None
         self.user_job_count_per_destination = None
         self.total_job_count_per_destination = None
@@ -0,0 +1,154 @@
+"""
+In-memory tracking of job input readiness for the job handler queue.
+
+Rather than re-running the full "which new jobs have all their inputs ready"
+query on every handler loop iteration, the handler can record which input
+datasets each waiting job is blocked on and only re-check the jobs whose
+inputs have changed state since the last iteration. A full reconciliation
+scan is still performed periodically to catch state changes made by other
+processes (e.g. datasets finished by another handler or uploaded through the
+web process).
+"""
+import threading
+import time
+from collections import defaultdict
+
+from galaxy.util.custom_logging import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_FULL_SCAN_INTERVAL = 60
+
+
+class ReadinessCounters:
+    """Running totals comparing full scans with incremental checks."""
+
+    def __init__(self):
+        self.full_scans = 0
+        self.full_scan_time = 0.0
+        self.incremental_scans = 0
+        self.incremental_scan_time = 0.0
+
+    def record_full_scan(self, elapsed):
+        self.full_scans += 1
+        self.full_scan_time += elapsed
+
+    def record_incremental_scan(self, elapsed):
+        self.incremental_scans += 1
+        self.incremental_scan_time += elapsed
+
+    def to_dict(self):
+        return {
+            'full_scans': self.full_scans,
+            'full_scan_time': self.full_scan_time,
+            'full_scan_mean_time': self.full_scan_time / self.full_scans if self.full_scans else 0.0,
+            'incremental_scans': self.incremental_scans,
+            'incremental_scan_time': self.incremental_scan_time,
+            'incremental_scan_mean_time': self.incremental_scan_time / self.incremental_scans if self.incremental_scans else 0.0,
+        }
+
+    def __str__(self):
+        return "full scans: {full_scans} ({full_scan_mean_time:0.3f}s avg), incremental scans: {incremental_scans} ({incremental_scan_mean_time:0.3f}s avg)".format(**self.to_dict())
+
+
+class JobReadinessTracker:
+    """
+    Dependency graph of waiting jobs to the dataset ids they are blocked on.
+
+    ``dataset_states_changed`` may be called from any thread (e.g. runner
+    worker threads finishing jobs), all other methods are meant to be called
+    from the handler's monitor thread.
+    """
+
+    def __init__(self, full_scan_interval=DEFAULT_FULL_SCAN_INTERVAL):
+        self.full_scan_interval = full_scan_interval
+        self.counters = ReadinessCounters()
+        self._lock = threading.Lock()
+        # job id -> set of dataset ids the job is still waiting on
+        self._blocked_jobs = {}
+        # dataset id -> set of job ids waiting on that dataset
+        self._waiters = defaultdict(set)
+        # dataset ids whose state changed since the last incremental scan
+        self._changed_datasets = set()
+        # jobs with ready inputs that were deferred (e.g. by concurrency limits)
+        self._deferred_jobs = set()
+        # highest job id seen by the last scan, newer jobs are picked up incrementally
+        self.max_seen_job_id = None
+        self._last_full_scan = None
+        self._force_full_scan = True
+
+    def full_scan_due(self, now=None):
+        if self._force_full_scan or self._last_full_scan is None or self.max_seen_job_id is None:
+            return True
+        now = time.time() if now is None else now
+        return now - self._last_full_scan >= self.full_scan_interval
+
+    def reconcile(self, blocked_inputs, max_seen_job_id, force_full_scan=False, now=None):
+        """
+        Replace the tracked graph with the result of a full scan.
+
+        ``blocked_inputs`` is an iterable of ``(job_id, dataset_id)`` pairs for
+        all new jobs with inputs that are not yet ready. If ``force_full_scan``
+        is set the next iteration performs a full scan again (e.g. because the
+        scan was truncated and more ready jobs may exist).
+        """
+        with self._lock:
+            self._blocked_jobs = {}
+            self._waiters = defaultdict(set)
+            self._changed_datasets = set()
+            self._deferred_jobs = set()
+            self._add_blocked(blocked_inputs)
+        self.max_seen_job_id = max_seen_job_id
+        self._force_full_scan = force_full_scan
+        self._last_full_scan = time.time() if now is None else now
+
+    def track(self, blocked_inputs):
+        """Add newly discovered ``(job_id, dataset_id)`` blocking pairs."""
+        with self._lock:
+            self._add_blocked(blocked_inputs)
+
+    def _add_blocked(self, blocked_inputs):
+        for job_id, dataset_id in blocked_inputs:
+            self._blocked_jobs.setdefault(job_id, set()).add(dataset_id)
+            self._waiters[dataset_id].add(job_id)
+
+    def untrack(self, job_id):
+        with self._lock:
+            self._deferred_jobs.discard(job_id)
+            for dataset_id in self._blocked_jobs.pop(job_id, ()):
+                waiters = self._waiters.get(dataset_id)
+                if waiters is not None:
+                    waiters.discard(job_id)
+                    if not waiters:
+                        del self._waiters[dataset_id]
+
+    def defer(self, job_id):
+        """Mark a job with ready inputs to be checked again on the next scan."""
+        with self._lock:
+            self._deferred_jobs.add(job_id)
+
+    def dataset_states_changed(self, dataset_ids):
+        with self._lock:
+            self._changed_datasets.update(dataset_ids)
+
+    def pop_candidate_job_ids(self):
+        """
+        Return ids of jobs that should be checked on this iteration: deferred
+        jobs and jobs waiting on a dataset whose state changed.
+
+        Jobs returned here are no longer tracked, callers are expected to
+        ``track`` or ``defer`` them again if they still can't be dispatched.
+        """
+        with self._lock:
+            candidates = set(self._deferred_jobs)
+            self._deferred_jobs = set()
+            for dataset_id in self._changed_datasets:
+                candidates.update(self._waiters.get(dataset_id, ()))
+            self._changed_datasets = set()
+        for job_id in candidates:
+            self.untrack(job_id)
+        return candidates
+
+    @property
+    def blocked_job_count(self):
+        return len(self._blocked_jobs)
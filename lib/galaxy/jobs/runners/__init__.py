@@ -107,11 +107,12 @@ class BaseJobRunner:
                         alive = True
                     yield thread
 
-    def run_next(self):
+    def run_next(self, work_queue=None):
         """Run the next item in the work queue (a job waiting to run)
         """
+        work_queue = work_queue or self.work_queue
         while True:
-            (method, arg) = self.work_queue.get()
+            (method, arg) = work_queue.get()
             if method is STOP_SIGNAL:
                 return
             # id and name are collected first so that the call of method() is the last exception.
@@ -610,6 +611,11 @@ class AsynchronousJobState(JobState):
         self._running = False
         self.check_count = 0
         self.start_time = None
+        # Adaptive polling, see schedule_next_check()
+        self.check_interval = None
+        self.next_check_time = None
+        # Set when the job is put on the runner's finish queue
+        self.finish_queued_time = None
 
         # job_id is the DRM's job id, not the Galaxy job id
         self.job_id = job_id
@@ -649,11 +655,65 @@ class AsynchronousJobState(JobState):
             return True
         return False
 
+    def due_for_check(self, now=None):
+        if self.next_check_time is None:
+            return True
+        return (time.time() if now is None else now) >= self.next_check_time
+
+    def schedule_next_check(self, state_changed, min_interval, max_interval, backoff_factor):
+        """
+        Compute when this job should next be polled. The interval is reset to
+        ``min_interval`` on state changes and grows by ``backoff_factor`` (up
+        to ``max_interval``) for every check that did not change the state, so
+        long running jobs are polled less often.
+        """
+        if state_changed or self.check_interval is None:
+            self.check_interval = min_interval
+        else:
+            self.check_interval = min(max_interval, self.check_interval * backoff_factor)
+        self.next_check_time = time.time() + self.check_interval
+
     def register_cleanup_file_attribute(self, attribute):
         if attribute not in self.cleanup_file_attributes:
             self.cleanup_file_attributes.append(attribute)
 
 
+class FinishMetrics:
+    """
+    Running totals of how long jobs waited in a runner's finish queue and how
+    long finishing them took, along with the last seen depths of the finish
+    queue and of the runner's work queue (the same queue unless the runner has
+    dedicated finish workers).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+        self.totals = {}
+        self.maxima = {}
+        self.queue_depth = 0
+        self.work_queue_depth = 0
+
+    def record(self, name, elapsed, queue_depth, work_queue_depth=None):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+            self.totals[name] = self.totals.get(name, 0.0) + elapsed
+            self.maxima[name] = max(self.maxima.get(name, 0.0), elapsed)
+            self.queue_depth = queue_depth
+            self.work_queue_depth = queue_depth if work_queue_depth is None else work_queue_depth
+
+    def to_dict(self):
+        with self._lock:
+            rval = {'queue_depth': self.queue_depth, 'work_queue_depth': self.work_queue_depth}
+            for name, count in self.counts.items():
+                rval[name] = {
+                    'count': count,
+                    'mean': self.totals[name] / count,
+                    'max': self.maxima[name],
+                }
+            return rval
+
+
 class AsynchronousJobRunner(BaseJobRunner, Monitors):
     """Parent class for any job runner that runs jobs asynchronously (e.g. via
     a distributed resource manager).  Provides general methods for having a
@@ -661,7 +721,17 @@ class AsynchronousJobRunner(BaseJobRunner, Monitors):
     to the correct methods (queue, finish, cleanup) at appropriate times..
     """
 
+    MONITOR_SPECS = dict(
+        monitor_interval=dict(map=float, valid=lambda x: float(x) > 0, default=1.0),
+        monitor_max_interval=dict(map=float, valid=lambda x: float(x) > 0, default=1.0),
+        monitor_backoff_factor=dict(map=float, valid=lambda x: float(x) >= 1, default=2.0),
+        finish_workers=dict(map=int, valid=lambda x: int(x) >= 0, default=0),
+    )
+
     def __init__(self, app, nworkers, **kwargs):
+        runner_param_specs = self.MONITOR_SPECS.copy()
+        runner_param_specs.update(kwargs.get('runner_param_specs', {}))
+        kwargs['runner_param_specs'] = runner_param_specs
         super().__init__(app, nworkers, **kwargs)
         # 'watched' and 'queue' are both used to keep track of jobs to watch.
         # 'queue' is used to add new watched jobs, and can be called from
@@ -670,6 +740,23 @@ class AsynchronousJobRunner(BaseJobRunner, Monitors):
         # to 'watched' and then manage the watched jobs.
         self.watched = []
         self.monitor_queue = Queue()
+        self.finish_metrics = FinishMetrics()
+
+    def _init_worker_threads(self):
+        """Start ``nworkers`` worker threads and, if the ``finish_workers``
+        runner param is set, a separate pool of threads that only finish jobs.
+        """
+        super()._init_worker_threads()
+        self.finish_queue = self.work_queue
+        self.finish_threads = []
+        if self.runner_params.finish_workers:
+            self.finish_queue = Queue()
+            log.debug(f'Starting {self.runner_params.finish_workers} {self.runner_name} finish workers')
+            for i in range(self.runner_params.finish_workers):
+                worker = threading.Thread(name="%s.finish_thread-%d" % (self.runner_name, i), target=self.run_next, kwargs=dict(work_queue=self.finish_queue))
+                worker.daemon = True
+                self.app.application_stack.register_postfork_function(worker.start)
+                self.finish_threads.append(worker)
 
     def _init_monitor_thread(self):
         name = f"{self.runner_name}.monitor_thread"
@@ -702,7 +789,7 @@ class AsynchronousJobRunner(BaseJobRunner, Monitors):
             except Exception:
                 log.exception('Unhandled exception checking active jobs')
             # Sleep a bit before the next state check
-            time.sleep(1)
+            time.sleep(self.runner_params.monitor_interval)
 
     def monitor_job(self, job_state):
         self.monitor_queue.put(job_state)
@@ -713,6 +800,10 @@ class AsynchronousJobRunner(BaseJobRunner, Monitors):
         self.monitor_queue.put(STOP_SIGNAL)
         # Call the parent's shutdown method to stop workers
         self.shutdown_monitor()
+        if self.finish_threads:
+            log.info("%s: Sending stop signal to %s job finish threads", self.runner_name, len(self.finish_threads))
+            for _ in range(len(self.finish_threads)):
+                self.finish_queue.put((STOP_SIGNAL, None))
         super().shutdown()
 
     def check_watched_items(self):
@@ -730,11 +821,52 @@ class AsynchronousJobRunner(BaseJobRunner, Monitors):
                 new_watched.append(new_async_job_state)
         self.watched = new_watched
 
+    def _schedule_next_check(self, job_state, state_changed):
+        """
+        Set when ``job_state`` should be polled next. Runners that support
+        adaptive polling skip watched jobs for which ``due_for_check()`` is
+        False. With the default ``monitor_max_interval`` every job is polled
+        on each monitor iteration.
+        """
+        job_state.schedule_next_check(
+            state_changed,
+            self.runner_params.monitor_interval,
+            max(self.runner_params.monitor_interval, self.runner_params.monitor_max_interval),
+            self.runner_params.monitor_backoff_factor,
+        )
+
     # Subclasses should implement this unless they override check_watched_items all together.
     def check_watched_item(self, job_state):
         raise NotImplementedError()
 
     def finish_job(self, job_state):
+        """
+        Finish a job and record how long it waited to be finished and how long
+        finishing it took. Runners customize finishing by overriding
+        ``_finish_job``.
+        """
+        finish_start = time.time()
+        if job_state.finish_queued_time is not None:
+            self._record_finish_metric('finish_queue_wait', finish_start - job_state.finish_queued_time)
+            job_state.finish_queued_time = None
+        try:
+            self._finish_job(job_state)
+        finally:
+            self._record_finish_metric('finish_latency', time.time() - finish_start)
+
+    def _record_finish_metric(self, name, elapsed):
+        finish_queue_depth = self.finish_queue.qsize()
+        work_queue_depth = self.work_queue.qsize()
+        self.finish_metrics.record(name, elapsed, finish_queue_depth, work_queue_depth)
+        statsd_client = getattr(self.app.execution_timer_factory, 'galaxy_statsd_client', None)
+        if statsd_client:
+            prefix = f'galaxy.jobs.runners.{self.runner_name.lower()}'
+            statsd_client.timing(f'{prefix}.{name}', elapsed * 1000.)
+            statsd_client.gauge(f'{prefix}.work_queue_depth', work_queue_depth)
+            if self.finish_queue is not self.work_queue:
+                statsd_client.gauge(f'{prefix}.finish_queue_depth', finish_queue_depth)
+
+    def _finish_job(self, job_state):
         """
         Get the output/error for a finished job, pass to `job_wrapper.finish`
         and cleanup all the job's temporary files.
@@ -773,7 +905,9 @@ class AsynchronousJobRunner(BaseJobRunner, Monitors):
         self._finish_or_resubmit_job(job_state, stdout, stderr, job_id=galaxy_id_tag, external_job_id=external_job_id)
 
     def mark_as_finished(self, job_state):
-        self.work_queue.put((self.finish_job, job_state))
+        if isinstance(job_state, AsynchronousJobState):
+            job_state.finish_queued_time = time.time()
+        self.finish_queue.put((self.finish_job, job_state))
 
     def mark_as_failed(self, job_state):
         self.work_queue.put((self.fail_job, job_state))
@@ -209,12 +209,12 @@ class CondorJobRunner(AsynchronousJobRunner):
                     if external_metadata:
                         self._handle_metadata_externally(cjs.job_wrapper, resolve_requirements=True)
                     log.debug(f"({galaxy_id_tag}/{job_id}) job has completed")
-                    self.work_queue.put((self.finish_job, cjs))
+                    self.mark_as_finished(cjs)
                 continue
             if job_failed:
                 log.debug(f"({galaxy_id_tag}/{job_id}) job failed")
                 cjs.failed = True
-                self.work_queue.put((self.finish_job, cjs))
+                self.mark_as_finished(cjs)
                 continue
             cjs.runnning = job_running
             new_watched.append(cjs)
@@ -246,7 +246,7 @@ class CondorJobRunner(AsynchronousJobRunner):
                     if external_metadata:
                         self._handle_metadata_externally(cjs.job_wrapper, resolve_requirements=True)
                     log.debug(f"({galaxy_id_tag}/{external_id}) job has completed")
-                    self.work_queue.put((self.finish_job, cjs))
+                    self.mark_as_finished(cjs)
             except Exception as e:
                 log.warning(f"stop_job(): {job.id}: trying to stop container failed. ({e})")
                 try:
@@ -253,13 +253,25 @@ class DRMAAJobRunner(AsynchronousJobRunner):
             if external_metadata:
                 self._handle_metadata_externally(ajs.job_wrapper, resolve_requirements=True)
             if job_state != model.Job.states.DELETED:
-                self.work_queue.put((self.finish_job, ajs))
+                self.mark_as_finished(ajs)
 
-    def check_watched_item(self, ajs, new_watched):
+    def _get_bulk_job_states(self, watched):
+        """
+        Return a dict mapping external job ids to DRMAA job states for (some of)
+        the watched jobs in ``watched``, obtained with a single query to the DRM
+        per monitor iteration. Jobs missing from the result are checked
+        individually with ``job_status``. Subclasses may implement this for
+        DRMs that provide a bulk status interface.
+        """
+        return {}
+
+    def check_watched_item(self, ajs, new_watched, state=None):
         """
         look at a single watched job, determine its state, and deal with errors
         that could happen in this process. to be called from check_watched_items()
         returns the state or None if exceptions occurred
+        if ``state`` is given (e.g. from a bulk status query) the DRM is not
+        queried again for this job
         in the latter case the job is appended to new_watched if a
 
         1 drmaa.InternalException,
@@ -277,10 +289,10 @@ class DRMAAJobRunner(AsynchronousJobRunner):
         """
         external_job_id = ajs.job_id
         galaxy_id_tag = ajs.job_wrapper.get_id_tag()
-        state = None
         try:
             assert external_job_id not in (None, 'None'), f'({galaxy_id_tag}/{external_job_id}) Invalid job id'
-            state = self.ds.job_status(external_job_id)
+            if state is None:
+                state = self.ds.job_status(external_job_id)
             # Reset exception retries
             for retry_exception in RETRY_EXCEPTIONS_LOWER:
                 setattr(ajs, f"{retry_exception}_retries", 0)
@@ -298,7 +310,7 @@ class DRMAAJobRunner(AsynchronousJobRunner):
                     return None
             if self.runner_params[state_param] == model.Job.states.OK:
                 log.warning("(%s/%s) job will now be finished OK", galaxy_id_tag, external_job_id)
-                self.work_queue.put((self.finish_job, ajs))
+                self.mark_as_finished(ajs)
             elif self.runner_params[state_param] == model.Job.states.ERROR:
                 log.warning("(%s/%s) job will now be errored", galaxy_id_tag, external_job_id)
                 self.work_queue.put((self.fail_job, ajs))
@@ -324,11 +336,22 @@ class DRMAAJobRunner(AsynchronousJobRunner):
         with state changes.
         """
         new_watched = []
+        now = time.time()
+        due = [ajs for ajs in self.watched if ajs.due_for_check(now)]
+        bulk_states = {}
+        if due:
+            try:
+                bulk_states = self._get_bulk_job_states(due)
+            except Exception:
+                log.exception("Unable to get bulk job states from the DRM, checking jobs individually")
         for ajs in self.watched:
+            if not ajs.due_for_check(now):
+                new_watched.append(ajs)
+                continue
             external_job_id = ajs.job_id
             galaxy_id_tag = ajs.job_wrapper.get_id_tag()
             old_state = ajs.old_state
-            state = self.check_watched_item(ajs, new_watched)
+            state = self.check_watched_item(ajs, new_watched, state=bulk_states.get(external_job_id))
             if state is None:
                 continue
             if state != old_state:
@@ -349,6 +372,7 @@ class DRMAAJobRunner(AsynchronousJobRunner):
                 self.work_queue.put((self.fail_job, ajs))
                 continue
             ajs.old_state = state
+            self._schedule_next_check(ajs, state != old_state)
             new_watched.append(ajs)
         # Replace the watch list with the updated version
         self.watched = new_watched
@@ -374,7 +374,7 @@ class PBSJobRunner(AsynchronousJobRunner):
                     if errno == 15001:
                         # 15001 == job not in queue
                         log.debug(f"({galaxy_job_id}/{job_id}) PBS job has left queue")
-                        self.work_queue.put((self.finish_job, pbs_job_state))
+                        self.mark_as_finished(pbs_job_state)
                     else:
                         # Unhandled error, continue to monitor
                         log.info("(%s/%s) PBS state check resulted in error (%d): %s" % (galaxy_job_id, job_id, errno, text))
@@ -408,7 +408,7 @@ class PBSJobRunner(AsynchronousJobRunner):
                 except AttributeError:
                     # No exit_status, can't verify proper completion so we just have to assume success.
                     log.debug(f"({galaxy_job_id}/{job_id}) PBS job has completed")
-                self.work_queue.put((self.finish_job, pbs_job_state))
+                self.mark_as_finished(pbs_job_state)
                 continue
             pbs_job_state.old_state = status.job_state
             new_watched.append(pbs_job_state)
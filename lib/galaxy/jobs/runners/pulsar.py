@@ -611,7 +611,7 @@ class PulsarJobRunner(AsynchronousJobRunner):
         job_destination_params = dict(job_destination_params.items())
         return self.client_manager.get_client(job_destination_params, **get_client_kwds)
 
-    def finish_job(self, job_state):
+    def _finish_job(self, job_state):
         stderr = stdout = ''
         job_wrapper = job_state.job_wrapper
         try:
@@ -3,10 +3,15 @@ SLURM job control via the DRMAA API.
 """
 import os
 import time
+from collections import defaultdict
 
 from galaxy import model
 from galaxy.jobs.runners.drmaa import DRMAAJobRunner
-from galaxy.util import commands
+from galaxy.util import (
+    asbool,
+    chunk_iterable,
+    commands,
+)
 from galaxy.util.custom_logging import get_logger
 
 log = get_logger(__name__)
@@ -30,10 +35,144 @@ OUT_OF_MEMORY_MSG = 'This job was terminated because it used more memory than it
 PROBABLY_OUT_OF_MEMORY_MSG = 'This job was cancelled probably because it used more memory than it was allocated.'
 
 
+# SLURM job states that are not terminal, all others are treated as terminal
+SLURM_QUEUED_STATES = ('PENDING', 'CONFIGURING', 'REQUEUED', 'REQUEUE_FED', 'REQUEUE_HOLD', 'RESIZING')
+SLURM_RUNNING_STATES = ('RUNNING', 'COMPLETING', 'STAGE_OUT', 'SIGNALING')
+SLURM_SUSPENDED_STATES = ('SUSPENDED', 'STOPPED')
+SLURM_DONE_STATES = ('COMPLETED',)
+
+
+def _split_job_id(job_id):
+    """Split custom slurm-drmaa-with-cluster-support job ids into (job id, cluster)."""
+    if '.' in job_id:
+        return job_id.split('.', 1)
+    return job_id, None
+
+
+def _parse_slurm_state(state):
+    # Strip the final '+' (if present) and reasons such as 'CANCELLED by 1000'
+    return state.strip().split()[0].rstrip('+')
+
+
+def parse_squeue_states(stdout):
+    """
+    Parse the output of ``squeue -h -o '%i %T'`` into a dict of job id to
+    SLURM state.
+
+    >>> sorted(parse_squeue_states("CLUSTER: one\\n12 RUNNING\\n13 PENDING\\n").items())
+    [('12', 'RUNNING'), ('13', 'PENDING')]
+    """
+    states = {}
+    for line in stdout.splitlines():
+        fields = line.split()
+        if len(fields) != 2 or line.startswith('CLUSTER:'):
+            continue
+        states[fields[0]] = _parse_slurm_state(fields[1])
+    return states
+
+
+def parse_sacct_states(stdout):
+    """
+    Parse the output of ``sacct -n -P -X -o JobID,State`` into a dict of job
+    id to SLURM state.
+
+    >>> sorted(parse_sacct_states("12|COMPLETED\\n13|CANCELLED by 1000\\n14|OUT_OF_MEMORY+\\n").items())
+    [('12', 'COMPLETED'), ('13', 'CANCELLED'), ('14', 'OUT_OF_MEMORY')]
+    """
+    states = {}
+    for line in stdout.splitlines():
+        fields = line.split('|')
+        if len(fields) < 2 or not fields[1].strip():
+            continue
+        states[fields[0].strip()] = _parse_slurm_state(fields[1])
+    return states
+
+
 class SlurmJobRunner(DRMAAJobRunner):
     runner_name = "SlurmRunner"
     restrict_job_name_length = False
 
+    def __init__(self, app, nworkers, **kwargs):
+        runner_param_specs = dict(
+            bulk_status=dict(map=asbool, default=False),
+            bulk_status_chunk_size=dict(map=int, valid=lambda x: int(x) > 0, default=500),
+        )
+        if 'runner_param_specs' not in kwargs:
+            kwargs['runner_param_specs'] = dict()
+        kwargs['runner_param_specs'].update(runner_param_specs)
+        super().__init__(app, nworkers, **kwargs)
+
+    def _get_bulk_job_states(self, watched):
+        """
+        Query the states of all watched jobs with one ``squeue`` call (and one
+        ``sacct`` call for jobs that already left the queue) per
+        ``bulk_status_chunk_size`` jobs, instead of one DRMAA status call per
+        job. The SLURM state is recorded on the job state so that
+        ``_complete_terminal_job`` does not need to query it again.
+        """
+        if not self.runner_params.bulk_status:
+            return {}
+        job_ids_by_cluster = defaultdict(dict)
+        for ajs in watched:
+            ajs.slurm_state = None
+            if ajs.job_id in (None, 'None'):
+                continue
+            job_id, cluster = _split_job_id(ajs.job_id)
+            job_ids_by_cluster[cluster][job_id] = ajs
+        drmaa_states = {}
+        for cluster, jobs in job_ids_by_cluster.items():
+            for job_ids in chunk_iterable(jobs, self.runner_params.bulk_status_chunk_size):
+                slurm_states = self._squeue_states(job_ids, cluster)
+                missing_job_ids = [job_id for job_id in job_ids if job_id not in slurm_states]
+                if missing_job_ids:
+                    slurm_states.update(self._sacct_states(missing_job_ids, cluster))
+                for job_id, slurm_state in slurm_states.items():
+                    ajs = jobs.get(job_id)
+                    drmaa_state = self._slurm_to_drmaa_state(slurm_state)
+                    if ajs is None or drmaa_state is None:
+                        continue
+                    ajs.slurm_state = slurm_state
+                    drmaa_states[ajs.job_id] = drmaa_state
+        return drmaa_states
+
+    def _squeue_states(self, job_ids, cluster):
+        cmd = ['squeue', '-h', '-t', 'all', '-o', '%i %T']
+        if cluster:
+            cmd.extend(['-M', cluster])
+        cmd.extend(['-j', ','.join(job_ids)])
+        try:
+            stdout = commands.execute(cmd)
+        except commands.CommandLineException as e:
+            # squeue fails if none of the job ids are known anymore
+            log.debug('squeue failed for bulk status query, falling back to sacct: %s', e)
+            return {}
+        return parse_squeue_states(stdout)
+
+    def _sacct_states(self, job_ids, cluster):
+        cmd = ['sacct', '-n', '-P', '-X', '-o', 'JobID,State']
+        if cluster:
+            cmd.extend(['-M', cluster])
+        cmd.extend(['-j', ','.join(job_ids)])
+        try:
+            stdout = commands.execute(cmd)
+        except commands.CommandLineException as e:
+            log.debug('sacct failed for bulk status query, jobs will be checked individually: %s', e)
+            return {}
+        return parse_sacct_states(stdout)
+
+    def _slurm_to_drmaa_state(self, slurm_state):
+        if slurm_state in SLURM_QUEUED_STATES:
+            return self.drmaa_job_states.QUEUED_ACTIVE
+        elif slurm_state in SLURM_RUNNING_STATES:
+            return self.drmaa_job_states.RUNNING
+        elif slurm_state in SLURM_SUSPENDED_STATES:
+            return self.drmaa_job_states.SYSTEM_SUSPENDED
+        elif slurm_state in SLURM_DONE_STATES:
+            return self.drmaa_job_states.DONE
+        elif slurm_state:
+            return self.drmaa_job_states.FAILED
+        return None
+
     def _complete_terminal_job(self, ajs, drmaa_state, **kwargs):
         def _get_slurm_state_with_sacct(job_id, cluster):
             cmd = ['sacct', '-n', '-o', 'state%-32']
@@ -55,6 +194,11 @@ class SlurmJobRunner(DRMAAJobRunner):
             return first_line.strip().rstrip('+').split()[0]
 
         def _get_slurm_state():
+            # Use the state from the bulk status query if available
+            bulk_slurm_state = getattr(ajs, 'slurm_state', None)
+            ajs.slurm_state = None
+            if bulk_slurm_state and bulk_slurm_state != 'COMPLETING':
+                return bulk_slurm_state
             cmd = ['scontrol', '-o']
             if '.' in ajs.job_id:
                 # custom slurm-drmaa-with-cluster-support job id syntax
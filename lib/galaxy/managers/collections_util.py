@@ -123,6 +123,9 @@ def dictify_dataset_collection_instance(dataset_collection_instance, parent, sec
     )
     if view in ["element", "element-reference"]:
         collection = dataset_collection_instance.collection
+        if fuzzy_count is None and collection.has_subcollections:
+            # All nested elements are serialized, load them at once
+            collection.preload_elements()
         rank_fuzzy_counts = gen_rank_fuzzy_counts(collection.collection_type, fuzzy_count)
         elements, rest_fuzzy_counts = get_fuzzy_count_elements(collection, rank_fuzzy_counts)
         if view == "element":
@@ -354,7 +354,7 @@ class DatasetAssociationManager(base.ModelManager,
             else:
                 path = data.dataset.file_name
                 is_binary = check_binary(path)
-                datatype = sniff.guess_ext(path, trans.app.datatypes_registry.sniff_order, is_binary=is_binary)
+                datatype = sniff.guess_ext(path, trans.app.datatypes_registry.sniff_dispatcher, is_binary=is_binary)
                 trans.app.datatypes_registry.change_datatype(data, datatype)
                 trans.sa_session.flush()
                 self.set_metadata(trans, dataset_assoc)
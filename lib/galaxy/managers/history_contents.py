@@ -3,13 +3,17 @@ Heterogenous lists/contents are difficult to query properly since unions are
 not easily made.
 """
 import logging
+import operator
+from collections import namedtuple
 
 from sqlalchemy import (
+    and_,
     asc,
     desc,
     false,
     func,
     literal,
+    or_,
     sql,
     true
 )
@@ -36,6 +40,9 @@ from galaxy.structured_app import MinimalManagerApp
 
 log = logging.getLogger(__name__)
 
+#: a page of contents, `after` is the keyset of the last row of the page
+ContentsPage = namedtuple('ContentsPage', ['contents', 'after', 'has_more'])
+
 
 # into its own class to have it's own filters, etc.
 # TODO: but can't inherit from model manager (which assumes only one model)
@@ -72,6 +79,9 @@ class HistoryContentsManager(containers.ContainerManagerMixin, base.SortableMana
         "update_time",
     )
     default_order_by = 'hid'
+    #: the orders keyset pagination (`contents_page`) supports, rows are also
+    #  ordered by content type and id so that a keyset identifies a single row
+    keyset_orders = ('hid-asc', 'hid-dsc', 'update_time-asc', 'update_time-dsc')
 
     def __init__(self, app: MinimalManagerApp):
         self.app = app
@@ -106,6 +116,50 @@ class HistoryContentsManager(containers.ContainerManagerMixin, base.SortableMana
         return self._union_of_contents(container,
             filters=filters, limit=limit, offset=offset, order_by=order_by, **kwargs)
 
+    def contents_page(self, container, order='hid-asc', after=None, filters=None, limit=None, expand_models=True,
+                      **kwargs):
+        """
+        Returns a `ContentsPage` of both/all types of contents, filtered and in
+        the keyset `order`, that follow the keyset `after`.
+
+        `after` is the `(order value, history_content_type, id)` of the last row
+        of the previous page (the page's `after`). Unlike an offset, which makes
+        the database go through the rows of all previous pages, this is answered
+        from the history_id and hid/update_time index.
+
+        If `expand_models` is False, the contents are the rows of the union
+        query (see `HistoryContentsSerializer` to serialize them).
+        """
+        column_name, descending = self.parse_keyset_order(order)
+        direction = desc if descending else asc
+        order_by = [direction(column_name), direction('history_content_type'), direction('id')]
+        rows = self._union_of_contents_query(container,
+            filters=filters, limit=limit + 1 if limit is not None else None, order_by=order_by,
+            keyset=(column_name, descending, after), **kwargs).all()
+        has_more = limit is not None and len(rows) > limit
+        rows = rows[:limit]
+        if rows:
+            last = rows[-1]
+            after = (getattr(last, column_name), last.history_content_type, last.id)
+        contents = rows
+        if expand_models:
+            contents = self._expand_union_rows(rows, filters=filters,
+                serialization_params=kwargs.get('serialization_params'))
+        return ContentsPage(contents, after, has_more)
+
+    def parse_keyset_order(self, order_string):
+        """
+        Return the column name and whether the order is descending for one of
+        the `keyset_orders` (or the column name alone, meaning descending).
+        """
+        if order_string in ('hid', 'update_time'):
+            order_string = f'{order_string}-dsc'
+        if order_string not in self.keyset_orders:
+            raise glx_exceptions.RequestParameterInvalidException('Unknown keyset order', order=order_string,
+                available=self.keyset_orders)
+        column_name, direction = order_string.rsplit('-', 1)
+        return column_name, direction == 'dsc'
+
     def contents_count(self, container, filters=None, limit=None, offset=None, order_by=None, **kwargs):
         """
         Returns a count of both/all types of contents, based on the given filters.
@@ -222,7 +276,14 @@ class HistoryContentsManager(containers.ContainerManagerMixin, base.SortableMana
         contents_results = self._union_of_contents_query(container, **kwargs).all()
         if not expand_models:
             return contents_results
+        return self._expand_union_rows(contents_results, filters=kwargs.get('filters'),
+            serialization_params=kwargs.get('serialization_params'))
 
+    def _expand_union_rows(self, contents_results, filters=None, serialization_params=None):
+        """
+        Returns the models of the union query rows `contents_results` that pass the
+        function `filters`, in the order of the rows.
+        """
         # partition ids into a map of { component_class names -> list of ids } from the above union query
         id_map = dict(((self.contained_class_type_name, []), (self.subcontainer_class_type_name, [])))
         for result in contents_results:
@@ -237,12 +298,11 @@ class HistoryContentsManager(containers.ContainerManagerMixin, base.SortableMana
         contained_ids = id_map[self.contained_class_type_name]
         id_map[self.contained_class_type_name] = self._contained_id_map(contained_ids)
         subcontainer_ids = id_map[self.subcontainer_class_type_name]
-        serialization_params = kwargs.get('serialization_params', None)
         id_map[self.subcontainer_class_type_name] = self._subcontainer_id_map(subcontainer_ids, serialization_params=serialization_params)
 
         # cycle back over the union query to create an ordered list of the objects returned in queries 2 & 3 above
         contents = []
-        filters = kwargs.get('filters') or []
+        filters = filters or []
         # TODO: or as generator?
         for result in contents_results:
             result_type = self._get_union_type(result)
@@ -267,10 +327,14 @@ class HistoryContentsManager(containers.ContainerManagerMixin, base.SortableMana
                                  offset=None,
                                  order_by=None,
                                  user_id=None,
+                                 keyset=None,
                                  **kwargs):
         """
         Returns a query for a limited and offset list of both types of contents,
         filtered and in some order.
+
+        `keyset` is a `(column name, descending, after)` tuple, if given only the
+        rows following the keyset `after` (see `contents_page`) are returned.
         """
         order_by = order_by if order_by is not None else self.default_order_by
         order_by = order_by if isinstance(order_by, (tuple, list)) else (order_by, )
@@ -300,6 +364,11 @@ class HistoryContentsManager(containers.ContainerManagerMixin, base.SortableMana
                 contained_query = self._apply_orm_filter(contained_query, orm_filter.filter)
                 subcontainer_query = self._apply_orm_filter(subcontainer_query, orm_filter.filter)
 
+        if keyset is not None and keyset[2] is not None:
+            # filter both queries, so that each one can use its own index
+            contained_query = self._apply_keyset_filter(contained_query, self.contained_class_type_name, *keyset)
+            subcontainer_query = self._apply_keyset_filter(subcontainer_query, self.subcontainer_class_type_name, *keyset)
+
         contents_query = contained_query.union_all(subcontainer_query)
         contents_query = contents_query.order_by(*order_by)
 
@@ -318,6 +387,24 @@ class HistoryContentsManager(containers.ContainerManagerMixin, base.SortableMana
                 qry = qry.filter(new_filter)
         return qry
 
+    def _apply_keyset_filter(self, qry, content_type, column_name, descending, after):
+        """
+        Filter `qry`, the union query part of `content_type`, to the rows that follow
+        the keyset `after` in the order of `column_name`, content type and id.
+        """
+        value, after_type, after_id = after
+        columns = {description['name']: description['expr'] for description in qry.column_descriptions}
+        column = columns[column_name]
+        follows = operator.lt if descending else operator.gt
+        # the content type is the same for all rows of the query
+        if content_type == after_type:
+            condition = or_(follows(column, value), and_(column == value, follows(columns['id'], after_id)))
+        elif follows(content_type, after_type):
+            condition = or_(follows(column, value), column == value)
+        else:
+            condition = follows(column, value)
+        return qry.filter(condition)
+
     def _contents_common_columns(self, component_class, **kwargs):
         columns = []
         # pull column from class by name or override with kwargs if listed there, then label
@@ -421,8 +508,12 @@ class HistoryContentsManager(containers.ContainerManagerMixin, base.SortableMana
 class HistoryContentsSerializer(base.ModelSerializer, deletable.PurgableSerializerMixin):
     """
     Interface/service object for serializing histories into dictionaries.
+
+    Besides models, this serializes the rows of the contents union query (see
+    `HistoryContentsManager.contents_page`) whose columns are `projectable_keys`.
     """
     model_manager_class = HistoryContentsManager
+    projectable_keys = frozenset(HistoryContentsManager.common_columns)
 
     def __init__(self, app: MinimalManagerApp, **kwargs):
         super().__init__(app, **kwargs)
@@ -458,11 +549,18 @@ class HistoryContentsSerializer(base.ModelSerializer, deletable.PurgableSerializ
         })
 
     def serialize_id_or_skip(self, content, key, **context):
-        """Serialize id or skip if attribute with `key` is not present."""
-        if not hasattr(content, key):
+        """Serialize id or skip if attribute with `key` is not present or not set."""
+        if getattr(content, key, None) is None:
             raise base.SkipAttribute('no such attribute')
         return self.serialize_id(content, key, **context)
 
+    def can_project(self, view=None, keys=None):
+        """
+        Return whether serializing contents to `keys` only needs the union query
+        columns, so that the union query rows can be serialized instead of models.
+        """
+        return view is None and bool(keys) and set(keys) <= self.projectable_keys
+
 
 class HistoryContentsFilters(base.ModelFilterParser,
                              annotatable.AnnotatableFilterMixin,
@@ -22,6 +22,7 @@ from galaxy.managers.collections import DatasetCollectionManager
 from galaxy.managers.datasets import DatasetManager
 from galaxy.managers.hdas import HDAManager
 from galaxy.managers.lddas import LDDAManager
+from galaxy.model import job_fingerprint
 from galaxy.security.idencoding import IdEncodingHelper
 from galaxy.structured_app import StructuredApp
 from galaxy.util import (
@@ -124,8 +125,11 @@ class JobSearch:
                     current_case = current_case[p]
                 src = current_case['src']
                 current_case = param
+                multiple = False
                 for i, p in enumerate(path):
                     if p == 'values' and i == len(path) - 2:
+                        # A list of datasets for a multiple data input
+                        multiple = isinstance(current_case, list)
                         continue
                     if isinstance(current_case, (list, dict)):
                         current_case = current_case[p]
@@ -133,6 +137,7 @@ class JobSearch:
                 input_data[path_key].append({'src': src,
                                              'id': value,
                                              'identifier': identifier,
+                                             'multiple': multiple,
                                              })
                 return key, "__id_wildcard__"
             return key, value
@@ -188,6 +193,12 @@ class JobSearch:
                     or_(*o)
                 )
 
+        if tool_version and param_dump is not None:
+            job = self.__search_by_fingerprint(job_conditions, tool_id, tool_version, input_data, param_dump)
+            if job is not None:
+                log.info("Found equivalent job by fingerprint %s", search_timer)
+                return job
+
         for k, v in wildcard_param_dump.items():
             wildcard_value = None
             if v == {'__class__': 'RuntimeValue'}:
@@ -392,6 +403,32 @@ class JobSearch:
         log.info("No equivalent jobs found %s", search_timer)
         return None
 
+    def __search_by_fingerprint(self, job_conditions, tool_id, tool_version, input_data, param_dump):
+        identifiers = {}
+        for k, input_list in input_data.items():
+            for i, type_values in enumerate(input_list):
+                if type_values['src'] not in job_fingerprint.INPUT_IDENTITIES:
+                    return None
+                identifier = type_values['identifier']
+                if identifier is None:
+                    continue
+                if type_values.get('multiple'):
+                    # Datasets of a multiple data input are recorded as <name>1, <name>2, ...
+                    # and the first dataset also as <name> (see DefaultToolAction._collect_input_datasets)
+                    if i == 0:
+                        identifiers[f"{k}|__identifier__"] = identifier
+                    identifiers[f"{k}{i + 1}|__identifier__"] = identifier
+                else:
+                    identifiers[f"{k}|__identifier__"] = identifier
+        fingerprint = job_fingerprint.fingerprint(self.sa_session, tool_id, tool_version, param_dump, identifiers)
+        query = self.sa_session.query(model.Job).filter(
+            model.Job.fingerprint == fingerprint,
+            model.Job.any_output_dataset_collection_instances_deleted == false(),
+            model.Job.any_output_dataset_deleted == false(),
+            *job_conditions
+        ).order_by(model.Job.id.desc())
+        return query.first()
+
 
 def view_show_job(trans, job, full: bool) -> typing.Dict:
     is_admin = trans.user_is_admin
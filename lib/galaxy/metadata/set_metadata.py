@@ -12,8 +12,10 @@ constructed automatically).
 """
 import json
 import logging
+import multiprocessing
 import os
 import sys
+import time
 import traceback
 
 try:
@@ -36,6 +38,7 @@ from galaxy.job_execution.output_collect import (
     SessionlessJobContext,
 )
 from galaxy.job_execution.setup import TOOL_PROVIDED_JOB_METADATA_KEYS
+from galaxy.job_metrics.instrumenters.metadata import METADATA_TIMINGS_FILE_NAME
 from galaxy.model import (
     Dataset,
     HistoryDatasetAssociation,
@@ -44,7 +47,10 @@ from galaxy.model import (
     store,
 )
 from galaxy.model.custom_types import total_size
-from galaxy.model.metadata import MetadataTempFile
+from galaxy.model.metadata import (
+    FileParameter,
+    MetadataTempFile,
+)
 from galaxy.objectstore import build_object_store_from_config
 from galaxy.tool_util.output_checker import (
     check_output,
@@ -105,6 +111,169 @@ def set_meta_with_tool_provided(dataset_instance, file_dict, set_meta_kwds, data
                 dataset_instance.metadata.remove_key(k)
 
 
+class MetadataTimings:
+    """Collects the time setting metadata took, read by the ``metadata`` job metrics plugin."""
+
+    def __init__(self, processes=1):
+        self.processes = processes
+        self.start = time.time()
+        self.outputs = {}
+        self.discovered_count = 0
+        self.discovered_seconds = 0.0
+        self.discovered_max_seconds = 0.0
+
+    def record_output(self, output_name, seconds):
+        self.outputs[output_name] = seconds
+
+    def record_discovered(self, seconds):
+        self.discovered_count += 1
+        self.discovered_seconds += seconds
+        self.discovered_max_seconds = max(self.discovered_max_seconds, seconds)
+
+    def to_dict(self):
+        return {
+            'processes': self.processes,
+            'wall_seconds': time.time() - self.start,
+            'outputs': self.outputs,
+            'discovered_count': self.discovered_count,
+            'discovered_seconds': self.discovered_seconds,
+            'discovered_max_seconds': self.discovered_max_seconds,
+        }
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+
+class MetadataResult:
+
+    def __init__(self, error=None, seconds=0.0, peek_set=False):
+        self.error = error
+        self.seconds = seconds
+        self.peek_set = peek_set
+
+
+class MetadataPool:
+    """
+    Sets metadata of many datasets in a pool of worker processes.
+
+    Workers set metadata on a copy of each dataset that only knows the
+    dataset's file, extra files directory (both resolved in this process),
+    extension and current metadata, the resulting metadata is
+    applied to the datasets in the order they were submitted. Datatypes with
+    metadata files (other than ``lazy`` ones, which aren't set by ``set_meta``)
+    and datasets that still need to be sniffed can't be handled by workers
+    (see ``can_set_meta``), their metadata is set in this process.
+
+    The workers are only started once metadata of at least two datasets is
+    set at once, a single dataset is handled the same way in this process.
+    """
+
+    def __init__(self, processes, datatypes_config):
+        self.processes = processes
+        self.datatypes_config = datatypes_config
+        self._pool = None
+
+    @property
+    def started(self):
+        return self._pool is not None
+
+    def can_set_meta(self, dataset_instance):
+        if dataset_instance.extension in ('_sniff_', 'auto'):
+            return False
+        return not any(isinstance(spec.param, FileParameter) and not spec.get('lazy') for spec in dataset_instance.metadata.spec.values())
+
+    def set_meta(self, requests, set_peek=False, max_metadata_value_size=0):
+        """
+        Set metadata for ``requests``, (dataset_instance, file_dict,
+        set_meta_kwds) tuples, and also set the peek if ``set_peek``.
+        Returns a ``MetadataResult`` for every request.
+        """
+        tasks = []
+        for dataset_instance, file_dict, set_meta_kwds in requests:
+            tasks.append({
+                'extension': dataset_instance.extension,
+                'file_name': dataset_instance.dataset.external_filename or dataset_instance.file_name,
+                'extra_files_path': dataset_instance.extra_files_path,
+                'metadata': dataset_instance.metadata.to_JSON_dict(),
+                'file_dict': file_dict,
+                'set_meta_kwds': set_meta_kwds,
+                'max_metadata_value_size': max_metadata_value_size,
+                'set_peek': set_peek,
+            })
+        if self._pool is None and len(tasks) < 2:
+            computed_results = map(_set_meta_in_worker, tasks)
+        else:
+            if self._pool is None:
+                self._pool = multiprocessing.Pool(self.processes, initializer=_init_metadata_worker, initargs=(self.datatypes_config,))
+            chunksize = max(1, min(100, len(tasks) // (self.processes * 4)))
+            computed_results = self._pool.imap(_set_meta_in_worker, tasks, chunksize=chunksize)
+        results = []
+        for (dataset_instance, _, _), computed in zip(requests, computed_results):
+            error, seconds, metadata, extension, peek = computed
+            if error is None:
+                dataset_instance.metadata.from_JSON_dict(json_dict=metadata)
+                dataset_instance.extension = extension
+                if peek is not None:
+                    dataset_instance.peek, dataset_instance.blurb = peek
+            results.append(MetadataResult(error=error, seconds=seconds, peek_set=peek is not None))
+        return results
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+
+    def terminate(self):
+        """Stop the workers without waiting for outstanding work."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+
+
+class _NoExtraFiles:
+    """Object store of worker datasets whose extra files directory doesn't exist."""
+
+    def get_store_by(self, obj):
+        return None
+
+    def exists(self, obj, **kwargs):
+        return False
+
+
+def _init_metadata_worker(datatypes_config):
+    if multiprocessing.get_start_method() != 'fork':
+        # Forked workers inherit the registry loaded by their parent
+        validate_and_load_datatypes_config(datatypes_config)
+
+
+def _set_meta_in_worker(task):
+    start = time.time()
+    dataset = Dataset(id=-1, external_filename=task['file_name'])
+    if task['extra_files_path']:
+        dataset.external_extra_files_path = task['extra_files_path']
+    else:
+        # The dataset has no extra files, there is no object store to look them up in
+        dataset.object_store = _NoExtraFiles()
+    dataset.state = dataset.states.OK
+    dataset_instance = HistoryDatasetAssociation(id=-1, dataset=dataset, extension=task['extension'])
+    try:
+        dataset_instance.metadata.from_JSON_dict(json_dict=task['metadata'])
+        # Datasets that need to be sniffed aren't sent to workers, so no registry is needed
+        set_meta_with_tool_provided(dataset_instance, task['file_dict'], task['set_meta_kwds'], None, task['max_metadata_value_size'])
+    except Exception:
+        return traceback.format_exc(), time.time() - start, None, None, None
+    peek = None
+    if task['set_peek']:
+        try:
+            dataset_instance.set_peek()
+            peek = (dataset_instance.peek, dataset_instance.blurb)
+        except Exception:
+            # The peek is set again (and the problem logged) by the parent process
+            pass
+    return None, time.time() - start, dataset_instance.metadata.to_JSON_dict(), dataset_instance.extension, peek
+
+
 def set_metadata():
     set_metadata_portable()
 
@@ -218,146 +387,220 @@ def set_metadata_portable():
         os.path.join(tool_job_working_directory, "working"),
         final_job_state=final_job_state,
     )
-
-    unnamed_id_to_path = {}
-    for unnamed_output_dict in job_context.tool_provided_metadata.get_unnamed_outputs():
-        destination = unnamed_output_dict["destination"]
-        elements = unnamed_output_dict["elements"]
-        destination_type = destination["type"]
-        if destination_type == 'hdas':
-            for element in elements:
-                filename = element.get('filename')
-                if filename:
-                    unnamed_id_to_path[element['object_id']] = os.path.join(job_context.job_working_directory, filename)
-
-    for output_name, output_dict in outputs.items():
-        dataset_instance_id = output_dict["id"]
-        klass = getattr(galaxy.model, output_dict.get('model_class', 'HistoryDatasetAssociation'))
-        dataset = None
-        if import_model_store:
-            dataset = import_model_store.sa_session.query(klass).find(dataset_instance_id)
-        if dataset is None:
-            # legacy check for jobs that started before 21.01, remove on 21.05
-            filename_in = os.path.join(f"metadata/metadata_in_{output_name}")
-            import pickle
-            dataset = pickle.load(open(filename_in, 'rb'))  # load DatasetInstance
-        assert dataset is not None
-
-        filename_kwds = os.path.join(f"metadata/metadata_kwds_{output_name}")
-        filename_out = os.path.join(f"metadata/metadata_out_{output_name}")
-        filename_results_code = os.path.join(f"metadata/metadata_results_{output_name}")
-        override_metadata = os.path.join(f"metadata/metadata_override_{output_name}")
-        dataset_filename_override = output_dict["filename_override"]
-        # pre-20.05 this was a per job parameter and not a per dataset parameter, drop in 21.XX
-        legacy_object_store_store_by = metadata_params.get("object_store_store_by", "id")
-
-        # Same block as below...
-        set_meta_kwds = stringify_dictionary_keys(json.load(open(filename_kwds)))  # load kwds; need to ensure our keywords are not unicode
-        try:
-            dataset.dataset.external_filename = unnamed_id_to_path.get(dataset_instance_id, dataset_filename_override)
-            store_by = output_dict.get("object_store_store_by", legacy_object_store_store_by)
-            extra_files_dir_name = f"dataset_{getattr(dataset.dataset, store_by)}_files"
-            files_path = os.path.abspath(os.path.join(tool_job_working_directory, "working", extra_files_dir_name))
-            dataset.dataset.external_extra_files_path = files_path
-            file_dict = tool_provided_metadata.get_dataset_meta(output_name, dataset.dataset.id, dataset.dataset.uuid)
-            if 'ext' in file_dict:
-                dataset.extension = file_dict['ext']
-            # Metadata FileParameter types may not be writable on a cluster node, and are therefore temporarily substituted with MetadataTempFiles
-            override_metadata = json.load(open(override_metadata))
-            for metadata_name, metadata_file_override in override_metadata:
-                if MetadataTempFile.is_JSONified_value(metadata_file_override):
-                    metadata_file_override = MetadataTempFile.from_JSON(metadata_file_override)
-                setattr(dataset.metadata, metadata_name, metadata_file_override)
-            if output_dict.get("validate", False):
-                set_validated_state(dataset)
-            if dataset_instance_id not in unnamed_id_to_path:
-                # We're going to run through set_metadata in collect_dynamic_outputs with more contextual metadata,
-                # so skip set_meta here.
-                set_meta(dataset, file_dict)
-
-            if extended_metadata_collection:
-                meta = tool_provided_metadata.get_dataset_meta(output_name, dataset.dataset.id, dataset.dataset.uuid)
-                if meta:
-                    context = ExpressionContext(meta, expression_context)
-                else:
-                    context = expression_context
-
-                # Lazy and unattached
-                # if getattr(dataset, "hidden_beneath_collection_instance", None):
-                #    dataset.visible = False
-                dataset.blurb = 'done'
-                dataset.peek = 'no peek'
-                dataset.info = (dataset.info or '')
-                if context['stdout'].strip():
-                    # Ensure white space between entries
-                    dataset.info = f"{dataset.info.rstrip()}\n{context['stdout'].strip()}"
-                if context['stderr'].strip():
-                    # Ensure white space between entries
-                    dataset.info = f"{dataset.info.rstrip()}\n{context['stderr'].strip()}"
-                dataset.tool_version = version_string
-                dataset.set_size()
-                if 'uuid' in context:
-                    dataset.dataset.uuid = context['uuid']
-                if dataset_filename_override and dataset_filename_override != dataset.file_name:
-                    # This has to be a job with outputs_to_working_directory set.
-                    # We update the object store with the created output file.
-                    object_store.update_from_file(dataset.dataset, file_name=dataset_filename_override, create=True)
-                collect_extra_files(object_store, dataset, ".")
-                if Job.states.ERROR == final_job_state:
-                    dataset.blurb = "error"
-                    dataset.mark_unhidden()
-                else:
-                    # If the tool was expected to set the extension, attempt to retrieve it
-                    if dataset.ext == 'auto':
-                        dataset.extension = context.get('ext', 'data')
-                        dataset.init_meta(copy_from=dataset)
-
-                    # This has already been done:
-                    # else:
-                    #     self.external_output_metadata.load_metadata(dataset, output_name, self.sa_session, working_directory=self.working_directory, remote_metadata_directory=remote_metadata_directory)
-                    line_count = context.get('line_count', None)
-                    try:
-                        # Certain datatype's set_peek methods contain a line_count argument
-                        dataset.set_peek(line_count=line_count)
-                    except TypeError:
-                        # ... and others don't
-                        dataset.set_peek()
-
-                for context_key in TOOL_PROVIDED_JOB_METADATA_KEYS:
-                    if context_key in context:
-                        context_value = context[context_key]
-                        setattr(dataset, context_key, context_value)
-                # We never want to persist the external_filename.
-                dataset.dataset.external_filename = None
-                export_store.add_dataset(dataset)
-            else:
-                dataset.metadata.to_JSON_dict(filename_out)  # write out results of set_meta
-
-            json.dump((True, 'Metadata has been set successfully'), open(filename_results_code, 'wt+'))  # setting metadata has succeeded
-        except Exception:
-            json.dump((False, traceback.format_exc()), open(filename_results_code, 'wt+'))  # setting metadata has failed somehow
-
-    if extended_metadata_collection:
-        # discover extra outputs...
-        output_collections = {}
-        for name, output_collection in metadata_params["output_collections"].items():
-            output_collections[name] = import_model_store.sa_session.query(HistoryDatasetCollectionAssociation).find(output_collection["id"])
-        outputs = {}
-        for name, output in metadata_params["outputs"].items():
-            klass = getattr(galaxy.model, output.get('model_class', 'HistoryDatasetAssociation'))
-            outputs[name] = import_model_store.sa_session.query(klass).find(output["id"])
-
-        input_ext = json.loads(metadata_params["job_params"].get("__input_ext", '"data"'))
-        collect_primary_datasets(
-            job_context,
-            outputs,
-            input_ext=input_ext,
+    processes = metadata_processes(metadata_params)
+    metadata_pool = MetadataPool(processes, datatypes_config) if processes > 1 else None
+    try:
+        metadata_timings = MetadataTimings(processes)
+        job_context.metadata_pool = metadata_pool
+        job_context.metadata_timings = metadata_timings
+
+        unnamed_id_to_path = {}
+        for unnamed_output_dict in job_context.tool_provided_metadata.get_unnamed_outputs():
+            destination = unnamed_output_dict["destination"]
+            elements = unnamed_output_dict["elements"]
+            destination_type = destination["type"]
+            if destination_type == 'hdas':
+                for element in elements:
+                    filename = element.get('filename')
+                    if filename:
+                        unnamed_id_to_path[element['object_id']] = os.path.join(job_context.job_working_directory, filename)
+
+        prepared_outputs = []
+        for output_name, output_dict in outputs.items():
+            dataset_instance_id = output_dict["id"]
+            klass = getattr(galaxy.model, output_dict.get('model_class', 'HistoryDatasetAssociation'))
+            dataset = None
+            if import_model_store:
+                dataset = import_model_store.sa_session.query(klass).find(dataset_instance_id)
+            if dataset is None:
+                # legacy check for jobs that started before 21.01, remove on 21.05
+                filename_in = os.path.join(f"metadata/metadata_in_{output_name}")
+                import pickle
+                dataset = pickle.load(open(filename_in, 'rb'))  # load DatasetInstance
+            assert dataset is not None
+
+            filename_kwds = os.path.join(f"metadata/metadata_kwds_{output_name}")
+            filename_results_code = os.path.join(f"metadata/metadata_results_{output_name}")
+            override_metadata = os.path.join(f"metadata/metadata_override_{output_name}")
+            dataset_filename_override = output_dict["filename_override"]
+            # pre-20.05 this was a per job parameter and not a per dataset parameter, drop in 21.XX
+            legacy_object_store_store_by = metadata_params.get("object_store_store_by", "id")
+
+            # Same block as below...
+            set_meta_kwds = stringify_dictionary_keys(json.load(open(filename_kwds)))  # load kwds; need to ensure our keywords are not unicode
+            try:
+                dataset.dataset.external_filename = unnamed_id_to_path.get(dataset_instance_id, dataset_filename_override)
+                store_by = output_dict.get("object_store_store_by", legacy_object_store_store_by)
+                extra_files_dir_name = f"dataset_{getattr(dataset.dataset, store_by)}_files"
+                files_path = os.path.abspath(os.path.join(tool_job_working_directory, "working", extra_files_dir_name))
+                dataset.dataset.external_extra_files_path = files_path
+                file_dict = tool_provided_metadata.get_dataset_meta(output_name, dataset.dataset.id, dataset.dataset.uuid)
+                if 'ext' in file_dict:
+                    dataset.extension = file_dict['ext']
+                # Metadata FileParameter types may not be writable on a cluster node, and are therefore temporarily substituted with MetadataTempFiles
+                override_metadata = json.load(open(override_metadata))
+                for metadata_name, metadata_file_override in override_metadata:
+                    if MetadataTempFile.is_JSONified_value(metadata_file_override):
+                        metadata_file_override = MetadataTempFile.from_JSON(metadata_file_override)
+                    setattr(dataset.metadata, metadata_name, metadata_file_override)
+                if output_dict.get("validate", False):
+                    set_validated_state(dataset)
+                prepared_outputs.append((output_name, output_dict, dataset, file_dict, set_meta_kwds))
+            except Exception:
+                json.dump((False, traceback.format_exc()), open(filename_results_code, 'wt+'))  # setting metadata has failed somehow
+
+        # Set metadata of all outputs first, with a metadata pool these are set in parallel
+        # Unnamed outputs go through set_metadata in collect_dynamic_outputs with more contextual metadata,
+        # so skip set_meta here.
+        metadata_errors = set_outputs_metadata(
+            [(output_name, dataset, file_dict, set_meta_kwds) for output_name, output_dict, dataset, file_dict, set_meta_kwds in prepared_outputs if output_dict["id"] not in unnamed_id_to_path],
+            set_meta,
+            metadata_pool,
+            metadata_timings,
+            max_metadata_value_size=max_metadata_value_size,
         )
-        collect_dynamic_outputs(job_context, output_collections)
 
+        for output_name, output_dict, dataset, file_dict, set_meta_kwds in prepared_outputs:
+            filename_out = os.path.join(f"metadata/metadata_out_{output_name}")
+            filename_results_code = os.path.join(f"metadata/metadata_results_{output_name}")
+            dataset_filename_override = output_dict["filename_override"]
+            if output_name in metadata_errors:
+                json.dump((False, metadata_errors[output_name]), open(filename_results_code, 'wt+'))  # setting metadata has failed somehow
+                continue
+            try:
+                if extended_metadata_collection:
+                    meta = tool_provided_metadata.get_dataset_meta(output_name, dataset.dataset.id, dataset.dataset.uuid)
+                    if meta:
+                        context = ExpressionContext(meta, expression_context)
+                    else:
+                        context = expression_context
+
+                    # Lazy and unattached
+                    # if getattr(dataset, "hidden_beneath_collection_instance", None):
+                    #    dataset.visible = False
+                    dataset.blurb = 'done'
+                    dataset.peek = 'no peek'
+                    dataset.info = (dataset.info or '')
+                    if context['stdout'].strip():
+                        # Ensure white space between entries
+                        dataset.info = f"{dataset.info.rstrip()}\n{context['stdout'].strip()}"
+                    if context['stderr'].strip():
+                        # Ensure white space between entries
+                        dataset.info = f"{dataset.info.rstrip()}\n{context['stderr'].strip()}"
+                    dataset.tool_version = version_string
+                    dataset.set_size()
+                    if 'uuid' in context:
+                        dataset.dataset.uuid = context['uuid']
+                    if dataset_filename_override and dataset_filename_override != dataset.file_name:
+                        # This has to be a job with outputs_to_working_directory set.
+                        # We update the object store with the created output file.
+                        object_store.update_from_file(dataset.dataset, file_name=dataset_filename_override, create=True)
+                    collect_extra_files(object_store, dataset, ".")
+                    if Job.states.ERROR == final_job_state:
+                        dataset.blurb = "error"
+                        dataset.mark_unhidden()
+                    else:
+                        # If the tool was expected to set the extension, attempt to retrieve it
+                        if dataset.ext == 'auto':
+                            dataset.extension = context.get('ext', 'data')
+                            dataset.init_meta(copy_from=dataset)
+
+                        # This has already been done:
+                        # else:
+                        #     self.external_output_metadata.load_metadata(dataset, output_name, self.sa_session, working_directory=self.working_directory, remote_metadata_directory=remote_metadata_directory)
+                        line_count = context.get('line_count', None)
+                        try:
+                            # Certain datatype's set_peek methods contain a line_count argument
+                            dataset.set_peek(line_count=line_count)
+                        except TypeError:
+                            # ... and others don't
+                            dataset.set_peek()
+
+                    for context_key in TOOL_PROVIDED_JOB_METADATA_KEYS:
+                        if context_key in context:
+                            context_value = context[context_key]
+                            setattr(dataset, context_key, context_value)
+                    # We never want to persist the external_filename.
+                    dataset.dataset.external_filename = None
+                    export_store.add_dataset(dataset)
+                else:
+                    dataset.metadata.to_JSON_dict(filename_out)  # write out results of set_meta
+
+                json.dump((True, 'Metadata has been set successfully'), open(filename_results_code, 'wt+'))  # setting metadata has succeeded
+            except Exception:
+                json.dump((False, traceback.format_exc()), open(filename_results_code, 'wt+'))  # setting metadata has failed somehow
+
+        if extended_metadata_collection:
+            # discover extra outputs...
+            output_collections = {}
+            for name, output_collection in metadata_params["output_collections"].items():
+                output_collections[name] = import_model_store.sa_session.query(HistoryDatasetCollectionAssociation).find(output_collection["id"])
+            outputs = {}
+            for name, output in metadata_params["outputs"].items():
+                klass = getattr(galaxy.model, output.get('model_class', 'HistoryDatasetAssociation'))
+                outputs[name] = import_model_store.sa_session.query(klass).find(output["id"])
+
+            input_ext = json.loads(metadata_params["job_params"].get("__input_ext", '"data"'))
+            collect_primary_datasets(
+                job_context,
+                outputs,
+                input_ext=input_ext,
+            )
+            collect_dynamic_outputs(job_context, output_collections)
+
+        if metadata_pool:
+            metadata_pool.close()
+    finally:
+        if metadata_pool:
+            # Only does something if setting metadata failed before the pool was closed
+            metadata_pool.terminate()
     if export_store:
         export_store._finalize()
     write_job_metadata(tool_job_working_directory, job_metadata, set_meta, tool_provided_metadata)
+    metadata_timings.write(os.path.join(tool_job_working_directory, METADATA_TIMINGS_FILE_NAME))
+
+
+def set_outputs_metadata(outputs, set_meta, metadata_pool, metadata_timings, max_metadata_value_size=0):
+    """
+    Set metadata of ``outputs``, (output_name, dataset_instance, file_dict,
+    set_meta_kwds) tuples, in ``metadata_pool`` if it can handle the dataset
+    and with ``set_meta(dataset_instance, file_dict)`` otherwise.
+
+    Returns the tracebacks of outputs whose metadata couldn't be set by
+    output name.
+    """
+    metadata_errors = {}
+    pooled_outputs = []
+    for output_name, dataset, file_dict, set_meta_kwds in outputs:
+        if metadata_pool and metadata_pool.can_set_meta(dataset):
+            pooled_outputs.append((output_name, dataset, file_dict, set_meta_kwds))
+            continue
+        start = time.time()
+        try:
+            set_meta(dataset, file_dict)
+        except Exception:
+            metadata_errors[output_name] = traceback.format_exc()
+        metadata_timings.record_output(output_name, time.time() - start)
+    if pooled_outputs:
+        results = metadata_pool.set_meta([(dataset, file_dict, set_meta_kwds) for _, dataset, file_dict, set_meta_kwds in pooled_outputs], max_metadata_value_size=max_metadata_value_size)
+        for (output_name, _, _, _), result in zip(pooled_outputs, results):
+            if result.error:
+                metadata_errors[output_name] = result.error
+            metadata_timings.record_output(output_name, result.seconds)
+    return metadata_errors
+
+
+def metadata_processes(metadata_params):
+    """
+    Return the number of processes to set metadata with, the cores allocated
+    to the job if parallel metadata collection is enabled.
+    """
+    if not metadata_params.get("parallel_metadata"):
+        return 1
+    try:
+        return max(int(os.environ.get("GALAXY_SLOTS", 1)), 1)
+    except ValueError:
+        return 1
 
 
 def validate_and_load_datatypes_config(datatypes_config):
@@ -34,6 +34,7 @@ from sqlalchemy import (
     alias,
     and_,
     BigInteger,
+    bindparam,
     Boolean,
     Column,
     DateTime,
@@ -41,6 +42,7 @@ from sqlalchemy import (
     inspect,
     Integer,
     join,
+    literal,
     not_,
     or_,
     select,
@@ -64,6 +66,7 @@ from sqlalchemy.orm import (
     reconstructor,
     registry,
 )
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.orm.decl_api import DeclarativeMeta
 
 import galaxy.exceptions
@@ -110,6 +113,8 @@ JOB_METRIC_PRECISION = 26
 JOB_METRIC_SCALE = 7
 # Tags that get automatically propagated from inputs to outputs when running jobs.
 AUTO_PROPAGATED_TAGS = ["name"]
+# Number of users whose disk usage is recalculated in one query when reconciling
+DISK_USAGE_RECONCILE_BATCH_SIZE = 1000
 
 
 if TYPE_CHECKING:
@@ -328,23 +333,33 @@ class JobLike:
         self.numeric_metrics = []
 
     def add_metric(self, plugin, metric_name, metric_value):
+        metric = self.build_metric(plugin, metric_name, metric_value)
+        if isinstance(metric, self._numeric_metric):
+            self.numeric_metrics.append(metric)
+        elif metric is not None:
+            self.text_metrics.append(metric)
+
+    def build_metric(self, plugin, metric_name, metric_value):
+        """
+        Return the (numeric or text) metric object storing ``metric_value``,
+        ``None`` if the value cannot be stored.
+        """
         plugin = unicodify(plugin, 'utf-8')
         metric_name = unicodify(metric_name, 'utf-8')
         number = isinstance(metric_value, numbers.Number)
         if number and int(metric_value) <= JobLike.MAX_NUMERIC:
-            metric = self._numeric_metric(plugin, metric_name, metric_value)
-            self.numeric_metrics.append(metric)
+            return self._numeric_metric(plugin, metric_name, metric_value)
         elif number:
             log.warning("Cannot store metric due to database column overflow (max: %s): %s: %s",
                         JobLike.MAX_NUMERIC, metric_name, metric_value)
+            return None
         else:
             metric_value = unicodify(metric_value, 'utf-8')
             if len(metric_value) > (JOB_METRIC_MAX_LENGTH - 1):
                 # Truncate these values - not needed with sqlite
                 # but other backends must need it.
                 metric_value = metric_value[:(JOB_METRIC_MAX_LENGTH - 1)]
-            metric = self._text_metric(plugin, metric_name, metric_value)
-            self.text_metrics.append(metric)
+            return self._text_metric(plugin, metric_name, metric_value)
 
     @property
     def metrics(self):
@@ -609,6 +624,84 @@ class User(Dictifiable, RepresentById):
             sa_session.flush()
         return usage
 
+    @staticmethod
+    def calculate_disk_usage_for_users(sa_session, user_ids):
+        """
+        Return a dictionary of user id to the disk usage calculated like
+        :meth:`calculate_disk_usage` for all ``user_ids``, using a single query.
+        """
+        if not user_ids:
+            return {}
+        sql_calc = text("""
+            WITH per_user_histories AS
+            (
+                SELECT id, user_id
+                FROM history
+                WHERE user_id IN :user_ids
+                    AND NOT purged
+            ),
+            per_hist_hdas AS (
+                SELECT DISTINCT per_user_histories.user_id, history_dataset_association.dataset_id
+                FROM history_dataset_association
+                JOIN per_user_histories ON history_dataset_association.history_id = per_user_histories.id
+                WHERE NOT history_dataset_association.purged
+            )
+            SELECT per_hist_hdas.user_id, SUM(COALESCE(dataset.total_size, dataset.file_size, 0))
+            FROM per_hist_hdas
+            JOIN dataset ON dataset.id = per_hist_hdas.dataset_id
+            LEFT OUTER JOIN library_dataset_dataset_association ON dataset.id = library_dataset_dataset_association.dataset_id
+            WHERE library_dataset_dataset_association.id IS NULL
+            GROUP BY per_hist_hdas.user_id
+        """).bindparams(bindparam('user_ids', expanding=True))
+        usage = {user_id: 0 for user_id in user_ids}
+        for user_id, user_usage in sa_session.execute(sql_calc, {'user_ids': list(user_ids)}):
+            usage[user_id] = int(user_usage or 0)
+        return usage
+
+    @classmethod
+    def reconcile_disk_usage(cls, sa_session, user_ids=None, dryrun=False, batch_size=DISK_USAGE_RECONCILE_BATCH_SIZE):
+        """
+        Compare the incrementally maintained ``disk_usage`` of users with
+        their recalculated disk usage and, unless ``dryrun`` is set, correct
+        the users that drifted.
+
+        Users are processed ``batch_size`` at a time (all users if
+        ``user_ids`` is None). Return a list of ``(user_id, recorded usage,
+        calculated usage)`` tuples for the users that drifted (and were
+        corrected, unless ``dryrun`` is set). A user's usage is only corrected
+        if it wasn't adjusted since it was read, users whose usage changed in
+        the meantime are left for the next run.
+        """
+        user_table = cls.table
+        if user_ids is None:
+            user_ids = [row[0] for row in sa_session.execute(select([user_table.c.id]).order_by(user_table.c.id))]
+        drifted = []
+        for batch in galaxy.util.chunk_iterable(user_ids, batch_size):
+            recorded = dict(sa_session.execute(
+                select([user_table.c.id, user_table.c.disk_usage]).where(user_table.c.id.in_(batch))
+            ).fetchall())
+            calculated = cls.calculate_disk_usage_for_users(sa_session, batch)
+            for user_id, usage in calculated.items():
+                if user_id not in recorded:
+                    continue
+                recorded_usage = int(recorded[user_id] or 0)
+                if recorded_usage == usage:
+                    continue
+                if not dryrun:
+                    # Don't overwrite adjustments made since the usage was read
+                    if recorded[user_id] is None:
+                        unchanged = user_table.c.disk_usage.is_(None)
+                    else:
+                        unchanged = user_table.c.disk_usage == recorded[user_id]
+                    result = sa_session.execute(
+                        user_table.update().where(and_(user_table.c.id == user_id, unchanged)).values(disk_usage=usage)
+                    )
+                    if result.rowcount == 0:
+                        log.debug("Disk usage of user %s changed while reconciling it, skipping", user_id)
+                        continue
+                drifted.append((user_id, recorded_usage, usage))
+        return drifted
+
     @staticmethod
     def user_template_environment(user):
         """
@@ -727,6 +820,27 @@ class TaskMetricNumeric(BaseJobMetric, RepresentById):
     pass
 
 
+class JobMetricRollup(RepresentById):
+    """
+    Histogram bin of the values of a numeric job metric of the jobs of a tool
+    version that finished on a destination on a day, see
+    ``galaxy.model.job_metrics``.
+    """
+
+    def __init__(self, day, tool_id, tool_version, destination_id, plugin, metric_name, bin, count=0, total=0, minimum=None, maximum=None):
+        self.day = day
+        self.tool_id = tool_id
+        self.tool_version = tool_version
+        self.destination_id = destination_id
+        self.plugin = plugin
+        self.metric_name = metric_name
+        self.bin = bin
+        self.count = count
+        self.total = total
+        self.minimum = minimum
+        self.maximum = maximum
+
+
 class Job(JobLike, UsesCreateAndUpdateTime, Dictifiable, RepresentById):
     dict_collection_visible_keys = ['id', 'state', 'exit_code', 'update_time', 'create_time', 'galaxy_version']
     dict_element_visible_keys = ['id', 'state', 'exit_code', 'update_time', 'create_time', 'galaxy_version', 'command_version']
@@ -737,6 +851,7 @@ class Job(JobLike, UsesCreateAndUpdateTime, Dictifiable, RepresentById):
     """
     _numeric_metric = JobMetricNumeric
     _text_metric = JobMetricText
+    _metrics_foreign_key = 'job_id'
 
     class states(str, Enum):
         NEW = 'new'
@@ -797,6 +912,7 @@ class Job(JobLike, UsesCreateAndUpdateTime, Dictifiable, RepresentById):
         self.state_history = []
         self.imported = False
         self.handler = None
+        self.fingerprint = None
         self.create_time = None
         self.exit_code = None
         self.history_id = None
@@ -1374,6 +1490,7 @@ class Task(JobLike, RepresentById):
     """
     _numeric_metric = TaskMetricNumeric
     _text_metric = TaskMetricText
+    _metrics_foreign_key = 'task_id'
 
     class states(str, Enum):
         NEW = 'new'
@@ -4299,6 +4416,53 @@ class DatasetCollection(Dictifiable, UsesAnnotations, RepresentById):
                 q = q.filter(entity.id == dce.c.id)
         return q.distinct()
 
+    def preload_elements(self, load_datasets=True):
+        """
+        Load the elements of this collection and of all its subcollections
+        (and the HDAs and datasets of the elements if ``load_datasets``) in a
+        few queries, so walking the elements of nested collections doesn't
+        lazy load every subcollection and dataset one by one.
+        """
+        db_session = object_session(self)
+        if not db_session or not self.id or getattr(self, '_elements_preloaded', False):
+            return
+        dce_table = DatasetCollectionElement.table
+        collection_tree = select(literal(self.id, Integer).label('collection_id')).cte('collection_tree', recursive=True)
+        collection_tree = collection_tree.union_all(
+            select(dce_table.c.child_collection_id).where(and_(
+                dce_table.c.dataset_collection_id == collection_tree.c.collection_id,
+                dce_table.c.child_collection_id.isnot(None),
+            ))
+        )
+        collection_ids = select(collection_tree.c.collection_id)
+        collections = {c.id: c for c in db_session.query(DatasetCollection).filter(DatasetCollection.table.c.id.in_(collection_ids))}
+        elements = db_session.query(DatasetCollectionElement).filter(
+            dce_table.c.dataset_collection_id.in_(collection_ids)
+        ).order_by(dce_table.c.dataset_collection_id, dce_table.c.element_index).all()
+        hdas = {}
+        if load_datasets:
+            hda_ids = select(dce_table.c.hda_id).where(dce_table.c.dataset_collection_id.in_(collection_ids))
+            hdas = {hda.id: hda for hda in db_session.query(HistoryDatasetAssociation).options(
+                joinedload(HistoryDatasetAssociation.dataset)
+            ).filter(HistoryDatasetAssociation.table.c.id.in_(hda_ids))}
+
+        def set_unloaded(obj, key, value):
+            # Don't replace relationships that are loaded (and maybe modified) already
+            if key in inspect(obj).unloaded:
+                set_committed_value(obj, key, value)
+
+        elements_by_collection = defaultdict(list)
+        for element in elements:
+            elements_by_collection[element.dataset_collection_id].append(element)
+            set_unloaded(element, 'collection', collections[element.dataset_collection_id])
+            if element.child_collection_id is not None:
+                set_unloaded(element, 'child_collection', collections[element.child_collection_id])
+            elif element.hda_id in hdas:
+                set_unloaded(element, 'hda', hdas[element.hda_id])
+        for collection in collections.values():
+            set_unloaded(collection, 'elements', elements_by_collection[collection.id])
+            collection._elements_preloaded = True
+
     @property
     def dataset_states_and_extensions_summary(self):
         if not hasattr(self, '_dataset_states_and_extensions_summary'):
@@ -5625,6 +5789,32 @@ class WorkflowInvocation(UsesCreateAndUpdateTime, Dictifiable, RepresentById):
         # is relatively intutitive.
         return [wid for wid in query.all()]
 
+    @staticmethod
+    def poll_unfinished_job_ids(sa_session, invocation_id):
+        """
+        Return ids of the unfinished jobs of a workflow invocation and its
+        subworkflow invocations, i.e. the jobs the invocation may be waiting on.
+        """
+        invocation_ids = [invocation_id]
+        new_invocation_ids = [invocation_id]
+        while new_invocation_ids:
+            subworkflow_association = WorkflowInvocationToSubworkflowInvocationAssociation
+            new_invocation_ids = [i for (i,) in sa_session.query(subworkflow_association.subworkflow_invocation_id).filter(
+                subworkflow_association.workflow_invocation_id.in_(new_invocation_ids)
+            )]
+            invocation_ids.extend(new_invocation_ids)
+        step = WorkflowInvocationStep
+        unfinished = not_(Job.state.in_(Job.terminal_states))
+        job_ids = sa_session.query(Job.id).join(step, step.job_id == Job.id).filter(
+            step.workflow_invocation_id.in_(invocation_ids), unfinished
+        )
+        implicit_job_ids = sa_session.query(Job.id).join(
+            ImplicitCollectionJobsJobAssociation, ImplicitCollectionJobsJobAssociation.job_id == Job.id
+        ).join(
+            step, step.implicit_collection_jobs_id == ImplicitCollectionJobsJobAssociation.implicit_collection_jobs_id
+        ).filter(step.workflow_invocation_id.in_(invocation_ids), unfinished)
+        return [job_id for (job_id,) in job_ids.union(implicit_job_ids)]
+
     def add_output(self, workflow_output, step, output_object):
         if not hasattr(output_object, "history_content_type"):
             # assuming this is a simple type, just JSON-ify it and stick in the database. In the future
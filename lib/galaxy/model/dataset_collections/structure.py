@@ -71,6 +71,9 @@ class Tree(BaseTree):
 
     @staticmethod
     def for_dataset_collection(dataset_collection, collection_type_description):
+        if collection_type_description.has_subcollections():
+            # Load all nested elements at once, walk_collections then uses them as well
+            dataset_collection.preload_elements(load_datasets=False)
         children = []
         for element in dataset_collection.elements:
             if collection_type_description.has_subcollections():
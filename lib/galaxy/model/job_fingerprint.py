@@ -0,0 +1,149 @@
+"""
+Fingerprints of jobs for the job cache.
+
+A job fingerprint is a hash of the tool id and version, the canonicalized tool
+parameters and the identities of the input datasets of a job. Jobs that the
+job cache considers equivalent (see ``JobSearch`` in ``galaxy.managers.jobs``)
+share a fingerprint, so a previous equivalent job can be found with a single
+lookup of the indexed ``job.fingerprint`` column. Fingerprints are recorded
+when jobs finish successfully, ``scripts/backfill_job_fingerprints.py``
+records them for jobs that finished before.
+"""
+import hashlib
+import json
+
+from galaxy import model
+
+# Increment when the fingerprint document changes, fingerprints of a different
+# version never match and jobs need to be backfilled again.
+FINGERPRINT_VERSION = 2
+IGNORED_PARAMETERS = {'chromInfo', 'dbkey'}
+RUNTIME_VALUE = {'__class__': 'RuntimeValue'}
+# Maximum number of HDCA copies followed to find the original HDCA
+MAX_COPIED_FROM_DEPTH = 100
+
+
+def parameter_ignored(name):
+    """
+    Parameters that are not passed along when expanding tool parameters and
+    can differ without affecting the resulting datasets.
+    """
+    return name.startswith('__') or name in IGNORED_PARAMETERS or name.endswith('|__identifier__')
+
+
+def fingerprint(sa_session, tool_id, tool_version, params, identifiers=None):
+    """
+    Return the fingerprint of a job running ``tool_id`` in ``tool_version``.
+
+    ``params`` maps tool parameter names to basic (JSON decoded) values as
+    produced by ``params_to_strings(..., nested=True)``, references to input
+    datasets are replaced by the identities of these datasets.
+    ``identifiers`` maps ``<input>|__identifier__`` names to the element
+    identifiers of the inputs.
+    """
+    parameters = {}
+    for name, value in params.items():
+        if parameter_ignored(name):
+            continue
+        if value == RUNTIME_VALUE:
+            value = None
+        # Round trip through JSON so values match those recorded on jobs
+        value = json.loads(json.dumps(value))
+        parameters[name] = _canonical_value(sa_session, value)
+    document = {
+        'version': FINGERPRINT_VERSION,
+        'tool_id': tool_id,
+        'tool_version': str(tool_version),
+        'parameters': parameters,
+        'identifiers': identifiers or {},
+    }
+    return hashlib.sha256(json.dumps(document, sort_keys=True).encode()).hexdigest()
+
+
+def fingerprint_for_job(sa_session, job):
+    """Return the fingerprint of ``job`` from its recorded parameters."""
+    params = {}
+    identifiers = {}
+    for parameter in job.parameters:
+        try:
+            value = json.loads(parameter.value)
+        except (TypeError, ValueError):
+            value = parameter.value
+        if parameter.name.endswith('|__identifier__'):
+            identifiers[parameter.name] = value
+        else:
+            params[parameter.name] = value
+    return fingerprint(sa_session, job.tool_id, job.tool_version, params, identifiers)
+
+
+def _canonical_value(sa_session, value):
+    if isinstance(value, dict):
+        if value.get('src') in INPUT_IDENTITIES and 'id' in value:
+            canonical = {k: _canonical_value(sa_session, v) for k, v in value.items() if k != 'id'}
+            canonical['identity'] = INPUT_IDENTITIES[value['src']](sa_session, value['id'])
+            return canonical
+        return {k: _canonical_value(sa_session, v) for k, v in value.items()}
+    elif isinstance(value, list):
+        return [_canonical_value(sa_session, v) for v in value]
+    return value
+
+
+def _hda_identity(sa_session, hda_id):
+    hda = sa_session.query(model.HistoryDatasetAssociation).get(hda_id)
+    if hda is None:
+        return None
+    metadata = json.dumps(_set_metadata(hda), sort_keys=True, default=str)
+    return [hda.dataset_id, hda.extension, hda.name, hashlib.sha1(metadata.encode()).hexdigest()]
+
+
+def _set_metadata(hda):
+    """
+    Return the metadata of ``hda`` without unset values and values equal to
+    the default of their metadata element, copies of datasets may have these
+    filled in while the original doesn't.
+    """
+    spec = hda.datatype.metadata_spec
+    metadata = {}
+    for name, value in (hda._metadata or {}).items():
+        element = spec.get(name)
+        if value is None or (element is not None and value == element.default):
+            continue
+        metadata[name] = value
+    return metadata
+
+
+def _ldda_identity(sa_session, ldda_id):
+    return [ldda_id]
+
+
+def _hdca_identity(sa_session, hdca_id):
+    hdca = sa_session.query(model.HistoryDatasetCollectionAssociation).get(hdca_id)
+    if hdca is None:
+        return None
+    name = hdca.name
+    # Copies of a collection are equivalent to the original
+    for _ in range(MAX_COPIED_FROM_DEPTH):
+        copied_from_id = hdca.copied_from_history_dataset_collection_association_id
+        if copied_from_id is None:
+            break
+        copied_from = sa_session.query(model.HistoryDatasetCollectionAssociation).get(copied_from_id)
+        if copied_from is None:
+            break
+        hdca = copied_from
+    return [name, hdca.id]
+
+
+def _dce_identity(sa_session, dce_id):
+    dce = sa_session.query(model.DatasetCollectionElement).get(dce_id)
+    if dce is None:
+        return None
+    dataset_id = dce.hda.dataset_id if dce.hda else None
+    return [dce.element_identifier, dce.child_collection_id, dataset_id]
+
+
+INPUT_IDENTITIES = {
+    'hda': _hda_identity,
+    'ldda': _ldda_identity,
+    'hdca': _hdca_identity,
+    'dce': _dce_identity,
+}
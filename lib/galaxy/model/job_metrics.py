@@ -0,0 +1,217 @@
+"""
+Bulk storage of job metrics and rollups of numeric job metrics.
+
+The metrics collected for a finished job are inserted with a single
+multi-row ``INSERT`` per metric table (see ``write_job_metrics``) instead of
+an ``INSERT`` per metric issued by the ORM.
+
+Rollups summarize selected numeric metrics (``job_metric_rollups`` in
+galaxy.yml, e.g. ``core:runtime_seconds``) of the jobs of a tool version that
+finished on a destination on a day. The values are kept as a log-scaled
+histogram (a DDSketch) in the ``job_metric_rollup`` table, a row per non-empty
+bin with the count, sum, minimum and maximum of its values. Bin ``i`` holds the
+values in ``(GAMMA ** (i - 1), GAMMA ** i]``, so percentiles can be estimated
+within ``RELATIVE_ACCURACY`` of the actual value from a few hundred rows,
+however many jobs ran. Bins are incremented with a single atomic ``UPDATE``,
+so handlers finishing jobs concurrently don't need to lock rows.
+``scripts/rebuild_job_metric_rollups.py`` rolls up the metrics of jobs that
+finished before.
+"""
+import logging
+import math
+from collections import defaultdict
+from functools import lru_cache
+
+from sqlalchemy import (
+    and_,
+    case,
+    func,
+    select,
+)
+from sqlalchemy.exc import IntegrityError
+
+from galaxy import model
+from galaxy.model.orm.now import now
+
+log = logging.getLogger(__name__)
+
+DEFAULT_ROLLUP_METRICS = "core:runtime_seconds,cgroup:memory.max_usage_in_bytes"
+RELATIVE_ACCURACY = 0.02
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+# Values below MIN_VALUE (including 0 and negative values) share ZERO_BIN
+MIN_VALUE = 1e-9
+ZERO_BIN = -(2 ** 31)
+GROUP_BY_COLUMNS = ('day', 'tool_id', 'tool_version', 'destination_id')
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+
+
+@lru_cache(maxsize=16)
+def parse_rollup_metrics(value):
+    """
+    Parse a comma separated list of ``plugin:metric_name`` entries into a
+    frozenset of ``(plugin, metric_name)`` tuples.
+    """
+    rollup_metrics = set()
+    for entry in (value or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        plugin, sep, metric_name = entry.partition(":")
+        if not sep or not plugin or not metric_name:
+            raise ValueError(f"Invalid job metric rollup [{entry}], expected <plugin>:<metric_name>")
+        rollup_metrics.add((plugin, metric_name))
+    return frozenset(rollup_metrics)
+
+
+def metric_bin(value):
+    """Return the histogram bin of ``value``."""
+    value = float(value)
+    if value < MIN_VALUE:
+        return ZERO_BIN
+    return int(math.ceil(math.log(value, GAMMA)))
+
+
+def bin_value(bin):
+    """Return the value representing the values of ``bin`` with the least relative error."""
+    if bin == ZERO_BIN:
+        return 0.0
+    return 2 * GAMMA ** bin / (GAMMA + 1)
+
+
+def write_job_metrics(sa_session, has_metrics, per_plugin_properties):
+    """
+    Store the metrics ``per_plugin_properties`` (as collected by
+    ``JobMetrics.collect_properties``) of a job or task.
+
+    Returns the ``(plugin, metric_name, value)`` tuples of the numeric metrics
+    stored.
+    """
+    rows = defaultdict(list)
+    numeric_metrics = []
+    for plugin, properties in per_plugin_properties.items():
+        for metric_name, metric_value in properties.items():
+            if metric_value is None:
+                continue
+            metric = has_metrics.build_metric(plugin, metric_name, metric_value)
+            if metric is None:
+                continue
+            rows[metric.table].append({
+                has_metrics._metrics_foreign_key: has_metrics.id,
+                'plugin': metric.plugin,
+                'metric_name': metric.metric_name,
+                'metric_value': metric.metric_value,
+            })
+            if isinstance(metric, has_metrics._numeric_metric):
+                numeric_metrics.append((metric.plugin, metric.metric_name, metric.metric_value))
+    for table, table_rows in rows.items():
+        sa_session.execute(table.insert(), table_rows)
+    if rows:
+        # Metrics were inserted bypassing the ORM, reload them on access
+        sa_session.expire(has_metrics, ['numeric_metrics', 'text_metrics'])
+    return numeric_metrics
+
+
+def rollup_key(job, plugin, metric_name, day=None):
+    """Return the columns identifying the rollup of ``metric_name`` of ``job``."""
+    return {
+        'day': day or now().date(),
+        'tool_id': job.tool_id or '',
+        'tool_version': str(job.tool_version or ''),
+        'destination_id': job.destination_id or '',
+        'plugin': plugin,
+        'metric_name': metric_name,
+    }
+
+
+def update_job_metric_rollups(sa_session, job, numeric_metrics, rollup_metrics, day=None):
+    """
+    Add the values of the numeric metrics ``(plugin, metric_name, value)``
+    of ``job`` listed in ``rollup_metrics`` to the rollups of the day.
+    """
+    for plugin, metric_name, value in numeric_metrics:
+        if (plugin, metric_name) in rollup_metrics:
+            key = rollup_key(job, plugin, metric_name, day=day)
+            add_to_rollup(sa_session, key, metric_bin(value), 1, value, value, value)
+
+
+def add_to_rollup(sa_session, key, bin, count, total, minimum, maximum):
+    """
+    Add ``count`` values with the sum ``total`` and the given ``minimum`` and
+    ``maximum`` to ``bin`` of the rollup ``key``.
+    """
+    table = model.JobMetricRollup.table
+    key = dict(key, bin=bin)
+    update = table.update().where(
+        and_(*(table.c[name] == value for name, value in key.items()))
+    ).values(
+        count=table.c.count + count,
+        total=table.c.total + total,
+        minimum=case((table.c.minimum > minimum, minimum), else_=table.c.minimum),
+        maximum=case((table.c.maximum < maximum, maximum), else_=table.c.maximum),
+    )
+    if sa_session.execute(update).rowcount:
+        return
+    try:
+        sa_session.execute(table.insert().values(count=count, total=total, minimum=minimum, maximum=maximum, **key))
+    except IntegrityError:
+        # Another handler created the bin in the meantime
+        sa_session.execute(update)
+
+
+def summarize_job_metric_rollups(sa_session, plugin, metric_name, group_by=('tool_id',), tool_id=None, tool_version=None,
+                                 destination_id=None, start_day=None, end_day=None, percentiles=DEFAULT_PERCENTILES):
+    """
+    Return the number, mean, minimum, maximum and estimated ``percentiles``
+    of the values of ``metric_name`` for each group of rollups by the
+    ``group_by`` columns, within ``start_day`` and ``end_day`` (inclusive).
+    """
+    table = model.JobMetricRollup.table
+    for name in group_by:
+        if name not in GROUP_BY_COLUMNS:
+            raise ValueError(f"Cannot group job metric rollups by [{name}]")
+    conditions = [table.c.plugin == plugin, table.c.metric_name == metric_name]
+    for name, value in (('tool_id', tool_id), ('tool_version', tool_version), ('destination_id', destination_id)):
+        if value is not None:
+            conditions.append(table.c[name] == value)
+    if start_day is not None:
+        conditions.append(table.c.day >= start_day)
+    if end_day is not None:
+        conditions.append(table.c.day <= end_day)
+    group_columns = [table.c[name] for name in group_by]
+    query = select(group_columns + [
+        table.c.bin,
+        func.sum(table.c.count),
+        func.sum(table.c.total),
+        func.min(table.c.minimum),
+        func.max(table.c.maximum),
+    ]).where(and_(*conditions)).group_by(*group_columns, table.c.bin)
+    histograms = defaultdict(list)
+    for row in sa_session.execute(query):
+        histograms[tuple(row[:len(group_by)])].append(tuple(row[len(group_by):]))
+    summaries = []
+    for group, bins in sorted(histograms.items(), key=lambda item: [str(value) for value in item[0]]):
+        summary = dict(zip(group_by, group))
+        summary.update(_summarize_histogram(bins, percentiles))
+        summaries.append(summary)
+    return summaries
+
+
+def _summarize_histogram(bins, percentiles):
+    bins = sorted(bins)
+    count = sum(bin_count for _, bin_count, _, _, _ in bins)
+    summary = {
+        'count': count,
+        'mean': float(sum(total for _, _, total, _, _ in bins)) / count,
+        'minimum': float(min(minimum for _, _, _, minimum, _ in bins)),
+        'maximum': float(max(maximum for _, _, _, _, maximum in bins)),
+        'percentiles': {},
+    }
+    for percentile in percentiles:
+        rank = percentile / 100.0 * (count - 1)
+        seen = 0
+        for bin, bin_count, _, minimum, maximum in bins:
+            seen += bin_count
+            if seen > rank:
+                summary['percentiles'][str(percentile)] = min(max(bin_value(bin), float(minimum)), float(maximum))
+                break
+    return summary
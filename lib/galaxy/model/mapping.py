@@ -12,6 +12,7 @@ from sqlalchemy import (
     asc,
     Boolean,
     Column,
+    Date,
     DateTime,
     desc,
     false,
@@ -217,7 +218,9 @@ model.HistoryDatasetAssociation.table = Table(
     Column("validated_state", TrimmedString(64), default='unvalidated', nullable=False),
     Column("validated_state_message", TEXT),
     Column("hidden_beneath_collection_instance_id",
-           ForeignKey("history_dataset_collection_association.id"), nullable=True))
+           ForeignKey("history_dataset_collection_association.id"), nullable=True),
+    Index('ix_hda_history_id_hid', 'history_id', 'hid'),
+    Index('ix_hda_history_id_update_time', 'history_id', 'update_time'))
 
 
 model.HistoryDatasetAssociationHistory.table = Table(
@@ -570,7 +573,8 @@ model.Job.table = Table(
     Column("object_store_id", TrimmedString(255), index=True),
     Column("imported", Boolean, default=False, index=True),
     Column("params", TrimmedString(255), index=True),
-    Column("handler", TrimmedString(255), index=True))
+    Column("handler", TrimmedString(255), index=True),
+    Column("fingerprint", String(64), index=True))
 
 model.JobStateHistory.table = Table(
     "job_state_history", metadata,
@@ -732,6 +736,23 @@ model.TaskMetricNumeric.table = Table(
     Column("metric_name", Unicode(255)),
     Column("metric_value", Numeric(model.JOB_METRIC_PRECISION, model.JOB_METRIC_SCALE)))
 
+model.JobMetricRollup.table = Table(
+    "job_metric_rollup", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("day", Date, nullable=False),
+    Column("tool_id", String(255), nullable=False),
+    Column("tool_version", String(255), nullable=False),
+    Column("destination_id", String(255), nullable=False),
+    Column("plugin", Unicode(255), nullable=False),
+    Column("metric_name", Unicode(255), nullable=False),
+    Column("bin", Integer, nullable=False),
+    Column("count", Integer, nullable=False, default=0),
+    Column("total", Numeric(model.JOB_METRIC_PRECISION, model.JOB_METRIC_SCALE), nullable=False, default=0),
+    Column("minimum", Numeric(model.JOB_METRIC_PRECISION, model.JOB_METRIC_SCALE)),
+    Column("maximum", Numeric(model.JOB_METRIC_PRECISION, model.JOB_METRIC_SCALE)),
+    UniqueConstraint("day", "tool_id", "tool_version", "destination_id", "plugin", "metric_name", "bin", name="job_metric_rollup_key"),
+    Index("ix_job_metric_rollup_tool_id_day", "tool_id", "day"))
+
 
 model.GenomeIndexToolData.table = Table(
     "genome_index_tool_data", metadata,
@@ -858,7 +879,9 @@ model.HistoryDatasetCollectionAssociation.table = Table(
     Column("job_id", ForeignKey("job.id"), index=True, nullable=True),
     Column("implicit_collection_jobs_id", ForeignKey("implicit_collection_jobs.id"), index=True, nullable=True),
     Column("create_time", DateTime, default=now),
-    Column("update_time", DateTime, default=now, onupdate=now, index=True))
+    Column("update_time", DateTime, default=now, onupdate=now, index=True),
+    Index('ix_hdca_history_id_hid', 'history_id', 'hid'),
+    Index('ix_hdca_history_id_update_time', 'history_id', 'update_time'))
 
 model.LibraryDatasetCollectionAssociation.table = Table(
     "library_dataset_collection_association", metadata,
@@ -2127,6 +2150,8 @@ simple_mapping(model.JobMetricNumeric,
 simple_mapping(model.TaskMetricNumeric,
     task=relation(model.Task, backref="numeric_metrics"))
 
+simple_mapping(model.JobMetricRollup)
+
 simple_mapping(model.ImplicitlyCreatedDatasetCollectionInput,
     input_dataset_collection=relation(model.HistoryDatasetCollectionAssociation,
         primaryjoin=(model.HistoryDatasetCollectionAssociation.table.c.id
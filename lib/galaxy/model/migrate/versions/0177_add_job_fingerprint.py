@@ -0,0 +1,35 @@
+"""
+Migration script for adding the fingerprint column used by the job cache to the job table.
+"""
+
+import logging
+
+from sqlalchemy import (
+    Column,
+    MetaData,
+    String,
+)
+
+from galaxy.model.migrate.versions.util import (
+    add_column,
+    drop_column,
+)
+
+log = logging.getLogger(__name__)
+metadata = MetaData()
+
+
+def upgrade(migrate_engine):
+    print(__doc__)
+    metadata.bind = migrate_engine
+    metadata.reflect()
+
+    fingerprint_column = Column('fingerprint', String(64), index=True)
+    add_column(fingerprint_column, 'job', metadata, index_name='ix_job_fingerprint')
+
+
+def downgrade(migrate_engine):
+    metadata.bind = migrate_engine
+    metadata.reflect()
+
+    drop_column('fingerprint', 'job', metadata)
@@ -0,0 +1,57 @@
+"""
+Migration script to add indexes on (history_id, hid) and (history_id, update_time) of
+history contents, used for keyset pagination of history contents and their changes.
+"""
+
+import logging
+
+from sqlalchemy import MetaData
+
+from galaxy.model.migrate.versions.util import (
+    add_index,
+    drop_index
+)
+
+log = logging.getLogger(__name__)
+metadata = MetaData()
+
+indexes = [
+    [
+        "ix_hda_history_id_hid",
+        "history_dataset_association",
+        ["history_id", "hid"]
+    ],
+    [
+        "ix_hda_history_id_update_time",
+        "history_dataset_association",
+        ["history_id", "update_time"]
+    ],
+    [
+        "ix_hdca_history_id_hid",
+        "history_dataset_collection_association",
+        ["history_id", "hid"]
+    ],
+    [
+        "ix_hdca_history_id_update_time",
+        "history_dataset_collection_association",
+        ["history_id", "update_time"]
+    ],
+]
+
+
+def upgrade(migrate_engine):
+    print(__doc__)
+    metadata.bind = migrate_engine
+    metadata.reflect()
+
+    for ix, table, cols in indexes:
+        add_index(ix, table, cols, metadata)
+
+
+def downgrade(migrate_engine):
+    metadata.bind = migrate_engine
+    metadata.reflect()
+
+    for ix, table, cols in indexes:
+        # dropping an index only needs one of its columns
+        drop_index(ix, table, cols[0], metadata)
@@ -0,0 +1,60 @@
+"""
+Migration script to add the job_metric_rollup table, histograms of numeric job
+metrics per tool version, destination and day.
+"""
+
+import logging
+
+from sqlalchemy import (
+    Column,
+    Date,
+    Index,
+    Integer,
+    MetaData,
+    Numeric,
+    String,
+    Table,
+    Unicode,
+    UniqueConstraint,
+)
+
+from galaxy.model.migrate.versions.util import (
+    create_table,
+    drop_table
+)
+
+log = logging.getLogger(__name__)
+metadata = MetaData()
+
+JobMetricRollup_table = Table(
+    "job_metric_rollup", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("day", Date, nullable=False),
+    Column("tool_id", String(255), nullable=False),
+    Column("tool_version", String(255), nullable=False),
+    Column("destination_id", String(255), nullable=False),
+    Column("plugin", Unicode(255), nullable=False),
+    Column("metric_name", Unicode(255), nullable=False),
+    Column("bin", Integer, nullable=False),
+    Column("count", Integer, nullable=False),
+    Column("total", Numeric(26, 7), nullable=False),
+    Column("minimum", Numeric(26, 7)),
+    Column("maximum", Numeric(26, 7)),
+    UniqueConstraint("day", "tool_id", "tool_version", "destination_id", "plugin", "metric_name", "bin", name="job_metric_rollup_key"),
+    Index("ix_job_metric_rollup_tool_id_day", "tool_id", "day"),
+)
+
+
+def upgrade(migrate_engine):
+    print(__doc__)
+    metadata.bind = migrate_engine
+    metadata.reflect()
+
+    create_table(JobMetricRollup_table)
+
+
+def downgrade(migrate_engine):
+    metadata.bind = migrate_engine
+    metadata.reflect()
+
+    drop_table(JobMetricRollup_table)
@@ -148,6 +148,9 @@ def add_index(index_name, table, column_name, metadata=None, **kwds):
     :param table: Table to add the index to
     :type table: :class:`Table` or str
 
+    :param column_name: Column(s) to index
+    :type column_name: str or list of str
+
     :param metadata: Needed only if ``table`` is a table name
     :type metadata: :class:`Metadata`
     """
@@ -157,11 +160,15 @@ def add_index(index_name, table, column_name, metadata=None, **kwds):
             table = Table(table, metadata, autoload=True)
         index_name = truncate_index_name(index_name, table.metadata.bind)
         if index_name not in [ix.name for ix in table.indexes]:
-            column = table.c[column_name]
-            # MySQL cannot index a TEXT/BLOB column without specifying mysql_length
-            if isinstance(column.type, (BLOB, MEDIUMBLOB, Text)):
-                kwds.setdefault('mysql_length', 200)
-            index = Index(index_name, column, **kwds)
+            if isinstance(column_name, list):
+                columns = [table.c[name] for name in column_name]
+            else:
+                column = table.c[column_name]
+                # MySQL cannot index a TEXT/BLOB column without specifying mysql_length
+                if isinstance(column.type, (BLOB, MEDIUMBLOB, Text)):
+                    kwds.setdefault('mysql_length', 200)
+                columns = [column]
+            index = Index(index_name, *columns, **kwds)
             index.create()
         else:
             log.debug("Index '%s' on column '%s' in table '%s' already exists.", index_name, column_name, table)
@@ -812,17 +812,8 @@ class GalaxyRBACAgent(RBACAgent):
         Permission looks like: { Action : [ Role, Role ] }
         """
         # Make sure that DATASET_MANAGE_PERMISSIONS is associated with at least 1 role
-        has_dataset_manage_permissions = False
         permissions = permissions or {}
-        for action, roles in permissions.items():
-            if isinstance(action, Action):
-                if action == self.permitted_actions.DATASET_MANAGE_PERMISSIONS and roles:
-                    has_dataset_manage_permissions = True
-                    break
-            elif action == self.permitted_actions.DATASET_MANAGE_PERMISSIONS.action and roles:
-                has_dataset_manage_permissions = True
-                break
-        if not has_dataset_manage_permissions:
+        if not self._has_dataset_manage_permissions(permissions):
             return "At least 1 role must be associated with manage permissions on this dataset."
         flush_needed = False
         # Delete all of the current permissions on the dataset
@@ -846,6 +837,41 @@ class GalaxyRBACAgent(RBACAgent):
             self.sa_session.flush()
         return ""
 
+    def set_new_datasets_permissions(self, datasets_permissions):
+        """
+        Set permissions on many new, already flushed datasets at once, inserting
+        all permission rows with a single statement. ``datasets_permissions`` is
+        a list of (dataset, permissions) pairs, permissions look like in
+        ``set_all_dataset_permissions``.
+        """
+        rows = []
+        for dataset, permissions in datasets_permissions:
+            permissions = permissions or {}
+            if not self._has_dataset_manage_permissions(permissions):
+                continue
+            for action, roles in permissions.items():
+                if isinstance(action, Action):
+                    action = action.action
+                for role in roles:
+                    rows.append({
+                        'action': action,
+                        'dataset_id': dataset.id,
+                        'role_id': role.id if hasattr(role, "id") else role,
+                    })
+        if rows:
+            self.sa_session.execute(self.model.DatasetPermissions.table.insert(), rows)
+            for dataset, _ in datasets_permissions:
+                self.sa_session.expire(dataset, ['actions'])
+
+    def _has_dataset_manage_permissions(self, permissions):
+        for action, roles in permissions.items():
+            if isinstance(action, Action):
+                if action == self.permitted_actions.DATASET_MANAGE_PERMISSIONS and roles:
+                    return True
+            elif action == self.permitted_actions.DATASET_MANAGE_PERMISSIONS.action and roles:
+                return True
+        return False
+
     def set_dataset_permission(self, dataset, permission=None):
         """
         Set a specific permission on a dataset, leaving all other current permissions on the dataset alone.
@@ -8,6 +8,7 @@ corresponding to files in other contexts.
 import abc
 import logging
 import os
+import time
 from collections import (
     namedtuple,
 )
@@ -37,6 +38,11 @@ class ModelPersistenceContext(metaclass=abc.ABCMeta):
     This class implement the create_dataset method that takes care of populating metadata
     required for datasets and other potential model objects.
     """
+    # Optional pool of worker processes setting metadata of many datasets at once
+    # and collector of the time setting metadata took (see galaxy.metadata.set_metadata)
+    metadata_pool = None
+    metadata_timings = None
+
     def create_dataset(
         self,
         ext,
@@ -180,8 +186,7 @@ class ModelPersistenceContext(metaclass=abc.ABCMeta):
 
         return primary_data
 
-    @staticmethod
-    def set_datasets_metadata(datasets, datasets_attributes=None):
+    def set_datasets_metadata(self, datasets, datasets_attributes=None):
         datasets_attributes = datasets_attributes or [{} for _ in datasets]
         for primary_data, dataset_attributes in zip(datasets, datasets_attributes):
             # add tool/metadata provided information
@@ -194,9 +199,24 @@ class ModelPersistenceContext(metaclass=abc.ABCMeta):
                     dataset_att_name = dataset_att_by_name.get(att_set, att_set)
                     setattr(primary_data, dataset_att_name, dataset_attributes.get(att_set, getattr(primary_data, dataset_att_name)))
 
+        pooled_results = {}
+        if self.metadata_pool:
+            pooled = [primary_data for primary_data, dataset_attributes in zip(datasets, datasets_attributes)
+                      if not dataset_attributes.get('metadata') and self.metadata_pool.can_set_meta(primary_data)]
+            for primary_data in pooled:
+                primary_data.clear_associated_files(metadata_safe=True)
+            results = self.metadata_pool.set_meta([(primary_data, {}, {}) for primary_data in pooled], set_peek=True)
+            pooled_results = {id(primary_data): result for primary_data, result in zip(pooled, results)}
+
+        for primary_data, dataset_attributes in zip(datasets, datasets_attributes):
+            result = pooled_results.get(id(primary_data))
+            start = time.time()
             try:
                 metadata_dict = dataset_attributes.get('metadata', None)
-                if metadata_dict:
+                if result:
+                    if result.error:
+                        raise Exception(f"Setting metadata in worker process failed:\n{result.error}")
+                elif metadata_dict:
                     if "dbkey" in dataset_attributes:
                         metadata_dict["dbkey"] = dataset_attributes["dbkey"]
                     # branch tested with tool_provided_metadata_3 / tool_provided_metadata_10
@@ -207,7 +227,11 @@ class ModelPersistenceContext(metaclass=abc.ABCMeta):
                 if primary_data.state == galaxy.model.HistoryDatasetAssociation.states.OK:
                     primary_data.state = galaxy.model.HistoryDatasetAssociation.states.FAILED_METADATA
                 log.exception("Exception occured while setting metdata")
+            if self.metadata_timings is not None:
+                self.metadata_timings.record_discovered(result.seconds if result else time.time() - start)
 
+            if result and result.peek_set:
+                continue
             try:
                 primary_data.set_peek()
             except Exception:
@@ -12,6 +12,10 @@ import random
 import shutil
 import threading
 import time
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    wait,
+)
 
 import yaml
 
@@ -28,6 +32,14 @@ from galaxy.util.path import (
     safe_relpath,
 )
 from galaxy.util.sleeper import Sleeper
+from .placement import (
+    placement_key,
+    PlacementIndex,
+)
+
+DEFAULT_CAPACITY_REFRESH_INTERVAL = 120
+# Maximum number of backends whose usage is queried concurrently
+CAPACITY_REFRESH_WORKERS = 8
 
 NO_SESSION_ERROR_MESSAGE = "Attempted to 'create' object store entity in configuration with no database session present."
 
@@ -655,13 +667,27 @@ class NestedObjectStore(BaseObjectStore):
         """Extend `ObjectStore`'s constructor."""
         super().__init__(config)
         self.backends = {}
+        self.placement_index = None
+        self.placement_index_path = None
+        if config_xml:
+            self.placement_index_path = config_xml.get("placement_index", None)
+        if self.placement_index_path:
+            self.placement_index = PlacementIndex(self.placement_index_path)
 
     def shutdown(self):
         """For each backend, shuts them down."""
         for store in self.backends.values():
             store.shutdown()
+        if self.placement_index is not None:
+            self.placement_index.close()
         super().shutdown()
 
+    def to_dict(self):
+        as_dict = super().to_dict()
+        if self.placement_index_path:
+            as_dict["placement_index"] = self.placement_index_path
+        return as_dict
+
     def _exists(self, obj, **kwargs):
         """Determine if the `obj` exists in any of the backends."""
         return self._call_method('_exists', obj, False, False, **kwargs)
@@ -684,7 +710,12 @@ class NestedObjectStore(BaseObjectStore):
 
     def _delete(self, obj, **kwargs):
         """For the first backend that has this `obj`, delete it."""
-        return self._call_method('_delete', obj, False, False, **kwargs)
+        deleted = self._call_method('_delete', obj, False, False, **kwargs)
+        if deleted and self.placement_index is not None and not kwargs.get('extra_dir'):
+            object_key = placement_key(obj)
+            if object_key is not None:
+                self.placement_index.remove(object_key)
+        return deleted
 
     def _get_data(self, obj, **kwargs):
         """For the first backend that has this `obj`, get data from it."""
@@ -722,12 +753,45 @@ class NestedObjectStore(BaseObjectStore):
         except AttributeError:
             return str(obj)
 
+    def _record_placement(self, obj, backend_id):
+        if self.placement_index is not None:
+            object_key = placement_key(obj)
+            if object_key is not None:
+                self.placement_index.set(object_key, backend_id)
+
+    def _find_backend_id(self, obj, **kwargs):
+        """
+        Return the id of the first backend that has `obj`, or None.
+
+        If a placement index is configured, the backend recorded for `obj` is
+        checked first and only if it doesn't have `obj` all backends are
+        probed.
+        """
+        object_key = None
+        # Job working directories are not placed in backends
+        if self.placement_index is not None and not kwargs.get('base_dir'):
+            object_key = placement_key(obj)
+        if object_key is not None:
+            backend_id = self.placement_index.get(object_key)
+            if backend_id is not None:
+                for id, store in self.backends.items():
+                    if str(id) == backend_id:
+                        if store.exists(obj, **kwargs):
+                            return id
+                        break
+        for id, store in self.backends.items():
+            if store.exists(obj, **kwargs):
+                if object_key is not None:
+                    self.placement_index.set(object_key, id)
+                return id
+        return None
+
     def _call_method(self, method, obj, default, default_is_exception,
             **kwargs):
         """Check all children object stores for the first one with the dataset."""
-        for store in self.backends.values():
-            if store.exists(obj, **kwargs):
-                return store.__getattribute__(method)(obj, **kwargs)
+        backend_id = self._find_backend_id(obj, **kwargs)
+        if backend_id is not None:
+            return self.backends[backend_id].__getattribute__(method)(obj, **kwargs)
         if default_is_exception:
             raise default('objectstore, _call_method failed: %s on %s, kwargs: %s'
                           % (method, self._repr_object_for_exception(obj), str(kwargs)))
@@ -768,6 +832,11 @@ class DistributedObjectStore(NestedObjectStore):
         self.original_weighted_backend_ids = []
         self.max_percent_full = {}
         self.global_max_percent_full = config_dict.get("global_max_percent_full", 0)
+        self.capacity_refresh_interval = config_dict.get("capacity_refresh_interval", DEFAULT_CAPACITY_REFRESH_INTERVAL)
+        # backend id -> last known store usage percent, refreshed by the filesystem monitor
+        self.store_usage_percent = {}
+        # backend id -> future of the last store usage query of the backend
+        self._store_usage_futures = {}
         random.seed()
 
         for backend_def in config_dict["backends"]:
@@ -806,8 +875,12 @@ class DistributedObjectStore(NestedObjectStore):
         backends = []
         config_dict = {
             'global_max_percent_full': float(backends_root.get('maxpctfull', 0)),
+            'capacity_refresh_interval': float(backends_root.get('capacity_refresh_interval', DEFAULT_CAPACITY_REFRESH_INTERVAL)),
             'backends': backends,
         }
+        placement_index = backends_root.get('placement_index', None)
+        if placement_index:
+            config_dict['placement_index'] = placement_index
 
         for b in [e for e in backends_root if e.tag == 'backend']:
             store_id = b.get("id")
@@ -850,6 +923,7 @@ class DistributedObjectStore(NestedObjectStore):
     def to_dict(self):
         as_dict = super().to_dict()
         as_dict["global_max_percent_full"] = self.global_max_percent_full
+        as_dict["capacity_refresh_interval"] = self.capacity_refresh_interval
         backends = []
         for backend_id, backend in self.backends.items():
             backend_as_dict = backend.to_dict()
@@ -867,15 +941,46 @@ class DistributedObjectStore(NestedObjectStore):
             self.sleeper.wake()
 
     def __filesystem_monitor(self):
-        while self.running:
-            new_weighted_backend_ids = self.original_weighted_backend_ids
-            for id, backend in self.backends.items():
-                maxpct = self.max_percent_full[id] or self.global_max_percent_full
-                pct = backend.get_store_usage_percent()
-                if pct > maxpct:
-                    new_weighted_backend_ids = [_ for _ in new_weighted_backend_ids if _ != id]
-            self.weighted_backend_ids = new_weighted_backend_ids
-            self.sleeper.sleep(120)  # Test free space every 2 minutes
+        with ThreadPoolExecutor(max_workers=max(1, min(len(self.backends), CAPACITY_REFRESH_WORKERS))) as executor:
+            while self.running:
+                self.refresh_capacity(executor)
+                self.sleeper.sleep(self.capacity_refresh_interval)
+
+    def refresh_capacity(self, executor):
+        """
+        Query the usage of all backends concurrently and remove backends that
+        are too full from the ones new objects are placed in.
+
+        A backend that does not answer in time (e.g. a hung NFS mount) keeps
+        its last known usage instead of holding up the other backends, and
+        isn't queried again until its pending query returns, so hung queries
+        don't pile up in the executor.
+        """
+        futures = {}
+        for id, backend in self.backends.items():
+            future = self._store_usage_futures.get(id)
+            if future is None or future.done():
+                future = self._store_usage_futures[id] = executor.submit(backend.get_store_usage_percent)
+            else:
+                log.debug("Store usage query of backend '%s' still pending, not querying it again", id)
+            futures[id] = future
+        wait(futures.values(), timeout=self.capacity_refresh_interval)
+        for id, future in futures.items():
+            if not future.done():
+                log.warning("Timed out getting store usage of backend '%s', using last known value", id)
+                continue
+            try:
+                self.store_usage_percent[id] = future.result()
+            except Exception:
+                log.exception("Failed to get store usage of backend '%s'", id)
+        new_weighted_backend_ids = self.original_weighted_backend_ids
+        for id in self.backends:
+            maxpct = self.max_percent_full[id] or self.global_max_percent_full
+            pct = self.store_usage_percent.get(id)
+            # A limit of 0 means the backend has no limit
+            if maxpct and pct is not None and pct > maxpct:
+                new_weighted_backend_ids = [_ for _ in new_weighted_backend_ids if _ != id]
+        self.weighted_backend_ids = new_weighted_backend_ids
 
     def _create(self, obj, **kwargs):
         """The only method in which obj.object_store_id may be None."""
@@ -893,6 +998,8 @@ class DistributedObjectStore(NestedObjectStore):
                 log.debug("Using preferred backend '%s' for creation of %s %s"
                           % (obj.object_store_id, obj.__class__.__name__, obj.id))
             self.backends[obj.object_store_id].create(obj, **kwargs)
+            if not kwargs.get('base_dir'):
+                self._record_placement(obj, obj.object_store_id)
 
     def _call_method(self, method, obj, default, default_is_exception, **kwargs):
         object_store_id = self.__get_store_id_for(obj, **kwargs)
@@ -914,13 +1021,12 @@ class DistributedObjectStore(NestedObjectStore):
         # if this instance has been switched from a non-distributed to a
         # distributed object store, or if the object's store id is invalid,
         # try to locate the object
-        for id, store in self.backends.items():
-            if store.exists(obj, **kwargs):
-                log.warning('%s object with ID %s found in backend object store with ID %s'
-                            % (obj.__class__.__name__, obj.id, id))
-                obj.object_store_id = id
-                return id
-        return None
+        id = self._find_backend_id(obj, **kwargs)
+        if id is not None:
+            log.warning('%s object with ID %s found in backend object store with ID %s'
+                        % (obj.__class__.__name__, obj.id, id))
+            obj.object_store_id = id
+        return id
 
 
 class HierarchicalObjectStore(NestedObjectStore):
@@ -946,14 +1052,19 @@ class HierarchicalObjectStore(NestedObjectStore):
     @classmethod
     def parse_xml(clazz, config_xml):
         backends_list = []
-        for b in sorted(config_xml.find('backends'), key=lambda b: int(b.get('order'))):
+        backends_root = config_xml.find('backends')
+        for b in sorted(backends_root, key=lambda b: int(b.get('order'))):
             store_type = b.get("type")
             objectstore_class, _ = type_to_object_store_class(store_type)
             backend_config_dict = objectstore_class.parse_xml(b)
             backend_config_dict["type"] = store_type
             backends_list.append(backend_config_dict)
 
-        return {"backends": backends_list}
+        config_dict = {"backends": backends_list}
+        placement_index = backends_root.get('placement_index', None)
+        if placement_index:
+            config_dict['placement_index'] = placement_index
+        return config_dict
 
     def to_dict(self):
         as_dict = super().to_dict()
@@ -966,10 +1077,7 @@ class HierarchicalObjectStore(NestedObjectStore):
 
     def _exists(self, obj, **kwargs):
         """Check all child object stores."""
-        for store in self.backends.values():
-            if store.exists(obj, **kwargs):
-                return True
-        return False
+        return self._find_backend_id(obj, **kwargs) is not None
 
     def _create(self, obj, **kwargs):
         """Call the primary object store."""
@@ -5,8 +5,6 @@ Object Store plugin for the Microsoft Azure Block Blob Storage system
 import logging
 import os
 import shutil
-import threading
-import time
 from datetime import datetime
 
 try:
@@ -26,11 +24,12 @@ from galaxy.util import (
     umask_fix_perms
 )
 from galaxy.util.path import safe_relpath
-from galaxy.util.sleeper import Sleeper
-from ..objectstore import (
-    ConcreteObjectStore,
-    convert_bytes,
+from .caching import (
+    build_cache_manager,
+    cache_manager_options,
+    parse_cache_xml,
 )
+from ..objectstore import ConcreteObjectStore
 
 NO_BLOBSERVICE_ERROR_MESSAGE = ("ObjectStore configured, but no azure.storage.blob dependency available."
                                 "Please install and properly configure azure.storage.blob or modify Object Store configuration.")
@@ -72,6 +71,7 @@ def parse_config_xml(config_xml):
             'cache': {
                 'size': cache_size,
                 'path': staging_path,
+                **parse_cache_xml(c_xml),
             },
             'extra_dirs': extra_dirs,
         }
@@ -106,6 +106,7 @@ class AzureBlobObjectStore(ConcreteObjectStore):
 
         self.cache_size = cache_dict.get('size', -1)
         self.staging_path = cache_dict.get('path') or self.config.object_store_cache_path
+        self.cache_manager_options = cache_manager_options(cache_dict)
 
         self._initialize()
 
@@ -119,11 +120,8 @@ class AzureBlobObjectStore(ConcreteObjectStore):
         if self.cache_size != -1:
             # Convert GBs to bytes for comparison
             self.cache_size = self.cache_size * 1073741824
-            # Helper for interruptable sleep
-            self.sleeper = Sleeper()
-            self.cache_monitor_thread = threading.Thread(target=self.__cache_monitor)
-            self.cache_monitor_thread.start()
-            log.info("Cache cleaner manager started")
+        self.cache_manager = build_cache_manager(self.staging_path, self.cache_manager_options, cache_size=self.cache_size)
+        self.cache_manager.start()
 
     def to_dict(self):
         as_dict = super().to_dict()
@@ -139,6 +137,7 @@ class AzureBlobObjectStore(ConcreteObjectStore):
             'cache': {
                 'size': self.cache_size,
                 'path': self.staging_path,
+                **self.cache_manager_options,
             }
         })
         return as_dict
@@ -239,7 +238,7 @@ class AzureBlobObjectStore(ConcreteObjectStore):
     def _in_cache(self, rel_path):
         """ Check if the given dataset is in the local cache. """
         cache_path = self._get_cache_path(rel_path)
-        return os.path.exists(cache_path)
+        return self.cache_manager.in_cache(cache_path)
 
     def _pull_into_cache(self, rel_path):
         # Ensure the cache directory structure exists (e.g., dataset_#_files/)
@@ -249,6 +248,8 @@ class AzureBlobObjectStore(ConcreteObjectStore):
         # Now pull in the file
         file_ok = self._download(rel_path)
         self._fix_permissions(self._get_cache_path(rel_path_dir))
+        if file_ok:
+            self.cache_manager.record(self._get_cache_path(rel_path))
         return file_ok
 
     def _transfer_cb(self, complete, total):
@@ -429,6 +430,7 @@ class AzureBlobObjectStore(ConcreteObjectStore):
             # but requires iterating through each individual blob in Azure and deleing it.
             if entire_dir and extra_dir:
                 shutil.rmtree(self._get_cache_path(rel_path))
+                self.cache_manager.remove(self._get_cache_path(rel_path))
                 blobs = self.service.list_blobs(self.container_name, prefix=rel_path)
                 for blob in blobs:
                     log.debug("Deleting from Azure: %s", blob)
@@ -437,6 +439,7 @@ class AzureBlobObjectStore(ConcreteObjectStore):
             else:
                 # Delete from cache first
                 os.unlink(self._get_cache_path(rel_path))
+                self.cache_manager.remove(self._get_cache_path(rel_path))
                 # Delete from S3 as well
                 if self._in_azure(rel_path):
                     log.debug("Deleting from Azure: %s", rel_path)
@@ -514,7 +517,7 @@ class AzureBlobObjectStore(ConcreteObjectStore):
                     log.exception("Trouble copying source file '%s' to cache '%s'", source_file, cache_file)
             else:
                 source_file = self._get_cache_path(rel_path)
-
+            self.cache_manager.record(self._get_cache_path(rel_path))
             self._push_to_os(rel_path, source_file)
 
         else:
@@ -533,53 +536,8 @@ class AzureBlobObjectStore(ConcreteObjectStore):
     def _get_store_usage_percent(self):
         return 0.0
 
-    ##################
-    # Secret Methods #
-    ##################
-
-    def __cache_monitor(self):
-        time.sleep(2)  # Wait for things to load before starting the monitor
-        while self.running:
-            total_size = 0
-            # Is this going to be too expensive of an operation to be done frequently?
-            file_list = []
-            for dirpath, _, filenames in os.walk(self.staging_path):
-                for filename in filenames:
-                    filepath = os.path.join(dirpath, filename)
-                    file_size = os.path.getsize(filepath)
-                    total_size += file_size
-                    # Get the time given file was last accessed
-                    last_access_time = time.localtime(os.stat(filepath)[7])
-                    # Compose a tuple of the access time and the file path
-                    file_tuple = last_access_time, filepath, file_size
-                    file_list.append(file_tuple)
-            # Sort the file list (based on access time)
-            file_list.sort()
-            # Initiate cleaning once within 10% of the defined cache size?
-            cache_limit = self.cache_size * 0.9
-            if total_size > cache_limit:
-                log.info("Initiating cache cleaning: current cache size: %s; clean until smaller than: %s",
-                         convert_bytes(total_size), convert_bytes(cache_limit))
-                # How much to delete? If simply deleting up to the cache-10% limit,
-                # is likely to be deleting frequently and may run the risk of hitting
-                # the limit - maybe delete additional #%?
-                # For now, delete enough to leave at least 10% of the total cache free
-                delete_this_much = total_size - cache_limit
-                # Keep deleting datasets from file_list until deleted_amount does not
-                # exceed delete_this_much; start deleting from the front of the file list,
-                # which assumes the oldest files come first on the list.
-                deleted_amount = 0
-                for entry in enumerate(file_list):
-                    if deleted_amount < delete_this_much:
-                        deleted_amount += entry[2]
-                        os.remove(entry[1])
-                        # Debugging code for printing deleted files' stats
-                        # folder, file_name = os.path.split(f[1])
-                        # file_date = time.strftime("%m/%d/%y %H:%M:%S", f[0])
-                        # log.debug("%s. %-25s %s, size %s (deleted %s/%s)" \
-                        #     % (i, file_name, convert_bytes(f[2]), file_date, \
-                        #     convert_bytes(deleted_amount), convert_bytes(delete_this_much)))
-                    else:
-                        log.debug("Cache cleaning done. Total space freed: %s", convert_bytes(deleted_amount))
-
-            self.sleeper.sleep(30)  # Test cache size every 30 seconds?
+    def shutdown(self):
+        cache_manager = getattr(self, 'cache_manager', None)
+        if cache_manager:
+            log.debug("Shutting down cache manager")
+            cache_manager.shutdown()
@@ -0,0 +1,724 @@
+"""
+Cache management shared by object stores that keep a local cache of remote
+objects (S3, Swift, cloud, Azure, iRODS).
+
+Rather than walking the whole cache directory to find out how big the cache
+is and which files to evict, cache entries are recorded in a small sqlite
+index (path, size, last access time, number of hits) that is updated as
+objects are pulled into, written to, read from or deleted from the cache.
+The index is only rebuilt from disk if it does not exist yet, was never
+completely built, or if explicitly requested. Files written by processes that
+do not maintain the index are picked up by a much less frequent
+reconciliation with the cache directory.
+
+Object stores may also hand uploads of cache files to a write-behind
+uploader, which persists pending uploads in a queue table of the same sqlite
+database and uploads them from a pool of threads, retrying failures until
+they succeed. Since the database is shared by all processes using the cache,
+files waiting to be uploaded are never evicted, whichever process queued
+them, and every upload is claimed by a single process before it starts.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from galaxy.util import string_as_bool
+from galaxy.util.sleeper import Sleeper
+
+log = logging.getLogger(__name__)
+
+# Files in the cache directory with this prefix are never indexed or evicted
+RESERVED_FILENAME_PREFIX = ".galaxy_"
+DEFAULT_INDEX_FILENAME = ".galaxy_cache_index.sqlite"
+DEFAULT_CHECK_INTERVAL = 30
+DEFAULT_RECONCILE_INTERVAL = 3600
+# Evict down to this fraction of the cache size once the limit is exceeded
+DEFAULT_CACHE_LIMIT_RATIO = 0.9
+EVICTION_POLICIES = ("lru", "lfu")
+# Options of the object store ``cache`` configuration used by the cache manager
+CACHE_MANAGER_OPTIONS = ("eviction_policy", "index_path", "check_interval", "reconcile_interval", "write_behind", "upload_workers")
+DEFAULT_UPLOAD_WORKERS = 4
+DEFAULT_UPLOAD_RETRY_DELAY = 5
+MAX_UPLOAD_RETRY_DELAY = 600
+# Claims of uploads not renewed for this long (e.g. because the claiming
+# process died) expire and the uploads are dispatched again
+DEFAULT_UPLOAD_CLAIM_TIMEOUT = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entry (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_cache_entry_last_access ON cache_entry (last_access);
+CREATE INDEX IF NOT EXISTS ix_cache_entry_hits ON cache_entry (hits, last_access);
+CREATE TABLE IF NOT EXISTS cache_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+UPLOAD_QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_upload (
+    rel_path TEXT PRIMARY KEY,
+    source_file TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    claimed REAL,
+    claimed_by TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_pending_upload_next_attempt ON pending_upload (next_attempt);
+CREATE INDEX IF NOT EXISTS ix_pending_upload_source_file ON pending_upload (source_file);
+"""
+
+
+class CacheMetrics:
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    def to_dict(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+        }
+
+
+class CacheIndex:
+    """
+    sqlite backed index of the files in a cache directory. Files that are
+    source files of pending uploads in the same database are never evicted.
+    """
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(index_path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.executescript(UPLOAD_QUEUE_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @property
+    def complete(self):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM cache_meta WHERE key = 'complete'").fetchone()
+        return row is not None and row[0] == "1"
+
+    def rebuild(self, entries):
+        """Replace the index with ``(path, size, last_access)`` tuples."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM cache_entry")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO cache_entry (path, size, last_access, hits) VALUES (?, ?, ?, 0)",
+                    entries
+                )
+                self._conn.execute("INSERT OR REPLACE INTO cache_meta (key, value) VALUES ('complete', '1')")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def reconcile(self, entries, started):
+        """
+        Add ``(path, size, last_access)`` tuples found on disk that are
+        missing from the index and drop entries of files that no longer exist,
+        unless they were recorded after the scan ``started``. Return the number
+        of added and removed entries.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS found_entry (path TEXT PRIMARY KEY, size INTEGER, last_access REAL)")
+                self._conn.execute("DELETE FROM found_entry")
+                self._conn.executemany("INSERT OR REPLACE INTO found_entry (path, size, last_access) VALUES (?, ?, ?)", entries)
+                added = self._conn.execute(
+                    "INSERT INTO cache_entry (path, size, last_access, hits) "
+                    "SELECT path, size, last_access, 0 FROM found_entry WHERE path NOT IN (SELECT path FROM cache_entry)"
+                ).rowcount
+                removed = self._conn.execute(
+                    "DELETE FROM cache_entry WHERE last_access < ? AND path NOT IN (SELECT path FROM found_entry)", (started,)
+                ).rowcount
+                self._conn.execute("DELETE FROM found_entry")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return added, removed
+
+    def upsert(self, path, size, last_access):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO cache_entry (path, size, last_access, hits) VALUES (?, ?, ?, 0) "
+                "ON CONFLICT(path) DO UPDATE SET size = excluded.size, last_access = excluded.last_access",
+                (path, size, last_access)
+            )
+
+    def touch_many(self, accesses):
+        """Apply ``{path: (last_access, hits)}`` for paths already in the index."""
+        if not accesses:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "UPDATE cache_entry SET last_access = MAX(last_access, ?), hits = hits + ? WHERE path = ?",
+                [(last_access, hits, path) for path, (last_access, hits) in accesses.items()]
+            )
+            self._conn.execute("COMMIT")
+
+    def remove(self, path):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entry WHERE path = ?", (path,))
+
+    def remove_prefix(self, prefix):
+        prefix = prefix.rstrip(os.sep) + os.sep
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entry WHERE substr(path, 1, ?) = ?", (len(prefix), prefix))
+
+    def total_size(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entry").fetchone()[0]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache_entry").fetchone()[0]
+
+    def eviction_candidates(self, policy, limit, offset=0):
+        if policy == "lfu":
+            order_by = "hits, last_access"
+        else:
+            order_by = "last_access"
+        with self._lock:
+            return self._conn.execute(
+                "SELECT path, size, last_access FROM cache_entry "
+                "WHERE path NOT IN (SELECT source_file FROM pending_upload) "
+                f"ORDER BY {order_by} LIMIT ? OFFSET ?", (limit, offset)
+            ).fetchall()
+
+    def claim_eviction(self, path, last_access):
+        """
+        Remove ``path`` from the index, unless it was accessed since
+        ``last_access`` or is waiting to be uploaded. Return True if the
+        file may be deleted.
+        """
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM cache_entry WHERE path = ? AND last_access <= ? "
+                "AND NOT EXISTS (SELECT 1 FROM pending_upload WHERE source_file = ?)",
+                (path, last_access, path)
+            ).rowcount > 0
+
+
+class CacheManager:
+    """
+    Track the contents of an object store cache directory and evict entries
+    (least recently or least frequently used first) to keep it below
+    ``cache_size`` bytes. A ``cache_size`` of -1 disables eviction, entries
+    and hit/miss metrics are still recorded. If ``use_index`` is False (e.g.
+    for processes that never clean the cache) only hits and misses are
+    counted, files written by such processes are added to the index when the
+    process cleaning the cache reconciles it with the cache directory every
+    ``reconcile_interval`` seconds.
+    """
+
+    def __init__(self, staging_path, cache_size=-1, eviction_policy="lru", index_path=None,
+                 check_interval=DEFAULT_CHECK_INTERVAL, cache_limit_ratio=DEFAULT_CACHE_LIMIT_RATIO, use_index=True,
+                 reconcile_interval=DEFAULT_RECONCILE_INTERVAL):
+        if eviction_policy not in EVICTION_POLICIES:
+            raise Exception(f"Invalid cache eviction policy '{eviction_policy}', must be one of {', '.join(EVICTION_POLICIES)}")
+        self.staging_path = os.path.abspath(staging_path)
+        self.cache_size = cache_size
+        self.eviction_policy = eviction_policy
+        self.check_interval = check_interval
+        self.reconcile_interval = reconcile_interval
+        self.cache_limit_ratio = cache_limit_ratio
+        self.index_path = os.path.abspath(index_path or os.path.join(self.staging_path, DEFAULT_INDEX_FILENAME))
+        self.metrics = CacheMetrics()
+        self._pending_accesses = {}
+        self._pending_lock = threading.Lock()
+        self.running = False
+        self.sleeper = None
+        self.monitor_thread = None
+        self._last_reconcile = time.time()
+        self.index = None
+        if use_index:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            self.index = CacheIndex(self.index_path)
+
+    @property
+    def enforces_size(self):
+        return self.cache_size is not None and self.cache_size > 0
+
+    def start(self):
+        """Rebuild the index if needed and start the eviction thread."""
+        if self.index is None:
+            return
+        if not self.index.complete:
+            self.rebuild_index()
+        if self.enforces_size:
+            self.running = True
+            self.sleeper = Sleeper()
+            self.monitor_thread = threading.Thread(target=self._monitor, name="CacheManager.monitor_thread")
+            self.monitor_thread.daemon = True
+            self.monitor_thread.start()
+            log.info("Cache manager started for %s (%s, %s bytes)", self.staging_path, self.eviction_policy, self.cache_size)
+
+    def shutdown(self):
+        self.running = False
+        if self.monitor_thread is not None:
+            self.sleeper.wake()
+            self.monitor_thread.join(5)
+        self.flush()
+
+    def _scan(self):
+        """Return ``(path, size, last_access)`` of all files in the cache directory."""
+        entries = []
+        for dirpath, _, filenames in os.walk(self.staging_path):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if filename.startswith(RESERVED_FILENAME_PREFIX) or path.startswith(self.index_path):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_size, max(stat.st_atime, stat.st_mtime)))
+        return entries
+
+    def rebuild_index(self):
+        """Walk the cache directory and replace the index with its contents."""
+        start = time.time()
+        entries = self._scan()
+        with self._pending_lock:
+            self._pending_accesses = {}
+        self.index.rebuild(entries)
+        self._last_reconcile = time.time()
+        log.info("Rebuilt cache index for %s with %d entries in %0.3f seconds", self.staging_path, len(entries), time.time() - start)
+
+    def reconcile(self):
+        """
+        Walk the cache directory, add files that are not in the index (e.g.
+        written by processes not using the index) and drop entries of files
+        removed behind the cache manager's back.
+        """
+        start = time.time()
+        entries = self._scan()
+        added, removed = self.index.reconcile(entries, start)
+        self._last_reconcile = time.time()
+        log.info("Reconciled cache index for %s with %d files in %0.3f seconds (%d entries added, %d removed)",
+                 self.staging_path, len(entries), time.time() - start, added, removed)
+        return added, removed
+
+    def in_cache(self, cache_path):
+        """Check whether ``cache_path`` exists, counting a cache hit or miss."""
+        if os.path.exists(cache_path):
+            self.metrics.hits += 1
+            self.touch(cache_path)
+            return True
+        self.metrics.misses += 1
+        return False
+
+    def touch(self, cache_path):
+        # Access times are buffered and written to the index by flush()
+        if self.index is None:
+            return
+        cache_path = os.path.abspath(cache_path)
+        with self._pending_lock:
+            _, hits = self._pending_accesses.get(cache_path, (None, 0))
+            self._pending_accesses[cache_path] = (time.time(), hits + 1)
+
+    def record(self, cache_path):
+        """Add or update ``cache_path`` (a file or a directory) in the index."""
+        if self.index is None:
+            return
+        if os.path.isdir(cache_path):
+            for dirpath, _, filenames in os.walk(cache_path):
+                for filename in filenames:
+                    self._record_file(os.path.join(dirpath, filename))
+        else:
+            self._record_file(cache_path)
+
+    def _record_file(self, path):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        self.index.upsert(os.path.abspath(path), size, time.time())
+
+    def remove(self, cache_path):
+        if self.index is None:
+            return
+        cache_path = os.path.abspath(cache_path)
+        with self._pending_lock:
+            self._pending_accesses.pop(cache_path, None)
+        self.index.remove(cache_path)
+        self.index.remove_prefix(cache_path)
+
+    def flush(self):
+        if self.index is None:
+            return
+        with self._pending_lock:
+            accesses = self._pending_accesses
+            self._pending_accesses = {}
+        self.index.touch_many(accesses)
+
+    def total_size(self):
+        if self.index is None:
+            return None
+        return self.index.total_size()
+
+    def check(self):
+        """Evict entries if the cache is above its size limit."""
+        self.flush()
+        if self.index is None or not self.enforces_size:
+            return 0
+        total_size = self.index.total_size()
+        if total_size <= self.cache_size:
+            return 0
+        cache_limit = self.cache_size * self.cache_limit_ratio
+        log.info("Initiating cache cleaning: current cache size: %s; clean until smaller than: %s", total_size, cache_limit)
+        return self.evict(total_size - cache_limit)
+
+    def evict(self, delete_this_much):
+        deleted_amount = 0
+        skipped = 0
+        while deleted_amount < delete_this_much:
+            candidates = self.index.eviction_candidates(self.eviction_policy, 1000, offset=skipped)
+            if not candidates:
+                break
+            for path, size, last_access in candidates:
+                if deleted_amount >= delete_this_much:
+                    break
+                # Another process may have accessed the file or queued it for
+                # upload since the candidates were selected
+                if not self.index.claim_eviction(path, last_access):
+                    skipped += 1
+                    continue
+                try:
+                    if os.path.getmtime(path) > last_access:
+                        # Rewritten and about to be recorded again
+                        continue
+                    os.remove(path)
+                except FileNotFoundError:
+                    # Removed outside of the cache manager, just drop the entry
+                    size = 0
+                except OSError:
+                    log.exception("Failed to remove cache file %s", path)
+                deleted_amount += size
+                if size:
+                    self.metrics.evictions += 1
+                    self.metrics.evicted_bytes += size
+        log.debug("Cache cleaning done. Total space freed: %s bytes", deleted_amount)
+        return deleted_amount
+
+    def _monitor(self):
+        while self.running:
+            try:
+                if self.reconcile_interval and time.time() - self._last_reconcile >= self.reconcile_interval:
+                    self.reconcile()
+                self.check()
+            except Exception:
+                log.exception("Failed to check cache size for %s", self.staging_path)
+            self.sleeper.sleep(self.check_interval)
+
+
+class UploadQueue:
+    """
+    sqlite backed queue of cache files waiting to be uploaded, shared by all
+    processes using the same database. An upload is claimed by one worker
+    before it starts, claims that are not renewed expire after
+    ``claim_timeout`` seconds.
+    """
+
+    def __init__(self, queue_path, claim_timeout=DEFAULT_UPLOAD_CLAIM_TIMEOUT):
+        self.queue_path = queue_path
+        self.claim_timeout = claim_timeout
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(queue_path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(UPLOAD_QUEUE_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def put(self, rel_path, source_file, now=None):
+        # An upload of a previous version that is still running keeps its
+        # claim, the new version is dispatched once that claim is released
+        now = time.time() if now is None else now
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO pending_upload (rel_path, source_file, version, attempts, next_attempt) VALUES (?, ?, 0, 0, ?) "
+                "ON CONFLICT(rel_path) DO UPDATE SET source_file = excluded.source_file, version = version + 1, "
+                "attempts = 0, next_attempt = excluded.next_attempt",
+                (rel_path, source_file, now)
+            )
+
+    def pending(self, prefix=None):
+        """Return ``(rel_path, source_file)`` of all queued uploads, optionally below ``prefix``."""
+        with self._lock:
+            if prefix is None:
+                return self._conn.execute("SELECT rel_path, source_file FROM pending_upload").fetchall()
+            return self._conn.execute(
+                "SELECT rel_path, source_file FROM pending_upload WHERE substr(rel_path, 1, ?) = ?", (len(prefix), prefix)
+            ).fetchall()
+
+    def is_pending(self, rel_path):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM pending_upload WHERE rel_path = ?", (rel_path,)).fetchone() is not None
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pending_upload").fetchone()[0]
+
+    def due(self, now, limit):
+        """Return ``(rel_path, source_file, version)`` of unclaimed uploads due at ``now``."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT rel_path, source_file, version FROM pending_upload "
+                "WHERE next_attempt <= ? AND (claimed IS NULL OR claimed < ?) ORDER BY next_attempt LIMIT ?",
+                (now, now - self.claim_timeout, limit)
+            ).fetchall()
+
+    def claim(self, rel_path, version, worker, now=None):
+        """Claim an upload for ``worker``, return False if another worker claimed it first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE pending_upload SET claimed = ?, claimed_by = ? "
+                "WHERE rel_path = ? AND version = ? AND (claimed IS NULL OR claimed < ?)",
+                (now, worker, rel_path, version, now - self.claim_timeout)
+            ).rowcount > 0
+
+    def renew(self, worker, now=None):
+        """Renew the claims of ``worker`` on the uploads it is running."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._conn.execute("UPDATE pending_upload SET claimed = ? WHERE claimed_by = ?", (now, worker))
+
+    def release(self, rel_path, worker):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pending_upload SET claimed = NULL, claimed_by = NULL WHERE rel_path = ? AND claimed_by = ?",
+                (rel_path, worker)
+            )
+
+    def done(self, rel_path, version):
+        """Remove an upload, unless it was queued again since ``version`` was dispatched."""
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM pending_upload WHERE rel_path = ? AND version = ?", (rel_path, version)
+            ).rowcount > 0
+
+    def failed(self, rel_path, version, retry_delay, max_retry_delay, now=None):
+        """Schedule a retry with exponential backoff, return the number of attempts so far."""
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts FROM pending_upload WHERE rel_path = ? AND version = ?", (rel_path, version)
+            ).fetchone()
+            if row is None:
+                return 0
+            attempts = row[0] + 1
+            delay = min(retry_delay * 2 ** (attempts - 1), max_retry_delay)
+            self._conn.execute(
+                "UPDATE pending_upload SET attempts = ?, next_attempt = ? WHERE rel_path = ? AND version = ?",
+                (attempts, now + delay, rel_path, version)
+            )
+        return attempts
+
+    def remove(self, rel_path):
+        with self._lock:
+            self._conn.execute("DELETE FROM pending_upload WHERE rel_path = ?", (rel_path,))
+
+
+class WriteBehindUploader:
+    """
+    Upload cache files to the object store from a pool of threads.
+
+    ``upload`` is called as ``upload(rel_path, source_file)`` and must return
+    True on success. Uploads are recorded in an :class:`UploadQueue` before
+    ``enqueue`` returns and only removed from it once they succeed, failed
+    uploads are retried with exponential backoff. The queue lives in the
+    index database of ``cache_manager`` (if given), which is shared by all
+    processes using the cache, so that queued source files are not evicted
+    and uploads queued by any process, including pending uploads left over
+    by a previous process, are run exactly once by whichever uploader
+    claims them first.
+    """
+
+    def __init__(self, staging_path, upload, workers=DEFAULT_UPLOAD_WORKERS, queue_path=None, cache_manager=None,
+                 retry_delay=DEFAULT_UPLOAD_RETRY_DELAY, max_retry_delay=MAX_UPLOAD_RETRY_DELAY,
+                 claim_timeout=DEFAULT_UPLOAD_CLAIM_TIMEOUT):
+        self.upload = upload
+        self.workers = workers
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        if queue_path is None:
+            if cache_manager is not None:
+                queue_path = cache_manager.index_path
+            else:
+                queue_path = os.path.join(staging_path, DEFAULT_INDEX_FILENAME)
+        queue_path = os.path.abspath(queue_path)
+        os.makedirs(os.path.dirname(queue_path), exist_ok=True)
+        self.queue = UploadQueue(queue_path, claim_timeout=claim_timeout)
+        self.worker_id = uuid.uuid4().hex
+        self.uploaded = 0
+        self.failed_attempts = 0
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._wake = threading.Event()
+        self.running = False
+        self.executor = None
+        self.dispatcher_thread = None
+
+    def start(self):
+        pending_count = self.pending_count
+        if pending_count:
+            log.info("%d object store uploads pending", pending_count)
+        self.running = True
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="WriteBehindUploader")
+        self.dispatcher_thread = threading.Thread(target=self._dispatch, name="WriteBehindUploader.dispatcher_thread")
+        self.dispatcher_thread.daemon = True
+        self.dispatcher_thread.start()
+
+    def shutdown(self):
+        """Stop uploading, uploads still pending are resumed by the next ``start``."""
+        self.running = False
+        self._wake.set()
+        if self.dispatcher_thread is not None:
+            self.dispatcher_thread.join(5)
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+    def enqueue(self, rel_path, source_file):
+        self.queue.put(rel_path, os.path.abspath(source_file))
+        self._wake.set()
+
+    def is_pending(self, rel_path):
+        return self.queue.is_pending(rel_path)
+
+    def pending_paths(self, prefix=None):
+        return [rel_path for rel_path, _ in self.queue.pending(prefix=prefix)]
+
+    @property
+    def pending_count(self):
+        return self.queue.count()
+
+    def cancel(self, rel_path):
+        """Drop a pending upload, e.g. because the object was deleted."""
+        self.queue.remove(rel_path)
+
+    def wait(self, timeout=None):
+        """Wait until no uploads are pending, return False on timeout."""
+        end = None if timeout is None else time.time() + timeout
+        while self.pending_count:
+            if end is not None and time.time() > end:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _dispatch(self):
+        while self.running:
+            self._wake.clear()
+            with self._lock:
+                in_flight = set(self._in_flight)
+            if in_flight:
+                self.queue.renew(self.worker_id)
+            for rel_path, source_file, version in self.queue.due(time.time(), self.workers + len(in_flight)):
+                if rel_path in in_flight or not self.queue.claim(rel_path, version, self.worker_id):
+                    continue
+                with self._lock:
+                    self._in_flight.add(rel_path)
+                in_flight.add(rel_path)
+                self.executor.submit(self._upload, rel_path, source_file, version)
+            self._wake.wait(1)
+
+    def _upload(self, rel_path, source_file, version):
+        missing = False
+        try:
+            missing = not os.path.exists(source_file)
+            uploaded = not missing and self.upload(rel_path, source_file)
+        except Exception:
+            log.exception("Failed to upload '%s' from '%s'", rel_path, source_file)
+            uploaded = False
+        if missing:
+            # Nothing left to upload, retrying would not help
+            log.error("Source file '%s' of pending upload '%s' no longer exists, dropping upload", source_file, rel_path)
+            self.queue.done(rel_path, version)
+        elif uploaded:
+            self.queue.done(rel_path, version)
+        else:
+            attempts = self.queue.failed(rel_path, version, self.retry_delay, self.max_retry_delay)
+            if attempts:
+                log.warning("Upload of '%s' failed (attempt %d), will retry", rel_path, attempts)
+        # Queued again while uploading (or retrying), let any uploader pick it up
+        self.queue.release(rel_path, self.worker_id)
+        with self._lock:
+            if uploaded:
+                self.uploaded += 1
+            elif not missing:
+                self.failed_attempts += 1
+            self._in_flight.discard(rel_path)
+        self._wake.set()
+
+
+def build_cache_manager(staging_path, cache_dict, cache_size=-1, use_index=True):
+    """
+    Build a :class:`CacheManager` from an object store's ``cache`` config
+    dictionary. ``cache_size`` is in bytes, -1 disables eviction.
+    """
+    return CacheManager(
+        staging_path,
+        cache_size=cache_size if cache_size is not None else -1,
+        eviction_policy=cache_dict.get("eviction_policy") or "lru",
+        index_path=cache_dict.get("index_path"),
+        check_interval=cache_dict.get("check_interval", DEFAULT_CHECK_INTERVAL),
+        reconcile_interval=cache_dict.get("reconcile_interval", DEFAULT_RECONCILE_INTERVAL),
+        use_index=use_index,
+    )
+
+
+def cache_manager_options(cache_dict):
+    """Return the cache manager options of a ``cache`` config dictionary."""
+    return {k: v for k, v in cache_dict.items() if k in CACHE_MANAGER_OPTIONS and v is not None}
+
+
+def parse_cache_xml(c_xml):
+    """Parse the optional cache manager attributes of a ``<cache>`` element."""
+    rval = {}
+    eviction_policy = c_xml.get("eviction_policy")
+    if eviction_policy:
+        rval["eviction_policy"] = eviction_policy
+    index_path = c_xml.get("index_path")
+    if index_path:
+        rval["index_path"] = index_path
+    check_interval = c_xml.get("check_interval")
+    if check_interval:
+        rval["check_interval"] = float(check_interval)
+    reconcile_interval = c_xml.get("reconcile_interval")
+    if reconcile_interval:
+        rval["reconcile_interval"] = float(reconcile_interval)
+    write_behind = c_xml.get("write_behind")
+    if write_behind:
+        rval["write_behind"] = string_as_bool(write_behind)
+    upload_workers = c_xml.get("upload_workers")
+    if upload_workers:
+        rval["upload_workers"] = int(upload_workers)
+    return rval
@@ -21,6 +21,11 @@ except ImportError:
 from galaxy.exceptions import ObjectInvalid, ObjectNotFound
 from galaxy.util import directory_hash_id, ExecutionTimer, umask_fix_perms
 from galaxy.util.path import safe_relpath
+from .caching import (
+    build_cache_manager,
+    cache_manager_options,
+    parse_cache_xml,
+)
 from ..objectstore import DiskObjectStore
 
 IRODS_IMPORT_MESSAGE = ('The Python irods package is required to use this feature, please install it')
@@ -99,6 +104,7 @@ def parse_config_xml(config_xml):
             'cache': {
                 'size': cache_size,
                 'path': staging_path,
+                **parse_cache_xml(c_xml[0]),
             },
             'extra_dirs': extra_dirs,
         }
@@ -132,6 +138,7 @@ class CloudConfigMixin:
             'cache': {
                 'size': self.cache_size,
                 'path': self.staging_path,
+                **self.cache_manager_options,
             }
         }
 
@@ -201,6 +208,7 @@ class IRODSObjectStore(DiskObjectStore, CloudConfigMixin):
         self.staging_path = cache_dict.get('path') or self.config.object_store_cache_path
         if self.staging_path is None:
             _config_dict_error('cache->path')
+        self.cache_manager_options = cache_manager_options(cache_dict)
 
         extra_dirs = {e['type']: e['path'] for e in config_dict.get('extra_dirs', [])}
         if not extra_dirs:
@@ -218,6 +226,11 @@ class IRODSObjectStore(DiskObjectStore, CloudConfigMixin):
         self.session = iRODSSession(host=self.host, port=self.port, user=self.username, password=self.password, zone=self.zone, refresh_time=self.refresh_time)
         # Set connection timeout
         self.session.connection_timeout = self.timeout
+
+        # Cache size is configured in GBs, evict only if it is set
+        cache_size = self.cache_size * 1073741824 if self.cache_size > 0 else -1
+        self.cache_manager = build_cache_manager(self.staging_path, self.cache_manager_options, cache_size=cache_size)
+        self.cache_manager.start()
         log.debug("irods_pt __init__: %s", ipt_timer)
 
     def shutdown(self):
@@ -228,6 +241,7 @@ class IRODSObjectStore(DiskObjectStore, CloudConfigMixin):
             self.session.cleanup()
         except OSError:
             pass
+        self.cache_manager.shutdown()
         log.debug("irods_pt shutdown: %s", ipt_timer)
 
     @classmethod
@@ -336,7 +350,7 @@ class IRODSObjectStore(DiskObjectStore, CloudConfigMixin):
     def _in_cache(self, rel_path):
         """ Check if the given dataset is in the local cache and return True if so. """
         cache_path = self._get_cache_path(rel_path)
-        return os.path.exists(cache_path)
+        return self.cache_manager.in_cache(cache_path)
 
     def _pull_into_cache(self, rel_path):
         ipt_timer = ExecutionTimer()
@@ -347,6 +361,8 @@ class IRODSObjectStore(DiskObjectStore, CloudConfigMixin):
         # Now pull in the file
         file_ok = self._download(rel_path)
         self._fix_permissions(self._get_cache_path(rel_path_dir))
+        if file_ok:
+            self.cache_manager.record(self._get_cache_path(rel_path))
         log.debug("irods_pt _pull_into_cache: %s", ipt_timer)
         return file_ok
 
@@ -564,6 +580,7 @@ class IRODSObjectStore(DiskObjectStore, CloudConfigMixin):
             # but requires iterating through each individual key in irods and deleing it.
             if entire_dir and extra_dir:
                 shutil.rmtree(self._get_cache_path(rel_path))
+                self.cache_manager.remove(self._get_cache_path(rel_path))
 
                 col_path = f"{self.home}/{str(rel_path)}"
                 col = None
@@ -595,6 +612,7 @@ class IRODSObjectStore(DiskObjectStore, CloudConfigMixin):
                 except FileNotFoundError:
                     # File was not in cache. Ok to ignore the exception and move on
                     pass
+                self.cache_manager.remove(self._get_cache_path(rel_path))
                 # Delete from irods as well
                 p = Path(rel_path)
                 data_object_name = p.stem + p.suffix
@@ -699,6 +717,7 @@ class IRODSObjectStore(DiskObjectStore, CloudConfigMixin):
                     log.exception("Trouble copying source file '%s' to cache '%s'", source_file, cache_file)
             else:
                 source_file = self._get_cache_path(rel_path)
+            self.cache_manager.record(self._get_cache_path(rel_path))
             # Update the file on iRODS
             self._push_to_irods(rel_path, source_file)
         else:
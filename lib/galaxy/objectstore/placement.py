@@ -0,0 +1,83 @@
+"""
+Placement index for nested object stores.
+
+Objects without a valid ``object_store_id`` (e.g. created before a store was
+switched to a distributed or hierarchical object store) are located by asking
+every backend whether the object exists, which is expensive with many (remote)
+backends. The placement index remembers which backend an object was found in
+or created in so that later lookups only need to check that backend.
+"""
+import logging
+import os
+import sqlite3
+import threading
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS placement (
+    object_key TEXT PRIMARY KEY,
+    backend_id TEXT NOT NULL
+);
+"""
+
+
+def placement_key(obj):
+    """Return the placement index key of ``obj`` or None if it has no id yet."""
+    obj_id = getattr(obj, "id", None)
+    if obj_id is None:
+        return None
+    return f"{obj.__class__.__name__}.{obj_id}"
+
+
+class PlacementIndex:
+    """Persistent (sqlite backed) mapping of object keys to backend ids."""
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        index_dir = os.path.dirname(os.path.abspath(index_path))
+        os.makedirs(index_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(index_path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # The index is a cache of where objects live, losing the most recent
+        # writes on power loss only costs a few extra backend probes
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get(self, object_key):
+        with self._lock:
+            row = self._conn.execute("SELECT backend_id FROM placement WHERE object_key = ?", (object_key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, object_key, backend_id):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO placement (object_key, backend_id) VALUES (?, ?)", (object_key, str(backend_id))
+            )
+
+    def set_many(self, placements):
+        """Record ``(object_key, backend_id)`` pairs in a single transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO placement (object_key, backend_id) VALUES (?, ?)",
+                    ((object_key, str(backend_id)) for object_key, backend_id in placements)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def remove(self, object_key):
+        with self._lock:
+            self._conn.execute("DELETE FROM placement WHERE object_key = ?", (object_key,))
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM placement").fetchone()[0]
@@ -1,13 +1,17 @@
 """
 Object Store plugin for the Amazon Simple Storage Service (S3)
 """
+import codecs
+import io
+import locale
 import logging
 import multiprocessing
 import os
 import shutil
 import subprocess
-import threading
+import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 try:
@@ -27,9 +31,15 @@ from galaxy.util import (
     which,
 )
 from galaxy.util.path import safe_relpath
-from galaxy.util.sleeper import Sleeper
+from .caching import (
+    build_cache_manager,
+    cache_manager_options,
+    DEFAULT_UPLOAD_WORKERS,
+    parse_cache_xml,
+    WriteBehindUploader,
+)
 from .s3_multipart_upload import multipart_upload
-from ..objectstore import ConcreteObjectStore, convert_bytes
+from ..objectstore import ConcreteObjectStore
 
 NO_BOTO_ERROR_MESSAGE = ("S3/Swift object store configured, but no boto dependency available."
                          "Please install and properly configure boto or modify object store configuration.")
@@ -37,6 +47,10 @@ NO_BOTO_ERROR_MESSAGE = ("S3/Swift object store configured, but no boto dependen
 log = logging.getLogger(__name__)
 logging.getLogger('boto').setLevel(logging.INFO)  # Otherwise boto is quite noisy
 
+# Objects larger than a part are pulled into the cache with concurrent ranged GETs
+DEFAULT_DOWNLOAD_PART_SIZE = 100  # MB
+DEFAULT_DOWNLOAD_CONCURRENCY = 4
+
 
 def parse_config_xml(config_xml):
     try:
@@ -60,6 +74,8 @@ def parse_config_xml(config_xml):
         multipart = string_as_bool(cn_xml.get('multipart', 'True'))
         is_secure = string_as_bool(cn_xml.get('is_secure', 'True'))
         conn_path = cn_xml.get('conn_path', '/')
+        download_part_size = int(cn_xml.get('download_part_size', DEFAULT_DOWNLOAD_PART_SIZE))
+        download_concurrency = int(cn_xml.get('download_concurrency', DEFAULT_DOWNLOAD_CONCURRENCY))
 
         c_xml = config_xml.findall('cache')[0]
         cache_size = float(c_xml.get('size', -1))
@@ -90,10 +106,13 @@ def parse_config_xml(config_xml):
                 'multipart': multipart,
                 'is_secure': is_secure,
                 'conn_path': conn_path,
+                'download_part_size': download_part_size,
+                'download_concurrency': download_concurrency,
             },
             'cache': {
                 'size': cache_size,
                 'path': staging_path,
+                **parse_cache_xml(c_xml),
             },
             'extra_dirs': extra_dirs,
         }
@@ -121,10 +140,13 @@ class CloudConfigMixin:
                 'multipart': self.multipart,
                 'is_secure': self.is_secure,
                 'conn_path': self.conn_path,
+                'download_part_size': self.download_part_size,
+                'download_concurrency': self.download_concurrency,
             },
             'cache': {
                 'size': self.cache_size,
                 'path': self.staging_path,
+                **self.cache_manager_options,
             },
             'enable_cache_monitor': False,
         }
@@ -161,9 +183,15 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
         self.multipart = connection_dict.get('multipart', True)
         self.is_secure = connection_dict.get('is_secure', True)
         self.conn_path = connection_dict.get('conn_path', '/')
+        self.download_part_size = connection_dict.get('download_part_size', DEFAULT_DOWNLOAD_PART_SIZE)
+        self.download_concurrency = connection_dict.get('download_concurrency', DEFAULT_DOWNLOAD_CONCURRENCY)
 
         self.cache_size = cache_dict.get('size', -1)
         self.staging_path = cache_dict.get('path') or self.config.object_store_cache_path
+        self.cache_manager_options = cache_manager_options(cache_dict)
+        self.write_behind = cache_dict.get('write_behind', False)
+        self.upload_workers = cache_dict.get('upload_workers', DEFAULT_UPLOAD_WORKERS)
+        self.uploader = None
 
         extra_dirs = {
             e['type']: e['path'] for e in config_dict.get('extra_dirs', [])}
@@ -195,15 +223,20 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
             self.use_axel = False
 
     def start_cache_monitor(self):
+        cache_size = -1
         # Clean cache only if value is set in galaxy.ini
         if self.cache_size != -1 and self.enable_cache_monitor:
             # Convert GBs to bytes for comparison
             self.cache_size = self.cache_size * 1073741824
-            # Helper for interruptable sleep
-            self.sleeper = Sleeper()
-            self.cache_monitor_thread = threading.Thread(target=self.__cache_monitor)
-            self.cache_monitor_thread.start()
-            log.info("Cache cleaner manager started")
+            cache_size = self.cache_size
+        self.cache_manager = build_cache_manager(self.staging_path, self.cache_manager_options, cache_size=cache_size, use_index=self.enable_cache_monitor)
+        self.cache_manager.start()
+        # Only the process managing the cache uploads in the background, other
+        # processes (e.g. jobs) may exit before their uploads complete
+        if self.write_behind and self.enable_cache_monitor:
+            self.uploader = WriteBehindUploader(self.staging_path, self._push_to_os, workers=self.upload_workers, cache_manager=self.cache_manager)
+            self.uploader.start()
+            log.info("Write-behind uploads enabled with %s workers", self.upload_workers)
 
     def _configure_connection(self):
         log.debug("Configuring S3 Connection")
@@ -222,70 +255,6 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
         as_dict.update(self._config_to_dict())
         return as_dict
 
-    def __cache_monitor(self):
-        time.sleep(2)  # Wait for things to load before starting the monitor
-        while self.running:
-            total_size = 0
-            # Is this going to be too expensive of an operation to be done frequently?
-            file_list = []
-            for dirpath, _, filenames in os.walk(self.staging_path):
-                for filename in filenames:
-                    filepath = os.path.join(dirpath, filename)
-                    file_size = os.path.getsize(filepath)
-                    total_size += file_size
-                    # Get the time given file was last accessed
-                    last_access_time = time.localtime(os.stat(filepath)[7])
-                    # Compose a tuple of the access time and the file path
-                    file_tuple = last_access_time, filepath, file_size
-                    file_list.append(file_tuple)
-            # Sort the file list (based on access time)
-            file_list.sort()
-            # Initiate cleaning once within 10% of the defined cache size?
-            cache_limit = self.cache_size * 0.9
-            if total_size > cache_limit:
-                log.info("Initiating cache cleaning: current cache size: %s; clean until smaller than: %s",
-                         convert_bytes(total_size), convert_bytes(cache_limit))
-                # How much to delete? If simply deleting up to the cache-10% limit,
-                # is likely to be deleting frequently and may run the risk of hitting
-                # the limit - maybe delete additional #%?
-                # For now, delete enough to leave at least 10% of the total cache free
-                delete_this_much = total_size - cache_limit
-                self.__clean_cache(file_list, delete_this_much)
-            self.sleeper.sleep(30)  # Test cache size every 30 seconds?
-
-    def __clean_cache(self, file_list, delete_this_much):
-        """ Keep deleting files from the file_list until the size of the deleted
-        files is greater than the value in delete_this_much parameter.
-
-        :type file_list: list
-        :param file_list: List of candidate files that can be deleted. This method
-            will start deleting files from the beginning of the list so the list
-            should be sorted accordingly. The list must contains 3-element tuples,
-            positioned as follows: position 0 holds file last accessed timestamp
-            (as time.struct_time), position 1 holds file path, and position 2 has
-            file size (e.g., (<access time>, /mnt/data/dataset_1.dat), 472394)
-
-        :type delete_this_much: int
-        :param delete_this_much: Total size of files, in bytes, that should be deleted.
-        """
-        # Keep deleting datasets from file_list until deleted_amount does not
-        # exceed delete_this_much; start deleting from the front of the file list,
-        # which assumes the oldest files come first on the list.
-        deleted_amount = 0
-        for entry in file_list:
-            if deleted_amount < delete_this_much:
-                deleted_amount += entry[2]
-                os.remove(entry[1])
-                # Debugging code for printing deleted files' stats
-                # folder, file_name = os.path.split(f[1])
-                # file_date = time.strftime("%m/%d/%y %H:%M:%S", f[0])
-                # log.debug("%s. %-25s %s, size %s (deleted %s/%s)" \
-                #     % (i, file_name, convert_bytes(f[2]), file_date, \
-                #     convert_bytes(deleted_amount), convert_bytes(delete_this_much)))
-            else:
-                log.debug("Cache cleaning done. Total space freed: %s", convert_bytes(deleted_amount))
-                return
-
     def _get_bucket(self, bucket_name):
         """ Sometimes a handle to a bucket is not established right away so try
         it a few times. Raise error is connection is not established. """
@@ -390,7 +359,7 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
         """ Check if the given dataset is in the local cache and return True if so. """
         # log.debug("------ Checking cache for rel_path %s" % rel_path)
         cache_path = self._get_cache_path(rel_path)
-        return os.path.exists(cache_path)
+        return self.cache_manager.in_cache(cache_path)
         # TODO: Part of checking if a file is in cache should be to ensure the
         # size of the cached file matches that on S3. Once the upload tool explicitly
         # creates, this check sould be implemented- in the mean time, it's not
@@ -423,6 +392,8 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
         # Now pull in the file
         file_ok = self._download(rel_path)
         self._fix_permissions(self._get_cache_path(rel_path_dir))
+        if file_ok:
+            self.cache_manager.record(self._get_cache_path(rel_path))
         return file_ok
 
     def _transfer_cb(self, complete, total):
@@ -437,7 +408,11 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
                 log.critical("File %s is larger (%s) than the cache size (%s). Cannot download.",
                              rel_path, key.size, self.cache_size)
                 return False
-            if self.use_axel:
+            part_size = self.download_part_size * 1048576
+            if self.download_concurrency > 1 and part_size > 0 and key.size > part_size:
+                log.debug("Pulling key '%s' into cache to %s in %s byte parts", rel_path, self._get_cache_path(rel_path), part_size)
+                return self._download_parts(rel_path, key.size, part_size)
+            elif self.use_axel:
                 log.debug("Parallel pulled key '%s' into cache to %s", rel_path, self._get_cache_path(rel_path))
                 ncores = multiprocessing.cpu_count()
                 url = key.generate_url(7200)
@@ -453,6 +428,76 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
             log.exception("Problem downloading key '%s' from S3 bucket '%s'", rel_path, self._bucket.name)
         return False
 
+    def _get_range(self, rel_path, start, end=None):
+        """
+        Return the bytes from ``start`` to ``end`` (inclusive, or to the end of
+        the object if ``end`` is None) of key ``rel_path`` with a ranged GET.
+        """
+        key = Key(self._bucket, rel_path)
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        try:
+            return key.get_contents_as_string(headers={'Range': byte_range})
+        except S3ResponseError as e:
+            # Range starts past the end of the object
+            if e.status == 416:
+                return b''
+            raise
+
+    def _get_text_range(self, rel_path, start, count):
+        """
+        Return ``count`` characters of key ``rel_path`` from byte ``start`` on,
+        decoded like reading the cache file in text mode. Ranges are fetched
+        until enough characters are decoded, ``count`` bytes hold fewer
+        characters if some of them are multibyte.
+        """
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(locale.getpreferredencoding(False))(), translate=True)
+        content = ''
+        position = start
+        while len(content) < count:
+            data = self._get_range(rel_path, position, position + count - len(content) - 1)
+            position += len(data)
+            content += decoder.decode(data, final=not data)
+            if not data:
+                break
+        return content[:count]
+
+    def _download_parts(self, rel_path, size, part_size):
+        """
+        Pull key ``rel_path`` into the cache with up to ``download_concurrency``
+        concurrent ranged GETs of ``part_size`` bytes. Parts are written into a
+        temporary file that only replaces the cache file once all parts have
+        been downloaded. Return ``False`` (and remove the temporary file) if
+        fewer bytes than expected were downloaded.
+        """
+        cache_path = self._get_cache_path(rel_path)
+        fd, part_path = tempfile.mkstemp(prefix=os.path.basename(cache_path), suffix='.part', dir=os.path.dirname(cache_path))
+        ranges = [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+        self.transfer_progress = 0  # Reset transfer progress counter
+        try:
+            with os.fdopen(fd, 'wb') as part_file:
+                part_file.truncate(size)
+
+                def fetch(byte_range):
+                    start, end = byte_range
+                    data = self._get_range(rel_path, start, end)
+                    os.pwrite(part_file.fileno(), data, start)
+                    return len(data)
+
+                complete = 0
+                with ThreadPoolExecutor(max_workers=self.download_concurrency) as executor:
+                    for fetched in executor.map(fetch, ranges):
+                        complete += fetched
+                        self.transfer_progress = float(complete) / float(size) * 100  # in percent
+            if complete != size:
+                log.error("Downloaded %s bytes of key '%s', expected %s", complete, rel_path, size)
+                os.unlink(part_path)
+                return False
+            os.rename(part_path, cache_path)
+        except Exception:
+            os.unlink(part_path)
+            raise
+        return True
+
     def _push_to_os(self, rel_path, source_file=None, from_string=None):
         """
         Push the file pointed to by ``rel_path`` to the object store naming the key
@@ -502,6 +547,9 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
         rel_path = self._construct_path(obj, **kwargs)
         # Make sure the size in cache is available in its entirety
         if self._in_cache(rel_path):
+            if self._upload_pending(rel_path):
+                # The cache holds the only complete copy until the upload is done
+                return True
             if os.path.getsize(self._get_cache_path(rel_path)) == self._get_size_in_s3(rel_path):
                 return True
             log.debug("Waiting for dataset %s to transfer from OS: %s/%s", rel_path,
@@ -515,8 +563,11 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
         # Check cache
         if self._in_cache(rel_path):
             in_cache = True
-        # Check S3
-        in_s3 = self._key_exists(rel_path)
+        # Check S3, unless the object is still waiting to be uploaded
+        if in_cache and self._upload_pending(rel_path):
+            in_s3 = False
+        else:
+            in_s3 = self._key_exists(rel_path)
         # log.debug("~~~~~~ File '%s' exists in cache: %s; in s3: %s" % (rel_path, in_cache, in_s3))
         # dir_only does not get synced so shortcut the decision
         dir_only = kwargs.get('dir_only', False)
@@ -534,7 +585,8 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
 
         # TODO: Sync should probably not be done here. Add this to an async upload stack?
         if in_cache and not in_s3:
-            self._push_to_os(rel_path, source_file=self._get_cache_path(rel_path))
+            if not self._upload_pending(rel_path):
+                self._push_to_os(rel_path, source_file=self._get_cache_path(rel_path))
             return True
         elif in_s3:
             return True
@@ -613,6 +665,10 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
             # but requires iterating through each individual key in S3 and deleing it.
             if entire_dir and extra_dir:
                 shutil.rmtree(self._get_cache_path(rel_path))
+                self.cache_manager.remove(self._get_cache_path(rel_path))
+                if self.uploader:
+                    for pending_rel_path in self.uploader.pending_paths(prefix=rel_path):
+                        self.uploader.cancel(pending_rel_path)
                 results = self._bucket.get_all_keys(prefix=rel_path)
                 for key in results:
                     log.debug("Deleting key %s", key.name)
@@ -620,7 +676,10 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
                 return True
             else:
                 # Delete from cache first
+                if self.uploader:
+                    self.uploader.cancel(rel_path)
                 os.unlink(self._get_cache_path(rel_path))
+                self.cache_manager.remove(self._get_cache_path(rel_path))
                 # Delete from S3 as well
                 if self._key_exists(rel_path):
                     key = Key(self._bucket, rel_path)
@@ -637,6 +696,17 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
         rel_path = self._construct_path(obj, **kwargs)
         # Check cache first and get file if not there
         if not self._in_cache(rel_path):
+            if count > 0:
+                # Only fetch the requested range (e.g. for peeks), rather than
+                # pulling a potentially huge object into the cache. Like when
+                # reading the cache file, ``count`` characters are read from
+                # byte ``start`` on - more ranges are fetched if they hold
+                # multibyte characters.
+                try:
+                    return self._get_text_range(rel_path, start, count)
+                except S3ResponseError:
+                    log.exception("Problem reading range of key '%s' from S3 bucket '%s'", rel_path, self._bucket.name)
+                    raise ObjectNotFound(f'objectstore.get_data, could not read key: {rel_path}')
             self._pull_into_cache(rel_path)
         # Read the file content from cache
         data_file = open(self._get_cache_path(rel_path))
@@ -688,21 +758,28 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
         if self._exists(obj, **kwargs):
             rel_path = self._construct_path(obj, **kwargs)
             # Chose whether to use the dataset file itself or an alternate file
+            cache_file = self._get_cache_path(rel_path)
+            cached = True
             if file_name:
                 source_file = os.path.abspath(file_name)
                 # Copy into cache
-                cache_file = self._get_cache_path(rel_path)
                 try:
                     if source_file != cache_file:
                         # FIXME? Should this be a `move`?
                         shutil.copy2(source_file, cache_file)
                     self._fix_permissions(cache_file)
                 except OSError:
+                    cached = False
                     log.exception("Trouble copying source file '%s' to cache '%s'", source_file, cache_file)
             else:
-                source_file = self._get_cache_path(rel_path)
-            # Update the file on S3
-            self._push_to_os(rel_path, source_file)
+                source_file = cache_file
+            self.cache_manager.record(cache_file)
+            if self.uploader and cached:
+                # The file is safe in the cache, upload it in the background
+                self.uploader.enqueue(rel_path, cache_file)
+            else:
+                # Update the file on S3
+                self._push_to_os(rel_path, source_file)
         else:
             raise ObjectNotFound('objectstore.update_from_file, object does not exist: %s, kwargs: %s'
                                  % (str(obj), str(kwargs)))
@@ -720,13 +797,19 @@ class S3ObjectStore(ConcreteObjectStore, CloudConfigMixin):
     def _get_store_usage_percent(self):
         return 0.0
 
+    def _upload_pending(self, rel_path):
+        return self.uploader is not None and self.uploader.is_pending(rel_path)
+
     def shutdown(self):
         self.running = False
-        thread = getattr(self, 'cache_monitor_thread', None)
-        if thread:
-            log.debug("Shutting down thread")
-            self.sleeper.wake()
-            thread.join(5)
+        uploader = getattr(self, 'uploader', None)
+        if uploader:
+            log.debug("Shutting down write-behind uploader, %s uploads pending", uploader.pending_count)
+            uploader.shutdown()
+        cache_manager = getattr(self, 'cache_manager', None)
+        if cache_manager:
+            log.debug("Shutting down cache manager")
+            cache_manager.shutdown()
 
 
 class SwiftObjectStore(S3ObjectStore):
@@ -49,12 +49,15 @@ class QuotaAgent():  # metaclass=abc.ABCMeta
             usage = user.total_disk_usage
         return usage
 
-    def is_over_quota(self, app, job, job_destination):
+    def is_over_quota(self, app, job, job_destination, quota=False):
         """Return True if the user or history is over quota for specified job.
 
         job_destination unused currently but an important future application will
         be admins and/or users dynamically specifying which object stores to use
         and that will likely come in through the job destination.
+
+        If ``quota`` is passed it is used instead of looking up the user's
+        quota, e.g. by callers checking many jobs of the same user.
         """
 
 
@@ -74,7 +77,7 @@ class NoQuotaAgent(QuotaAgent):
     def get_percent(self, trans=None, user=False, history=False, usage=False, quota=False):
         return None
 
-    def is_over_quota(self, app, job, job_destination):
+    def is_over_quota(self, app, job, job_destination, quota=False):
         return False
 
 
@@ -215,8 +218,9 @@ class DatabaseQuotaAgent(QuotaAgent):
                 self.sa_session.add(gqa)
             self.sa_session.flush()
 
-    def is_over_quota(self, app, job, job_destination):
-        quota = self.get_quota(job.user)
+    def is_over_quota(self, app, job, job_destination, quota=False):
+        if quota is False:
+            quota = self.get_quota(job.user)
         if quota is not None:
             try:
                 usage = self.get_usage(user=job.user, history=job.history)
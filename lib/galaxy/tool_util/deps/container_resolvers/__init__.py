@@ -9,6 +9,9 @@ from abc import (
 from galaxy.util.bunch import Bunch
 from galaxy.util.dictifiable import Dictifiable
 
+#: Default number of seconds image listings and container resolutions are cached for
+DEFAULT_CONTAINER_RESOLUTION_CACHE_TTL = 60
+
 
 class ResolutionCache(Bunch):
     """Simple cache for duplicated computation created once per set of requests (likely web request in Galaxy context).
@@ -3,6 +3,8 @@
 import logging
 import os
 import subprocess
+import threading
+import time
 from typing import NamedTuple, Optional
 
 from galaxy.util import (
@@ -15,6 +17,7 @@ from galaxy.util.commands import shell
 from ..container_classes import CONTAINER_CLASSES
 from ..container_resolvers import (
     ContainerResolver,
+    DEFAULT_CONTAINER_RESOLUTION_CACHE_TTL,
 )
 from ..docker_util import build_docker_images_command
 from ..mulled.mulled_build import (
@@ -75,18 +78,76 @@ class CachedV2MulledImageMultiTarget(NamedTuple):
             return image_name.rsplit("/")[-1]
 
 
+class ImageListingCache:
+    """
+    Process-wide cache of the locally available images: the output of
+    ``docker images`` and the contents of singularity image directories.
+
+    Listings are refreshed after ``ttl`` seconds, directory listings also as
+    soon as the modification time of the directory changes (i.e. when an image
+    is added or removed). ``generation`` increases whenever a listing changes
+    or the cache is invalidated (after images are pulled or built), so
+    results derived from the listings can be dropped as well.
+    """
+
+    def __init__(self, ttl=DEFAULT_CONTAINER_RESOLUTION_CACHE_TTL):
+        self.ttl = ttl
+        self.generation = 0
+        self._docker_images = None
+        self._directories = {}
+        self._lock = threading.Lock()
+
+    def docker_images(self):
+        """Return the ``<repository>:<tag>`` of the images known to docker."""
+        now = time.time()
+        cached = self._docker_images
+        if cached is not None and now - cached[0] < self.ttl:
+            return cached[1]
+        command = build_docker_images_command(truncate=True, sudo=False, to_str=False)
+        images_and_versions = unicodify(subprocess.check_output(command)).strip().splitlines()
+        images_and_versions = [":".join(line.split()[0:2]) for line in images_and_versions[1:]]
+        with self._lock:
+            if cached is not None and cached[1] != images_and_versions:
+                self.generation += 1
+            self._docker_images = (now, images_and_versions)
+        return images_and_versions
+
+    def directory_contents(self, directory):
+        """Return the names of the files in ``directory``."""
+        now = time.time()
+        mtime = os.stat(directory).st_mtime_ns
+        cached = self._directories.get(directory)
+        if cached is not None and cached[1] == mtime and now - cached[0] < self.ttl:
+            return cached[2]
+        contents = os.listdir(directory)
+        with self._lock:
+            if cached is not None and sorted(cached[2]) != sorted(contents):
+                self.generation += 1
+            self._directories[directory] = (now, mtime, contents)
+        return contents
+
+    def invalidate(self):
+        """Drop all listings, called after images have been pulled or built."""
+        with self._lock:
+            self._docker_images = None
+            self._directories = {}
+            self.generation += 1
+
+
+#: Process-wide listing of the locally available images
+image_listing_cache = ImageListingCache()
+
+
 def list_docker_cached_mulled_images(namespace=None, hash_func="v2", resolution_cache=None):
     cache_key = "galaxy.tool_util.deps.container_resolvers.mulled:cached_images"
     if resolution_cache is not None and cache_key in resolution_cache:
         images_and_versions = resolution_cache.get(cache_key)
     else:
-        command = build_docker_images_command(truncate=True, sudo=False, to_str=False)
         try:
-            images_and_versions = unicodify(subprocess.check_output(command)).strip().splitlines()
+            images_and_versions = image_listing_cache.docker_images()
         except subprocess.CalledProcessError:
             log.info("Call to `docker images` failed, configured container resolution may be broken")
             return []
-        images_and_versions = [":".join(line.split()[0:2]) for line in images_and_versions[1:]]
         if resolution_cache is not None:
             resolution_cache[cache_key] = images_and_versions
 
@@ -149,7 +210,7 @@ def identifier_to_cached_target(identifier, hash_func, namespace=None):
 
 
 def list_cached_mulled_images_from_path(directory, hash_func="v2"):
-    contents = os.listdir(directory)
+    contents = image_listing_cache.directory_contents(directory)
     sorted_images = version_sorted(contents)
     raw_images = map(lambda name: identifier_to_cached_target(name, hash_func), sorted_images)
     return [i for i in raw_images if i is not None]
@@ -266,7 +327,7 @@ def targets_to_mulled_name(targets, hash_func, namespace, resolution_cache=None,
     def cached_name(cache_key):
         if mulled_resolution_cache:
             if cache_key in mulled_resolution_cache:
-                return resolution_cache.get(cache_key)
+                return mulled_resolution_cache.get(cache_key)
         return None
 
     if len(targets) == 1:
@@ -331,7 +392,7 @@ def targets_to_mulled_name(targets, hash_func, namespace, resolution_cache=None,
         mulled_resolution_cache.put(cache_key, name)
 
     if name is None:
-        unresolved_cache.add(name)
+        unresolved_cache.add(cache_key)
 
     return name
 
@@ -435,6 +496,7 @@ class MulledDockerContainerResolver(CliContainerResolver):
         if self.cli_available:
             command = container.build_pull_command()
             shell(command)
+            image_listing_cache.invalidate()
 
     @property
     def can_list_containers(self):
@@ -515,6 +577,7 @@ class MulledSingularityContainerResolver(SingularityCliContainerResolver, Mulled
         if self.cli_available:
             cmds = container.build_mulled_singularity_pull_command(cache_directory=self.cache_directory, namespace=self.namespace)
             shell(cmds=cmds)
+            image_listing_cache.invalidate()
 
     def __str__(self):
         return f"MulledSingularityContainerResolver[namespace={self.namespace}]"
@@ -556,6 +619,7 @@ class BuildMulledDockerContainerResolver(CliContainerResolver):
                 involucro_context=self._get_involucro_context(),
                 **self._mulled_kwds
             )
+            image_listing_cache.invalidate()
         return docker_cached_container_description(targets, self.namespace, hash_func=self.hash_func, shell=self.shell)
 
     def _get_involucro_context(self):
@@ -604,6 +668,7 @@ class BuildMulledSingularityContainerResolver(SingularityCliContainerResolver):
                 involucro_context=self._get_involucro_context(),
                 **self._mulled_kwds
             )
+            image_listing_cache.invalidate()
         return singularity_cached_container_description(targets, self.cache_directory, hash_func=self.hash_func, shell=self.shell)
 
     def _get_involucro_context(self):
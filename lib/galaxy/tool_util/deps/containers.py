@@ -1,6 +1,10 @@
 import collections
+import hashlib
+import json
 import logging
 import os
+import threading
+import time
 
 from galaxy.util import (
     asbool,
@@ -12,7 +16,10 @@ from .container_classes import (
     NULL_CONTAINER,
     SINGULARITY_CONTAINER_TYPE,
 )
-from .container_resolvers import ResolutionCache
+from .container_resolvers import (
+    DEFAULT_CONTAINER_RESOLUTION_CACHE_TTL,
+    ResolutionCache,
+)
 from .container_resolvers.explicit import (
     ExplicitContainerResolver,
     ExplicitSingularityContainerResolver,
@@ -22,6 +29,7 @@ from .container_resolvers.mulled import (
     BuildMulledSingularityContainerResolver,
     CachedMulledDockerContainerResolver,
     CachedMulledSingularityContainerResolver,
+    image_listing_cache,
     MulledDockerContainerResolver,
     MulledSingularityContainerResolver,
 )
@@ -36,6 +44,7 @@ DEFAULT_CONTAINER_TYPE = DOCKER_CONTAINER_TYPE
 ALL_CONTAINER_TYPES = [DOCKER_CONTAINER_TYPE, SINGULARITY_CONTAINER_TYPE]
 
 ResolvedContainerDescription = collections.namedtuple('ResolvedContainerDescription', ['container_resolver', 'container_description'])
+CONTAINER_RESOLUTION_CACHE_SIZE = 1000
 
 
 class ContainerFinder:
@@ -183,6 +192,74 @@ class NullContainerFinder:
         return []
 
 
+class ContainerResolutionCache:
+    """
+    Cache of the container resolved for tool requirements and destination
+    container types (``None`` if no container could be resolved).
+
+    Entries expire after ``ttl`` seconds and whenever the listing of locally
+    available images changes (see ``ImageListingCache.generation``), e.g.
+    because an image was pulled or built.
+    """
+
+    def __init__(self, ttl=DEFAULT_CONTAINER_RESOLUTION_CACHE_TTL, size=CONTAINER_RESOLUTION_CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.size > 0
+
+    def get(self, key):
+        """Return whether ``key`` is cached and its resolved container description."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            created, generation, resolved_container_description = entry
+            if time.time() - created >= self.ttl or generation != image_listing_cache.generation:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, resolved_container_description
+
+    def set(self, key, resolved_container_description, generation):
+        with self._lock:
+            self._entries[key] = (time.time(), generation, resolved_container_description)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def container_resolution_key(enabled_container_types, tool_info, **kwds):
+    """
+    Return the key of the container resolution for ``tool_info`` - a hash of
+    its requirements and container descriptions - on a destination with
+    ``enabled_container_types``.
+    """
+    tool_hash = hashlib.sha1(json.dumps([
+        [requirement.to_dict() for requirement in tool_info.requirements],
+        [container_description.to_dict() for container_description in tool_info.container_descriptions],
+        tool_info.requires_galaxy_python_environment,
+    ], sort_keys=True).encode()).hexdigest()
+    return (
+        tool_info.tool_id,
+        tool_info.tool_version,
+        tool_hash,
+        tuple(sorted(enabled_container_types)),
+        tuple(sorted(kwds.items())),
+    )
+
+
 class ContainerRegistry:
     """Loop through enabled ContainerResolver plugins and find first match."""
 
@@ -192,6 +269,9 @@ class ContainerRegistry:
         self.app_info = app_info
         self.container_resolvers = self.__build_container_resolvers(app_info)
         self.mulled_resolution_cache = mulled_resolution_cache
+        ttl = getattr(app_info, 'container_resolution_cache_ttl', DEFAULT_CONTAINER_RESOLUTION_CACHE_TTL)
+        image_listing_cache.ttl = ttl
+        self.container_resolution_cache = ContainerResolutionCache(ttl=ttl)
 
     def __build_container_resolvers(self, app_info):
         conf_file = getattr(app_info, 'containers_resolvers_config_file', None)
@@ -253,6 +333,20 @@ class ContainerRegistry:
         return None if resolved_container_description is None else resolved_container_description.container_description
 
     def resolve(self, enabled_container_types, tool_info, index=None, resolver_type=None, install=True, resolution_cache=None, session=None):
+        if not self.container_resolution_cache.enabled:
+            return self._resolve(enabled_container_types, tool_info, index=index, resolver_type=resolver_type, install=install, resolution_cache=resolution_cache, session=session)
+        key = container_resolution_key(enabled_container_types, tool_info, index=index, resolver_type=resolver_type, install=install)
+        cached, resolved_container_description = self.container_resolution_cache.get(key)
+        if cached:
+            return resolved_container_description
+        generation = image_listing_cache.generation
+        resolved_container_description = self._resolve(enabled_container_types, tool_info, index=index, resolver_type=resolver_type, install=install, resolution_cache=resolution_cache, session=session)
+        if generation == image_listing_cache.generation:
+            # Images pulled or built while resolving invalidate the listings, resolve again next time
+            self.container_resolution_cache.set(key, resolved_container_description, generation)
+        return resolved_container_description
+
+    def _resolve(self, enabled_container_types, tool_info, index=None, resolver_type=None, install=True, resolution_cache=None, session=None):
         resolution_cache = resolution_cache or self.get_resolution_cache()
         for i, container_resolver in enumerate(self.container_resolvers):
             if index is not None and i != index:
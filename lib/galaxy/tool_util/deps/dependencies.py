@@ -1,5 +1,6 @@
 from galaxy.tool_util.deps.requirements import ToolRequirements
 from galaxy.util import bunch
+from .container_resolvers import DEFAULT_CONTAINER_RESOLUTION_CACHE_TTL
 from .mulled.mulled_build import DEFAULT_CHANNELS
 
 
@@ -19,6 +20,7 @@ class AppInfo:
         involucro_path=None,
         involucro_auto_init=True,
         mulled_channels=DEFAULT_CHANNELS,
+        container_resolution_cache_ttl=DEFAULT_CONTAINER_RESOLUTION_CACHE_TTL,
     ):
         self.galaxy_root_dir = galaxy_root_dir
         self.default_file_path = default_file_path
@@ -33,6 +35,7 @@ class AppInfo:
         self.involucro_path = involucro_path
         self.involucro_auto_init = involucro_auto_init
         self.mulled_channels = mulled_channels
+        self.container_resolution_cache_ttl = container_resolution_cache_ttl
 
 
 class ToolInfo:
@@ -99,6 +99,7 @@ from galaxy.util.json import safe_loads
 from galaxy.util.rules_dsl import RuleSet
 from galaxy.util.template import (
     fill_template,
+    precompile_template,
     refactoring_tool,
 )
 from galaxy.util.tool_shed.common_util import (
@@ -318,6 +319,22 @@ class ToolBox(BaseGalaxyToolBox):
                 self.cache_regions[tool_cache_data_dir] = ToolDocumentCache(cache_dir=tool_cache_data_dir)
             return self.cache_regions[tool_cache_data_dir]
 
+    def preload_tools(self, config_files, tool_cache_data_dir=None):
+        """
+        Parse the tools in ``config_files`` missing from the tool document
+        cache in a pool of worker processes, so that loading them afterwards
+        only needs to read the cache.
+        """
+        cache = self.get_cache_region(tool_cache_data_dir or self.app.config.tool_cache_data_dir)
+        if not cache or cache.disabled:
+            return
+        config_files = [f for f in config_files if not self.load_tool_from_cache(f)]
+        cache.preload(
+            config_files,
+            processes=self.app.config.tool_parse_processes,
+            enable_beta_formats=getattr(self.app.config, "enable_beta_tool_formats", False),
+        )
+
     def create_tool(self, config_file, tool_cache_data_dir=None, **kwds):
         cache = self.get_cache_region(tool_cache_data_dir or self.app.config.tool_cache_data_dir)
         if config_file.endswith('.xml') and cache and not cache.disabled:
@@ -937,6 +954,8 @@ class Tool(Dictifiable):
 
         # Any extra generated config files for the tool
         self.__parse_config_files(tool_source)
+        if getattr(self.app.config, "precompile_tool_templates", False):
+            self.precompile_templates()
         # Action
         action = tool_source.parse_action_module()
         if action is None:
@@ -1040,6 +1059,18 @@ class Tool(Dictifiable):
                 content = conf_elem.text
                 self.config_files.append((name, filename, content))
 
+    def precompile_templates(self):
+        """
+        Compile the Cheetah templates the tool evaluator fills for each job (the
+        command, configfiles and environment variables) into the template cache.
+        """
+        templates = [self.command]
+        templates.extend(content for _, _, content in self.config_files if isinstance(content, str))
+        templates.extend(variable["template"] for variable in self.environment_variables if not variable.get("inject"))
+        for template in templates:
+            if template:
+                precompile_template(template, python_template_version=self.python_template_version)
+
     def __parse_trackster_conf(self, tool_source):
         self.trackster_conf = None
         if not hasattr(tool_source, 'root'):
@@ -31,6 +31,13 @@ class ToolExecutionCache:
         self.current_user_roles = trans.get_current_user_roles()
         self.chrom_info = {}
         self.cached_collection_elements = {}
+        self.output_permissions = {}
+        # If set, parameters of new jobs and permissions of new output datasets
+        # are collected and inserted in bulk by ``insert_deferred_rows`` once
+        # the jobs and datasets have been flushed.
+        self.defer_rows = False
+        self.deferred_job_parameters = []
+        self.deferred_dataset_permissions = []
 
     def get_chrom_info(self, tool_id, input_dbkey):
         genome_builds = self.trans.app.genome_builds
@@ -44,6 +51,53 @@ class ToolExecutionCache:
 
         return chrom_info_pair
 
+    def get_output_permissions(self, all_permissions, history):
+        security_agent = self.trans.app.security_agent
+        if all_permissions:
+            key = frozenset((action, frozenset(role_ids)) for action, role_ids in all_permissions.items())
+        else:
+            key = (None, model.cached_id(history))
+        if key not in self.output_permissions:
+            if all_permissions:
+                self.output_permissions[key] = security_agent.guess_derived_permissions(all_permissions)
+            else:
+                # No valid inputs, we will use history defaults
+                self.output_permissions[key] = security_agent.history_get_default_permissions(history)
+        return self.output_permissions[key]
+
+    def add_job_parameters(self, job, params):
+        if self.defer_rows:
+            self.deferred_job_parameters.append((job, params))
+        else:
+            for name, value in params.items():
+                job.add_parameter(name, value)
+
+    def set_new_dataset_permissions(self, dataset, permissions):
+        if self.defer_rows:
+            self.deferred_dataset_permissions.append((dataset, permissions))
+        else:
+            self.trans.app.security_agent.set_all_dataset_permissions(dataset, permissions, new=True, flush=False)
+
+    def insert_deferred_rows(self):
+        """
+        Insert deferred job parameters and dataset permissions with one
+        statement each, the jobs and datasets must have been flushed.
+        """
+        sa_session = self.trans.sa_session
+        if self.deferred_job_parameters:
+            rows = []
+            for job, params in self.deferred_job_parameters:
+                for name, value in params.items():
+                    rows.append({'job_id': job.id, 'name': name, 'value': value})
+            if rows:
+                sa_session.execute(model.JobParameter.table.insert(), rows)
+            for job, _ in self.deferred_job_parameters:
+                sa_session.expire(job, ['parameters'])
+            self.deferred_job_parameters = []
+        if self.deferred_dataset_permissions:
+            self.trans.app.security_agent.set_new_datasets_permissions(self.deferred_dataset_permissions)
+            self.deferred_dataset_permissions = []
+
 
 class ToolAction:
     """
@@ -345,11 +399,7 @@ class DefaultToolAction:
 
         if not completed_job:
             # Determine output dataset permission/roles list
-            if all_permissions:
-                output_permissions = app.security_agent.guess_derived_permissions(all_permissions)
-            else:
-                # No valid inputs, we will use history defaults
-                output_permissions = app.security_agent.history_get_default_permissions(history)
+            output_permissions = execution_cache.get_output_permissions(all_permissions, history)
 
         # Add the dbkey to the incoming parameters
         incoming["dbkey"] = input_dbkey
@@ -426,7 +476,7 @@ class DefaultToolAction:
                     dataset_collection_elements[name].hda = data
                 trans.sa_session.add(data)
                 if not completed_job:
-                    trans.app.security_agent.set_all_dataset_permissions(data.dataset, output_permissions, new=True, flush=False)
+                    execution_cache.set_new_dataset_permissions(data.dataset, output_permissions)
             data.copy_tags_to(preserved_tags.values())
 
             # This may not be neccesary with the new parent/child associations
@@ -550,7 +600,7 @@ class DefaultToolAction:
         job_setup_timer = ExecutionTimer()
         # Create the job object
         job, galaxy_session = self._new_job_for_session(trans, tool, history)
-        self._record_inputs(trans, tool, job, incoming, inp_data, inp_dataset_collections)
+        self._record_inputs(trans, tool, job, incoming, inp_data, inp_dataset_collections, execution_cache=execution_cache)
         self._record_outputs(job, out_data, output_collections)
         # execute immediate post job actions and associate post job actions that are to be executed after the job is complete
         if job_callback:
@@ -717,7 +767,7 @@ class DefaultToolAction:
         job.dynamic_tool = tool.dynamic_tool
         return job, galaxy_session
 
-    def _record_inputs(self, trans, tool, job, incoming, inp_data, inp_dataset_collections):
+    def _record_inputs(self, trans, tool, job, incoming, inp_data, inp_dataset_collections, execution_cache=None):
         # FIXME: Don't need all of incoming here, just the defined parameters
         #        from the tool. We need to deal with tools that pass all post
         #        parameters to the command as a special case.
@@ -754,8 +804,12 @@ class DefaultToolAction:
         if reductions:
             tool.visit_inputs(incoming, restore_reduction_visitor)
 
-        for name, value in tool.params_to_strings(incoming, trans.app).items():
-            job.add_parameter(name, value)
+        params = tool.params_to_strings(incoming, trans.app)
+        if execution_cache is not None:
+            execution_cache.add_job_parameters(job, params)
+        else:
+            for name, value in params.items():
+                job.add_parameter(name, value)
         self._record_input_datasets(trans, job, inp_data)
 
     def _record_outputs(self, job, out_data, output_collections):
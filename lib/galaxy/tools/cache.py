@@ -1,11 +1,12 @@
+import hashlib
 import json
 import logging
+import multiprocessing
 import os
-import shutil
 import sqlite3
-import tempfile
 import zlib
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from threading import Lock
 from typing import Dict, List, Tuple
 
@@ -13,18 +14,37 @@ from sqlalchemy.orm import (
     defer,
     joinedload,
 )
-from sqlitedict import SqliteDict
 
 from galaxy.model.tool_shed_install import ToolShedRepository
 from galaxy.structured_app import MinimalManagerApp
+from galaxy.tool_util.parser import get_tool_source
 from galaxy.tools.toolbox.base import ToolConfRepository
-from galaxy.util import unicodify
+from galaxy.util import (
+    ExecutionTimer,
+    unicodify,
+)
 from galaxy.util.hash_util import md5_hash_file
 
 
 log = logging.getLogger(__name__)
 
-CURRENT_TOOL_CACHE_VERSION = 0
+CURRENT_TOOL_CACHE_VERSION = 1
+# Number of tool files sent to a parsing worker process at once
+TOOL_PARSE_CHUNK_SIZE = 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tool_source (
+    config_file TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    macro_paths TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_tool_source_content_hash ON tool_source (content_hash);
+CREATE TABLE IF NOT EXISTS tool_document (
+    content_hash TEXT PRIMARY KEY,
+    tool_cache_version INTEGER NOT NULL,
+    document BLOB NOT NULL
+);
+"""
 
 
 def encoder(obj):
@@ -35,104 +55,213 @@ def decoder(obj):
     return json.loads(zlib.decompress(bytes(obj)).decode('utf-8'))
 
 
+def expand_tool_document(config_file, enable_beta_formats=False):
+    """
+    Parse and expand the tool at ``config_file``, return the expanded
+    document and macro paths or None if the tool can't be parsed.
+
+    Meant to be run in worker processes by :meth:`ToolDocumentCache.preload`.
+    """
+    try:
+        tool_source = get_tool_source(config_file, enable_beta_formats=enable_beta_formats)
+        return tool_source.to_string(), tool_source.macro_paths
+    except Exception:
+        # The tool is parsed again when it is loaded, which logs the error
+        return None
+
+
 class ToolDocumentCache:
+    """
+    Cache of expanded tool documents shared by all Galaxy processes on a node.
+
+    Documents are stored by a hash of the contents of the tool file and its
+    macro files, so that touching files or checking them out again doesn't
+    invalidate the cache and identical tools at different paths share a
+    document. The sqlite database is used in WAL mode, readers don't block
+    each other or the (incremental) writes of other processes.
+    """
 
     def __init__(self, cache_dir):
         self.cache_dir = cache_dir
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
         self.cache_file = os.path.join(self.cache_dir, 'cache.sqlite')
-        self.writeable_cache_file = None
-        self._cache = None
+        self._lock = Lock()
+        self._conn = None
+        # path -> (mtime, size, hash) of tool and macro files hashed by this process
+        self._file_hashes = {}
         self.disabled = False
-        self._get_cache(create_if_necessary=True)
-
-    def close(self):
-        self._cache and self._cache.close()
+        self._connect()
 
-    def _get_cache(self, flag='r', create_if_necessary=False):
+    def _connect(self):
         try:
-            if create_if_necessary and not os.path.exists(self.cache_file):
-                # Create database if necessary using 'c' flag
-                self._cache = SqliteDict(self.cache_file, flag='c', encode=encoder, decode=decoder, autocommit=False)
-                if flag == 'r':
-                    self._cache.flag = flag
+            if self.cache_file_is_writeable or not os.path.exists(self.cache_file):
+                conn = sqlite3.connect(self.cache_file, timeout=60, check_same_thread=False, isolation_level=None)
+                conn.execute("PRAGMA journal_mode=WAL")
+                # Losing the latest writes on power loss only costs re-parsing a few tools
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript(SCHEMA)
             else:
-                cache_file = self.writeable_cache_file.name if self.writeable_cache_file else self.cache_file
-                self._cache = SqliteDict(cache_file, flag=flag, encode=encoder, decode=decoder, autocommit=False)
+                # e.g. a cache distributed through CVMFS, there is no way to
+                # create the WAL index next to it.
+                conn = sqlite3.connect(f"file:{self.cache_file}?immutable=1", uri=True, check_same_thread=False, isolation_level=None)
+            self._conn = conn
         except sqlite3.OperationalError:
             log.warning('Tool document cache unavailable')
-            self._cache = None
+            self._conn = None
             self.disabled = True
 
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
     @property
     def cache_file_is_writeable(self):
         return os.access(self.cache_file, os.W_OK)
 
     def reopen_ro(self):
-        self._get_cache(flag='r')
-        self.writeable_cache_file = None
+        # Connections must not be shared with forked processes, reconnect
+        # after forking.
+        self.close()
+        self._connect()
+
+    def _file_hash(self, path):
+        stat = os.stat(path)
+        cached = self._file_hashes.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        with open(path, 'rb') as f:
+            file_hash = hashlib.sha1(f.read()).hexdigest()
+        self._file_hashes[path] = (stat.st_mtime_ns, stat.st_size, file_hash)
+        return file_hash
+
+    def content_hash(self, config_file, macro_paths):
+        """Return a hash of the contents of ``config_file`` and its macro files."""
+        content_hash = hashlib.sha1()
+        for path in [config_file] + list(macro_paths):
+            content_hash.update(self._file_hash(path).encode())
+        return content_hash.hexdigest()
+
+    def _execute(self, *args):
+        with self._lock:
+            if self._conn is None:
+                return None
+            return self._conn.execute(*args).fetchone()
 
     def get(self, config_file):
         try:
-            tool_document = self._cache.get(config_file)
+            row = self._execute("SELECT content_hash, macro_paths FROM tool_source WHERE config_file = ?", (config_file,))
+            if not row:
+                return None
+            content_hash, macro_paths = row[0], json.loads(row[1])
+            if self.cache_file_is_writeable:
+                try:
+                    if self.content_hash(config_file, macro_paths) != content_hash:
+                        return None
+                except OSError:
+                    return None
+            row = self._execute(
+                "SELECT document FROM tool_document WHERE content_hash = ? AND tool_cache_version = ?",
+                (content_hash, CURRENT_TOOL_CACHE_VERSION),
+            )
         except sqlite3.OperationalError:
             log.debug("Tool document cache unavailable")
             return None
-        if not tool_document:
-            return None
-        if tool_document.get('tool_cache_version') != CURRENT_TOOL_CACHE_VERSION:
+        if not row:
             return None
-        if self.cache_file_is_writeable:
-            for path, modtime in tool_document['paths_and_modtimes'].items():
-                if os.path.getmtime(path) != modtime:
-                    return None
-        return tool_document
-
-    def _make_writable(self):
-        if not self.writeable_cache_file:
-            self.writeable_cache_file = tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix='cache.sqlite.tmp', delete=False)
-            if os.path.exists(self.cache_file):
-                shutil.copy(self.cache_file, self.writeable_cache_file.name)
-            self._get_cache(flag='c')
+        return {
+            'document': decoder(row[0]),
+            'macro_paths': macro_paths,
+            'tool_cache_version': CURRENT_TOOL_CACHE_VERSION,
+        }
 
     def persist(self):
-        if self.writeable_cache_file:
-            self._cache.commit()
-            os.rename(self.writeable_cache_file.name, self.cache_file)
-            self.reopen_ro()
+        # Writes are committed as they happen, move them from the WAL into
+        # the database so that the file can be copied or used read-only.
+        try:
+            self._execute("PRAGMA wal_checkpoint(PASSIVE)")
+        except sqlite3.OperationalError:
+            log.debug("Tool document cache unavailable")
 
     def set(self, config_file, tool_source):
+        self.set_many([(config_file, tool_source.to_string(), tool_source.macro_paths)])
+
+    def set_many(self, documents):
+        """Store ``(config_file, document, macro_paths)`` tuples in one transaction."""
+        if not self.cache_file_is_writeable:
+            return
+        rows = []
+        for config_file, document, macro_paths in documents:
+            try:
+                rows.append((config_file, self.content_hash(config_file, macro_paths), json.dumps(macro_paths), encoder(document)))
+            except OSError:
+                # File removed while loading the toolbox
+                continue
         try:
-            if self.cache_file_is_writeable:
-                self._make_writable()
-                to_persist = {
-                    'document': tool_source.to_string(),
-                    'macro_paths': tool_source.macro_paths,
-                    'paths_and_modtimes': tool_source.paths_and_modtimes(),
-                    'tool_cache_version': CURRENT_TOOL_CACHE_VERSION,
-                }
+            with self._lock:
+                if self._conn is None:
+                    return
+                self._conn.execute("BEGIN")
                 try:
-                    self._cache[config_file] = to_persist
-                except RuntimeError:
-                    log.debug("Tool document cache not writeable")
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO tool_source (config_file, content_hash, macro_paths) VALUES (?, ?, ?)",
+                        ((config_file, content_hash, macro_paths) for config_file, content_hash, macro_paths, _ in rows)
+                    )
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO tool_document (content_hash, tool_cache_version, document) VALUES (?, ?, ?)",
+                        ((content_hash, CURRENT_TOOL_CACHE_VERSION, document) for _, content_hash, _, document in rows)
+                    )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
         except sqlite3.OperationalError:
             log.debug("Tool document cache unavailable")
 
     def delete(self, config_file):
-        if self.cache_file_is_writeable:
-            self._make_writable()
-            try:
-                del self._cache[config_file]
-            except (KeyError, RuntimeError):
-                pass
+        if not self.cache_file_is_writeable:
+            return
+        try:
+            with self._lock:
+                if self._conn is None:
+                    return
+                self._conn.execute("DELETE FROM tool_source WHERE config_file = ?", (config_file,))
+                self._conn.execute("DELETE FROM tool_document WHERE content_hash NOT IN (SELECT content_hash FROM tool_source)")
+        except sqlite3.OperationalError:
+            log.debug("Tool document cache unavailable")
 
-    def __del__(self):
-        if self.writeable_cache_file:
-            try:
-                os.unlink(self.writeable_cache_file.name)
-            except Exception:
-                pass
+    def preload(self, config_files, processes=None, enable_beta_formats=False):
+        """
+        Parse and expand the XML tools in ``config_files`` that are not cached
+        yet in a pool of worker processes (defaults to the number of CPUs) and
+        cache the results. Return the number of tools parsed.
+        """
+        if self.disabled or not self.cache_file_is_writeable:
+            return 0
+        timer = ExecutionTimer()
+        missing = [f for f in config_files if f.endswith('.xml') and os.path.exists(f) and self.get(f) is None]
+        lookup_timer = str(timer)
+        processes = min(processes or os.cpu_count() or 1, len(missing))
+        if processes < 2:
+            # Not worth starting workers, tools are parsed as they are loaded
+            return 0
+        timer = ExecutionTimer()
+        start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context(start_method)) as executor:
+            results = list(executor.map(
+                expand_tool_document, missing, [enable_beta_formats] * len(missing), chunksize=TOOL_PARSE_CHUNK_SIZE
+            ))
+        parse_timer = str(timer)
+        timer = ExecutionTimer()
+        documents = [(config_file, *result) for config_file, result in zip(missing, results) if result]
+        self.set_many(documents)
+        log.info(
+            "Preloaded tool document cache %s: %d of %d tools parsed in %d processes (lookup %s, parsing %s, storing %s)",
+            self.cache_file, len(documents), len(config_files), processes, lookup_timer, parse_timer, timer
+        )
+        return len(documents)
 
 
 class ToolCache:
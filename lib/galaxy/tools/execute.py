@@ -18,6 +18,9 @@ log = logging.getLogger(__name__)
 
 SINGLE_EXECUTION_SUCCESS_MESSAGE = "Tool ${tool_id} created job ${job_id}"
 BATCH_EXECUTION_MESSAGE = "Executed ${job_count} job(s) for tool ${tool_id} request"
+# Executions creating at least this many jobs insert job parameters and output
+# dataset permissions in bulk instead of flushing an ORM object per row.
+BULK_EXECUTION_MIN_JOBS = 64
 
 
 class PartialJobExecution(Exception):
@@ -96,6 +99,8 @@ def execute(trans, tool, mapping_params, history, rerun_remap_job_id=None, colle
 
     execution_tracker.ensure_implicit_collections_populated(history, mapping_params.param_template)
     job_count = len(execution_tracker.param_combinations)
+    new_job_count = job_count if max_num_jobs is None else min(job_count, max_num_jobs)
+    execution_cache.defer_rows = rerun_remap_job_id is None and new_job_count >= BULK_EXECUTION_MIN_JOBS
 
     jobs_executed = 0
     has_remaining_jobs = False
@@ -114,6 +119,12 @@ def execute(trans, tool, mapping_params, history, rerun_remap_job_id=None, colle
     if execution_slice:
         # a side effect of adding datasets to a history is a commit within db_next_hid (even with flush=False).
         history.add_pending_items()
+        if execution_cache.defer_rows:
+            # Jobs without an assigned handler are not picked up yet, flush
+            # them to insert their parameters and output dataset permissions
+            # before they are enqueued.
+            trans.sa_session.flush()
+            execution_cache.insert_deferred_rows()
     else:
         # Make sure collections, implicit jobs etc are flushed even if there are no precreated output datasets
         trans.sa_session.flush()
@@ -1,3 +1,4 @@
+import heapq
 from logging import getLogger
 
 import galaxy.model
@@ -26,6 +27,7 @@ class DatasetMatcherFactory:
         self._tool = tool
         self._data_inputs = []
         self._matches_format_cache = {}
+        self._history_dataset_indexes = {}
         if tool:
             valid_input_states = tool.valid_input_states
         else:
@@ -63,6 +65,23 @@ class DatasetMatcherFactory:
 
         return formats[format]
 
+    def conversion_destination(self, hda_extension, formats):
+        """ Return ``(direct_match, target_ext)`` for datasets of extension
+        ``hda_extension`` and a parameter accepting ``formats``.
+        """
+        return self._trans.app.datatypes_registry.get_conversion_destination(hda_extension, formats)
+
+    def history_dataset_index(self, history):
+        """ Return the HistoryDatasetIndex of ``history``, built once per
+        factory (i.e. per request building a tool form) and shared by all
+        data parameters of the tool.
+        """
+        index = self._history_dataset_indexes.get(history.id)
+        if index is None:
+            index = HistoryDatasetIndex(history.active_visible_datasets_and_roles)
+            self._history_dataset_indexes[history.id] = index
+        return index
+
     def _collect_data_inputs(self, input):
         type_name = input.type
         if type_name == "repeat" or type_name == "upload_dataset" or type_name == "section":
@@ -114,24 +133,11 @@ class DatasetMatcher:
         HdaDirectMatch describing a direct match or a HdaImplicitMatch
         describing an implicit conversion.)
         """
-        rval = False
         formats = self.param.formats
         direct_match, target_ext, converted_dataset = hda.find_conversion_destination(formats)
-        if direct_match:
-            rval = HdaDirectMatch(hda)
-        else:
-            if not check_implicit_conversions:
-                return False
-            if target_ext:
-                original_hda = hda
-                if converted_dataset:
-                    hda = converted_dataset
-                rval = HdaImplicitMatch(hda, target_ext, original_hda)
-            else:
-                return False
-        if self.filter(hda):
+        if not direct_match and not check_implicit_conversions:
             return False
-        return rval
+        return self.__match(hda, direct_match, target_ext, converted_dataset)
 
     def hda_match(self, hda, check_implicit_conversions=True, ensure_visible=True):
         """ If HDA is accessible, return information about whether it could
@@ -141,13 +147,34 @@ class DatasetMatcher:
         dataset = hda.dataset
         valid_state = dataset.state in self.dataset_matcher_factory.valid_input_states
         if valid_state and (not ensure_visible or hda.visible):
-            # If we are sending data to an external application, then we need to make sure there are no roles
-            # associated with the dataset that restrict its access from "public".
-            require_public = self.tool and self.tool.tool_type == 'data_destination'
-            if require_public and not self.trans.app.security_agent.dataset_is_public(dataset):
+            if not self.__accessible(dataset):
                 return False
             return self.valid_hda_match(hda, check_implicit_conversions=check_implicit_conversions)
 
+    def history_hda_matches(self, history, reverse=False):
+        """ Yield the matches of the active, visible datasets of ``history``
+        in history order (reversed if ``reverse``). Only datasets with an
+        extension that matches this parameter directly or through an implicit
+        conversion are looked at, see HistoryDatasetIndex.
+        """
+        dataset_matcher_factory = self.dataset_matcher_factory
+        index = dataset_matcher_factory.history_dataset_index(history)
+        formats = self.param.formats
+        candidates = []
+        for extension, hdas in index.by_extension.items():
+            direct_match, target_ext = dataset_matcher_factory.conversion_destination(extension, formats)
+            if direct_match or target_ext:
+                candidates.append([(position, hda, direct_match, target_ext) for position, hda in (reversed(hdas) if reverse else hdas)])
+        valid_input_states = dataset_matcher_factory.valid_input_states
+        for _, hda, direct_match, target_ext in heapq.merge(*candidates, key=lambda candidate: candidate[0], reverse=reverse):
+            dataset = hda.dataset
+            if dataset.state not in valid_input_states or not self.__accessible(dataset):
+                continue
+            converted_dataset = not direct_match and hda.get_converted_files_by_type(target_ext)
+            match = self.__match(hda, direct_match, target_ext, converted_dataset)
+            if match:
+                yield match
+
     def filter(self, hda):
         """ Filter out this value based on other values for job (if
         applicable).
@@ -155,6 +182,43 @@ class DatasetMatcher:
         param = self.param
         return param.options and param.get_options_filter_attribute(hda) not in self.filter_values
 
+    def __accessible(self, dataset):
+        # If we are sending data to an external application, then we need to make sure there are no roles
+        # associated with the dataset that restrict its access from "public".
+        require_public = self.tool and self.tool.tool_type == 'data_destination'
+        return not require_public or self.trans.app.security_agent.dataset_is_public(dataset)
+
+    def __match(self, hda, direct_match, target_ext, converted_dataset):
+        if direct_match:
+            rval = HdaDirectMatch(hda)
+        elif target_ext:
+            original_hda = hda
+            if converted_dataset:
+                hda = converted_dataset
+            rval = HdaImplicitMatch(hda, target_ext, original_hda)
+        else:
+            return False
+        if self.filter(hda):
+            return False
+        return rval
+
+
+class HistoryDatasetIndex:
+    """ Active, visible datasets of a history grouped by extension.
+
+    Whether datasets match a data parameter directly or through an implicit
+    conversion only depends on their extension (see
+    ``Registry.get_conversion_destination``), so matching the datasets of a
+    history against a parameter only needs to look at the groups of the
+    extensions the parameter can use instead of all datasets.
+    """
+
+    def __init__(self, hdas):
+        # extension => [(position in history order, hda)]
+        self.by_extension = {}
+        for position, hda in enumerate(hdas):
+            self.by_extension.setdefault(hda.extension, []).append((position, hda))
+
 
 class HdaDirectMatch:
     """ Supplied HDA was a valid option directly (did not need to find implicit
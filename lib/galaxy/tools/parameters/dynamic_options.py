@@ -6,6 +6,8 @@ import copy
 import logging
 import os
 import re
+import threading
+from collections import OrderedDict
 from io import StringIO
 
 from galaxy.model import (
@@ -23,6 +25,104 @@ from . import validation
 
 log = logging.getLogger(__name__)
 
+#: Default number of option tables kept by ``options_table_cache``
+OPTIONS_TABLE_CACHE_SIZE = 100
+# Ensure parsing dynamic options from a dataset does not consume more than a megabyte worth memory.
+MAX_DATASET_OPTIONS_SIZE = 1048576
+
+
+class OptionsTable(list):
+    """
+    Rows (lists of fields) of dynamic options, with indexes of the rows by
+    column value that are built on first use and kept with the table.
+
+    Tables are shared between requests (see ``options_table_cache``), neither
+    the table nor its rows must be modified.
+    """
+
+    def __init__(self, rows=(), source=None):
+        super().__init__(rows)
+        # Object the rows were loaded from, keeps it from being reused while the table is cached
+        self.source = source
+        self._column_indexes = {}
+        self._unique_rows = {}
+
+    def rows_with_value(self, column, value):
+        """Return the rows whose field ``column`` is ``value``, in table order."""
+        index = self._column_indexes.get(column)
+        if index is None:
+            index = {}
+            for fields in self:
+                index.setdefault(fields[column], []).append(fields)
+            self._column_indexes[column] = index
+        return index.get(value, [])
+
+    def unique_rows(self, column):
+        """Return the first row of each value of field ``column``, in table order."""
+        rows = self._unique_rows.get(column)
+        if rows is None:
+            rows = []
+            seen = set()
+            for fields in self:
+                if fields[column] not in seen:
+                    rows.append(fields)
+                    seen.add(fields[column])
+            self._unique_rows[column] = rows
+        return rows
+
+
+class OptionsTableCache:
+    """
+    Thread-safe LRU cache of up to ``max_size`` ``OptionsTable`` objects (0
+    disables the cache). Keys identify the content the table was parsed from,
+    like the path, modification time and size of a file, so changed files are
+    parsed again and stale tables are evicted eventually.
+    """
+
+    def __init__(self, max_size=OPTIONS_TABLE_CACHE_SIZE):
+        self.max_size = max_size
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_table(self, key, load):
+        """Return the table cached for ``key``, or an ``OptionsTable`` of the rows returned by ``load()``."""
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+        table = load()
+        if not isinstance(table, OptionsTable):
+            table = OptionsTable(table)
+        if self.max_size:
+            with self._lock:
+                self._tables[key] = table
+                self._evict()
+        return table
+
+    def resize(self, max_size):
+        with self._lock:
+            self.max_size = max_size
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+
+    def __contains__(self, key):
+        return key in self._tables
+
+    def __len__(self):
+        return len(self._tables)
+
+    def _evict(self):
+        while len(self._tables) > max(self.max_size, 0):
+            self._tables.popitem(last=False)
+
+
+#: Process-wide cache of option tables parsed from datasets, files and data tables
+options_table_cache = OptionsTableCache()
+
 
 class Filter:
     """
@@ -78,6 +178,8 @@ class StaticValueFilter(Filter):
             filter_value = User.expand_user_properties(trans.user, filter_value)
         except Exception:
             pass
+        if self.keep and isinstance(options, OptionsTable):
+            return list(options.rows_with_value(self.column, filter_value))
         for fields in options:
             if self.keep == (filter_value == fields[self.column]):
                 rval.append(fields)
@@ -276,6 +378,8 @@ class ParamValueFilter(Filter):
                 return []  # ref does not have attribute, so we cannot filter, return empty list
             ref = getattr(ref, ref_attribute)
         ref = str(ref)
+        if self.keep and isinstance(options, OptionsTable):
+            return list(options.rows_with_value(self.column, ref))
         rval = []
         for fields in options:
             if self.keep == (fields[self.column] == ref):
@@ -303,12 +407,14 @@ class UniqueValueFilter(Filter):
         return self.dynamic_option.dataset_ref_name
 
     def filter_options(self, options, trans, other_values):
+        if isinstance(options, OptionsTable):
+            return list(options.unique_rows(self.column))
         rval = []
-        skip_list = []
+        skip_list = set()
         for fields in options:
             if fields[self.column] not in skip_list:
                 rval.append(fields)
-                skip_list.append(fields[self.column])
+                skip_list.add(fields[self.column])
         return rval
 
 
@@ -521,7 +627,7 @@ class DynamicOptions:
                 obj = getattr(obj, field)
             if transform_lines:
                 obj = eval(transform_lines, {'self': self, 'obj': obj})
-            return self.parse_file_fields(obj)
+            return OptionsTable(self.parse_file_fields(obj))
         self.tool_param = tool_param
         self.columns = {}
         self.filters = []
@@ -539,6 +645,7 @@ class DynamicOptions:
         self.line_startswith = elem.get('startswith', None)
         data_file = elem.get('from_file', None)
         self.index_file = None
+        self.index_file_path = None
         self.missing_index_file = None
         dataset_file = elem.get('from_dataset', None)
         from_parameter = elem.get('from_parameter', None)
@@ -559,8 +666,8 @@ class DynamicOptions:
                     full_path = os.path.join(self.tool_param.tool.app.config.tool_data_path, data_file)
                     if os.path.exists(full_path):
                         self.index_file = data_file
-                        with open(full_path) as fh:
-                            self.file_fields = self.parse_file_fields(fh)
+                        self.index_file_path = full_path
+                        self.file_fields = self._file_options(full_path)
                     else:
                         self.missing_index_file = data_file
             elif dataset_file is not None:
@@ -570,7 +677,7 @@ class DynamicOptions:
                 self.converter_safe = False
             elif from_parameter is not None:
                 transform_lines = elem.get('transform_lines', None)
-                self.file_fields = list(load_from_parameter(from_parameter, transform_lines))
+                self.file_fields = load_from_parameter(from_parameter, transform_lines)
 
         # Load filters
         for filter_elem in elem.findall('filter'):
@@ -644,6 +751,36 @@ class DynamicOptions:
                     rval.append(fields)
         return rval
 
+    def _file_options(self, path, max_size=None):
+        """
+        Return the ``OptionsTable`` of the file at ``path``, parsed again only
+        if the file changed. Only the first ``max_size`` characters of larger
+        files are parsed.
+        """
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size, max_size, self.separator, self.line_startswith, self.largest_index)
+
+        def load():
+            with open(path) as fh:
+                if max_size is not None and stat.st_size >= max_size:
+                    # Pass just the first max_size characters to parse_file_fields.
+                    log.warning("Attempting to load options from large file, reading just first megabyte")
+                    return self.parse_file_fields(StringIO(fh.read(max_size)))
+                return self.parse_file_fields(fh)
+
+        return options_table_cache.get_table(key, load)
+
+    def _data_table_options(self, tool_data_table):
+        """
+        Return the ``OptionsTable`` of the fields of ``tool_data_table``,
+        rebuilt whenever entries are added to or removed from the table.
+        """
+        if not hasattr(tool_data_table, 'get_version_fields'):
+            return tool_data_table.get_fields()
+        version, fields = tool_data_table.get_version_fields()
+        key = ('from_data_table', tool_data_table.name, id(tool_data_table), version)
+        return options_table_cache.get_table(key, lambda: OptionsTable(fields, source=tool_data_table))
+
     def get_dependency_names(self):
         """
         Return the names of parameters these options depend on -- both data
@@ -659,6 +796,17 @@ class DynamicOptions:
         return rval
 
     def get_fields(self, trans, other_values):
+        options = self._get_fields(trans, other_values)
+        if isinstance(options, OptionsTable):
+            # Don't hand out the cached table
+            options = list(options)
+        return options
+
+    def _get_fields(self, trans, other_values):
+        """
+        Like get_fields, but unfiltered options may be returned as the
+        (cached) ``OptionsTable`` they were loaded as.
+        """
         if self.dataset_ref_name:
             try:
                 datasets = _get_ref_data(other_values, self.dataset_ref_name)
@@ -669,7 +817,7 @@ class DynamicOptions:
                 log.warning(f"could not create dynamic options from_dataset: {self.dataset_ref_name} not a data or collection parameter")
                 return []
 
-            options = []
+            tables = []
             meta_file_key = self.meta_file_key
             for dataset in datasets:
                 if meta_file_key:
@@ -682,21 +830,21 @@ class DynamicOptions:
                         continue
                 if not hasattr(dataset, 'file_name'):
                     continue
-                # Ensure parsing dynamic options does not consume more than a megabyte worth memory.
-                path = dataset.file_name
-                if os.path.getsize(path) < 1048576:
-                    with open(path) as fh:
-                        options += self.parse_file_fields(fh)
-                else:
-                    # Pass just the first megabyte to parse_file_fields.
-                    log.warning("Attempting to load options from large file, reading just first megabyte")
-                    with open(path) as fh:
-                        contents = fh.read(1048576)
-                    options += self.parse_file_fields(StringIO(contents))
+                tables.append(self._file_options(dataset.file_name, max_size=MAX_DATASET_OPTIONS_SIZE))
+            if len(tables) == 1:
+                options = tables[0]
+            else:
+                options = [fields for table in tables for fields in table]
         elif self.tool_data_table:
-            options = self.tool_data_table.get_fields()
+            options = self._data_table_options(self.tool_data_table)
         elif self.file_fields:
-            options = list(self.file_fields)
+            options = self.file_fields
+            if self.index_file_path:
+                try:
+                    options = self._file_options(self.index_file_path)
+                except OSError:
+                    # File vanished since the tool was loaded, keep using the options loaded then
+                    pass
         else:
             options = []
         for filter in self.filters:
@@ -709,7 +857,10 @@ class DynamicOptions:
         """
         rval = []
         val_index = self.columns['value']
-        for fields in self.get_fields(trans, other_values):
+        options = self._get_fields(trans, other_values)
+        if isinstance(options, OptionsTable):
+            return list(options.rows_with_value(val_index, value))
+        for fields in options:
             if fields[val_index] == value:
                 rval.append(fields)
         return rval
@@ -734,7 +885,7 @@ class DynamicOptions:
     def get_options(self, trans, other_values):
         rval = []
         if self.file_fields is not None or self.tool_data_table is not None or self.dataset_ref_name is not None or self.missing_index_file:
-            options = self.get_fields(trans, other_values)
+            options = self._get_fields(trans, other_values)
             for fields in options:
                 rval.append((fields[self.columns['name']], fields[self.columns['value']], False))
         else:
@@ -256,7 +256,12 @@ class AbstractToolBox(Dictifiable, ManagesIntegratedToolPanelMixin):
         tool_path = self.__resolve_tool_path(tool_path, config_filename)
         # Only load the panel_dict under certain conditions.
         load_panel_dict = not self._integrated_tool_panel_config_has_contents
-        for item in tool_conf_source.parse_items():
+        items = tool_conf_source.parse_items()
+        preload_timer = ExecutionTimer()
+        self.preload_tools(self._tool_config_files(items, tool_path), tool_cache_data_dir=tool_cache_data_dir)
+        preload_timer = str(preload_timer)
+        load_timer = ExecutionTimer()
+        for item in items:
             index = self._index
             self._index += 1
             if parsing_shed_tool_conf:
@@ -269,6 +274,7 @@ class AbstractToolBox(Dictifiable, ManagesIntegratedToolPanelMixin):
                 guid=item.get('guid'),
                 index=index,
             )
+        log.debug("Loaded %s configuration %s: preloading tools %s, loading tools %s", tool_conf_type, config_filename, preload_timer, load_timer)
 
         if parsing_shed_tool_conf:
             # if read_only mode, (CVMFS consumer) don't add to dynamic_confs
@@ -815,12 +821,29 @@ class AbstractToolBox(Dictifiable, ManagesIntegratedToolPanelMixin):
     def _path_template_kwds(self):
         return {}
 
+    def _tool_item_path(self, item, tool_path):
+        path = string.Template(item.get("file")).safe_substitute(**self._path_template_kwds())
+        return path, os.path.join(tool_path, path)
+
+    def _tool_config_files(self, items, tool_path):
+        """Return the paths of the tool files referenced by tool conf ``items`` (and their sections)."""
+        config_files = []
+        for item in items:
+            if item.type == 'tool':
+                config_files.append(self._tool_item_path(item, tool_path)[1])
+            elif item.type == 'section':
+                config_files.extend(self._tool_config_files(item.items, tool_path))
+        return config_files
+
+    def preload_tools(self, config_files, tool_cache_data_dir=None):
+        """
+        Hook to prepare loading the tools in ``config_files`` before they are
+        loaded one by one, e.g. by parsing them in parallel.
+        """
+
     def _load_tool_tag_set(self, item, panel_dict, integrated_panel_dict, tool_path, load_panel_dict, guid=None, index=None, tool_cache_data_dir=None):
         try:
-            path_template = item.get("file")
-            template_kwds = self._path_template_kwds()
-            path = string.Template(path_template).safe_substitute(**template_kwds)
-            concrete_path = os.path.join(tool_path, path)
+            path, concrete_path = self._tool_item_path(item, tool_path)
             if not os.path.exists(concrete_path):
                 # This is a lot faster than attempting to load a non-existing tool
                 raise OSError(ENOENT, os.strerror(ENOENT))
@@ -1,6 +1,11 @@
 """Entry point for the usage of Cheetah templating within Galaxy."""
 
+import hashlib
+import logging
+import sys
+import threading
 import traceback
+from collections import OrderedDict
 from lib2to3.refactor import RefactoringTool
 
 import packaging.version
@@ -12,11 +17,16 @@ from past.translation import myfixes
 
 from . import unicodify
 
+log = logging.getLogger(__name__)
+
 # Skip libpasteurize fixers, which make sure code is py2 and py3 compatible.
 # This is not needed, we only translate code on py3.
 myfixes = [f for f in myfixes if not f.startswith('libpasteurize')]
 refactoring_tool = RefactoringTool(myfixes, {'print_function': True})
 
+#: Default number of compiled templates kept by ``template_cache``
+TEMPLATE_CACHE_SIZE = 500
+
 
 class FixedModuleCodeCompiler(Compiler):
 
@@ -36,6 +46,119 @@ def create_compiler_class(module_code):
     return CustomCompilerClass
 
 
+class CompiledTemplate:
+    """
+    A compiled template class and the compiler class and futurize state it was
+    compiled with, i.e. the fallback fill_template ended up using for the template.
+    """
+
+    def __init__(self, klass, compiler_class, futurized):
+        self.klass = klass
+        self.compiler_class = compiler_class
+        self.futurized = futurized
+
+
+class TemplateCache:
+    """
+    Thread-safe LRU cache of up to ``max_size`` ``CompiledTemplate`` objects
+    (0 disables the cache), keyed by a hash of the template text, the compiler
+    class and the python template version.
+
+    This replaces Cheetah's own compilation cache, which is unbounded and
+    misses for the compiler classes created when retrying a template.
+    """
+
+    def __init__(self, max_size=TEMPLATE_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(template_text, compiler_class, python_template_version):
+        if isinstance(template_text, str):
+            template_text = template_text.encode('utf-8')
+        return (hashlib.sha1(template_text).hexdigest(), compiler_class, str(python_template_version))
+
+    def get(self, key):
+        with self._lock:
+            compiled_template = self._templates.get(key)
+            if compiled_template is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._templates.move_to_end(key)
+            return compiled_template
+
+    def put(self, key, compiled_template):
+        if not self.max_size:
+            return
+        with self._lock:
+            previous = self._templates.pop(key, None)
+            if previous is not None and previous.klass is not compiled_template.klass:
+                _forget_module(previous.klass)
+            self._templates[key] = compiled_template
+            self._evict()
+
+    def resize(self, max_size):
+        with self._lock:
+            self.max_size = max_size
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            while self._templates:
+                _, compiled_template = self._templates.popitem()
+                _forget_module(compiled_template.klass)
+
+    def __contains__(self, key):
+        return key in self._templates
+
+    def __len__(self):
+        return len(self._templates)
+
+    def _evict(self):
+        while len(self._templates) > max(self.max_size, 0):
+            _, compiled_template = self._templates.popitem(last=False)
+            _forget_module(compiled_template.klass)
+
+
+def _forget_module(klass):
+    # Cheetah registers the module of every compiled template in sys.modules
+    module_name = klass.__module__
+    if Template._CHEETAH_defaultModuleNameForTemplates in module_name:
+        sys.modules.pop(module_name, None)
+
+
+#: Process-wide cache of templates compiled by fill_template
+template_cache = TemplateCache()
+
+
+def _compile(template_text, compiler_class):
+    return Template.compile(source=template_text, compilerClass=compiler_class,
+                            cacheCompilationResults=False, keepRefToGeneratedCode=True)
+
+
+def precompile_template(template_text, python_template_version='3'):
+    """
+    Compile ``template_text`` into ``template_cache``, so that filling it does
+    not need to compile it. Templates that fail to compile are skipped, errors
+    are raised when the template is filled.
+    """
+    if isinstance(python_template_version, str):
+        python_template_version = packaging.version.parse(python_template_version)
+    key = TemplateCache.key(template_text, Compiler, python_template_version)
+    if key in template_cache:
+        return
+    try:
+        klass = _compile(template_text, Compiler)
+    except Exception:
+        log.debug("Failed to precompile template", exc_info=True)
+        return
+    template_cache.put(key, CompiledTemplate(klass, Compiler, False))
+
+
 def fill_template(template_text,
                   context=None,
                   retry=10,
@@ -49,6 +172,10 @@ def fill_template(template_text,
     If template_text is None, an exception will be thrown, if context
     is None (the default) - keyword arguments to this function will be used
     as the context.
+
+    Compiled templates are kept in ``template_cache``, along with the compiler
+    class a retry fell back to, so a template is only compiled (and retried)
+    once per process.
     """
     if template_text is None:
         raise TypeError("Template text specified as None to fill_template.")
@@ -56,25 +183,49 @@ def fill_template(template_text,
         context = kwargs
     if isinstance(python_template_version, str):
         python_template_version = packaging.version.parse(python_template_version)
-    try:
-        klass = Template.compile(source=template_text, compilerClass=compiler_class)
-    except ParseError as e:
-        # Might happen on invalid syntax within a cheetah statement, like `#if $smxsize <> 128.0`
-        if first_exception is None:
-            first_exception = e
-        if python_template_version.release[0] < 3 and retry > 0:
-            module_code = Template.compile(source=template_text, compilerClass=compiler_class, returnAClass=False).decode('utf-8')
-            module_code = futurize_preprocessor(module_code)
-            compiler_class = create_compiler_class(module_code)
-            return fill_template(
-                template_text=template_text,
-                context=context,
-                retry=retry - 1,
-                compiler_class=compiler_class,
-                first_exception=first_exception,
-                python_template_version=python_template_version,
-            )
-        raise first_exception or e
+    cache_key = TemplateCache.key(template_text, compiler_class, python_template_version)
+    compiled_template = template_cache.get(cache_key)
+    if compiled_template is not None:
+        return _fill_template(template_text, context, retry, compiled_template.compiler_class, first_exception,
+                              futurized or compiled_template.futurized, python_template_version, cache_key,
+                              klass=compiled_template.klass)
+    return _fill_template(template_text, context, retry, compiler_class, first_exception, futurized,
+                          python_template_version, cache_key)
+
+
+def _fill_template(template_text,
+                   context,
+                   retry,
+                   compiler_class,
+                   first_exception,
+                   futurized,
+                   python_template_version,
+                   cache_key,
+                   klass=None):
+    if klass is None:
+        try:
+            klass = _compile(template_text, compiler_class)
+        except ParseError as e:
+            # Might happen on invalid syntax within a cheetah statement, like `#if $smxsize <> 128.0`
+            if first_exception is None:
+                first_exception = e
+            if python_template_version.release[0] < 3 and retry > 0:
+                module_code = Template.compile(source=template_text, compilerClass=compiler_class, returnAClass=False).decode('utf-8')
+                module_code = futurize_preprocessor(module_code)
+                compiler_class = create_compiler_class(module_code)
+                return _fill_template(
+                    template_text,
+                    context,
+                    retry - 1,
+                    compiler_class,
+                    first_exception,
+                    False,
+                    python_template_version,
+                    cache_key,
+                )
+            raise first_exception or e
+        if cache_key is not None:
+            template_cache.put(cache_key, CompiledTemplate(klass, compiler_class, futurized))
     t = klass(searchList=[context])
     try:
         return unicodify(t, log_exception=False)
@@ -97,13 +248,16 @@ def fill_template(template_text,
                 module_code[lineno] = module_code[lineno].replace(replace_str, var_not_found)
                 module_code = "\n".join(module_code)
                 compiler_class = create_compiler_class(module_code)
-                return fill_template(template_text=template_text,
-                                     context=context,
-                                     retry=retry - 1,
-                                     compiler_class=compiler_class,
-                                     first_exception=first_exception,
-                                     python_template_version=python_template_version,
-                                     )
+                return _fill_template(template_text,
+                                      context,
+                                      retry - 1,
+                                      compiler_class,
+                                      first_exception,
+                                      False,
+                                      python_template_version,
+                                      # Replacing missing variables depends on the context, don't cache the result
+                                      None,
+                                      )
         raise first_exception or e
     except Exception as e:
         if first_exception is None:
@@ -115,14 +269,15 @@ def fill_template(template_text,
             module_code = t._CHEETAH_generatedModuleCode
             module_code = futurize_preprocessor(module_code)
             compiler_class = create_compiler_class(module_code)
-            return fill_template(template_text=template_text,
-                                 context=context,
-                                 retry=retry,
-                                 compiler_class=compiler_class,
-                                 first_exception=first_exception,
-                                 futurized=True,
-                                 python_template_version=python_template_version,
-                                 )
+            return _fill_template(template_text,
+                                  context,
+                                  retry,
+                                  compiler_class,
+                                  first_exception,
+                                  True,
+                                  python_template_version,
+                                  cache_key,
+                                  )
         raise first_exception or e
 
 
@@ -21,6 +21,12 @@ from galaxy.datatypes.interval import Bed, Gff, Gtf
 from galaxy.datatypes.util.gff_util import convert_gff_coords_to_bed, GFFFeature, GFFInterval, GFFReaderWrapper, parse_gff_attributes
 from galaxy.visualization.data_providers.basic import BaseDataProvider
 from galaxy.visualization.data_providers.cigar import get_ref_based_read_seq_and_cigar
+from galaxy.visualization.data_providers.tile_cache import (
+    cache_key,
+    provider_key,
+    SummaryPyramid,
+    tile_cached,
+)
 
 #
 # Utility functions.
@@ -138,6 +144,11 @@ class GenomeDataProvider(BaseDataProvider):
     """
     col_name_data_attr_mapping: Dict[Union[str, int], Dict] = {}
 
+    # GenomeTileCache results of get_data are cached in, set by the registry.
+    tile_cache = None
+    # Compute the regions next to requested ones in the background.
+    tile_prefetch = True
+
     def __init__(self, converted_dataset=None, original_dataset=None, dependencies=None,
                  error_max_vals="Only the first %i %s in this region are displayed."):
         super().__init__(converted_dataset=converted_dataset,
@@ -183,6 +194,7 @@ class GenomeDataProvider(BaseDataProvider):
         """
         raise Exception("Unimplemented Function")
 
+    @tile_cached
     def get_data(self, chrom=None, low=None, high=None, start_val=0, max_vals=sys.maxsize, **kwargs):
         """
         Returns data in region defined by chrom, start, and end. start_val and
@@ -800,6 +812,9 @@ class BamDataProvider(GenomeDataProvider, FilterableMixin):
     """
 
     dataset_type = 'bai'
+    # Reads are sampled based on the mean depth of the requested region, so
+    # results of neighbouring regions cannot be computed in advance.
+    tile_prefetch = False
 
     def get_filters(self):
         """
@@ -1121,6 +1136,7 @@ class BBIDataProvider(GenomeDataProvider):
         f.close()
         return all_dat is not None
 
+    @tile_cached
     def get_data(self, chrom, start, end, start_val=0, max_vals=None, num_samples=1000, **kwargs):
         start = int(start)
         end = int(end)
@@ -1128,6 +1144,9 @@ class BBIDataProvider(GenomeDataProvider):
         # Helper function for getting summary data regardless of chromosome
         # naming convention.
         def _summarize_bbi(bbi, chrom, start, end, num_points):
+            pyramid = self._get_summary_pyramid(bbi, chrom, start, end, num_points)
+            if pyramid is not None:
+                return pyramid.summarize(start, end, num_points)
             return bbi.summarize(chrom, start, end, num_points) or \
                 bbi.summarize(_convert_between_ucsc_and_ensemble_naming(chrom), start, end, num_points)
 
@@ -1232,6 +1251,26 @@ class BBIDataProvider(GenomeDataProvider):
             'dataset_type': self.dataset_type
         }
 
+    def _get_summary_pyramid(self, bbi, chrom, start, end, num_points):
+        """
+        Returns the SummaryPyramid of chrom to summarize start:end with if the
+        region is large enough, computing and caching it if needed.
+        """
+        if self.tile_cache is None:
+            return None
+        span = SummaryPyramid.span_for(end)
+        if (end - start) / num_points < SummaryPyramid.min_step(span):
+            return None
+        key = cache_key(provider_key(self), 'summary', chrom, span)
+        pyramid = self.tile_cache.get(key)
+        if pyramid is None:
+            summary = bbi.summarize(chrom, 0, span, SummaryPyramid.bins) or \
+                bbi.summarize(_convert_between_ucsc_and_ensemble_naming(chrom), 0, span, SummaryPyramid.bins)
+            # Chromosomes without data are cached as False
+            pyramid = SummaryPyramid(span, summary) if summary else False
+            self.tile_cache.put(key, pyramid)
+        return pyramid or None
+
 
 class BigBedDataProvider(BBIDataProvider):
     def _get_dataset(self):
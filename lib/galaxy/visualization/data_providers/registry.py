@@ -20,7 +20,9 @@ class DataProviderRegistry:
     Registry for data providers that enables listing and lookup.
     """
 
-    def __init__(self):
+    def __init__(self, tile_cache=None):
+        # Optional GenomeTileCache shared by the genome data providers.
+        self.tile_cache = tile_cache
         # Mapping from dataset type name to a class that can fetch data from a file of that
         # type. First key is converted dataset type; if result is another dict, second key
         # is original dataset type.
@@ -115,4 +117,7 @@ class DataProviderRegistry:
                         except NoConverterException:
                             pass
 
+            if isinstance(data_provider, genome.GenomeDataProvider):
+                data_provider.tile_cache = self.tile_cache
+
         return data_provider
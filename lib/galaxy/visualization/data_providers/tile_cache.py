@@ -0,0 +1,466 @@
+"""
+Server-side cache of genome data provider results.
+
+Track browsers such as Trackster request the data of a dataset in fixed tiles
+of a chromosome whose size depends on the resolution the track is drawn at, so
+panning and zooming back and forth repeatedly requests the same regions.
+``GenomeTileCache`` keeps the results of these requests in memory (within a
+byte budget, least recently used results are evicted first) and optionally in
+a directory on disk (pruned the same way once it exceeds its own budget), and
+computes the results of the tiles neighbouring a requested one in the
+background.
+
+For BBI (bigWig/bigBed) datasets ``SummaryPyramid`` holds summaries of a whole
+chromosome at several zoom levels, so summaries of large regions (and their
+statistics) are computed from these instead of summarizing the file again.
+"""
+import copy
+import functools
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
+
+from galaxy.util.bunch import Bunch
+
+log = logging.getLogger(__name__)
+
+PREFETCH_WORKERS = 2
+# The cache directory is checked for files to remove after writing this
+# fraction of its size limit, and pruned down to DIR_PRUNE_TARGET of the limit.
+DIR_PRUNE_INTERVAL = 0.1
+DIR_PRUNE_TARGET = 0.9
+# Number of bins of the finest level of a summary pyramid, each coarser level
+# has SUMMARY_LEVEL_FACTOR times fewer bins.
+SUMMARY_BINS = 16384
+SUMMARY_LEVEL_FACTOR = 4
+SUMMARY_MIN_LEVEL_BINS = 16
+# Summaries are computed from a pyramid level only if a summarized interval
+# spans at least this many bins of the level.
+SUMMARY_MIN_BINS_PER_POINT = 8
+
+
+class GenomeTileCache:
+    """
+    Thread-safe cache of genome data provider results.
+
+    Results are kept in memory up to ``max_bytes`` (measured as the size of
+    the pickled result) and, if ``cache_dir`` is set, also written to and read
+    back from that directory. If ``max_dir_bytes`` is set, the files of the
+    directory that were read or written least recently are removed in the
+    background once it grows beyond that.
+    """
+
+    def __init__(self, max_bytes, cache_dir=None, max_dir_bytes=0, prefetch_workers=PREFETCH_WORKERS):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.max_dir_bytes = max_dir_bytes
+        self.prefetch_workers = prefetch_workers
+        self.current_bytes = 0
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._in_flight = set()
+        # Bytes written to cache_dir since it was last pruned, the first write
+        # prunes it as other processes may have filled it already.
+        self._written_bytes = max_dir_bytes
+        self._pruning = False
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+        if self.cache_dir:
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                value = pickle.loads(data)
+            except FileNotFoundError:
+                return default
+            except Exception:
+                log.exception("Failed to read genome tile cache entry [%s]", path)
+                return default
+            if self.max_dir_bytes:
+                # Files are pruned by modification time, mark this one as recently used
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+            self._add(key, value, len(data))
+            return value
+        return default
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._entries:
+                return True
+        return bool(self.cache_dir) and os.path.exists(self._path(key))
+
+    def put(self, key, value):
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            log.debug("Not caching unpicklable genome data provider result", exc_info=True)
+            return
+        self._add(key, value, len(data))
+        if self.cache_dir and self._write(key, data) and self.max_dir_bytes:
+            with self._lock:
+                self._written_bytes += len(data)
+                if self._pruning or self._written_bytes < self.max_dir_bytes * DIR_PRUNE_INTERVAL:
+                    return
+                self._pruning = True
+                self._written_bytes = 0
+                executor = self._get_executor()
+            executor.submit(self._prune_dir)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def prefetch(self, key, compute):
+        """
+        Compute ``compute()`` in the background and cache it as ``key``, unless
+        the key is cached or being computed already.
+        """
+        with self._lock:
+            if key in self._entries or key in self._in_flight:
+                return None
+            self._in_flight.add(key)
+            executor = self._get_executor()
+        return executor.submit(self._prefetch, key, compute)
+
+    def prune_dir(self):
+        """
+        Remove the least recently used files of ``cache_dir`` until it holds at
+        most ``DIR_PRUNE_TARGET`` of ``max_dir_bytes``, if it holds more than
+        ``max_dir_bytes``.
+        """
+        try:
+            files = []
+            total = 0
+            for directory, _, file_names in os.walk(self.cache_dir):
+                for file_name in file_names:
+                    if not file_name.endswith('.pickle'):
+                        # Entries still being written
+                        continue
+                    path = os.path.join(directory, file_name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        # Removed by another process
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+            if total <= self.max_dir_bytes:
+                return
+            target = self.max_dir_bytes * DIR_PRUNE_TARGET
+            for _, size, path in sorted(files):
+                if total <= target:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    log.exception("Failed to remove genome tile cache entry [%s]", path)
+                    continue
+                total -= size
+        finally:
+            with self._lock:
+                self._pruning = False
+
+    def _get_executor(self):
+        # Called with the lock held
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.prefetch_workers, thread_name_prefix="genome-tile-prefetch")
+        return self._executor
+
+    def _prune_dir(self):
+        try:
+            self.prune_dir()
+        except Exception:
+            log.exception("Failed to prune genome tile cache directory [%s]", self.cache_dir)
+
+    def _prefetch(self, key, compute):
+        try:
+            if key not in self:
+                value = compute()
+                if value is not None:
+                    self.put(key, value)
+        except Exception:
+            log.exception("Failed to prefetch genome data")
+        finally:
+            with self._lock:
+                self._in_flight.discard(key)
+
+    def _add(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pickle")
+
+    def _write(self, key, data):
+        path = self._path(key)
+        try:
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=directory, delete=False) as f:
+                f.write(data)
+            os.replace(f.name, path)
+            return True
+        except OSError:
+            log.exception("Failed to write genome tile cache entry [%s]", path)
+            return False
+
+
+def tile_cache_from_config(config):
+    """Return the GenomeTileCache configured for Galaxy or None if disabled."""
+    size = getattr(config, 'genome_tile_cache_size', 0)
+    if not size:
+        return None
+    return GenomeTileCache(
+        int(size) * 1024 * 1024,
+        cache_dir=getattr(config, 'genome_tile_cache_dir', None),
+        max_dir_bytes=int(getattr(config, 'genome_tile_cache_dir_size', 0) or 0) * 1024 * 1024,
+    )
+
+
+def dataset_key(dataset):
+    """
+    Identify the content of ``dataset``, cached results of a dataset whose file
+    is replaced are not used anymore.
+    """
+    if dataset is None:
+        return None
+    try:
+        stat = os.stat(dataset.file_name)
+        return [dataset.id, stat.st_size, stat.st_mtime_ns]
+    except Exception:
+        return [dataset.id]
+
+
+def provider_key(provider):
+    return [
+        provider.__class__.__name__,
+        dataset_key(provider.original_dataset),
+        dataset_key(provider.converted_dataset),
+    ]
+
+
+def cache_key(*parts):
+    document = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(document.encode()).hexdigest()
+
+
+# Metadata values copied for prefetching, others (e.g. metadata files) are ORM objects
+PLAIN_METADATA_TYPES = (str, int, float, bool, list, tuple, dict, type(None))
+
+
+class DatasetFiles:
+    """
+    Plain values of a dataset that genome data providers read data with (the
+    dataset's id, file and metadata), so that a provider can read data on a
+    prefetch thread without touching the request's ORM objects and session.
+    """
+
+    def __init__(self, dataset):
+        self.id = dataset.id
+        self.file_name = dataset.file_name
+        self.ext = dataset.ext
+        self.datatype = dataset.datatype
+        metadata = {}
+        for name in dataset.metadata.spec.keys():
+            value = getattr(dataset.metadata, name)
+            if isinstance(value, PLAIN_METADATA_TYPES):
+                metadata[name] = value
+        self.metadata = Bunch(**metadata)
+
+
+def prefetch_provider(provider):
+    """
+    Return a copy of ``provider`` that reads data from :class:`DatasetFiles`
+    of its datasets, to compute results on a prefetch thread with.
+    """
+    prefetch_copy = copy.copy(provider)
+    for attribute in ('original_dataset', 'converted_dataset'):
+        dataset = getattr(provider, attribute, None)
+        setattr(prefetch_copy, attribute, dataset and DatasetFiles(dataset))
+    dependencies = getattr(provider, 'dependencies', None)
+    if dependencies:
+        prefetch_copy.dependencies = {name: DatasetFiles(dataset) for name, dataset in dependencies.items()}
+    return prefetch_copy
+
+
+def tile_cached(get_data):
+    """
+    Cache the results of a genome data provider's ``get_data(chrom, low, high, ...)``
+    in the provider's ``tile_cache`` (if set) and prefetch the regions of the
+    same size to the left and to the right of the requested region.
+
+    Only calls passing the region positionally are cached. Keyword arguments
+    starting with an underscore (like jQuery's ``_`` cache buster) are not
+    part of the key.
+    """
+
+    @functools.wraps(get_data)
+    def wrapper(self, *args, **kwargs):
+        cache = getattr(self, 'tile_cache', None)
+        if cache is None or len(args) < 3 or None in args[:3]:
+            return get_data(self, *args, **kwargs)
+        chrom, low, high, args = args[0], int(args[1]), int(args[2]), args[3:]
+        base_key = provider_key(self)
+        filters = {k: v for k, v in kwargs.items() if not k.startswith('_')}
+
+        def key_for(low, high):
+            return cache_key(base_key, chrom, low, high, args, filters)
+
+        key = key_for(low, high)
+        result = cache.get(key)
+        if result is None:
+            result = get_data(self, chrom, low, high, *args, **kwargs)
+            if result is None:
+                return result
+            cache.put(key, result)
+            size = high - low
+            if self.tile_prefetch and 'stats' not in kwargs and size > 0:
+                # Neighbouring regions are computed on another thread by a
+                # copy of the provider that doesn't hold the request's ORM
+                # objects, only the files and metadata of its datasets.
+                provider = None
+                for neighbour_low in (low - size, high):
+                    if neighbour_low < 0:
+                        continue
+                    neighbour_high = neighbour_low + size
+                    neighbour_key = key_for(neighbour_low, neighbour_high)
+                    if neighbour_key in cache:
+                        continue
+                    if provider is None:
+                        provider = prefetch_provider(self)
+                    cache.prefetch(
+                        neighbour_key,
+                        functools.partial(get_data, provider, chrom, neighbour_low, neighbour_high, *args, **kwargs)
+                    )
+        if isinstance(result, dict):
+            # Callers update results with extra information
+            result = dict(result)
+        return result
+
+    return wrapper
+
+
+class SummarizedData:
+    """
+    Summary of ``size`` intervals with the attributes of the summaries
+    returned by bx-python's ``BBIFile.summarize``.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.valid_count = numpy.zeros(size, dtype=numpy.float64)
+        self.sum_data = numpy.zeros(size, dtype=numpy.float64)
+        self.sum_squares = numpy.zeros(size, dtype=numpy.float64)
+        self.min_val = numpy.full(size, numpy.inf)
+        self.max_val = numpy.full(size, -numpy.inf)
+
+
+class SummaryPyramid:
+    """
+    Summaries of the interval ``[0, span)`` of a chromosome at several zoom
+    levels. The finest level has ``SUMMARY_BINS`` bins, each coarser level
+    ``SUMMARY_LEVEL_FACTOR`` times fewer.
+    """
+
+    bins = SUMMARY_BINS
+
+    def __init__(self, span, summary):
+        self.span = span
+        valid_count = numpy.asarray(summary.valid_count, dtype=numpy.float64)
+        empty = valid_count == 0
+        level = (
+            valid_count,
+            numpy.asarray(summary.sum_data, dtype=numpy.float64),
+            numpy.asarray(summary.sum_squares, dtype=numpy.float64),
+            numpy.where(empty, numpy.inf, summary.min_val),
+            numpy.where(empty, -numpy.inf, summary.max_val),
+        )
+        self.levels = [level]
+        while len(level[0]) // SUMMARY_LEVEL_FACTOR >= SUMMARY_MIN_LEVEL_BINS:
+            shape = (-1, SUMMARY_LEVEL_FACTOR)
+            level = (
+                level[0].reshape(shape).sum(axis=1),
+                level[1].reshape(shape).sum(axis=1),
+                level[2].reshape(shape).sum(axis=1),
+                level[3].reshape(shape).min(axis=1),
+                level[4].reshape(shape).max(axis=1),
+            )
+            self.levels.append(level)
+
+    @staticmethod
+    def span_for(end):
+        """Return the span of the pyramid covering ``[0, end)``."""
+        span = SUMMARY_BINS
+        while span < end:
+            span *= 2
+        return span
+
+    @staticmethod
+    def min_step(span):
+        """Return the smallest interval size summarized by a pyramid of ``span``."""
+        return SUMMARY_MIN_BINS_PER_POINT * (span // SUMMARY_BINS)
+
+    def bin_size(self, level_index=0):
+        return self.span // len(self.levels[level_index][0])
+
+    def can_summarize(self, start, end, num_points):
+        return 0 <= start < end <= self.span and (end - start) / num_points >= self.min_step(self.span)
+
+    def summarize(self, start, end, num_points):
+        """
+        Summarize ``[start, end)`` in ``num_points`` intervals of equal size
+        using the coarsest level with enough bins per interval. Returns None if
+        the pyramid is too coarse for the request.
+        """
+        if not self.can_summarize(start, end, num_points):
+            return None
+        step = (end - start) / num_points
+        level_index = 0
+        while level_index + 1 < len(self.levels) and step >= SUMMARY_MIN_BINS_PER_POINT * self.bin_size(level_index + 1):
+            level_index += 1
+        valid_count, sum_data, sum_squares, min_val, max_val = self.levels[level_index]
+        bin_size = self.bin_size(level_index)
+        edges = (start + step * numpy.arange(num_points + 1)) / bin_size
+        positions = numpy.arange(len(valid_count) + 1)
+
+        result = SummarizedData(num_points)
+        for values, attribute in ((valid_count, 'valid_count'), (sum_data, 'sum_data'), (sum_squares, 'sum_squares')):
+            cumulative = numpy.concatenate(([0.0], numpy.cumsum(values)))
+            setattr(result, attribute, numpy.diff(numpy.interp(edges, positions, cumulative)))
+        # Extremes of all bins overlapping an interval
+        first_bins = numpy.minimum(numpy.floor(edges[:-1]).astype(numpy.int64), len(valid_count) - 1)
+        last_bin = int(numpy.ceil(edges[-1]))
+        result.min_val = numpy.minimum.reduceat(min_val[:last_bin], first_bins)
+        result.max_val = numpy.maximum.reduceat(max_val[:last_bin], first_bins)
+        return result
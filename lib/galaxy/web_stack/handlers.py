@@ -89,6 +89,9 @@ class ConfiguresHandlers:
             ready_window_size_str = config_element.attrib.get("ready_window_size", None)
             if ready_window_size_str:
                 handling_config_dict["ready_window_size"] = int(ready_window_size_str)
+            ready_full_scan_interval_str = config_element.attrib.get("ready_full_scan_interval", None)
+            if ready_full_scan_interval_str:
+                handling_config_dict["ready_full_scan_interval"] = int(ready_full_scan_interval_str)
 
         return handling_config_dict
 
@@ -32,6 +32,9 @@ from . import BaseGalaxyAPIController, depends
 
 log = logging.getLogger(__name__)
 
+# Dataproviders that can stream their data as JSON lines or Arrow IPC
+STREAMING_DATAPROVIDERS = ('column-block', 'dict-block')
+
 
 class DatasetsController(BaseGalaxyAPIController, UsesVisualizationMixin):
     history_manager: HistoryManager = depends(HistoryManager)
@@ -402,6 +405,37 @@ class DatasetsController(BaseGalaxyAPIController, UsesVisualizationMixin):
 
         return data
 
+    @web.legacy_expose_api_raw_anonymous
+    def stream_raw_data(self, trans, dataset_id, hda_ldda='hda', provider='column-block', format='jsonl', **kwd):
+        """
+        GET /api/datasets/{dataset_id}/raw_data
+        Streams the rows of a tabular dataset provided by a block dataprovider
+        (``column-block`` or ``dict-block``) as JSON lines (``format=jsonl``)
+        or as an Arrow IPC stream (``format=arrow``, requires pyarrow).
+
+        Takes the same provider parameters (``indeces``, ``filters``,
+        ``limit``, ``offset``, ...) as ``GET /api/datasets/{dataset_id}``
+        with ``data_type=raw_data``.
+        """
+        dataset = self.get_hda_or_ldda(trans, hda_ldda=hda_ldda, dataset_id=dataset_id)
+        msg = self.hda_manager.data_conversion_status(dataset)
+        if msg:
+            raise galaxy_exceptions.RequestParameterInvalidException(f"Dataset cannot provide data: {msg}")
+        if provider not in STREAMING_DATAPROVIDERS or not dataset.datatype.has_dataprovider(provider):
+            raise dataproviders.exceptions.NoProviderAvailable(dataset.datatype, provider)
+        if format not in ('jsonl', 'arrow'):
+            raise galaxy_exceptions.RequestParameterInvalidException(f"Unknown format: {format}")
+        if format == 'arrow' and not dataproviders.column.ARROW_AVAILABLE:
+            raise galaxy_exceptions.NotImplemented("Providing data as Arrow IPC stream requires the pyarrow package")
+
+        kwd = dataset.datatype.dataproviders[provider].parse_query_string_settings(kwd)
+        data_provider = dataset.datatype.dataprovider(dataset, provider, **kwd)
+        if format == 'arrow':
+            trans.response.set_content_type('application/vnd.apache.arrow.stream')
+            return data_provider.arrow_ipc()
+        trans.response.set_content_type('application/x-ndjson')
+        return data_provider.json_lines()
+
     @web.legacy_expose_api_anonymous
     def extra_files(self, trans, history_content_id, history_id, **kwd):
         """
@@ -1,6 +1,7 @@
 """
 API operations on the contents of a history.
 """
+import base64
 import datetime
 import json
 import logging
@@ -108,6 +109,14 @@ AnyJobStateSummary = Union[
 
 class HistoryContentsFilterQueryParams(FilterQueryParams):
     order: Optional[str] = OrderParamField(default_order="hid-asc")
+    after: Optional[str] = Field(
+        default=None,
+        title="After",
+        description=(
+            "Use keyset pagination instead of `offset`: the `next_cursor` header of the previous page "
+            "or an empty value for the first page. Only `hid` and `update_time` orders are supported."
+        ),
+    )
 
 
 HistoryContentFilter = List[Any]  # Lists with [attribute:str, operator:str, value:Any]
@@ -296,6 +305,7 @@ class HistoriesContentsService(ServiceBase):
         hda_serializer: hdas.HDASerializer,
         hda_deserializer: hdas.HDADeserializer,
         hdca_serializer: hdcas.HDCASerializer,
+        history_contents_serializer: history_contents.HistoryContentsSerializer,
         history_contents_filters: history_contents.HistoryContentsFilters,
     ):
         super().__init__(security)
@@ -308,6 +318,7 @@ class HistoriesContentsService(ServiceBase):
         self.hda_serializer = hda_serializer
         self.hda_deserializer = hda_deserializer
         self.hdca_serializer = hdca_serializer
+        self.history_contents_serializer = history_contents_serializer
         self.history_contents_filters = history_contents_filters
 
     def index(
@@ -829,6 +840,113 @@ class HistoriesContentsService(ServiceBase):
 
         return json.dumps(contents)
 
+    def changes(
+        self, trans,
+        history_id: EncodedDatabaseIdField,
+        serialization_params: SerializationParams,
+        filter_query_params: HistoryContentsFilterQueryParams,
+        since: Optional[datetime.datetime] = None,
+    ):
+        """
+        Return the contents of the history, deleted and hidden ones included, in
+        the order they were last updated, starting after the `after` cursor
+        (the `next_cursor` header of the previous response) or at `since`.
+
+        Polling clients pass back `next_cursor` to only get the contents updated
+        since the previous request, `has_more` tells whether to poll right away.
+        """
+        history = self._get_history(trans, history_id)
+        filters = self.history_contents_filters.parse_query_filters(filter_query_params)
+        if since:
+            # see contents_near
+            since_date = since.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+            if not filter_query_params.after and history.update_time <= since_date:
+                trans.response.status = 204
+                return
+            filters += self.history_contents_filters.parse_filters([['update_time', 'ge', since_date.isoformat()]])
+        return self._contents_page(
+            trans, history, filters, 'update_time-asc', filter_query_params.after,
+            filter_query_params.limit, serialization_params,
+        )
+
+    def _contents_page(
+        self, trans,
+        history: History,
+        filters,
+        order: str,
+        cursor: Optional[str],
+        limit: Optional[int],
+        serialization_params: SerializationParams,
+        dataset_details: Optional[DatasetDetailsType] = None,
+    ):
+        """
+        Return the serialized page of contents following `cursor` in the keyset `order`
+        and put the cursor of the page and whether more contents follow in the headers.
+
+        Contents are serialized from the columns of the union query, without loading
+        the HDAs and HDCAs, when only keys of these columns are requested.
+        """
+        order = '-'.join(self._parse_keyset_order(order))
+        project = (
+            not dataset_details
+            and self.history_contents_serializer.can_project(serialization_params.get('view'), serialization_params.get('keys'))
+            and all(f.filter_type != 'function' for f in filters)
+        )
+        page = self.history_contents_manager.contents_page(
+            history,
+            order=order,
+            after=self._decode_contents_cursor(order, cursor),
+            filters=filters,
+            limit=limit,
+            expand_models=not project,
+            serialization_params=serialization_params,
+        )
+        if project:
+            contents = [
+                self.history_contents_serializer.serialize_to_view(row, user=trans.user, trans=trans, **serialization_params)
+                for row in page.contents
+            ]
+        else:
+            contents = [
+                self._serialize_content_item(
+                    trans, content,
+                    dataset_details=dataset_details,
+                    serialization_params=dict(serialization_params),
+                )
+                for content in page.contents
+            ]
+        if page.after is not None:
+            trans.response.headers['next_cursor'] = self._encode_contents_cursor(order, page.after)
+        trans.response.headers['has_more'] = json.dumps(page.has_more)
+        return contents
+
+    def _parse_keyset_order(self, order: str):
+        column_name, descending = self.history_contents_manager.parse_keyset_order(order)
+        return column_name, 'dsc' if descending else 'asc'
+
+    def _encode_contents_cursor(self, order: str, keyset) -> str:
+        value, content_type, content_id = keyset
+        if isinstance(value, datetime.datetime):
+            value = value.isoformat()
+        cursor = json.dumps([order, value, content_type, self.encode_id(content_id)])
+        return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+    def _decode_contents_cursor(self, order: str, cursor: Optional[str]):
+        if not cursor:
+            return None
+        try:
+            cursor_order, value, content_type, content_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            column_name, _ = self._parse_keyset_order(cursor_order)
+            if column_name == 'update_time':
+                value = dateutil.parser.isoparse(value)
+        except Exception:
+            raise exceptions.RequestParameterInvalidException('Invalid contents cursor', cursor=cursor)
+        if cursor_order != order:
+            raise exceptions.RequestParameterInvalidException(
+                f"The cursor is for the order [{cursor_order}], not for [{order}]", cursor=cursor
+            )
+        return value, content_type, self.decode_id(content_id)
+
     def _hid_greater_than(self, hid: int) -> HistoryContentsFilterList:
         return [["hid", "gt", hid]]
 
@@ -1005,6 +1123,13 @@ class HistoriesContentsService(ServiceBase):
         # TODO: remove 'dataset_details' and the following section when the UI doesn't need it
         parsed_legacy_params = self._parse_legacy_contents_params(legacy_params)
 
+        if filter_query_params.after is not None:
+            return self._contents_page(
+                trans, history, filters, filter_query_params.order, filter_query_params.after,
+                filter_query_params.limit, serialization_params,
+                dataset_details=parsed_legacy_params.get("dataset_details"),
+            )
+
         contents = self.history_contents_manager.contents(
             history,
             filters=filters,
@@ -1780,6 +1905,32 @@ class HistoryContentsController(BaseGalaxyAPIController, UsesLibraryMixinItems,
             trans, history_id, serialization_params, filter_params, hid, limit, since,
         )
 
+    @expose_api_anonymous
+    def changes(self, trans, history_id, **kwd):
+        """
+        GET /api/histories/{history_id}/contents/changes
+
+        Return the contents of the history, deleted and hidden ones included, in
+        the order they were last updated. Pass the `next_cursor` header of the
+        previous response as `after` to only get the contents updated since,
+        the `has_more` header tells whether more contents follow.
+
+        :type   since:  str
+        :param  since:  (optional) ISO 8601 date, only return the contents
+                        updated at or after it if `after` isn't given
+        :param  after:  (optional) the `next_cursor` header of the previous response
+        :param  limit:  (optional) the maximum number of contents to return
+
+        Contents can be filtered with `q`/`qv` and serialized with `view`/`keys`,
+        as with `GET /api/histories/{history_id}/contents?v=dev`.
+        """
+        serialization_params = parse_serialization_params(**kwd)
+        filter_parameters = HistoryContentsFilterQueryParams(**kwd)
+        since = kwd.get('since', None)
+        if since:
+            since = dateutil.parser.isoparse(since)
+        return self.service.changes(trans, history_id, serialization_params, filter_parameters, since)
+
     # Parsing query string according to REST standards.
     def _parse_rest_params(self, qdict: Dict[str, Any]) -> HistoryContentsFilterList:
         DEFAULT_OP = 'eq'
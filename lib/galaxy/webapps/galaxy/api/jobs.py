@@ -4,6 +4,7 @@ API operations on a jobs.
 .. seealso:: :class:`galaxy.model.Jobs`
 """
 
+import datetime
 import logging
 import typing
 
@@ -27,6 +28,7 @@ from galaxy.managers.jobs import (
     summarize_job_parameters,
     view_show_job,
 )
+from galaxy.model.job_metrics import summarize_job_metric_rollups
 from galaxy.schema.fields import EncodedDatabaseIdField
 from galaxy.web import (
     expose_api,
@@ -355,6 +357,68 @@ class JobController(BaseGalaxyAPIController, UsesVisualizationMixin):
         job = self.__get_job(trans, **kwd)
         return summarize_job_metrics(trans, job)
 
+    @require_admin
+    @expose_api
+    def metric_rollups(self, trans: ProvidesUserContext, metric='core:runtime_seconds', group_by='tool_id', **kwd):
+        """
+        * GET /api/job_metric_rollups
+            Return the number of jobs and the mean, minimum, maximum and
+            percentiles of a numeric job metric, computed from the rollups
+            recorded when jobs finish (see ``job_metric_rollups`` in galaxy.yml).
+
+        :type   metric: string
+        :param  metric: rolled up metric as ``<plugin>:<metric_name>``, defaults to ``core:runtime_seconds``
+
+        :type   group_by: string
+        :param  group_by: comma separated columns to summarize by, any of ``day``,
+                          ``tool_id``, ``tool_version`` and ``destination_id``. Defaults to ``tool_id``.
+
+        :type   tool_id: string
+        :param  tool_id: limit the summary to jobs of this tool
+
+        :type   tool_version: string
+        :param  tool_version: limit the summary to jobs of this tool version
+
+        :type   destination_id: string
+        :param  destination_id: limit the summary to jobs run on this destination
+
+        :type   date_range_min: string '2014-01-01'
+        :param  date_range_min: limit the summary to jobs that finished on or after this date
+
+        :type   date_range_max: string '2014-12-31'
+        :param  date_range_max: limit the summary to jobs that finished on or before this date
+
+        :rtype:     list
+        :returns:   list of dictionaries with the group_by columns, ``count``, ``mean``,
+                    ``minimum``, ``maximum`` and ``percentiles`` (50, 90, 95 and 99)
+        """
+        plugin, _, metric_name = metric.partition(':')
+        if not plugin or not metric_name:
+            raise exceptions.RequestParameterInvalidException(f"metric parameter '{metric}' is not of the form <plugin>:<metric_name>")
+        try:
+            start_day, end_day = (datetime.date.fromisoformat(kwd[key]) if kwd.get(key) else None
+                                  for key in ('date_range_min', 'date_range_max'))
+        except ValueError as e:
+            raise exceptions.RequestParameterInvalidException(f"Invalid date range: {e}")
+        try:
+            summaries = summarize_job_metric_rollups(
+                trans.sa_session,
+                plugin,
+                metric_name,
+                group_by=util.listify(group_by, do_strip=True),
+                tool_id=kwd.get('tool_id'),
+                tool_version=kwd.get('tool_version'),
+                destination_id=kwd.get('destination_id'),
+                start_day=start_day,
+                end_day=end_day,
+            )
+        except ValueError as e:
+            raise exceptions.RequestParameterInvalidException(str(e))
+        for summary in summaries:
+            if 'day' in summary:
+                summary['day'] = summary['day'].isoformat()
+        return summaries
+
     @require_admin
     @expose_api
     def destination_params(self, trans: ProvidesUserContext, **kwd):
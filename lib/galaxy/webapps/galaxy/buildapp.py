@@ -254,6 +254,12 @@ def populate_api_routes(webapp, app):
                            controller='history_contents',
                            path_prefix='/api/histories/{history_id}/contents',
                            parent_resources=dict(member_name='history', collection_name='histories'))
+    # Before the legacy access below, that would match 'changes' as an HDA id
+    webapp.mapper.connect("history_contents_changes",
+                          "/api/histories/{history_id}/contents/changes",
+                          controller='history_contents',
+                          action='changes',
+                          conditions=dict(method=["GET"]))
     # Legacy access to HDA details via histories/{history_id}/contents/{hda_id}
     webapp.mapper.resource('content',
                            'contents',
@@ -291,6 +297,11 @@ def populate_api_routes(webapp, app):
                           controller="datasets",
                           action="get_content_as_text",
                           conditions=dict(method=["GET"]))
+    webapp.mapper.connect("dataset_raw_data",
+                          "/api/datasets/{dataset_id}/raw_data",
+                          controller="datasets",
+                          action="stream_raw_data",
+                          conditions=dict(method=["GET"]))
     webapp.mapper.connect('dataset_storage',
                           '/api/datasets/{dataset_id}/storage',
                           controller='datasets',
@@ -1059,6 +1070,7 @@ def populate_api_routes(webapp, app):
     webapp.mapper.connect('destination_params', '/api/jobs/{job_id}/destination_params', controller='jobs', action='destination_params', conditions=dict(method=['GET']))
     webapp.mapper.connect('show_job_lock', '/api/job_lock', controller='jobs', action='show_job_lock', conditions=dict(method=['GET']))
     webapp.mapper.connect('update_job_lock', '/api/job_lock', controller='jobs', action='update_job_lock', conditions=dict(method=['PUT']))
+    webapp.mapper.connect('job_metric_rollups', '/api/job_metric_rollups', controller='jobs', action='metric_rollups', conditions=dict(method=['GET']))
     webapp.mapper.connect('dataset_metrics', '/api/datasets/{dataset_id}/metrics', controller='jobs', action='metrics', conditions=dict(method=['GET']))
     webapp.mapper.connect('parameters_display', '/api/jobs/{job_id}/parameters_display', controller='jobs', action='parameters_display', conditions=dict(method=['GET']))
     webapp.mapper.connect('dataset_parameters_display', '/api/datasets/{dataset_id}/parameters_display', controller='jobs', action='parameters_display', conditions=dict(method=['GET']))
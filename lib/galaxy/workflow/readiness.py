@@ -0,0 +1,150 @@
+"""
+Wakeup tracking of active workflow invocations for the workflow request monitor.
+
+Rather than attempting to schedule every active invocation on every monitor
+iteration, the monitor can record which jobs an invocation is waiting on after
+scheduling it and only attempt to schedule it again once one of these jobs
+finished. Jobs finished by this process wake invocations immediately, jobs
+finished by other processes are found by polling the states of all waited on
+jobs with a single query per iteration. Invocations that aren't waiting on any
+job (e.g. waiting on a subworkflow or a paused step) are attempted on every
+iteration as before, invocations that have been waiting for longer than the
+full scan interval are attempted again regardless of their jobs.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from galaxy.util.custom_logging import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_FULL_SCAN_INTERVAL = 60
+
+
+class SchedulingCounters:
+    """Running totals of scheduling attempts and wakeup latencies."""
+
+    def __init__(self):
+        self.attempts = 0
+        self.skipped = 0
+        self.wakeups = 0
+        self.latency_count = 0
+        self.latency_time = 0.0
+        self.latency_max = 0.0
+
+    def record_attempts(self, attempted, skipped):
+        self.attempts += attempted
+        self.skipped += skipped
+
+    def record_latency(self, latency):
+        self.latency_count += 1
+        self.latency_time += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    def to_dict(self):
+        return {
+            'attempts': self.attempts,
+            'skipped': self.skipped,
+            'wakeups': self.wakeups,
+            'latency_count': self.latency_count,
+            'latency_mean_time': self.latency_time / self.latency_count if self.latency_count else 0.0,
+            'latency_max_time': self.latency_max,
+        }
+
+    def __str__(self):
+        return "attempts: {attempts}, skipped: {skipped}, wakeups: {wakeups}, job finished to step scheduled latency: {latency_mean_time:0.3f}s avg, {latency_max_time:0.3f}s max".format(**self.to_dict())
+
+
+class InvocationWakeupTracker:
+    """
+    Tracks the jobs parked workflow invocations are waiting on.
+
+    ``jobs_finished`` may be called from any thread (e.g. runner worker
+    threads finishing jobs), all other methods are meant to be called from the
+    monitor thread.
+    """
+
+    def __init__(self, full_scan_interval=DEFAULT_FULL_SCAN_INTERVAL):
+        self.full_scan_interval = full_scan_interval
+        self.counters = SchedulingCounters()
+        self._lock = threading.Lock()
+        # invocation id -> (time parked, set of job ids the invocation waits on)
+        self._parked = {}
+        # job id -> set of invocation ids waiting on that job
+        self._waiters = defaultdict(set)
+        # invocation id -> time the first job it was waiting on finished
+        self._woken = {}
+
+    def park(self, invocation_id, job_ids, now=None):
+        """Don't attempt ``invocation_id`` again until one of ``job_ids`` finished."""
+        now = time.time() if now is None else now
+        job_ids = set(job_ids)
+        with self._lock:
+            self._unpark(invocation_id)
+            self._parked[invocation_id] = (now, job_ids)
+            for job_id in job_ids:
+                self._waiters[job_id].add(invocation_id)
+
+    def _unpark(self, invocation_id):
+        _, job_ids = self._parked.pop(invocation_id, (None, ()))
+        for job_id in job_ids:
+            waiters = self._waiters.get(job_id)
+            if waiters is not None:
+                waiters.discard(invocation_id)
+                if not waiters:
+                    del self._waiters[job_id]
+
+    def jobs_finished(self, job_ids, finish_time=None):
+        """Wake invocations waiting on any of ``job_ids``."""
+        finish_time = time.time() if finish_time is None else finish_time
+        with self._lock:
+            for job_id in job_ids:
+                for invocation_id in self._waiters.pop(job_id, ()):
+                    if invocation_id not in self._woken:
+                        self._woken[invocation_id] = finish_time
+                        self.counters.wakeups += 1
+
+    def waiting_job_ids(self):
+        with self._lock:
+            return list(self._waiters.keys())
+
+    def candidates(self, active_invocation_ids, now=None):
+        """
+        Return the ids of ``active_invocation_ids`` that should be attempted on
+        this iteration: invocations that are new to the tracker, were woken by
+        a finished job or have been parked for longer than the full scan
+        interval. Invocations that are no longer active are forgotten.
+        """
+        now = time.time() if now is None else now
+        candidates = []
+        with self._lock:
+            active = set(active_invocation_ids)
+            for invocation_id in [i for i in self._parked if i not in active]:
+                self._unpark(invocation_id)
+                self._woken.pop(invocation_id, None)
+            for invocation_id in active_invocation_ids:
+                parked = self._parked.get(invocation_id)
+                if parked is not None and parked[1] and invocation_id not in self._woken and now - parked[0] < self.full_scan_interval:
+                    continue
+                candidates.append(invocation_id)
+        self.counters.record_attempts(len(candidates), len(active_invocation_ids) - len(candidates))
+        return candidates
+
+    def scheduled(self, invocation_id, progressed, now=None):
+        """
+        Record that ``invocation_id`` was attempted, if new steps were
+        ``progressed`` the latency since its wakeup is recorded.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            woken_at = self._woken.pop(invocation_id, None)
+            if woken_at is not None and progressed:
+                latency = max(now - woken_at, 0.0)
+                self.counters.record_latency(latency)
+                return latency
+        return None
+
+    @property
+    def parked_invocation_count(self):
+        return len(self._parked)
@@ -1,4 +1,7 @@
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
 from functools import partial
 
 import galaxy.workflow.schedulers
@@ -13,6 +16,7 @@ from galaxy.util.custom_logging import get_logger
 from galaxy.util.monitors import Monitors
 from galaxy.web_stack.handlers import ConfiguresHandlers, HANDLER_ASSIGNMENT_METHODS
 from galaxy.web_stack.message import WorkflowSchedulingMessage
+from galaxy.workflow.readiness import InvocationWakeupTracker
 
 log = get_logger(__name__)
 
@@ -25,6 +29,9 @@ EXCEPTION_MESSAGE_NO_DEFAULT_SCHEDULER = "Failed to defined workflow schedulers
 EXCEPTION_MESSAGE_DUPLICATE_SCHEDULERS = "Failed to defined workflow schedulers - workflow scheduling plugin id '%s' duplicated."
 EXCEPTION_MESSAGE_SERIALIZE = "Parallelization is not desired but handler assignment methods are non-deterministic. Set DB_PREASSIGN in workflow_schedulers_conf.xml."
 
+# Number of waited on job ids to check the state of per query
+FINISHED_JOBS_POLL_CHUNK_SIZE = 1000
+
 
 class WorkflowSchedulingManager(ConfiguresHandlers):
     """ A workflow scheduling manager based loosely on pattern established by
@@ -147,6 +154,11 @@ class WorkflowSchedulingManager(ConfiguresHandlers):
         if exception:
             raise exception
 
+    def jobs_finished(self, job_ids):
+        """Wake workflow invocations waiting on ``job_ids`` in this process."""
+        if self.request_monitor and self.request_monitor.wakeup_tracker:
+            self.request_monitor.wakeup_tracker.jobs_finished(job_ids)
+
     def queue(self, workflow_invocation, request_params, flush=True):
         workflow_invocation.state = model.WorkflowInvocation.states.NEW
         workflow_invocation.scheduler = request_params.get("scheduler", None) or self.default_scheduler_id
@@ -270,6 +282,15 @@ class WorkflowRequestMonitor(Monitors):
         self.workflow_scheduling_manager = workflow_scheduling_manager
         self._init_monitor_thread(name="WorkflowRequestMonitor.monitor_thread", target=self.__monitor, config=app.config)
         self.invocation_grabber = None
+        self.wakeup_tracker = None
+        full_scan_interval = getattr(app.config, "workflow_scheduling_full_scan_interval", 0)
+        if full_scan_interval and full_scan_interval > 0:
+            self.wakeup_tracker = InvocationWakeupTracker(full_scan_interval=full_scan_interval)
+        self._last_counters_log = time.time()
+        self.executor = None
+        workers = getattr(app.config, "workflow_scheduling_workers", 1)
+        if workers and workers > 1:
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="WorkflowRequestMonitor.worker")
         self_handler_tags = set(self.app.job_config.self_handler_tags)
         self_handler_tags.add(self.workflow_scheduling_manager.default_handler_id)
         handler_assignment_method = ItemGrabber.get_grabbable_handler_assignment_method(self.workflow_scheduling_manager.handler_assignment_methods)
@@ -300,19 +321,47 @@ class WorkflowRequestMonitor(Monitors):
 
                     self.__schedule(workflow_scheduler_id, workflow_scheduler)
                 log.trace(monitor_step_timer.to_str())
+                self.__log_counters()
             except Exception:
                 log.exception('An exception occured scheduling while scheduling workflows')
             self._monitor_sleep(1)
 
     def __schedule(self, workflow_scheduler_id, workflow_scheduler):
         invocation_ids = self.__active_invocation_ids(workflow_scheduler_id)
+        if self.wakeup_tracker:
+            self.__poll_finished_jobs()
+            invocation_ids = self.wakeup_tracker.candidates(invocation_ids)
+        if self.executor:
+            # Invocations are independent of each other, schedule them in
+            # parallel and wait for all attempts before the next iteration.
+            futures = [self.executor.submit(self.__attempt_schedule, invocation_id, workflow_scheduler) for invocation_id in invocation_ids]
+            for future in futures:
+                future.result()
+            return
         for invocation_id in invocation_ids:
-            log.debug("Attempting to schedule workflow invocation [%s]", invocation_id)
             self.__attempt_schedule(invocation_id, workflow_scheduler)
             if not self.monitor_running:
                 return
 
+    def __poll_finished_jobs(self):
+        # Jobs finished by other processes don't notify this process, check
+        # the states of all jobs parked invocations are waiting on instead.
+        sa_session = self.app.model.context
+        job_ids = self.wakeup_tracker.waiting_job_ids()
+        for start in range(0, len(job_ids), FINISHED_JOBS_POLL_CHUNK_SIZE):
+            chunk = job_ids[start:start + FINISHED_JOBS_POLL_CHUNK_SIZE]
+            finished = sa_session.query(model.Job.id, model.Job.update_time).filter(
+                model.Job.id.in_(chunk),
+                model.Job.state.in_(model.Job.terminal_states),
+            ).all()
+            for job_id, update_time in finished:
+                finish_time = update_time.replace(tzinfo=timezone.utc).timestamp() if update_time else None
+                self.wakeup_tracker.jobs_finished([job_id], finish_time=finish_time)
+
     def __attempt_schedule(self, invocation_id, workflow_scheduler):
+        if not self.monitor_running:
+            return False
+        log.debug("Attempting to schedule workflow invocation [%s]", invocation_id)
         sa_session = self.app.model.context
         workflow_invocation = sa_session.query(model.WorkflowInvocation).get(invocation_id)
 
@@ -327,8 +376,11 @@ class WorkflowRequestMonitor(Monitors):
                 for i in workflow_invocation.history.workflow_invocations:
                     if i.active and i.id < workflow_invocation.id:
                         return False
+            step_states = self.__step_states(workflow_invocation)
             workflow_scheduler.schedule(workflow_invocation)
             log.debug("Workflow invocation [%s] scheduled", workflow_invocation.id)
+            if self.wakeup_tracker:
+                self.__park(sa_session, workflow_invocation, step_states)
         except Exception:
             # TODO: eventually fail this - or fail it right away?
             log.exception("Exception raised while attempting to schedule workflow request.")
@@ -339,17 +391,49 @@ class WorkflowRequestMonitor(Monitors):
         # A workflow was obtained and scheduled...
         return True
 
+    def __step_states(self, workflow_invocation):
+        if not self.wakeup_tracker:
+            return None
+        return [(step.workflow_step_id, step.state) for step in workflow_invocation.steps]
+
+    def __park(self, sa_session, workflow_invocation, step_states):
+        step_states_after = self.__step_states(workflow_invocation)
+        progressed = step_states_after != step_states
+        latency = self.wakeup_tracker.scheduled(workflow_invocation.id, progressed)
+        if latency is not None:
+            log.debug("Workflow invocation [%s] progressed %0.3f seconds after a job it was waiting on finished", workflow_invocation.id, latency)
+        if not workflow_invocation.active:
+            return
+        if progressed or any(state == model.WorkflowInvocationStep.states.READY for _, state in step_states_after):
+            # Steps were scheduled or are only partially scheduled (e.g. the
+            # maximum number of jobs per iteration was reached), try again on
+            # the next iteration.
+            job_ids = ()
+        else:
+            job_ids = model.WorkflowInvocation.poll_unfinished_job_ids(sa_session, workflow_invocation.id)
+        self.wakeup_tracker.park(workflow_invocation.id, job_ids)
+
+    def __log_counters(self):
+        if not self.wakeup_tracker:
+            return
+        now = time.time()
+        if now - self._last_counters_log >= self.wakeup_tracker.full_scan_interval:
+            self._last_counters_log = now
+            log.debug("Workflow scheduling wakeups (%d invocations parked): %s", self.wakeup_tracker.parked_invocation_count, self.wakeup_tracker.counters)
+
     def __active_invocation_ids(self, scheduler_id):
         sa_session = self.app.model.context
         handler = self.app.config.server_name
-        return model.WorkflowInvocation.poll_active_workflow_ids(
+        return [invocation_id for (invocation_id,) in model.WorkflowInvocation.poll_active_workflow_ids(
             sa_session,
             scheduler=scheduler_id,
             handler=handler,
-        )
+        )]
 
     def start(self):
         self.monitor_thread.start()
 
     def shutdown(self):
         self.shutdown_monitor()
+        if self.executor:
+            self.executor.shutdown(wait=True)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Record job cache fingerprints for successful jobs that finished before
+fingerprints were recorded, so the job cache finds them with an index lookup.
+Use ``--recompute`` to also refresh fingerprints recorded by an older
+fingerprint version.
+
+% python scripts/backfill_job_fingerprints.py -c config/galaxy.yml
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(1, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, 'lib')))
+
+import galaxy.config
+from galaxy.model.job_fingerprint import fingerprint_for_job
+from galaxy.util.script import app_properties_from_args, populate_config_args
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--tool-id', dest='tool_id', help='Only backfill jobs of this tool', default=None)
+parser.add_argument('--batch-size', dest='batch_size', type=int, help='Number of jobs to update per transaction', default=1000)
+parser.add_argument('--recompute', dest='recompute', help='Recompute existing fingerprints too', action='store_true', default=False)
+parser.add_argument('--dry-run', dest='dryrun', help='Dry run (compute fingerprints but do not save to database)', action='store_true', default=False)
+populate_config_args(parser)
+args = parser.parse_args()
+
+
+def init():
+    app_properties = app_properties_from_args(args)
+    config = galaxy.config.Configuration(**app_properties)
+    return galaxy.config.init_models_from_config(config)
+
+
+def backfill(model, sa_session):
+    Job = model.Job
+    last_id = 0
+    updated = 0
+    failed = 0
+    while True:
+        query = sa_session.query(Job).filter(
+            Job.id > last_id,
+            Job.state == Job.states.OK,
+            Job.copied_from_job_id.is_(None),
+        )
+        if not args.recompute:
+            query = query.filter(Job.fingerprint.is_(None))
+        if args.tool_id:
+            query = query.filter(Job.tool_id == args.tool_id)
+        jobs = query.order_by(Job.id).limit(args.batch_size).all()
+        if not jobs:
+            break
+        with sa_session.no_autoflush:
+            for job in jobs:
+                try:
+                    job.fingerprint = fingerprint_for_job(sa_session, job)
+                    updated += 1
+                except Exception as e:
+                    failed += 1
+                    print(f'Failed to compute fingerprint for job {job.id}: {e}')
+        last_id = jobs[-1].id
+        if not args.dryrun:
+            sa_session.flush()
+        sa_session.expunge_all()
+        print(f'Processed jobs up to id {last_id}, {updated} fingerprinted, {failed} failed')
+    return updated, failed
+
+
+if __name__ == '__main__':
+    print('Loading Galaxy model...')
+    model = init()
+    sa_session = model.context.current
+    updated, failed = backfill(model, sa_session)
+    action = 'would be' if args.dryrun else 'were'
+    print(f'{updated} jobs {action} fingerprinted, {failed} failed')
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Rebuild the job metric rollups (see ``job_metric_rollups`` in galaxy.yml) of
+the days before --before (today by default) from the stored job metrics, e.g.
+to roll up the metrics of jobs that finished before rollups were enabled.
+Rollups of these days are deleted and recomputed, so the script can be run
+again at any time. Jobs are assigned to the day they were last updated.
+
+% python scripts/rebuild_job_metric_rollups.py -c config/galaxy.yml
+"""
+import argparse
+import datetime
+import os
+import sys
+from collections import defaultdict
+
+sys.path.insert(1, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, 'lib')))
+
+from sqlalchemy import (
+    and_,
+    or_,
+    select,
+)
+
+import galaxy.config
+from galaxy.model.job_metrics import (
+    add_to_rollup,
+    metric_bin,
+    parse_rollup_metrics,
+    rollup_key,
+)
+from galaxy.util.script import app_properties_from_args, populate_config_args
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--before', help='Rebuild the rollups of the days before this date (YYYY-MM-DD), defaults to today', default=None)
+parser.add_argument('--metrics', help='Comma separated <plugin>:<metric_name> entries to roll up, defaults to job_metric_rollups of the Galaxy configuration', default=None)
+parser.add_argument('--batch-size', dest='batch_size', type=int, help='Number of metrics to read per query', default=10000)
+parser.add_argument('--dry-run', dest='dryrun', help='Dry run (compute rollups but do not save to database)', action='store_true', default=False)
+populate_config_args(parser)
+args = parser.parse_args()
+
+
+def init():
+    app_properties = app_properties_from_args(args)
+    config = galaxy.config.Configuration(**app_properties)
+    return config, galaxy.config.init_models_from_config(config)
+
+
+def rebuild(model, sa_session, rollup_metrics, before):
+    job = model.Job.table
+    metric = model.JobMetricNumeric.table
+    rollup = model.JobMetricRollup.table
+    metric_condition = or_(*(and_(metric.c.plugin == plugin, metric.c.metric_name == metric_name) for plugin, metric_name in rollup_metrics))
+    # key, bin -> [count, total, minimum, maximum]
+    bins = defaultdict(lambda: [0, 0, None, None])
+    last_id = 0
+    while True:
+        query = select([
+            metric.c.id, metric.c.plugin, metric.c.metric_name, metric.c.metric_value,
+            job.c.tool_id, job.c.tool_version, job.c.destination_id, job.c.update_time,
+        ]).select_from(metric.join(job, metric.c.job_id == job.c.id)).where(and_(
+            metric.c.id > last_id,
+            metric_condition,
+            job.c.update_time < before,
+        )).order_by(metric.c.id).limit(args.batch_size)
+        rows = sa_session.execute(query).fetchall()
+        if not rows:
+            break
+        for row in rows:
+            key = rollup_key(row, row.plugin, row.metric_name, day=row.update_time.date())
+            value = row.metric_value
+            summary = bins[(tuple(key.items()), metric_bin(value))]
+            summary[0] += 1
+            summary[1] += value
+            summary[2] = value if summary[2] is None else min(summary[2], value)
+            summary[3] = value if summary[3] is None else max(summary[3], value)
+        last_id = rows[-1].id
+        print(f'Read job metrics up to id {last_id}, {len(bins)} rollup bins')
+    if not args.dryrun:
+        sa_session.execute(rollup.delete().where(rollup.c.day < before.date()))
+        for (key, bin), (count, total, minimum, maximum) in bins.items():
+            add_to_rollup(sa_session, dict(key), bin, count, total, minimum, maximum)
+    return len(bins)
+
+
+if __name__ == '__main__':
+    print('Loading Galaxy model...')
+    config, model = init()
+    sa_session = model.context.current
+    rollup_metrics = parse_rollup_metrics(args.metrics if args.metrics is not None else config.job_metric_rollups)
+    if not rollup_metrics:
+        sys.exit('No job metrics to roll up')
+    before = datetime.datetime.combine(datetime.date.fromisoformat(args.before) if args.before else datetime.datetime.utcnow().date(), datetime.time())
+    written = rebuild(model, sa_session, rollup_metrics, before)
+    action = 'would be' if args.dryrun else 'were'
+    print(f'{written} rollup bins {action} written for the days before {before.date()}')
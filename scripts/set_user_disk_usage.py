@@ -17,6 +17,7 @@ parser = argparse.ArgumentParser()
 parser.add_argument('-u', '--username', dest='username', help='Username of user to update', default='all')
 parser.add_argument('-e', '--email', dest='email', help='Email address of user to update', default='all')
 parser.add_argument('--dry-run', dest='dryrun', help='Dry run (show changes but do not save to database)', action='store_true', default=False)
+parser.add_argument('--bulk', dest='bulk', help='When processing all users, recalculate disk usage for many users per query and only report users whose usage changed', action='store_true', default=False)
 populate_config_args(parser)
 args = parser.parse_args()
 
@@ -63,7 +64,15 @@ if __name__ == '__main__':
     model, object_store, engine = init()
     sa_session = model.context.current
 
-    if not args.username and not args.email:
+    if not args.username and not args.email and args.bulk:
+        drifted = model.User.reconcile_disk_usage(sa_session, dryrun=args.dryrun)
+        for user_id, current, new in drifted:
+            change = '+%s' % nice_size(new - current) if new > current else '-%s' % nice_size(current - new)
+            print('user', user_id, 'old usage:', nice_size(current), 'change:', change)
+        print('%i users changed' % len(drifted))
+        object_store.shutdown()
+        sys.exit(0)
+    elif not args.username and not args.email:
         user_count = sa_session.query(model.User).count()
         print('Processing %i users...' % user_count)
         for i, user in enumerate(sa_session.query(model.User).enable_eagerloads(False).yield_per(1000)):
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""Benchmark user disk usage calculation against the disk usage ledger.
+
+Compares recalculating the disk usage of users one query per user (as done by
+``set_user_disk_usage.py`` and the ``recalculate_user_disk_usage`` task) with
+the batched recalculation used for reconciliation, and with reading the
+incrementally maintained ``disk_usage`` column that quota checks use.
+
+% python test/manual/disk_usage_benchmark.py -c config/galaxy.yml --users 1000
+"""
+import os
+import sys
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib")]
+
+import galaxy.config  # noqa: I100,I202
+from galaxy.util.script import app_properties_from_args, populate_config_args
+
+DESCRIPTION = "Script to benchmark user disk usage calculation."
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--users", type=int, default=1000, help="number of users to calculate the disk usage of")
+    arg_parser.add_argument("--batch-size", type=int, default=1000)
+    populate_config_args(arg_parser)
+    args = arg_parser.parse_args(argv)
+
+    config = galaxy.config.Configuration(**app_properties_from_args(args))
+    model = galaxy.config.init_models_from_config(config)
+    sa_session = model.context.current
+    users = sa_session.query(model.User).enable_eagerloads(False).order_by(model.User.id).limit(args.users).all()
+    user_ids = [user.id for user in users]
+
+    start = time.time()
+    for user in users:
+        user.calculate_disk_usage()
+    _report("calculate per user", len(users), time.time() - start)
+
+    start = time.time()
+    drifted = model.User.reconcile_disk_usage(sa_session, user_ids=user_ids, dryrun=True, batch_size=args.batch_size)
+    _report("calculate batched", len(users), time.time() - start)
+    print(f"{len(drifted)} users with drifted disk usage")
+
+    start = time.time()
+    for user in users:
+        sa_session.refresh(user, ["disk_usage"])
+        user.get_disk_usage()
+    _report("read ledger", len(users), time.time() - start)
+
+
+def _report(name, count, elapsed):
+    print(f"{name}: {count} users in {elapsed:.2f}s ({count / elapsed if elapsed else 0:.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
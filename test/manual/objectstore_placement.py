@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""Benchmark the placement index of nested object stores.
+
+Places synthetic objects in a distributed object store with many disk
+backends, records their placement in a placement index and measures how long
+it takes to look them up again. For a sample of objects that are actually
+created on disk, locating them through the placement index is compared with
+probing every backend.
+
+% python test/manual/objectstore_placement.py --objects 1000000 --backends 40
+"""
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib")]
+
+from galaxy.objectstore import DistributedObjectStore  # noqa: I100,I202
+from galaxy.objectstore.placement import placement_key
+from galaxy.util.bunch import Bunch
+
+DESCRIPTION = "Script to benchmark object store placement lookups."
+BATCH_SIZE = 10000
+
+
+class SyntheticDataset:
+
+    def __init__(self, id):
+        self.id = id
+        self.object_store_id = None
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--objects", type=int, default=1000000)
+    arg_parser.add_argument("--backends", type=int, default=40)
+    arg_parser.add_argument("--sample", type=int, default=1000, help="number of objects created on disk to compare with probing backends")
+    arg_parser.add_argument("--directory", default=None, help="directory for backends and index, defaults to a temporary directory")
+    args = arg_parser.parse_args(argv)
+    # Locating objects without an object_store_id logs a warning per object
+    logging.basicConfig(level=logging.ERROR)
+
+    directory = args.directory or tempfile.mkdtemp()
+    try:
+        _run(args, directory)
+    finally:
+        if not args.directory:
+            shutil.rmtree(directory)
+
+
+def _build_store(directory, backend_count, placement_index=None):
+    config = Bunch(
+        object_store_check_old_style=False,
+        jobs_directory=os.path.join(directory, "jobs"),
+        new_file_path=os.path.join(directory, "tmp"),
+        umask=0o077,
+        gid=None,
+        file_path=os.path.join(directory, "files"),
+        object_store_cache_path=os.path.join(directory, "cache"),
+        object_store_store_by="id",
+    )
+    backends = []
+    for i in range(backend_count):
+        backends.append({
+            "id": f"files{i}",
+            "type": "disk",
+            "weight": 1 + i % 3,
+            "files_dir": os.path.join(directory, f"files{i}"),
+        })
+    config_dict = {"backends": backends}
+    if placement_index:
+        config_dict["placement_index"] = placement_index
+    return DistributedObjectStore(config, config_dict)
+
+
+def _run(args, directory):
+    store = _build_store(directory, args.backends, placement_index=os.path.join(directory, "placement.sqlite"))
+    index = store.placement_index
+
+    start = time.time()
+    for batch_start in range(0, args.objects, BATCH_SIZE):
+        placements = []
+        for object_id in range(batch_start, min(batch_start + BATCH_SIZE, args.objects)):
+            backend_id = random.choice(store.weighted_backend_ids)
+            placements.append((placement_key(SyntheticDataset(object_id)), backend_id))
+        index.set_many(placements)
+    _report("place", args.objects, time.time() - start)
+
+    start = time.time()
+    for object_id in range(args.objects):
+        assert index.get(placement_key(SyntheticDataset(object_id))) is not None
+    _report("index lookup", args.objects, time.time() - start)
+
+    # Objects created on disk without an object_store_id must be located by
+    # the store, compare using the index with probing all backends.
+    sample = []
+    for i in range(args.sample):
+        dataset = SyntheticDataset(args.objects + i)
+        store.create(dataset)
+        dataset.object_store_id = None
+        sample.append(dataset)
+
+    start = time.time()
+    for dataset in sample:
+        assert store.exists(dataset)
+        dataset.object_store_id = None
+    _report("locate with index", len(sample), time.time() - start)
+
+    probing_store = _build_store(directory, args.backends)
+    start = time.time()
+    for dataset in sample:
+        assert probing_store.exists(dataset)
+        dataset.object_store_id = None
+    _report("locate by probing", len(sample), time.time() - start)
+    store.shutdown()
+    probing_store.shutdown()
+
+
+def _report(name, count, elapsed):
+    print(f"{name}: {count} objects in {elapsed:.2f}s ({count / elapsed if elapsed else 0:.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
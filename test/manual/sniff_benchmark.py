@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""Benchmark sniffing many files.
+
+Builds a corpus by copying the datatype test files in
+``lib/galaxy/datatypes/test`` until it holds the requested number of files
+and guesses the extension of every file with ``guess_ext`` on the plain sniff
+order, with the registry's compiled sniff dispatcher, and with
+``guess_ext_batch`` in a pool of worker processes. Results of all methods are
+checked to be identical.
+
+% python test/manual/sniff_benchmark.py --files 5000 --processes 8
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib")]
+
+from galaxy.datatypes.registry import example_datatype_registry_for_sample  # noqa: I100,I202
+from galaxy.datatypes.sniff import (
+    guess_ext,
+    guess_ext_batch,
+)
+
+DESCRIPTION = "Script to benchmark sniffing many files."
+TEST_DATA_DIRECTORY = os.path.join(galaxy_root, "lib", "galaxy", "datatypes", "test")
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--files", type=int, default=2000)
+    arg_parser.add_argument("--processes", type=int, default=None, help="worker processes for batch sniffing, defaults to the number of CPUs")
+    arg_parser.add_argument("--max-size", type=int, default=1024 * 1024, help="skip test files larger than this many bytes")
+    args = arg_parser.parse_args(argv)
+
+    registry = example_datatype_registry_for_sample()
+    directory = tempfile.mkdtemp()
+    try:
+        fnames = _build_corpus(directory, args.files, args.max_size)
+
+        start = time.time()
+        expected = [guess_ext(fname, registry.sniff_order) for fname in fnames]
+        _report("sniff order", len(fnames), time.time() - start)
+
+        start = time.time()
+        dispatched = [guess_ext(fname, registry.sniff_dispatcher) for fname in fnames]
+        _report("sniff dispatcher", len(fnames), time.time() - start)
+        assert dispatched == expected
+
+        start = time.time()
+        batched = guess_ext_batch(fnames, registry.sniff_dispatcher, processes=args.processes)
+        _report("batch", len(fnames), time.time() - start)
+        assert batched == expected
+    finally:
+        shutil.rmtree(directory)
+
+
+def _build_corpus(directory, count, max_size):
+    sources = []
+    for name in sorted(os.listdir(TEST_DATA_DIRECTORY)):
+        path = os.path.join(TEST_DATA_DIRECTORY, name)
+        if os.path.isfile(path) and os.path.getsize(path) <= max_size:
+            sources.append(path)
+    fnames = []
+    for i in range(count):
+        source = sources[i % len(sources)]
+        fname = os.path.join(directory, f"{i}_{os.path.basename(source)}")
+        shutil.copyfile(source, fname)
+        fnames.append(fname)
+    return fnames
+
+
+def _report(name, count, elapsed):
+    print(f"{name}: {count} files in {elapsed:.2f}s ({count / elapsed if elapsed else 0:.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
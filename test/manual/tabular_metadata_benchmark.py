@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""Benchmark setting metadata of large tabular datasets.
+
+Writes an interval-like tabular file with the requested number of lines (and
+a gzip compressed copy) and computes its line counts and column types line by
+line, as ``Tabular.set_meta`` used to, and with the single pass
+``scan_tabular``. Results of both methods are checked to be identical.
+
+% python test/manual/tabular_metadata_benchmark.py --lines 5000000 --max-data-lines 0
+"""
+import gzip
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib")]
+
+from galaxy.datatypes.util.tabular_scan import (  # noqa: I100,I202
+    count_data_lines,
+    guess_column_type,
+    scan_tabular,
+    type_overrules_type,
+)
+from galaxy.util import compression_utils
+
+DESCRIPTION = "Script to benchmark setting metadata of large tabular datasets."
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--lines", type=int, default=1000000)
+    arg_parser.add_argument("--max-data-lines", type=int, default=0, help="stop after this many data lines, 0 reads the whole file")
+    arg_parser.add_argument("--max-guess-type-data-lines", type=int, default=0, help="guess column types on this many data lines, 0 uses all data lines")
+    args = arg_parser.parse_args(argv)
+    max_data_lines = args.max_data_lines or None
+    max_guess_type_data_lines = args.max_guess_type_data_lines or None
+
+    directory = tempfile.mkdtemp()
+    try:
+        fname = os.path.join(directory, "large.bed")
+        _write_dataset(fname, args.lines)
+        with open(fname, "rb") as f_in, gzip.open(f"{fname}.gz", "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        for path in (fname, f"{fname}.gz"):
+            start = time.time()
+            expected = _scan_lines(path, max_data_lines, max_guess_type_data_lines)
+            _report(f"line by line ({os.path.basename(path)})", args.lines, time.time() - start)
+
+            start = time.time()
+            scan = scan_tabular(path, max_data_lines=max_data_lines, max_guess_type_data_lines=max_guess_type_data_lines)
+            _report(f"scan_tabular ({os.path.basename(path)})", args.lines, time.time() - start)
+            assert (scan.data_lines, scan.comment_lines, scan.column_types) == expected, ((scan.data_lines, scan.comment_lines, scan.column_types), expected)
+
+            start = time.time()
+            count_data_lines(path)
+            _report(f"count_data_lines ({os.path.basename(path)})", args.lines, time.time() - start)
+    finally:
+        shutil.rmtree(directory)
+
+
+def _write_dataset(fname, lines):
+    random.seed(0)
+    with open(fname, "w") as f:
+        f.write("#chrom\tstart\tend\tname\tscore\tstrand\tblockSizes\n")
+        for i in range(lines - 1):
+            if i % 1000 == 0:
+                f.write("# comment\n")
+                continue
+            start = random.randint(0, 10 ** 8)
+            f.write(f"chr{random.randint(1, 22)}\t{start}\t{start + random.randint(1, 1000)}\tfeature_{i}\t{random.random():.3f}\t{random.choice('+-')}\t{random.randint(1, 99)},{random.randint(1, 99)},\n")
+
+
+def _scan_lines(fname, max_data_lines, max_guess_type_data_lines):
+    # Reading line by line as Tabular.set_meta did, skip is 0
+    data_lines = 0
+    comment_lines = 0
+    column_types = []
+    with compression_utils.get_fileobj(fname) as fh:
+        for line in fh:
+            line = line.rstrip('\r\n')
+            if not line or line.startswith('#'):
+                comment_lines += 1
+            else:
+                data_lines += 1
+                if max_guess_type_data_lines is None or data_lines <= max_guess_type_data_lines:
+                    for field_count, field in enumerate(line.split('\t')):
+                        if field_count >= len(column_types):
+                            column_types.append(None)
+                        column_type = guess_column_type(field)
+                        if type_overrules_type(column_type, column_types[field_count]):
+                            column_types[field_count] = column_type
+            if max_data_lines is not None and data_lines >= max_data_lines:
+                if fh.read(1):
+                    data_lines = None
+                    comment_lines = None
+                break
+    return data_lines, comment_lines, column_types
+
+
+def _report(name, count, elapsed):
+    print(f"{name}: {count} lines in {elapsed:.2f}s ({count / elapsed if elapsed else 0:.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
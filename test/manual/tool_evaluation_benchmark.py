@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""Benchmark ``ToolEvaluator.build()`` throughput with and without the compiled template cache.
+
+Builds the command line and configfiles of the mock bwa job of the tool
+evaluation unit tests ``--builds`` times, once with ``template_cache``
+disabled (every build compiles the templates, like Galaxy did before the
+cache) and once with it enabled.
+
+% python test/manual/tool_evaluation_benchmark.py --builds 1000
+"""
+import os
+import sys
+import time
+from argparse import ArgumentParser
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib"), os.path.join(galaxy_root, "test")]
+
+from galaxy.tools.evaluation import ToolEvaluator  # noqa: I100,I202
+from galaxy.util.template import (
+    template_cache,
+    TEMPLATE_CACHE_SIZE,
+)
+from unit.tools.test_evaluation import ToolEvaluatorTestCase
+
+DESCRIPTION = "Script to benchmark ToolEvaluator.build() throughput."
+COMMAND = """bwa mem
+#if $thresh > 2:
+    --thresh=$thresh
+#end if
+#for $i, $name in enumerate(['a', 'b', 'c']):
+    --opt-$name=$i
+#end for
+--in=$input1 --out=$output1 --config=$conf1"""
+CONFIGFILE = """#for $i in range(10):
+line $i: $thresh
+#end for
+"""
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--builds", type=int, default=1000)
+    args = arg_parser.parse_args(argv)
+
+    test_case = ToolEvaluatorTestCase()
+    test_case.setUp()
+    try:
+        test_case._setup_test_bwa_job()
+        test_case.tool._command_line = COMMAND
+        test_case.tool._config_files = [("conf1", None, CONFIGFILE)]
+        for label, cache_size in (("without cache", 0), ("with cache", TEMPLATE_CACHE_SIZE)):
+            template_cache.clear()
+            template_cache.resize(cache_size)
+            elapsed = _time_builds(test_case, args.builds)
+            print(f"{label}: {args.builds} builds in {elapsed:.2f}s ({args.builds / elapsed:.0f} builds/s)")
+    finally:
+        test_case.tearDown()
+
+
+def _time_builds(test_case, builds):
+    start = time.time()
+    for _ in range(builds):
+        test_case.evaluator = ToolEvaluator(test_case.app, test_case.tool, test_case.job, test_case.test_directory)
+        test_case._set_compute_environment()
+        test_case.evaluator.build()
+    return time.time() - start
+
+
+if __name__ == "__main__":
+    main()
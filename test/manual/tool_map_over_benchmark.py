@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""Benchmark submitting a large collection map-over through the tools API.
+
+Creates a list with the requested number of elements in a new history and
+times the tool request mapping ``cat1`` over it. Map-overs creating at least
+``BULK_EXECUTION_MIN_JOBS`` jobs use the bulk execution path, pass a smaller
+``--elements`` value to compare with the per-job path.
+
+% python test/manual/tool_map_over_benchmark.py --host http://localhost:8080/ --elements 10000
+$ .venv/bin/python scripts/summarize_timings.py --file /tmp/<work_dir>/main.log --pattern 'Executed'
+"""
+import os
+import random
+import sys
+import time
+from argparse import ArgumentParser
+
+from bioblend import galaxy
+
+galaxy_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+sys.path[1:1] = [os.path.join(galaxy_root, "lib"), os.path.join(galaxy_root, "test")]
+
+from galaxy_test.base.populators import (  # noqa: I100,I202
+    GiDatasetCollectionPopulator,
+    GiDatasetPopulator,
+)
+
+LONG_TIMEOUT = 1000000000
+DESCRIPTION = "Script to benchmark submitting a large collection map-over."
+
+
+def main(argv=None):
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--api_key", default="testmasterapikey")
+    arg_parser.add_argument("--host", default="http://localhost:8080/")
+    arg_parser.add_argument("--elements", type=int, default=10000)
+    arg_parser.add_argument("--tool_id", default="cat1")
+    args = arg_parser.parse_args(argv)
+
+    gi = _gi(args)
+    dataset_populator = GiDatasetPopulator(gi)
+    dataset_collection_populator = GiDatasetCollectionPopulator(gi)
+    history_id = dataset_populator.new_history()
+
+    start = time.time()
+    contents = ["random dataset number #%d" % i for i in range(args.elements)]
+    hdca_id = dataset_collection_populator.create_list_in_history(history_id, contents=contents, direct_upload=True).json()["outputs"][0]["id"]
+    dataset_populator.wait_for_history(history_id, assert_ok=True, timeout=LONG_TIMEOUT)
+    print(f"created list of {args.elements} elements in {time.time() - start:.2f}s")
+
+    inputs = {"input1": {"batch": True, "values": [{"src": "hdca", "id": hdca_id}]}}
+    start = time.time()
+    response = dataset_populator.run_tool(args.tool_id, inputs, history_id)
+    elapsed = time.time() - start
+    job_count = len(response["jobs"])
+    print(f"submitted {job_count} jobs in {elapsed:.2f}s ({job_count / elapsed if elapsed else 0:.0f} jobs/s)")
+
+
+def _gi(args):
+    gi = galaxy.GalaxyInstance(args.host, key=args.api_key)
+    name = "mapover-user-%d" % random.randint(0, 1000000)
+
+    user = gi.users.create_local_user(name, "%s@galaxytesting.dev" % name, "pass123")
+    user_id = user["id"]
+    api_key = gi.users.create_user_apikey(user_id)
+    user_gi = galaxy.GalaxyInstance(args.host, api_key)
+    return user_gi
+
+
+if __name__ == "__main__":
+    main()
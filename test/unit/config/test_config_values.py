@@ -5,6 +5,7 @@ from datetime import timedelta
 import pytest
 
 from galaxy import config
+from galaxy.exceptions import ConfigurationError
 from galaxy.util import listify
 from galaxy.web.formatting import expand_pretty_datetime_format
 
@@ -56,6 +57,18 @@ def test_base_config_if_running_not_from_source(monkeypatch, mock_config_file):
     assert appconfig.managed_config_dir == os.path.join(appconfig.data_dir, 'config')
 
 
+def test_job_metric_rollups(mock_config_file):
+    appconfig = config.GalaxyAppConfiguration(job_metric_rollups='core:runtime_seconds, core:galaxy_slots')
+    assert appconfig.job_metric_rollup_metrics == frozenset([('core', 'runtime_seconds'), ('core', 'galaxy_slots')])
+    appconfig = config.GalaxyAppConfiguration(job_metric_rollups='')
+    assert not appconfig.job_metric_rollup_metrics
+
+
+def test_invalid_job_metric_rollups(mock_config_file):
+    with pytest.raises(ConfigurationError):
+        config.GalaxyAppConfiguration(job_metric_rollups='core:runtime_seconds,runtime_seconds')
+
+
 def listify_strip(value):
     return listify(value, do_strip=True)
 
@@ -0,0 +1,84 @@
+"""
+Unit tests for column DataProviders.
+.. seealso:: galaxy.datatypes.dataproviders.column
+"""
+import json
+from io import StringIO
+
+from galaxy.datatypes.dataproviders import column
+
+CONTENTS = """# header
+chr1\t10\t20\tgene_a\t0.5\t+
+chr1\t15\t25\tgene_b\tNA\t-
+
+chr2\t30\t40\tgene_c\t1e3\t+\textra
+chr2\tx\t50\tgene_d\t2\t+
+chr10\t99999999999999999999\t60\tgene_e\t-1.5
+"""
+COLUMN_TYPES = ['str', 'int', 'int', 'str', 'float', 'str']
+
+
+def _provide(provider_class, **kwargs):
+    return list(provider_class(StringIO(CONTENTS), **kwargs))
+
+
+def _assert_same_as_columnar(**kwargs):
+    expected = _provide(column.ColumnarDataProvider, **kwargs)
+    for block_size in (1, 2, 100):
+        assert _provide(column.ColumnBlockDataProvider, block_size=block_size, **kwargs) == expected, (block_size, kwargs)
+    return expected
+
+
+def test_same_rows_as_columnar():
+    rows = _assert_same_as_columnar()
+    assert rows[0] == ['chr1', '10', '20', 'gene_a', '0.5', '+']
+    assert len(rows[2]) == 7
+    rows = _assert_same_as_columnar(column_types=COLUMN_TYPES)
+    assert rows[0] == ['chr1', 10, 20, 'gene_a', 0.5, '+']
+    assert rows[1][4] is None
+    assert rows[3][1] is None
+    assert rows[4][1] == 99999999999999999999
+    assert rows[4][5] is None
+    _assert_same_as_columnar(column_types=COLUMN_TYPES, parse_columns=False)
+    _assert_same_as_columnar(indeces=[4, 1, 0, 6], column_types=['float', 'int', 'str', 'str'])
+    _assert_same_as_columnar(column_count=2, column_types=['str', 'bool'])
+    _assert_same_as_columnar(column_types=COLUMN_TYPES, provide_blank=True, comment_char=None)
+    _assert_same_as_columnar(regex_list=['chr2'], invert=True)
+
+
+def test_offset_and_limit():
+    for offset in range(0, 7):
+        for limit in (None, 0, 1, 2, 5):
+            provider = column.ColumnBlockDataProvider(StringIO(CONTENTS), block_size=2, offset=offset, limit=limit)
+            rows = list(provider)
+            assert rows == _provide(column.ColumnarDataProvider, offset=offset, limit=limit)
+            assert provider.num_data_returned == len(rows)
+
+
+def test_filters():
+    # numeric comparisons skip values that could not be parsed
+    rows = _provide(column.ColumnBlockDataProvider, column_types=COLUMN_TYPES, filters=['1-ge-15'])
+    assert [row[3] for row in rows] == ['gene_b', 'gene_c', 'gene_e']
+    rows = _provide(column.ColumnBlockDataProvider, column_types=COLUMN_TYPES, filters=['1-ge-15', '4-lt-100'])
+    assert [row[3] for row in rows] == ['gene_e']
+    for filter_ in ('0-eq-chr1', '3-has-_c', '0-re-chr1.*', '5-eq-%2B'):
+        rows = _provide(column.ColumnBlockDataProvider, column_types=COLUMN_TYPES, filters=[filter_])
+        expected = _provide(column.ColumnarDataProvider, column_types=COLUMN_TYPES, filters=[filter_])
+        assert rows == expected
+    rows = _provide(column.ColumnBlockDataProvider, column_types=COLUMN_TYPES, filters=['0-re-chr1.*'], offset=1, limit=1)
+    assert [row[3] for row in rows] == ['gene_b']
+
+
+def test_dict_provider():
+    column_names = ['chrom', 'start', 'end']
+    rows = _provide(column.DictBlockDataProvider, column_names=column_names, column_types=['str', 'int', 'int'])
+    assert rows == _provide(column.DictDataProvider, column_names=column_names, column_types=['str', 'int', 'int'])
+    assert rows[0] == {'chrom': 'chr1', 'start': 10, 'end': 20}
+
+
+def test_json_lines():
+    provider = column.ColumnBlockDataProvider(StringIO(CONTENTS), block_size=2, indeces=[3, 4], column_types=['str', 'float'])
+    lines = ''.join(provider.json_lines()).splitlines()
+    assert [json.loads(line) for line in lines] == [
+        ['gene_a', 0.5], ['gene_b', None], ['gene_c', 1000.0], ['gene_d', 2.0], ['gene_e', -1.5]
+    ]
@@ -0,0 +1,164 @@
+import gzip
+
+from galaxy.datatypes.dataproviders import (
+    column,
+    line,
+)
+from galaxy.datatypes.tabular import Tabular
+from galaxy.datatypes.util import line_index
+from galaxy.datatypes.util.line_index import (
+    build_line_index,
+    is_multi_member_gzip,
+    LineIndex,
+    open_at_offset,
+)
+from galaxy.util.bunch import Bunch
+
+LINES = []
+for i in range(1000):
+    if i % 7 == 0:
+        LINES.append(f"# comment {i}\n")
+    elif i % 11 == 0:
+        LINES.append("  \n")
+    else:
+        LINES.append(f"chr{i % 3}\t{i}\t{i * 2}\n")
+CONTENT = "".join(LINES)
+
+
+def _offset_of_line(line_number):
+    return len("".join(LINES[:line_number]).encode())
+
+
+def _data_lines_before(line_number):
+    return sum(1 for line in LINES[:line_number] if line.strip() and not line.strip().startswith("#"))
+
+
+def _write(tmp_path, content=CONTENT, name="dataset.tabular"):
+    path = tmp_path / name
+    path.write_text(content)
+    return str(path)
+
+
+def _write_members(tmp_path, members, name="dataset.tabular.gz"):
+    path = tmp_path / name
+    with open(path, "wb") as f:
+        for member in members:
+            f.write(gzip.compress(member.encode()))
+    return str(path)
+
+
+def _assert_checkpoints(index, interval):
+    assert index.lines == len(LINES)
+    assert index.data_lines == _data_lines_before(len(LINES))
+    expected = [(n, _data_lines_before(n), _offset_of_line(n)) for n in range(0, len(LINES), interval)]
+    assert index.checkpoints == expected
+
+
+def test_build_line_index(tmp_path):
+    path = _write(tmp_path)
+    for chunk_size in (1, 10, 1000, 2 ** 20):
+        index = build_line_index(path, interval=64, chunk_size=chunk_size)
+        assert not index.compressed
+        assert index.seek_points == []
+        _assert_checkpoints(index, 64)
+    assert index.checkpoint_for_line(130) == (128, _data_lines_before(128), _offset_of_line(128))
+    line_number, data_line_number, _ = index.checkpoint_for_data_line(100)
+    assert data_line_number <= 100 < _data_lines_before(line_number + 64)
+
+
+def test_build_line_index_last_line(tmp_path):
+    index = build_line_index(_write(tmp_path, "1\n\n#2\n3"), interval=2)
+    assert (index.lines, index.data_lines) == (4, 2)
+    assert index.checkpoints == [(0, 0, 0), (2, 1, 3)]
+    assert build_line_index(_write(tmp_path, ""), interval=2).lines == 0
+
+
+def test_write_and_load(tmp_path):
+    index = build_line_index(_write_members(tmp_path, [CONTENT[:3000], CONTENT[3000:]]), interval=64, seek_point_spacing=1)
+    path = str(tmp_path / "index.json")
+    index.write(path)
+    loaded = LineIndex.load(path)
+    assert loaded.to_dict() == index.to_dict()
+    assert loaded.compressed
+
+
+def test_gzip_seek_points(tmp_path):
+    members = [CONTENT[i:i + 2000] for i in range(0, len(CONTENT), 2000)]
+    path = _write_members(tmp_path, members)
+    index = build_line_index(path, interval=64, seek_point_spacing=4000, chunk_size=100)
+    _assert_checkpoints(index, 64)
+    assert [point[0] for point in index.seek_points] == list(range(0, len(CONTENT), 4000))
+    with open(path, "rb") as f:
+        raw = f.read()
+    for uncompressed_offset, compressed_offset in index.seek_points:
+        assert gzip.decompress(raw[compressed_offset:]).decode() == CONTENT[uncompressed_offset:]
+    for offset in (0, 1, 3999, 4000, 10001, len(CONTENT) - 1):
+        with open_at_offset(path, offset, index) as f:
+            assert f.read(100).decode() == CONTENT[offset:offset + 100]
+        with open_at_offset(path, offset) as f:
+            assert f.read(100).decode() == CONTENT[offset:offset + 100]
+
+
+def test_is_multi_member_gzip(tmp_path):
+    assert is_multi_member_gzip(_write_members(tmp_path, [CONTENT[:3000], CONTENT[3000:]]), chunk_size=100)
+    assert not is_multi_member_gzip(_write_members(tmp_path, [CONTENT]), chunk_size=100)
+    # Only the start of the file is decompressed
+    assert not is_multi_member_gzip(_write_members(tmp_path, [CONTENT[:3000], CONTENT[3000:]]), max_size=1000, chunk_size=100)
+
+
+def _dataset(path):
+    return Bunch(id=1, file_name=path, metadata=Bunch(line_index=None), dataset=Bunch(object_store=object()))
+
+
+def test_get_line_index_not_built(tmp_path, monkeypatch):
+    monkeypatch.setattr(line_index, "LINE_INDEX_MIN_SIZE", 1)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Line index built")
+
+    monkeypatch.setattr(line_index, "build_line_index", fail)
+    datatype = Tabular()
+    multi_member = _dataset(_write_members(tmp_path, [CONTENT[:3000], CONTENT[3000:]]))
+    assert datatype.needs_line_index(multi_member)
+    # Requests only use existing indexes
+    assert datatype.get_line_index(multi_member) is None
+    # A single gzip member has no seek point to read from other than the start
+    assert datatype.get_line_index(_dataset(_write_members(tmp_path, [CONTENT], name="single.tabular.gz")), build=True) is None
+    monkeypatch.setattr(line_index, "LINE_INDEX_MIN_SIZE", 2 ** 24)
+    assert not datatype.needs_line_index(multi_member)
+
+
+class IndexedSource:
+
+    def __init__(self, path, index):
+        self.file = open(path)
+        self.index = index
+        self.seeks = []
+
+    def __iter__(self):
+        return iter(self.file)
+
+    def seek_data_line(self, data_line_number):
+        line_number, data_line_number, offset = self.index.checkpoint_for_data_line(data_line_number)
+        self.seeks.append(line_number)
+        self.file.seek(offset)
+        return line_number, data_line_number
+
+
+def test_providers_seek_data_lines(tmp_path):
+    path = _write(tmp_path)
+    index = build_line_index(path, interval=64)
+    for provider_class in (line.FilteredLineDataProvider, column.ColumnarDataProvider, column.ColumnBlockDataProvider):
+        for offset in (0, 63, 64, 300, 700, 900):
+            expected = list(provider_class(open(path), offset=offset, limit=20))
+            source = IndexedSource(path, index)
+            provider = provider_class(source, offset=offset, limit=20)
+            assert list(provider) == expected
+            assert provider.num_data_returned == len(expected)
+            if offset >= 64:
+                assert source.seeks and source.seeks[0] > 0
+    # Providers filtering data lines read from the start
+    source = IndexedSource(path, index)
+    provider = line.RegexLineDataProvider(source, regex_list=["chr1"], offset=300)
+    assert list(provider) == list(line.RegexLineDataProvider(open(path), regex_list=["chr1"], offset=300))
+    assert source.seeks == []
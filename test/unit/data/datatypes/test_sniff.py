@@ -1,3 +1,4 @@
+import gzip
 import tempfile
 
 import pytest
@@ -6,9 +7,103 @@ from galaxy.datatypes.sniff import (
     convert_newlines,
     convert_newlines_sep2tabs,
     get_test_fname,
+    guess_ext,
+    guess_ext_batch,
+    run_sniffers_raw,
+    SniffDispatcher,
 )
 
 
+class PrefixSniffer:
+    is_binary = False
+
+    def __init__(self, file_ext, start):
+        self.file_ext = file_ext
+        self.start = start
+
+    def sniff_prefix(self, file_prefix):
+        return file_prefix.startswith(self.start)
+
+
+class CompressedPrefixSniffer(PrefixSniffer):
+    compressed = True
+    compressed_format = "gzip"
+
+
+class FileSniffer:
+
+    def __init__(self, file_ext, start, is_binary=False):
+        self.file_ext = file_ext
+        self.start = start
+        self.is_binary = is_binary
+
+    def sniff(self, filename):
+        with open(filename, "rb") as f:
+            return f.read(len(self.start)) == self.start
+
+
+class BrokenSniffer:
+    file_ext = "broken"
+    is_binary = False
+
+    def sniff_prefix(self, file_prefix):
+        raise Exception("broken sniffer")
+
+
+SNIFF_ORDER = [
+    BrokenSniffer(),
+    CompressedPrefixSniffer("foo.gz", "foo"),
+    FileSniffer("bin", b"\x00BIN", is_binary=True),
+    PrefixSniffer("foo", "foo"),
+    FileSniffer("bar", b"bar"),
+]
+
+
+def _write_sniff_files(directory):
+    files = {}
+    for name, content in [("foo", b"foo\n"), ("bar", b"bar\n"), ("bin", b"\x00BIN\xff"), ("txt", b"a\nb\n")]:
+        path = directory / name
+        path.write_bytes(content)
+        files[name] = str(path)
+    path = directory / "foo.gz"
+    with gzip.open(path, "wb") as f:
+        f.write(b"foo\n")
+    files["foo.gz"] = str(path)
+    return files
+
+
+def test_sniff_dispatcher_candidates():
+    dispatcher = SniffDispatcher(SNIFF_ORDER)
+    assert [d.file_ext for d, _ in dispatcher.candidates(None)] == ["broken", "bin", "foo", "bar"]
+    assert [d.file_ext for d, _ in dispatcher.candidates("gzip")] == ["foo.gz", "bin", "bar"]
+    assert [d.file_ext for d, _ in dispatcher.candidates("bz2")] == ["bin", "bar"]
+    assert [d.file_ext for d, _ in dispatcher.candidates(None, is_binary=True)] == ["broken", "bin", "foo"]
+    assert [use_prefix for _, use_prefix in dispatcher.candidates(None)] == [True, False, True, False]
+    assert dispatcher.candidates(None) is dispatcher.candidates(None)
+
+
+def test_sniff_dispatcher_matches_sniff_order(tmp_path):
+    files = _write_sniff_files(tmp_path)
+    dispatcher = SniffDispatcher(SNIFF_ORDER)
+    expected = {"foo": "foo", "bar": "bar", "bin": "bin", "txt": "txt", "foo.gz": "foo.gz"}
+    for name, path in files.items():
+        assert guess_ext(path, SNIFF_ORDER) == expected[name]
+        assert guess_ext(path, dispatcher) == expected[name]
+    assert run_sniffers_raw(files["bar"], SNIFF_ORDER, is_binary=True) is None
+
+
+def test_guess_ext_batch(tmp_path):
+    files = _write_sniff_files(tmp_path)
+    fnames = list(files.values()) * 4
+    expected = [guess_ext(fname, SNIFF_ORDER) for fname in fnames]
+    assert guess_ext_batch(fnames, SNIFF_ORDER, processes=1) == expected
+    assert guess_ext_batch(fnames, SNIFF_ORDER, processes=2) == expected
+    is_binary = [fname == files["bar"] for fname in fnames]
+    assert guess_ext_batch(fnames, SNIFF_ORDER, is_binary=is_binary, processes=2) == [
+        "binary" if b else ext for ext, b in zip(expected, is_binary)
+    ]
+
+
 def assert_converts_to_1234_convert_sep2tabs(content, expected='1\t2\n3\t4\n'):
     with tempfile.NamedTemporaryFile(delete=False, mode='w') as tf:
         tf.write(content)
@@ -0,0 +1,84 @@
+import gzip
+
+from galaxy.datatypes.sniff import get_test_fname
+from galaxy.datatypes.util.tabular_scan import (
+    cached_peek,
+    count_data_lines,
+    guess_values_type,
+    scan_tabular,
+)
+
+
+def _write(tmp_path, content, name="dataset.tabular"):
+    path = tmp_path / name
+    path.write_text(content)
+    return str(path)
+
+
+def test_guess_values_type():
+    assert guess_values_type(["1", "-2", "+3"]) == "int"
+    assert guess_values_type(["1", "2.5", "1e3"]) == "float"
+    assert guess_values_type(["1", "NA"]) == "float"
+    assert guess_values_type(["1,2", "3,"]) == "list"
+    assert guess_values_type(["1", "1_000"]) == "str"
+    assert guess_values_type(["", ""]) is None
+    assert guess_values_type(["1", ""]) == "int"
+    assert guess_values_type(["1" * 5000]) == "float"
+
+
+def test_scan_tabular(tmp_path):
+    content = "a\tb\tc\n#comment\n1\t1.5\tx\n\n2\t3\t1,2\n"
+    for chunk_size in (1, 4, 1024):
+        scan = scan_tabular(_write(tmp_path, content), chunk_size=chunk_size)
+        assert scan.data_lines == 3
+        assert scan.comment_lines == 2
+        assert scan.first_line_column_types == ["str", "str", "str"]
+        assert scan.column_types == ["int", "float", "str"]
+        assert scan.peek == content
+
+
+def test_scan_tabular_skip(tmp_path):
+    path = _write(tmp_path, "header\n1\t2\n3\t4\n")
+    scan = scan_tabular(path, skip=1, get_column_names=lambda first_line: [first_line])
+    assert scan.column_names == ["header"]
+    assert scan.data_lines == 2
+    assert scan.comment_lines == 1
+    assert scan.first_line_column_types == ["str"]
+    assert scan.column_types == ["int", "int"]
+
+
+def test_scan_tabular_max_data_lines(tmp_path):
+    path = _write(tmp_path, "1\n2\n#3\n4\n", name="max.tabular")
+    scan = scan_tabular(path, skip=0, max_data_lines=2, chunk_size=2)
+    assert scan.data_lines is None
+    assert scan.comment_lines is None
+    scan = scan_tabular(path, skip=0, max_data_lines=3, chunk_size=2)
+    assert scan.data_lines == 3
+    assert scan.comment_lines == 1
+    # The peek still holds the first lines
+    assert scan_tabular(path, skip=0, max_data_lines=1).peek == "1\n2\n#3\n4\n"
+
+
+def test_scan_tabular_compressed(tmp_path):
+    path = str(tmp_path / "dataset.tabular.gz")
+    with gzip.open(path, "wt") as f:
+        f.write("1\tchr1\n2\tchr2\n")
+    scan = scan_tabular(path, skip=0)
+    assert scan.data_lines == 2
+    assert scan.column_types == ["int", "str"]
+
+
+def test_scan_tabular_peek():
+    path = get_test_fname("1.bed")
+    scan = scan_tabular(path)
+    with open(path) as f:
+        lines = [f.readline() for _ in range(5)]
+    assert scan.peek == "".join(line[:256].rstrip("\n") + "\n" for line in lines)
+    assert cached_peek(path) == scan.peek
+
+
+def test_count_data_lines(tmp_path):
+    content = "1\n  \n # comment\n2\t3\n\n4"
+    for chunk_size in (1, 3, 1024):
+        assert count_data_lines(_write(tmp_path, content), chunk_size=chunk_size) == 3
+    assert count_data_lines(_write(tmp_path, "")) == 0
@@ -5,7 +5,10 @@ import uuid
 from tempfile import NamedTemporaryFile
 
 import pytest
-from sqlalchemy import inspect
+from sqlalchemy import (
+    event,
+    inspect,
+)
 
 import galaxy.datatypes.registry
 import galaxy.model
@@ -382,6 +385,46 @@ class MappingTests(BaseModelTestCase):
         assert c4.dataset_elements == [dce1, dce2]
         assert c4.element_identifiers_extensions_and_paths == [(('outer_list', 'inner_list', 'forward'), 'bam', 'mock_dataset_14.dat'), (('outer_list', 'inner_list', 'reverse'), 'txt', 'mock_dataset_14.dat')]
 
+    def test_collection_preload_elements(self):
+        model = self.model
+        u = model.User(email="preload@example.com", password="password")
+        h1 = model.History(name="History 1", user=u)
+        outer = model.DatasetCollection(collection_type="list:list:paired")
+        objects = [u, h1, outer]
+        for i in range(3):
+            middle = model.DatasetCollection(collection_type="list:paired")
+            objects.append(model.DatasetCollectionElement(collection=outer, element=middle, element_identifier=f"outer{i}", element_index=i))
+            for j in range(2):
+                inner = model.DatasetCollection(collection_type="paired")
+                objects.append(model.DatasetCollectionElement(collection=middle, element=inner, element_identifier=f"middle{j}", element_index=j))
+                for k, identifier in enumerate(("forward", "reverse")):
+                    hda = model.HistoryDatasetAssociation(extension="txt", history=h1, create_dataset=True, sa_session=model.session)
+                    objects.append(model.DatasetCollectionElement(collection=inner, element=hda, element_identifier=identifier, element_index=k))
+        self.persist(*objects)
+        outer_id = outer.id
+        self.expunge()
+
+        outer = model.session.query(model.DatasetCollection).get(outer_id)
+        outer.preload_elements()
+        statements = []
+
+        def count_statement(*args):
+            statements.append(args)
+
+        event.listen(model.engine, "before_cursor_execute", count_statement)
+        try:
+            identifiers = [(e1.element_identifier, e2.element_identifier, e3.element_identifier, e3.hda.dataset.state)
+                           for e1 in outer.elements
+                           for e2 in e1.child_collection.elements
+                           for e3 in e2.child_collection.elements]
+            assert outer["outer1"].child_collection[1].child_collection[0].collection.collection_type == "paired"
+        finally:
+            event.remove(model.engine, "before_cursor_execute", count_statement)
+        assert statements == []
+        assert len(identifiers) == 12
+        assert identifiers[:3] == [("outer0", "middle0", "forward", "new"), ("outer0", "middle0", "reverse", "new"), ("outer0", "middle1", "forward", "new")]
+        assert [i[:3] for i in identifiers] == [r[0] for r in outer.element_identifiers_extensions_and_paths]
+
     def test_default_disk_usage(self):
         model = self.model
 
@@ -0,0 +1,73 @@
+import json
+
+from galaxy.managers.jobs import JobSearch
+from galaxy.model.job_fingerprint import fingerprint, fingerprint_for_job
+from galaxy.security.idencoding import IdEncodingHelper
+from galaxy.util.bunch import Bunch
+from .test_galaxy_mapping import BaseModelTestCase
+
+
+class JobFingerprintTestCase(BaseModelTestCase):
+
+    def test_fingerprint_matches_recorded_job(self):
+        model = self.model
+        u = model.User(email="fingerprint@example.com", password="password")
+        h = model.History(name="History for fingerprints", user=u)
+        self.persist(u, h)
+        d1 = model.HistoryDatasetAssociation(extension="txt", history=h, name="input", create_dataset=True, sa_session=model.session)
+        self.persist(d1)
+        # A copy of the input in another history has the same identity
+        d2 = d1.copy()
+        d2.history = h
+        self.persist(d2)
+
+        job = model.Job()
+        job.tool_id = "cat1"
+        job.tool_version = "1.0.0"
+        job.add_parameter("input1", json.dumps({"values": [{"id": d1.id, "src": "hda"}]}, sort_keys=True))
+        job.add_parameter("lines", json.dumps(5))
+        job.add_parameter("dbkey", json.dumps("hg19"))
+        job.add_parameter("__input_ext", json.dumps("txt"))
+        self.persist(job)
+
+        job_fingerprint = fingerprint_for_job(model.session, job)
+        params = {"input1": {"values": [{"id": d2.id, "src": "hda"}]}, "lines": 5}
+        assert fingerprint(model.session, "cat1", "1.0.0", params) == job_fingerprint
+        assert fingerprint(model.session, "cat1", "1.0.1", params) != job_fingerprint
+        params["lines"] = 6
+        assert fingerprint(model.session, "cat1", "1.0.0", params) != job_fingerprint
+
+    def test_job_search_multiple_data_input(self):
+        model = self.model
+        u = model.User(email="fingerprint_multiple@example.com", password="password")
+        h = model.History(name="History for multiple inputs", user=u)
+        self.persist(u, h)
+        d1 = model.HistoryDatasetAssociation(extension="txt", history=h, name="forward", create_dataset=True, sa_session=model.session)
+        d2 = model.HistoryDatasetAssociation(extension="txt", history=h, name="reverse", create_dataset=True, sa_session=model.session)
+        self.persist(d1, d2)
+
+        # Parameters as recorded by DefaultToolAction for a multiple="true" data input
+        job = model.Job()
+        job.tool_id = "cat_multiple"
+        job.tool_version = "1.0.0"
+        job.user = u
+        job.state = model.Job.states.OK
+        job.add_parameter("input1", json.dumps({"values": [{"id": d1.id, "src": "hda"}, {"id": d2.id, "src": "hda"}]}))
+        job.add_parameter("input1|__identifier__", json.dumps("forward"))
+        job.add_parameter("input11|__identifier__", json.dumps("forward"))
+        job.add_parameter("input12|__identifier__", json.dumps("reverse"))
+        self.persist(job)
+        job.fingerprint = fingerprint_for_job(model.session, job)
+        self.persist(job)
+
+        search = JobSearch(model.session, None, None, None, IdEncodingHelper(id_secret="6e46ed6483a833c100e68cc3f1d0dd76"))
+        trans = Bunch(user=u)
+        param_dump = {"input1": {"values": [{"id": d1.id, "src": "hda"}, {"id": d2.id, "src": "hda"}]}}
+
+        def search_with_identifiers(*identifiers):
+            for hda, identifier in zip((d1, d2), identifiers):
+                hda.element_identifier = identifier
+            return search.by_tool_input(trans, "cat_multiple", "1.0.0", param={"input1": [d1, d2]}, param_dump=param_dump)
+
+        assert search_with_identifiers("forward", "reverse") == job
+        assert search_with_identifiers("reverse", "forward") is None
@@ -0,0 +1,117 @@
+import datetime
+
+import pytest
+
+from galaxy.model.job_metrics import (
+    bin_value,
+    metric_bin,
+    parse_rollup_metrics,
+    RELATIVE_ACCURACY,
+    summarize_job_metric_rollups,
+    update_job_metric_rollups,
+    write_job_metrics,
+    ZERO_BIN,
+)
+from .test_galaxy_mapping import BaseModelTestCase
+
+ROLLUP_METRICS = parse_rollup_metrics("core:runtime_seconds, cgroup:memory.max_usage_in_bytes")
+DAY = datetime.date(2021, 6, 1)
+
+
+def test_parse_rollup_metrics():
+    assert ROLLUP_METRICS == {("core", "runtime_seconds"), ("cgroup", "memory.max_usage_in_bytes")}
+    assert parse_rollup_metrics("") == frozenset()
+    with pytest.raises(ValueError):
+        parse_rollup_metrics("runtime_seconds")
+
+
+def test_metric_bins():
+    for value in (1e-6, 0.5, 1, 3, 59.9, 60, 3600, 12345.678, 2 ** 40):
+        estimate = bin_value(metric_bin(value))
+        assert estimate == pytest.approx(value, rel=RELATIVE_ACCURACY + 1e-9)
+    assert metric_bin(0) == metric_bin(-1) == ZERO_BIN
+    assert bin_value(ZERO_BIN) == 0
+    assert metric_bin(10) < metric_bin(10.5) < metric_bin(20)
+
+
+class JobMetricsTestCase(BaseModelTestCase):
+
+    def _job(self, tool_id, tool_version="1.0.0", destination_id="local"):
+        job = self.model.Job()
+        job.tool_id = tool_id
+        job.tool_version = tool_version
+        job.destination_id = destination_id
+        self.persist(job)
+        return job
+
+    def _rollup(self, job, runtime, day=DAY):
+        update_job_metric_rollups(self.model.session, job, [("core", "runtime_seconds", runtime)], ROLLUP_METRICS, day=day)
+
+    def test_write_job_metrics(self):
+        model = self.model
+        job = self._job("metrics_tool")
+        per_plugin_properties = {
+            "core": {"runtime_seconds": 12, "galaxy_slots": 2, "start_epoch": None},
+            "env": {"HOME": "/home/galaxy", "BIG_PATH": "x" * 2000},
+            "cgroup": {"memory.max_usage_in_bytes": 10 ** 30},
+        }
+        numeric_metrics = write_job_metrics(model.session, job, per_plugin_properties)
+        assert sorted(numeric_metrics) == [("core", "galaxy_slots", 2), ("core", "runtime_seconds", 12)]
+        numeric = {(m.plugin, m.metric_name): m.metric_value for m in job.numeric_metrics}
+        assert numeric == {("core", "runtime_seconds"): 12, ("core", "galaxy_slots"): 2}
+        text = {(m.plugin, m.metric_name): m.metric_value for m in job.text_metrics}
+        assert text[("env", "HOME")] == "/home/galaxy"
+        assert len(text[("env", "BIG_PATH")]) <= 1023
+
+        task = model.Task(job=job, working_directory="/tmp", prepare_files_cmd="split.sh")
+        self.persist(task)
+        write_job_metrics(model.session, task, {"core": {"runtime_seconds": 3}})
+        assert [m.metric_value for m in task.numeric_metrics] == [3]
+        assert write_job_metrics(model.session, task, {}) == []
+
+    def test_rollups(self):
+        model = self.model
+        job = self._job("rollup_tool")
+        runtimes = list(range(1, 1001))
+        for runtime in runtimes:
+            self._rollup(job, runtime)
+        update_job_metric_rollups(model.session, job, [("core", "galaxy_slots", 1)], ROLLUP_METRICS, day=DAY)
+        rows = model.session.query(model.JobMetricRollup).filter_by(tool_id="rollup_tool").all()
+        assert sum(row.count for row in rows) == len(runtimes)
+        # Histogram bins instead of a row per job
+        assert len(rows) < 400
+
+        summary, = summarize_job_metric_rollups(model.session, "core", "runtime_seconds", tool_id="rollup_tool")
+        assert summary["tool_id"] == "rollup_tool"
+        assert summary["count"] == 1000
+        assert summary["mean"] == pytest.approx(500.5)
+        assert (summary["minimum"], summary["maximum"]) == (1, 1000)
+        for percentile, value in summary["percentiles"].items():
+            expected = runtimes[int(float(percentile) / 100 * 999)]
+            assert value == pytest.approx(expected, rel=RELATIVE_ACCURACY + 1e-9)
+        assert summarize_job_metric_rollups(model.session, "core", "galaxy_slots", tool_id="rollup_tool") == []
+
+    def test_rollup_groups(self):
+        model = self.model
+        local_job = self._job("group_tool")
+        cluster_job = self._job("group_tool", destination_id="cluster")
+        other_tool_job = self._job("other_group_tool", tool_version=None, destination_id=None)
+        next_day = DAY + datetime.timedelta(days=1)
+        self._rollup(local_job, 10)
+        self._rollup(local_job, 10, day=next_day)
+        self._rollup(cluster_job, 30)
+        self._rollup(other_tool_job, 0)
+
+        summaries = summarize_job_metric_rollups(model.session, "core", "runtime_seconds", group_by=("tool_id", "destination_id"))
+        summaries = [(s["tool_id"], s["destination_id"], s["count"], s["mean"]) for s in summaries if "group_tool" in s["tool_id"]]
+        assert summaries == [
+            ("group_tool", "cluster", 1, 30),
+            ("group_tool", "local", 2, 10),
+            ("other_group_tool", "", 1, 0),
+        ]
+        summaries = summarize_job_metric_rollups(model.session, "core", "runtime_seconds", group_by=("day",), tool_id="group_tool")
+        assert [(s["day"], s["count"]) for s in summaries] == [(DAY, 2), (next_day, 1)]
+        summaries = summarize_job_metric_rollups(model.session, "core", "runtime_seconds", group_by=(), tool_id="group_tool", start_day=next_day)
+        assert [s["count"] for s in summaries] == [1]
+        with pytest.raises(ValueError):
+            summarize_job_metric_rollups(model.session, "core", "runtime_seconds", group_by=("plugin",))
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+import galaxy.model
+from galaxy.datatypes.registry import example_datatype_registry_for_sample
+from galaxy.metadata.set_metadata import (
+    MetadataPool,
+    MetadataTimings,
+    set_outputs_metadata,
+)
+from galaxy.model.store.discover import SessionlessModelPersistenceContext
+
+datatypes_registry = example_datatype_registry_for_sample()
+galaxy.model.set_datatypes_registry(datatypes_registry)
+DATATYPES_CONFIG = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir, "lib", "galaxy", "config", "sample", "datatypes_conf.xml.sample")
+
+
+@pytest.fixture
+def metadata_pool():
+    pool = MetadataPool(2, DATATYPES_CONFIG)
+    try:
+        yield pool
+    finally:
+        pool.terminate()
+
+
+def _dataset_instance(tmp_path, name, content=None, extension="tabular"):
+    path = tmp_path / name
+    if content is not None:
+        path.write_text(content)
+    dataset = galaxy.model.Dataset(id=-1, external_filename=str(path))
+    dataset.external_extra_files_path = str(tmp_path / f"{name}_files")
+    dataset.state = dataset.states.OK
+    return galaxy.model.HistoryDatasetAssociation(dataset=dataset, extension=extension, create_dataset=False)
+
+
+def _columns(columns, rows=3):
+    return "".join("\t".join(str(i) for i in range(columns)) + "\n" for _ in range(rows))
+
+
+def test_single_dataset_in_process(tmp_path, metadata_pool):
+    dataset_instance = _dataset_instance(tmp_path, "1.tabular", _columns(2))
+    result, = metadata_pool.set_meta([(dataset_instance, {}, {})])
+    assert not result.error
+    assert dataset_instance.metadata.columns == 2
+    # Workers are only started for more than one dataset
+    assert not metadata_pool.started
+
+
+def test_set_outputs_metadata(tmp_path, metadata_pool):
+    outputs = []
+    for i in range(1, 6):
+        outputs.append((f"out{i}", _dataset_instance(tmp_path, f"{i}.tabular", _columns(i)), {}, {}))
+    # Setting metadata of a missing file fails
+    outputs.insert(2, ("missing", _dataset_instance(tmp_path, "missing.txt", extension="txt"), {}, {}))
+    # Datasets that need to be sniffed are set in this process
+    outputs.append(("sniffed", _dataset_instance(tmp_path, "sniffed", _columns(3), extension="auto"), {}, {}))
+    set_meta_calls = []
+
+    def set_meta(dataset_instance, file_dict):
+        set_meta_calls.append(dataset_instance)
+        dataset_instance.extension = "tabular"
+        dataset_instance.datatype.set_meta(dataset_instance)
+
+    timings = MetadataTimings(processes=2)
+    metadata_errors = set_outputs_metadata(outputs, set_meta, metadata_pool, timings)
+    assert metadata_pool.started
+    assert list(metadata_errors) == ["missing"]
+    assert "missing.txt" in metadata_errors["missing"]
+    assert set_meta_calls == [outputs[-1][1]]
+    # Results are applied to the dataset they were computed for
+    for i, (output_name, dataset_instance, _, _) in enumerate(o for o in outputs if o[0].startswith("out")):
+        assert dataset_instance.metadata.columns == i + 1
+        assert dataset_instance.metadata.data_lines == 3
+    assert outputs[-1][1].metadata.columns == 3
+    assert set(timings.outputs) == {output[0] for output in outputs}
+
+
+def test_set_datasets_metadata(tmp_path, metadata_pool):
+    context = SessionlessModelPersistenceContext(None, None, str(tmp_path))
+    context.metadata_pool = metadata_pool
+    context.metadata_timings = MetadataTimings(processes=2)
+    datasets = [_dataset_instance(tmp_path, f"{i}.tabular", _columns(i)) for i in range(1, 4)]
+    failing = _dataset_instance(tmp_path, "missing.txt", extension="txt")
+    datasets.insert(1, failing)
+    provided = _dataset_instance(tmp_path, "provided.tabular", _columns(2))
+    datasets.append(provided)
+    attributes = [{} for _ in datasets[:-1]] + [{"metadata": {"columns": 7}}]
+    context.set_datasets_metadata(datasets, attributes)
+    assert metadata_pool.started
+    assert [dataset.metadata.columns for dataset in datasets if dataset is not failing] == [1, 2, 3, 7]
+    # Peeks are set by the workers
+    assert datasets[0].peek and datasets[0].blurb == "3 lines"
+    assert failing.state == failing.states.FAILED_METADATA
+    assert context.metadata_timings.discovered_count == len(datasets)
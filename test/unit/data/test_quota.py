@@ -1,3 +1,5 @@
+from unittest import mock
+
 from galaxy.quota import DatabaseQuotaAgent
 from .test_galaxy_mapping import BaseModelTestCase
 
@@ -33,6 +35,73 @@ class CalculateUsageTestCase(BaseModelTestCase):
 
         assert u.calculate_disk_usage() == 10
 
+    def test_reconcile_disk_usage(self):
+        model = self.model
+        u1 = model.User(email="reconcile_usage1@example.com", password="password")
+        u2 = model.User(email="reconcile_usage2@example.com", password="password")
+        u3 = model.User(email="reconcile_usage3@example.com", password="password")
+        self.persist(u1, u2, u3)
+
+        h1 = model.History(name="History for reconcile", user=u1)
+        h2 = model.History(name="History for reconcile", user=u2)
+        self.persist(h1, h2)
+        d1 = model.HistoryDatasetAssociation(extension="txt", history=h1, create_dataset=True, sa_session=model.session)
+        d1.dataset.total_size = 10
+        d2 = model.HistoryDatasetAssociation(extension="txt", history=h2, create_dataset=True, sa_session=model.session)
+        d2.dataset.total_size = 25
+        self.persist(d1, d2)
+        # a dataset shared by both users counts towards both
+        d3 = model.HistoryDatasetAssociation(extension="txt", history=h2, dataset=d1.dataset)
+        self.persist(d3)
+
+        user_ids = [u1.id, u2.id, u3.id]
+        assert model.User.calculate_disk_usage_for_users(model.session, user_ids) == {u1.id: 10, u2.id: 35, u3.id: 0}
+        assert model.User.calculate_disk_usage_for_users(model.session, user_ids) == {
+            u.id: u.calculate_disk_usage() or 0 for u in (u1, u2, u3)
+        }
+
+        u1.disk_usage = 10
+        u3.disk_usage = 0
+        self.persist(u1, u3)
+        drifted = model.User.reconcile_disk_usage(model.session, user_ids=user_ids, dryrun=True, batch_size=2)
+        assert drifted == [(u2.id, 0, 35)]
+        self.model.session.refresh(u2)
+        assert u2.disk_usage is None
+
+        drifted = model.User.reconcile_disk_usage(model.session, user_ids=user_ids, batch_size=2)
+        assert drifted == [(u2.id, 0, 35)]
+        self.model.session.refresh(u2)
+        assert u2.disk_usage == 35
+        assert model.User.reconcile_disk_usage(model.session, user_ids=user_ids) == []
+
+    def test_reconcile_disk_usage_concurrent_adjustment(self):
+        model = self.model
+        u = model.User(email="reconcile_concurrent@example.com", password="password")
+        self.persist(u)
+        h = model.History(name="History for concurrent reconcile", user=u)
+        self.persist(h)
+        d = model.HistoryDatasetAssociation(extension="txt", history=h, create_dataset=True, sa_session=model.session)
+        d.dataset.total_size = 10
+        self.persist(d)
+        u.disk_usage = 3
+        self.persist(u)
+
+        calculate_disk_usage_for_users = model.User.calculate_disk_usage_for_users
+
+        def calculate_and_adjust(sa_session, user_ids):
+            usage = calculate_disk_usage_for_users(sa_session, user_ids)
+            # A job finishing while the usage is recalculated
+            sa_session.execute(model.User.table.update().where(model.User.table.c.id == u.id).values(disk_usage=model.User.table.c.disk_usage + 5))
+            return usage
+
+        with mock.patch.object(model.User, "calculate_disk_usage_for_users", side_effect=calculate_and_adjust):
+            assert model.User.reconcile_disk_usage(model.session, user_ids=[u.id]) == []
+        self.model.session.refresh(u)
+        assert u.disk_usage == 8
+        assert model.User.reconcile_disk_usage(model.session, user_ids=[u.id]) == [(u.id, 8, 10)]
+        self.model.session.refresh(u)
+        assert u.disk_usage == 10
+
 
 class QuotaTestCase(BaseModelTestCase):
 
@@ -1,3 +1,5 @@
+import json
+
 from galaxy.job_metrics import (
     formatting,
     JobMetrics,
@@ -30,3 +32,27 @@ def test_job_metric_formatting():
     assert formatting.seconds_to_str(7260) == "2 hours and 1 minute"
     assert formatting.seconds_to_str(7320) == "2 hours and 2 minutes"
     assert formatting.seconds_to_str(36181) == "10 hours and 3 minutes"
+
+
+def test_metadata_plugin(tmp_path):
+    from galaxy.job_metrics.instrumenters.metadata import (
+        METADATA_TIMINGS_FILE_NAME,
+        MetadataPlugin,
+    )
+    plugin = MetadataPlugin()
+    assert plugin.job_properties(1, str(tmp_path)) == {}
+    timings = {
+        "processes": 4,
+        "wall_seconds": 12.5,
+        "outputs": {"out_file1": 0.25},
+        "discovered_count": 1000,
+        "discovered_seconds": 40.0,
+        "discovered_max_seconds": 0.5,
+    }
+    (tmp_path / METADATA_TIMINGS_FILE_NAME).write_text(json.dumps(timings))
+    properties = plugin.job_properties(1, str(tmp_path))
+    assert properties["processes"] == 4
+    assert properties["discovered_count"] == 1000
+    assert properties["output_out_file1_seconds"] == 0.25
+    assert plugin.formatter.format("output_out_file1_seconds", 0.25) == ("Metadata Time for Output out_file1", "0.25 seconds")
+    assert plugin.formatter.format("processes", 4) == ("Metadata Processes", "4")
@@ -7,6 +7,8 @@ from galaxy.jobs import (
     TaskWrapper
 )
 from galaxy.model import (
+    Dataset,
+    HistoryDatasetAssociation,
     Job,
     Task,
     User
@@ -74,6 +76,25 @@ class JobWrapperTestCase(BaseWrapperTestCase, TestCase):
         with self._prepared_wrapper() as wrapper:
             assert TEST_VERSION_COMMAND in wrapper.write_version_cmd, wrapper.write_version_cmd
 
+    def test_pause_and_notify(self):
+        wrapper = self._wrapper()
+        dependent_job = Job()
+        dependent_job.id = 346
+        dependent_job.state = Job.states.NEW
+        for job, dataset_id in ((self.job, 1), (dependent_job, 2)):
+            hda = HistoryDatasetAssociation(create_dataset=False)
+            hda.dataset = Dataset(id=dataset_id)
+            job.add_output_dataset("out_file1", hda)
+        assert wrapper.pause(dependent_job, "paused")
+        assert dependent_job.state == Job.states.PAUSED
+        assert dependent_job.output_datasets[0].dataset.dataset.state == Dataset.states.PAUSED
+        # Only new jobs are paused
+        assert not wrapper.pause(dependent_job, "paused")
+        self.app.workflow_scheduling_manager = MockWorkflowSchedulingManager()
+        wrapper._notify_output_states_changed(self.job, dependent_job)
+        assert self.queue.changed_dataset_ids == [1, 2]
+        assert self.app.workflow_scheduling_manager.finished_job_ids == [345, 346]
+
 
 class TaskWrapperTestCase(BaseWrapperTestCase, TestCase):
 
@@ -112,6 +133,19 @@ class MockJobQueue:
     def __init__(self, app):
         self.app = app
         self.dispatcher = MockJobDispatcher(app)
+        self.changed_dataset_ids = []
+
+    def dataset_states_changed(self, dataset_ids):
+        self.changed_dataset_ids.extend(dataset_ids)
+
+
+class MockWorkflowSchedulingManager:
+
+    def __init__(self):
+        self.finished_job_ids = []
+
+    def jobs_finished(self, job_ids):
+        self.finished_job_ids.extend(job_ids)
 
 
 class MockJobDispatcher:
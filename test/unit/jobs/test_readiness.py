@@ -0,0 +1,52 @@
+from galaxy.jobs.readiness import JobReadinessTracker
+
+
+def test_full_scan_due_until_reconciled():
+    tracker = JobReadinessTracker(full_scan_interval=60)
+    assert tracker.full_scan_due()
+    tracker.reconcile([], 10, now=100)
+    assert not tracker.full_scan_due(now=159)
+    assert tracker.full_scan_due(now=160)
+    tracker.reconcile([], 10, force_full_scan=True, now=200)
+    assert tracker.full_scan_due(now=201)
+
+
+def test_changed_dataset_wakes_waiting_jobs():
+    tracker = JobReadinessTracker()
+    tracker.reconcile([(1, 100), (1, 101), (2, 101), (3, 102)], 3)
+    assert tracker.blocked_job_count == 3
+    assert tracker.pop_candidate_job_ids() == set()
+    tracker.dataset_states_changed([101])
+    assert tracker.pop_candidate_job_ids() == {1, 2}
+    # candidates are no longer tracked until they are tracked again
+    assert tracker.blocked_job_count == 1
+    tracker.track([(1, 100)])
+    tracker.dataset_states_changed([101])
+    assert tracker.pop_candidate_job_ids() == set()
+    tracker.dataset_states_changed([100, 102])
+    assert tracker.pop_candidate_job_ids() == {1, 3}
+    assert tracker.blocked_job_count == 0
+
+
+def test_deferred_jobs_checked_once():
+    tracker = JobReadinessTracker()
+    tracker.reconcile([], 5)
+    tracker.defer(4)
+    assert tracker.pop_candidate_job_ids() == {4}
+    assert tracker.pop_candidate_job_ids() == set()
+
+
+def test_reconcile_resets_state():
+    tracker = JobReadinessTracker()
+    tracker.reconcile([(1, 100)], 1)
+    tracker.defer(2)
+    tracker.dataset_states_changed([100])
+    tracker.reconcile([(3, 103)], 3)
+    assert tracker.pop_candidate_job_ids() == set()
+    assert tracker.blocked_job_count == 1
+    tracker.counters.record_full_scan(2.0)
+    tracker.counters.record_incremental_scan(0.5)
+    tracker.counters.record_incremental_scan(0.5)
+    counters = tracker.counters.to_dict()
+    assert counters["full_scan_mean_time"] == 2.0
+    assert counters["incremental_scan_mean_time"] == 0.5
@@ -46,3 +46,34 @@ def test_param_default():
     runner_params = runners.RunnerParams(specs=dict(foo=dict(default="baz")), params={})
     assert runner_params["foo"] == "baz"
     assert runner_params.foo == "baz"
+
+
+def test_monitor_specs():
+    params = runners.RunnerParams(specs=runners.AsynchronousJobRunner.MONITOR_SPECS, params=dict(monitor_max_interval="30"))
+    assert params.monitor_interval == 1.0
+    assert params.monitor_max_interval == 30.0
+    assert params.monitor_backoff_factor == 2.0
+
+
+def test_adaptive_check_interval():
+    job_state = runners.AsynchronousJobState()
+    assert job_state.due_for_check()
+    job_state.schedule_next_check(False, 1, 8, 2)
+    assert job_state.check_interval == 1
+    for _ in range(5):
+        job_state.schedule_next_check(False, 1, 8, 2)
+    assert job_state.check_interval == 8
+    assert not job_state.due_for_check()
+    assert job_state.due_for_check(now=job_state.next_check_time)
+    job_state.schedule_next_check(True, 1, 8, 2)
+    assert job_state.check_interval == 1
+
+
+def test_finish_metrics():
+    metrics = runners.FinishMetrics()
+    metrics.record("finish_latency", 2.0, 5)
+    metrics.record("finish_latency", 4.0, 3, 7)
+    metrics_dict = metrics.to_dict()
+    assert metrics_dict["queue_depth"] == 3
+    assert metrics_dict["work_queue_depth"] == 7
+    assert metrics_dict["finish_latency"] == {"count": 2, "mean": 3.0, "max": 4.0}
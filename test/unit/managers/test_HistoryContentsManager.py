@@ -6,6 +6,7 @@ import unittest
 
 from sqlalchemy import column, desc, false, true
 
+from galaxy import exceptions
 from galaxy.managers import base, collections, hdas, history_contents
 from galaxy.managers.histories import HistoryManager
 from .base import BaseTestCase
@@ -306,6 +307,61 @@ class HistoryAsContainerTestCase(HistoryAsContainerBaseTestCase):
         filters = [parsed_filter("orm", column('type_id').in_(['dataset-2', 'dataset_collection-2']))]
         self.assertEqual(self.contents_manager.contents(history, filters=filters), [contents[1], contents[6]])
 
+    def test_contents_page(self):
+        user2 = self.user_manager.create(**user2_data)
+        history = self.history_manager.create(name='history', user=user2)
+        contents = []
+        contents.extend([self.add_hda_to_history(history, name=('hda-' + str(x))) for x in range(3)])
+        contents.append(self.add_list_collection_to_history(history, contents[:3]))
+        contents.extend([self.add_hda_to_history(history, name=('hda-' + str(x))) for x in range(4, 6)])
+        contents.append(self.add_list_collection_to_history(history, contents[4:6]))
+        # contents with the same hid are ordered by type and id
+        contents[3].hid = contents[2].hid
+        self.app.model.context.flush()
+
+        self.log("should page through contents following the keyset of the previous page")
+        for order, expected in (('hid-asc', contents), ('hid-dsc', contents[::-1])):
+            results = []
+            page = self.contents_manager.contents_page(history, order=order, limit=3)
+            results.extend(page.contents)
+            while page.has_more:
+                page = self.contents_manager.contents_page(history, order=order, after=page.after, limit=3)
+                self.assertTrue(page.contents)
+                results.extend(page.contents)
+            self.assertEqual(results, expected)
+
+        self.log("should return the union query rows if not expanding models")
+        page = self.contents_manager.contents_page(history, limit=4, expand_models=False)
+        self.assertEqual([(row.history_content_type, row.id) for row in page.contents],
+                         [(content.history_content_type, content.id) for content in contents[:4]])
+        self.assertEqual(page.after, (contents[3].hid, 'dataset_collection', contents[3].id))
+
+        self.log("should serialize union query rows as their models")
+        serializer = history_contents.HistoryContentsSerializer(self.app)
+        keys = ['id', 'type_id', 'hid', 'name', 'history_content_type', 'dataset_id', 'collection_id', 'update_time']
+        self.assertTrue(serializer.can_project(keys=keys))
+        self.assertFalse(serializer.can_project(keys=keys + ['tags']))
+        self.assertFalse(serializer.can_project(view='summary'))
+        for row, content in zip(page.contents, contents):
+            self.assertEqual(serializer.serialize_to_view(row, keys=keys), serializer.serialize_to_view(content, keys=keys))
+
+        self.log("should return the contents updated after the keyset in order of update_time")
+        page = self.contents_manager.contents_page(history, order='update_time-asc', expand_models=False)
+        self.assertEqual(len(page.contents), len(contents))
+        contents[1].name = 'renamed'
+        contents[3].name = 'renamed'
+        self.app.model.context.flush()
+        page = self.contents_manager.contents_page(history, order='update_time-asc', after=page.after)
+        updated = sorted([contents[1], contents[3]], key=lambda c: (c.update_time, c.history_content_type, c.id))
+        self.assertEqual(page.contents, updated)
+        self.assertFalse(page.has_more)
+        page = self.contents_manager.contents_page(history, order='update_time-asc', after=page.after)
+        self.assertEqual(page.contents, [])
+
+        self.log("should only allow keyset orders")
+        self.assertRaises(exceptions.RequestParameterInvalidException,
+                          self.contents_manager.contents_page, history, order='name-asc')
+
 
 class HistoryContentsFilterParserTestCase(HistoryAsContainerBaseTestCase):
 
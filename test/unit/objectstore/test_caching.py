@@ -0,0 +1,285 @@
+import os
+import time
+from tempfile import mkdtemp
+
+from galaxy.objectstore.caching import (
+    CacheManager,
+    DEFAULT_INDEX_FILENAME,
+    parse_cache_xml,
+    WriteBehindUploader,
+)
+from galaxy.util import parse_xml_string
+
+
+def _write(staging_path, rel_path, size):
+    path = os.path.join(staging_path, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("x" * size)
+    return path
+
+
+def test_index_rebuilt_only_when_incomplete():
+    staging_path = mkdtemp()
+    _write(staging_path, "000/dataset_1.dat", 10)
+    _write(staging_path, "000/dataset_2.dat", 20)
+    manager = CacheManager(staging_path)
+    manager.start()
+    assert os.path.exists(os.path.join(staging_path, DEFAULT_INDEX_FILENAME))
+    assert manager.index.count() == 2
+    assert manager.total_size() == 30
+    manager.shutdown()
+
+    # A file added behind the manager's back is not picked up by a restart
+    _write(staging_path, "000/dataset_3.dat", 30)
+    manager = CacheManager(staging_path)
+    manager.start()
+    assert manager.total_size() == 30
+    manager.rebuild_index()
+    assert manager.total_size() == 60
+    manager.shutdown()
+
+
+def test_record_and_remove():
+    staging_path = mkdtemp()
+    manager = CacheManager(staging_path)
+    manager.start()
+    path = _write(staging_path, "000/dataset_1.dat", 10)
+    manager.record(path)
+    _write(staging_path, "000/dataset_1_files/a.txt", 5)
+    _write(staging_path, "000/dataset_1_files/b.txt", 5)
+    manager.record(os.path.join(staging_path, "000/dataset_1_files"))
+    assert manager.total_size() == 20
+    manager.remove(os.path.join(staging_path, "000/dataset_1_files"))
+    assert manager.total_size() == 10
+    manager.remove(path)
+    assert manager.total_size() == 0
+    manager.shutdown()
+
+
+def test_hit_miss_metrics():
+    staging_path = mkdtemp()
+    manager = CacheManager(staging_path)
+    path = _write(staging_path, "000/dataset_1.dat", 10)
+    manager.record(path)
+    assert manager.in_cache(path)
+    assert not manager.in_cache(os.path.join(staging_path, "000/dataset_2.dat"))
+    assert manager.metrics.to_dict() == {"hits": 1, "misses": 1, "evictions": 0, "evicted_bytes": 0}
+
+
+def test_lru_eviction():
+    staging_path = mkdtemp()
+    manager = CacheManager(staging_path, cache_size=100)
+    paths = []
+    for i in range(4):
+        path = _write(staging_path, f"000/dataset_{i}.dat", 30)
+        manager.record(path)
+        paths.append(path)
+        time.sleep(0.01)
+    # Access the oldest dataset so that the second one is evicted first
+    manager.in_cache(paths[0])
+    deleted = manager.check()
+    assert deleted == 30
+    assert not os.path.exists(paths[1])
+    assert all(os.path.exists(p) for p in (paths[0], paths[2], paths[3]))
+    assert manager.total_size() == 90
+    assert manager.metrics.evictions == 1
+    assert manager.check() == 0
+
+
+def test_lfu_eviction():
+    staging_path = mkdtemp()
+    manager = CacheManager(staging_path, cache_size=100, eviction_policy="lfu")
+    paths = []
+    for i in range(4):
+        path = _write(staging_path, f"000/dataset_{i}.dat", 30)
+        manager.record(path)
+        paths.append(path)
+    for path in paths[:3]:
+        manager.in_cache(path)
+    manager.in_cache(paths[0])
+    manager.check()
+    assert not os.path.exists(paths[3])
+    assert all(os.path.exists(p) for p in paths[:3])
+
+
+def test_pending_uploads_not_evicted():
+    staging_path = mkdtemp()
+    manager = CacheManager(staging_path, cache_size=100)
+    paths = []
+    for i in range(4):
+        path = _write(staging_path, f"000/dataset_{i}.dat", 30)
+        manager.record(path)
+        paths.append(path)
+        time.sleep(0.01)
+    # Queued by the uploader of another process sharing the cache
+    other_uploader = WriteBehindUploader(staging_path, FlakyUpload())
+    other_uploader.enqueue("000/dataset_0.dat", paths[0])
+    manager.check()
+    assert os.path.exists(paths[0])
+    assert not os.path.exists(paths[1])
+    # Nothing but files waiting to be uploaded left to evict
+    other_uploader.enqueue("000/dataset_2.dat", paths[2])
+    other_uploader.enqueue("000/dataset_3.dat", paths[3])
+    assert manager.evict(100) == 0
+    other_uploader.cancel("000/dataset_0.dat")
+    assert manager.evict(100) == 30
+    assert not os.path.exists(paths[0])
+
+
+def test_accessed_files_not_evicted():
+    staging_path = mkdtemp()
+    manager = CacheManager(staging_path, cache_size=100)
+    path = _write(staging_path, "000/dataset_1.dat", 30)
+    manager.record(path)
+    (candidate_path, size, last_access), = manager.index.eviction_candidates("lru", 10)
+    # Accessed by another process after the candidates were selected
+    manager.index.touch_many({candidate_path: (last_access + 1, 1)})
+    assert not manager.index.claim_eviction(candidate_path, last_access)
+    assert manager.index.claim_eviction(candidate_path, last_access + 1)
+
+
+class FlakyUpload:
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.uploaded = {}
+
+    def __call__(self, rel_path, source_file):
+        if self.failures:
+            self.failures -= 1
+            return False
+        with open(source_file) as f:
+            self.uploaded[rel_path] = f.read()
+        return True
+
+
+def test_write_behind_upload_retried():
+    staging_path = mkdtemp()
+    manager = CacheManager(staging_path, cache_size=100)
+    upload = FlakyUpload(failures=2)
+    uploader = WriteBehindUploader(staging_path, upload, workers=2, cache_manager=manager, retry_delay=0.01)
+    uploader.start()
+    path = _write(staging_path, "000/dataset_1.dat", 10)
+    uploader.enqueue("000/dataset_1.dat", path)
+    assert uploader.is_pending("000/dataset_1.dat")
+    assert uploader.wait(timeout=10)
+    assert upload.uploaded == {"000/dataset_1.dat": "x" * 10}
+    assert uploader.failed_attempts == 2
+    assert not uploader.is_pending("000/dataset_1.dat")
+    uploader.shutdown()
+
+
+def test_write_behind_queue_survives_restart():
+    staging_path = mkdtemp()
+    path = _write(staging_path, "000/dataset_1.dat", 10)
+    upload = FlakyUpload(failures=1)
+    uploader = WriteBehindUploader(staging_path, upload, retry_delay=60)
+    uploader.start()
+    uploader.enqueue("000/dataset_1.dat", path)
+    while not uploader.failed_attempts:
+        time.sleep(0.01)
+    uploader.shutdown()
+    assert not upload.uploaded
+
+    upload = FlakyUpload()
+    uploader = WriteBehindUploader(staging_path, upload, retry_delay=60)
+    assert uploader.queue.failed("000/dataset_1.dat", 0, 0, 0) == 2  # make the retry due now
+    uploader.start()
+    assert uploader.is_pending("000/dataset_1.dat")
+    assert uploader.wait(timeout=10)
+    assert upload.uploaded == {"000/dataset_1.dat": "x" * 10}
+    uploader.shutdown()
+
+
+def test_write_behind_cancel():
+    staging_path = mkdtemp()
+    manager = CacheManager(staging_path, cache_size=100)
+    uploader = WriteBehindUploader(staging_path, FlakyUpload(), cache_manager=manager)
+    assert uploader.queue.queue_path == manager.index_path
+    path = _write(staging_path, "000/dataset_1.dat", 10)
+    uploader.enqueue("000/dataset_1.dat", path)
+    assert uploader.queue.pending() == [("000/dataset_1.dat", os.path.abspath(path))]
+    uploader.cancel("000/dataset_1.dat")
+    assert not uploader.is_pending("000/dataset_1.dat")
+    assert uploader.queue.pending() == []
+
+
+def test_write_behind_shared_queue():
+    staging_path = mkdtemp()
+    uploads = []
+
+    def upload(rel_path, source_file):
+        uploads.append(rel_path)
+        time.sleep(0.01)
+        return True
+
+    # Uploaders of two processes sharing the cache
+    uploaders = [WriteBehindUploader(staging_path, upload, workers=2) for _ in range(2)]
+    rel_paths = [f"000/dataset_{i}.dat" for i in range(10)]
+    for rel_path in rel_paths:
+        uploaders[0].enqueue(rel_path, _write(staging_path, rel_path, 10))
+    # Pending in every process, not just the one that queued the upload
+    assert uploaders[1].is_pending(rel_paths[0])
+    for uploader in uploaders:
+        uploader.start()
+    assert uploaders[1].wait(timeout=10)
+    for uploader in uploaders:
+        uploader.shutdown()
+    assert sorted(uploads) == rel_paths
+
+
+def test_upload_claims():
+    staging_path = mkdtemp()
+    queue = WriteBehindUploader(staging_path, FlakyUpload(), claim_timeout=60).queue
+    queue.put("000/dataset_1.dat", "/tmp/dataset_1.dat", now=0)
+    assert queue.claim("000/dataset_1.dat", 0, "a", now=1)
+    assert not queue.claim("000/dataset_1.dat", 0, "b", now=2)
+    assert queue.due(2, 10) == []
+    # Queued again while the first version is uploading
+    queue.put("000/dataset_1.dat", "/tmp/dataset_1.dat", now=3)
+    assert queue.due(3, 10) == []
+    assert not queue.done("000/dataset_1.dat", 0)
+    queue.release("000/dataset_1.dat", "a")
+    assert queue.due(4, 10) == [("000/dataset_1.dat", "/tmp/dataset_1.dat", 1)]
+    # Claims that are not renewed expire
+    assert queue.claim("000/dataset_1.dat", 1, "b", now=5)
+    queue.renew("b", now=50)
+    assert not queue.claim("000/dataset_1.dat", 1, "c", now=100)
+    assert queue.claim("000/dataset_1.dat", 1, "c", now=111)
+
+
+def test_no_index():
+    staging_path = mkdtemp()
+    manager = CacheManager(staging_path, cache_size=100, use_index=False)
+    manager.start()
+    path = _write(staging_path, "000/dataset_1.dat", 200)
+    manager.record(path)
+    assert manager.in_cache(path)
+    assert manager.check() == 0
+    assert os.path.exists(path)
+    assert not os.path.exists(os.path.join(staging_path, DEFAULT_INDEX_FILENAME))
+
+
+def test_reconcile_unindexed_files():
+    staging_path = mkdtemp()
+    manager = CacheManager(staging_path, cache_size=100)
+    manager.start()
+    indexed_path = _write(staging_path, "000/dataset_1.dat", 30)
+    manager.record(indexed_path)
+    # Written by a process that does not use the index
+    unindexed_path = _write(staging_path, "000/dataset_2.dat", 200)
+    CacheManager(staging_path, use_index=False).record(unindexed_path)
+    assert manager.check() == 0
+    os.remove(indexed_path)
+    assert manager.reconcile() == (1, 1)
+    assert manager.total_size() == 200
+    assert manager.check() == 200
+    assert not os.path.exists(unindexed_path)
+    manager.shutdown()
+
+
+def test_parse_cache_xml():
+    c_xml = parse_xml_string('<cache path="database/cache" size="10" eviction_policy="lfu" check_interval="60" reconcile_interval="600" write_behind="true" upload_workers="2"/>')
+    assert parse_cache_xml(c_xml) == {"eviction_policy": "lfu", "check_interval": 60.0, "reconcile_interval": 600.0, "write_behind": True, "upload_workers": 2}
+    assert parse_cache_xml(parse_xml_string('<cache path="database/cache" size="10"/>')) == {}
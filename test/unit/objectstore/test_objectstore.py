@@ -1,4 +1,6 @@
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from tempfile import mkdtemp
 from uuid import uuid4
 
@@ -374,6 +376,81 @@ def test_distributed_store():
             assert len(extra_dirs) == 2
 
 
+DISTRIBUTED_PLACEMENT_INDEX_TEST_CONFIG = """<?xml version="1.0"?>
+<object_store type="distributed">
+    <backends placement_index="${temp_directory}/placement.sqlite">
+        <backend id="files1" type="disk" weight="1">
+            <files_dir path="${temp_directory}/files1"/>
+        </backend>
+        <backend id="files2" type="disk" weight="1">
+            <files_dir path="${temp_directory}/files2"/>
+        </backend>
+    </backends>
+</object_store>
+"""
+
+
+def test_distributed_store_placement_index():
+    with TestConfig(DISTRIBUTED_PLACEMENT_INDEX_TEST_CONFIG) as (directory, object_store):
+        placement_index = object_store.placement_index
+        dataset = MockDataset(1)
+        object_store.create(dataset)
+        assert placement_index.get("MockDataset.1") == dataset.object_store_id
+
+        # Dataset written outside of the object store is found by probing
+        # backends and recorded in the index
+        directory.write("Hello World!", "files2/000/dataset_2.dat")
+        dataset = MockDataset(2)
+        assert object_store.get_data(dataset) == "Hello World!"
+        assert dataset.object_store_id == "files2"
+        assert placement_index.get("MockDataset.2") == "files2"
+
+        # A stale index entry falls back to probing all backends
+        placement_index.set("MockDataset.2", "files1")
+        dataset = MockDataset(2)
+        assert object_store.exists(dataset)
+        assert placement_index.get("MockDataset.2") == "files2"
+
+        assert object_store.delete(dataset)
+        assert placement_index.get("MockDataset.2") is None
+        assert object_store.to_dict()["placement_index"].endswith("placement.sqlite")
+
+
+def test_distributed_store_refresh_capacity():
+    with TestConfig(DISTRIBUTED_TEST_CONFIG) as (directory, object_store):
+        object_store.max_percent_full["files1"] = 50
+        object_store.backends["files1"].get_store_usage_percent = lambda: 90.0
+        object_store.backends["files2"].get_store_usage_percent = lambda: 10.0
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            object_store.refresh_capacity(executor)
+        assert object_store.store_usage_percent == {"files1": 90.0, "files2": 10.0}
+        assert set(object_store.weighted_backend_ids) == {"files2"}
+
+
+def test_distributed_store_refresh_capacity_hung_backend():
+    with TestConfig(DISTRIBUTED_TEST_CONFIG) as (directory, object_store):
+        object_store.capacity_refresh_interval = 0.1
+        hung = threading.Event()
+        queries = []
+
+        def hung_usage():
+            queries.append(1)
+            hung.wait()
+            return 20.0
+
+        object_store.backends["files1"].get_store_usage_percent = hung_usage
+        object_store.backends["files2"].get_store_usage_percent = lambda: 10.0
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            object_store.refresh_capacity(executor)
+            object_store.refresh_capacity(executor)
+            # The pending query isn't submitted again
+            assert len(queries) == 1
+            assert object_store.store_usage_percent == {"files2": 10.0}
+            hung.set()
+            object_store.refresh_capacity(executor)
+        assert object_store.store_usage_percent == {"files1": 20.0, "files2": 10.0}
+
+
 # Unit testing the cloud and advanced infrastructure object stores is difficult, but
 # we can at least stub out initializing and test the configuration of these things from
 # XML and dicts.
@@ -511,6 +588,8 @@ def test_config_parse_s3():
             assert object_store.multipart is True
             assert object_store.is_secure is True
             assert object_store.conn_path == "/"
+            assert object_store.download_part_size == 100
+            assert object_store.download_concurrency == 4
 
             assert object_store.cache_size == 1000
             assert object_store.staging_path == "database/object_store_cache"
@@ -537,6 +616,8 @@ def test_config_parse_s3():
             _assert_key_has_value(connection_dict, "port", 6000)
             _assert_key_has_value(connection_dict, "multipart", True)
             _assert_key_has_value(connection_dict, "is_secure", True)
+            _assert_key_has_value(connection_dict, "download_part_size", 100)
+            _assert_key_has_value(connection_dict, "download_concurrency", 4)
 
             _assert_key_has_value(cache_dict, "size", 1000)
             _assert_key_has_value(cache_dict, "path", "database/object_store_cache")
@@ -545,6 +626,31 @@ def test_config_parse_s3():
             assert len(extra_dirs) == 2
 
 
+def test_s3_get_data_range():
+    content = "h\u00e9llo w\u00f6rld\r\n\u00f1\u20ac\u00e7 line 2\n".encode() * 20
+    with TestConfig(S3_TEST_CONFIG, clazz=UnitializeS3ObjectStore) as (directory, object_store):
+        cache_path = os.path.join(directory.temp_directory, "cached.dat")
+        with open(cache_path, "wb") as f:
+            f.write(content)
+        ranges = []
+
+        def get_range(rel_path, start, end=None):
+            ranges.append((start, end))
+            return content[start:end + 1]
+
+        object_store._construct_path = lambda obj, **kwargs: "key"
+        object_store._get_range = get_range
+        for start, count in ((0, 1), (0, 6), (3, 14), (17, 40), (len(content) - 5, 10), (len(content), 4)):
+            # Reading ranges returns as many characters as reading the cache file
+            object_store._in_cache = lambda rel_path: False
+            ranged = object_store._get_data(MockDataset(1), start=start, count=count)
+            object_store._in_cache = lambda rel_path: True
+            object_store._get_cache_path = lambda rel_path: cache_path
+            assert ranged == object_store._get_data(MockDataset(1), start=start, count=count)
+        # The first range holds count bytes
+        assert ranges[0] == (0, 0)
+
+
 CLOUD_AWS_TEST_CONFIG = """<object_store type="cloud" provider="aws">
      <auth access_key="access_moo" secret_key="secret_cow" />
      <bucket name="unique_bucket_name_all_lowercase" use_reduced_redundancy="False" />
@@ -1,11 +1,28 @@
+import os
 from subprocess import CalledProcessError
 
+from galaxy.tool_util.deps.container_resolvers import ResolutionCache
 from galaxy.tool_util.deps.container_resolvers.mulled import (
     CachedMulledDockerContainerResolver,
+    ImageListingCache,
+    list_docker_cached_mulled_images,
     MulledDockerContainerResolver,
+    targets_to_mulled_name,
 )
-from galaxy.tool_util.deps.dependencies import ToolInfo
-from galaxy.tool_util.deps.requirements import ToolRequirement
+from galaxy.tool_util.deps.containers import ContainerRegistry
+from galaxy.tool_util.deps.dependencies import (
+    AppInfo,
+    ToolInfo,
+)
+from galaxy.tool_util.deps.mulled.util import build_target
+from galaxy.tool_util.deps.requirements import (
+    ContainerDescription,
+    ToolRequirement,
+)
+
+DOCKER_IMAGES_OUTPUT = b"""REPOSITORY                          TAG                  IMAGE ID
+quay.io/biocontainers/samtools      1.10--h2e538c0_3     1234567890ab
+"""
 
 
 def test_docker_container_resolver_detects_docker_cli_absent(mocker):
@@ -51,3 +68,89 @@ def test_docker_container_docker_cli_exception_resolve(mocker):
     assert resolver.cli_available is True
     assert container_description.type == 'docker'
     assert container_description.identifier == 'quay.io/biocontainers/samtools:1.10--h2e538c0_3'
+
+
+def test_image_listing_cache_docker_images(mocker):
+    check_output = mocker.patch('galaxy.tool_util.deps.container_resolvers.mulled.subprocess.check_output', return_value=DOCKER_IMAGES_OUTPUT)
+    listing_cache = ImageListingCache(ttl=60)
+    mocker.patch('galaxy.tool_util.deps.container_resolvers.mulled.image_listing_cache', listing_cache)
+    assert list_docker_cached_mulled_images(namespace="biocontainers")[0].image_identifier == "quay.io/biocontainers/samtools:1.10--h2e538c0_3"
+    list_docker_cached_mulled_images(namespace="biocontainers")
+    assert check_output.call_count == 1
+    generation = listing_cache.generation
+    listing_cache.invalidate()
+    assert listing_cache.generation > generation
+    list_docker_cached_mulled_images(namespace="biocontainers")
+    assert check_output.call_count == 2
+    listing_cache.ttl = 0
+    list_docker_cached_mulled_images(namespace="biocontainers")
+    assert check_output.call_count == 3
+    check_output.side_effect = CalledProcessError(1, 'docker')
+    assert list_docker_cached_mulled_images(namespace="biocontainers") == []
+
+
+def test_image_listing_cache_directory_contents(tmp_path):
+    listing_cache = ImageListingCache(ttl=60)
+    (tmp_path / "samtools:1.10--h2e538c0_3").touch()
+    assert listing_cache.directory_contents(str(tmp_path)) == ["samtools:1.10--h2e538c0_3"]
+    generation = listing_cache.generation
+    (tmp_path / "bwa:0.7.17--hed695b0_7").touch()
+    # Make sure the modification time changes even on file systems with a coarse resolution
+    mtime = os.stat(tmp_path).st_mtime_ns
+    os.utime(tmp_path, ns=(mtime + 10 ** 9, mtime + 10 ** 9))
+    assert sorted(listing_cache.directory_contents(str(tmp_path))) == ["bwa:0.7.17--hed695b0_7", "samtools:1.10--h2e538c0_3"]
+    assert listing_cache.generation > generation
+
+
+def test_targets_to_mulled_name_unresolved_cache(mocker):
+    mulled_tags_for = mocker.patch('galaxy.tool_util.deps.container_resolvers.mulled.mulled_tags_for', return_value=[])
+    resolution_cache = ResolutionCache()
+    targets = [build_target("samtools", version="1.10")]
+    for _ in range(2):
+        assert targets_to_mulled_name(targets, "v2", "biocontainers", resolution_cache=resolution_cache) is None
+    assert mulled_tags_for.call_count == 1
+
+
+def test_container_registry_caches_resolution(mocker, tmp_path):
+    mocker.patch('galaxy.tool_util.deps.container_resolvers.mulled.which', return_value=None)
+    listing_cache = ImageListingCache(ttl=60)
+    mocker.patch('galaxy.tool_util.deps.container_resolvers.mulled.image_listing_cache', listing_cache)
+    mocker.patch('galaxy.tool_util.deps.containers.image_listing_cache', listing_cache)
+    targets_to_mulled_name = mocker.patch('galaxy.tool_util.deps.container_resolvers.mulled.targets_to_mulled_name', return_value='samtools:1.10--h2e538c0_3')
+    registry = ContainerRegistry(AppInfo(enable_mulled_containers=True, container_image_cache_path=str(tmp_path)))
+    tool_info = ToolInfo(requirements=[ToolRequirement(name="samtools", version="1.10", type="package")], tool_id="samtools_sort", tool_version="1.0")
+
+    def resolve(tool_info=tool_info, enabled_container_types=('docker',)):
+        resolved = registry.resolve(list(enabled_container_types), tool_info, install=False)
+        return resolved and resolved.container_description.identifier
+
+    assert resolve() == 'quay.io/biocontainers/samtools:1.10--h2e538c0_3'
+    assert resolve() == 'quay.io/biocontainers/samtools:1.10--h2e538c0_3'
+    assert targets_to_mulled_name.call_count == 1
+    # unresolved requirements are cached as well
+    assert resolve(enabled_container_types=()) is None
+    assert resolve(enabled_container_types=()) is None
+    # other requirements or container descriptions resolve again
+    other_tool_info = ToolInfo(requirements=[ToolRequirement(name="samtools", version="1.11", type="package")], tool_id="samtools_sort", tool_version="1.0")
+    resolve(tool_info=other_tool_info)
+    assert targets_to_mulled_name.call_count == 2
+    explicit_tool_info = ToolInfo(container_descriptions=[ContainerDescription("quay.io/biocontainers/bwa:0.7.17--hed695b0_7")], requirements=tool_info.requirements, tool_id="samtools_sort", tool_version="1.0")
+    assert resolve(tool_info=explicit_tool_info) == "quay.io/biocontainers/bwa:0.7.17--hed695b0_7"
+    # pulling or building an image drops all cached resolutions
+    listing_cache.invalidate()
+    resolve()
+    assert targets_to_mulled_name.call_count == 3
+
+
+def test_container_registry_resolution_cache_disabled(mocker, tmp_path):
+    mocker.patch('galaxy.tool_util.deps.container_resolvers.mulled.which', return_value=None)
+    listing_cache = ImageListingCache()
+    mocker.patch('galaxy.tool_util.deps.container_resolvers.mulled.image_listing_cache', listing_cache)
+    mocker.patch('galaxy.tool_util.deps.containers.image_listing_cache', listing_cache)
+    targets_to_mulled_name = mocker.patch('galaxy.tool_util.deps.container_resolvers.mulled.targets_to_mulled_name', return_value='samtools:1.10--h2e538c0_3')
+    registry = ContainerRegistry(AppInfo(enable_mulled_containers=True, container_image_cache_path=str(tmp_path), container_resolution_cache_ttl=0))
+    tool_info = ToolInfo(requirements=[ToolRequirement(name="samtools", version="1.10", type="package")])
+    for _ in range(2):
+        registry.resolve(['docker'], tool_info, install=False)
+    assert targets_to_mulled_name.call_count == 2
+    assert len(registry.container_resolution_cache) == 0
@@ -7,7 +7,8 @@ from galaxy.tool_util.parser.output_objects import ToolOutput
 from galaxy.tools.actions import (
     DefaultToolAction,
     determine_output_format,
-    on_text_for_names
+    on_text_for_names,
+    ToolExecutionCache,
 )
 from galaxy.util import XML
 from .. import tools_support
@@ -111,6 +112,26 @@ class DefaultToolActionTestCase(unittest.TestCase, tools_support.UsesApp, tools_
         # Again this is a stupid way to ensure data parameters are wrapped.
         self.assertEqual(output["out1"].name, "Output (%s)" % hda1.dataset.get_file_name())
 
+    def test_deferred_job_parameters(self):
+        execution_cache = ToolExecutionCache(self.trans)
+        execution_cache.defer_rows = True
+        self._init_tool(tools_support.SIMPLE_TOOL_CONTENTS)
+        job, _, _ = self.action.execute(
+            tool=self.tool,
+            trans=self.trans,
+            history=self.history,
+            incoming=dict(param1="moo"),
+            execution_cache=execution_cache,
+            flush_job=False,
+        )
+        assert len(execution_cache.deferred_job_parameters) == 1
+        self.history.add_pending_items()
+        self.app.model.context.flush()
+        execution_cache.insert_deferred_rows()
+        assert not execution_cache.deferred_job_parameters
+        parameters = {p.name: p.value for p in job.parameters}
+        assert parameters["param1"] == '"moo"'
+
     def test_inactive_user_job_create_failure(self):
         self.trans.user_is_active = False
         try:
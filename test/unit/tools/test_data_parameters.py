@@ -1,3 +1,5 @@
+from unittest import mock
+
 from galaxy import model
 from .util import BaseParameterTestCase
 from ..unittest_utils import galaxy_mock
@@ -69,6 +71,7 @@ class DataToolParameterTestCase(BaseParameterTestCase):
         hda1.extension = 'data'
         hda1.conversion_destination = (False, "tabular", None)
         self.stub_active_datasets(hda1)
+        self.stub_conversion_destination('data', 'tabular')
         field = self._simple_field()
         assert len(field['options']['hda']) == 1
         assert field['options']['hda'][0]['name'] == "hda1 (as tabular)"
@@ -79,6 +82,7 @@ class DataToolParameterTestCase(BaseParameterTestCase):
         hda1.extension = 'data'
         hda1.conversion_destination = (False, "tabular", MockHistoryDatasetAssociation(name="hda1converted", id=2))
         self.stub_active_datasets(hda1)
+        self.stub_conversion_destination('data', 'tabular')
         field = self._simple_field()
         assert len(field['options']['hda']) == 1
         assert field['options']['hda'][0]['name'] == "hda1 (as tabular)"
@@ -128,6 +132,7 @@ class DataToolParameterTestCase(BaseParameterTestCase):
         converted = MockHistoryDatasetAssociation(name="hda1converted", id=2)
         hda1.conversion_destination = (False, "tabular", converted)
         self.stub_active_datasets(hda1)
+        self.stub_conversion_destination('data', 'tabular')
         assert converted == self.param.get_initial_value(self.trans, {})
 
     def test_get_initial_with_to_be_converted_data(self):
@@ -135,6 +140,7 @@ class DataToolParameterTestCase(BaseParameterTestCase):
         hda1.extension = 'data'
         hda1.conversion_destination = (False, "tabular", None)
         self.stub_active_datasets(hda1)
+        self.stub_conversion_destination('data', 'tabular')
         assert hda1 == self.param.get_initial_value(self.trans, {}), hda1
 
     def _new_hda(self):
@@ -159,6 +165,19 @@ class DataToolParameterTestCase(BaseParameterTestCase):
         self.test_history._active_datasets_and_roles = [h for h in hdas if not h.deleted]
         self.test_history._active_visible_datasets_and_roles = [h for h in hdas if not h.deleted and h.visible]
 
+    def stub_conversion_destination(self, extension, target_ext):
+        registry = self.trans.app.datatypes_registry
+        get_conversion_destination = registry.get_conversion_destination
+
+        def stub(ext, formats):
+            if ext == extension:
+                return False, target_ext
+            return get_conversion_destination(ext, formats)
+
+        patcher = mock.patch.object(registry, "get_conversion_destination", stub)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     def _simple_field(self, **kwds):
         return self.param.to_dict(trans=self.trans, **kwds)
 
@@ -210,3 +229,6 @@ class MockHistoryDatasetAssociation:
 
     def find_conversion_destination(self, formats):
         return self.conversion_destination
+
+    def get_converted_files_by_type(self, file_type):
+        return self.conversion_destination[2]
@@ -1,4 +1,7 @@
-from unittest import TestCase
+from unittest import (
+    mock,
+    TestCase,
+)
 
 from galaxy import model
 from galaxy.tools.parameters import (
@@ -137,6 +140,43 @@ class DatasetMatcherTestCase(TestCase, UsesApp):
         hda_match = self.test_context.hda_match(hda)
         assert not hda_match
 
+    def test_history_hda_matches(self):
+        registry = self.app.datatypes_registry
+        hdas = []
+        for extension, state in (('txt', 'ok'), ('bam', 'ok'), ('h5', 'ok'), ('tabular', 'error'), ('bam', 'ok'), ('tabular', 'queued')):
+            hda = MockHistoryDatasetAssociation(id=len(hdas) + 1)
+            hda.extension = extension
+            hda.dataset.state = state
+            hda.conversion_destination = (False, None, None)
+            hdas.append(hda)
+        converted_hda = MockHistoryDatasetAssociation(id=7)
+        hdas[4].conversion_destination = (False, 'sam', converted_hda)
+        history = bunch.Bunch(id=1, active_visible_datasets_and_roles=hdas)
+
+        with mock.patch.object(registry, 'datatype_converters', {'bam': {'sam': None}}):
+            registry._converters_by_datatype = {}
+            assert registry.get_conversion_destination('txt', self.param_formats) == (True, None)
+            assert registry.get_conversion_destination('bam', self.param_formats) == (False, 'sam')
+            assert registry.get_conversion_destination('h5', self.param_formats) == (False, None)
+            assert registry.find_conversion_destination_for_dataset_by_extensions('bam', self.param_formats) == (False, 'sam', None)
+
+            matches = list(self.test_context.history_hda_matches(history))
+            assert [match.hda for match in matches] == [hdas[0], hdas[1], converted_hda, hdas[5]]
+            assert [match.implicit_conversion for match in matches] == [False, True, True, False]
+            assert matches[2].original_hda is hdas[4]
+            matches = list(self.test_context.history_hda_matches(history, reverse=True))
+            assert [match.hda for match in matches] == [hdas[5], converted_hda, hdas[1], hdas[0]]
+
+        # The index is built once per factory
+        factory = self.test_context.dataset_matcher_factory
+        assert factory.history_dataset_index(history) is factory.history_dataset_index(history)
+        assert sorted(factory.history_dataset_index(history).by_extension) == ['bam', 'h5', 'tabular', 'txt']
+
+    @property
+    def param_formats(self):
+        self.test_context
+        return self.param.formats
+
     def setUp(self):
         self.setup_app()
         self.mock_hda = MockHistoryDatasetAssociation()
@@ -1,7 +1,14 @@
+import os
+import tempfile
+from unittest import mock
+
 import pytest
 
 from galaxy import model
-from galaxy.tools.parameters import basic
+from galaxy.tools.parameters import (
+    basic,
+    dynamic_options,
+)
 from galaxy.util import bunch
 from .util import BaseParameterTestCase
 
@@ -49,6 +56,36 @@ class SelectToolParameterTestCase(BaseParameterTestCase):
         assert ("testname2", "testpath2", False) in self.param.get_options(self.trans, {"input_bam": "testpath2"})
         assert len(self.param.get_options(self.trans, {"input_bam": "testpath3"})) == 0
 
+    def test_filters_on_cached_data_table(self):
+        self.app.tool_data_tables["test_table"] = VersionedMockToolDataTable()
+        self.options_xml = '''<options from_data_table="test_table"><filter type="unique_value" column="0" /><filter type="static_value" column="1" value="testpath2" /></options>'''
+        assert self.param.get_options(self.trans, {}) == [("testname2", "testpath2", False)]
+        self.options_xml = '''<options from_data_table="test_table"><filter type="param_value" ref="input_bam" column="0" /></options>'''
+        self._param = None
+        assert self.param.get_options(self.trans, {"input_bam": "testname1"}) == [("testname1", "testpath1", False), ("testname1", "testpath3", False)]
+        assert len(self.options_table_cache) == 1
+        # New entries are picked up
+        self.app.tool_data_tables["test_table"].add(["testname1", "testpath4"])
+        assert len(self.param.get_options(self.trans, {"input_bam": "testname1"})) == 3
+        assert len(self.options_table_cache) == 2
+
+    def test_options_from_dataset_cached(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".tabular", delete=False) as f:
+            f.write("#comment\nname1\tvalue1\nname2\tvalue2\nname1\tvalue3\n")
+        self.addCleanup(os.remove, f.name)
+        hda = model.HistoryDatasetAssociation()
+        hda.dataset = model.Dataset()
+        hda.dataset.external_filename = f.name
+        self.options_xml = '''<options from_dataset="input_bam"><column name="name" index="0"/><column name="value" index="1"/><filter type="unique_value" column="0" /></options>'''
+        assert self.param.get_options(self.trans, {"input_bam": hda}) == [("name1", "value1", False), ("name2", "value2", False)]
+        with mock.patch("builtins.open", side_effect=AssertionError("options not cached")):
+            assert self.param.options.get_field_by_name_for_value("name", "value3", self.trans, {"input_bam": hda}) == []
+            assert self.param.options.get_fields_by_value("value2", self.trans, {"input_bam": hda}) == [["name2", "value2"]]
+        # Changed datasets are parsed again
+        with open(f.name, "a") as fh:
+            fh.write("name3\tvalue4\n")
+        assert ("name3", "value4", False) in self.param.get_options(self.trans, {"input_bam": hda})
+
     # TODO: Good deal of overlap here with DataToolParameterTestCase,
     # refactor.
     def setUp(self):
@@ -70,6 +107,10 @@ class SelectToolParameterTestCase(BaseParameterTestCase):
         self.optional = False
         self.options_xml = ""
         self._param = None
+        self.options_table_cache = dynamic_options.OptionsTableCache()
+        patcher = mock.patch.object(dynamic_options, "options_table_cache", self.options_table_cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
     @property
     def param(self):
@@ -102,3 +143,22 @@ class MockToolDataTable:
 
     def get_fields(self):
         return [["testname1", "testpath1"], ["testname2", "testpath2"]]
+
+
+class VersionedMockToolDataTable(MockToolDataTable):
+    name = "test_table"
+
+    def __init__(self):
+        super().__init__()
+        self.version = 1
+        self.data = [["testname1", "testpath1"], ["testname2", "testpath2"], ["testname1", "testpath3"]]
+
+    def add(self, fields):
+        self.data.append(fields)
+        self.version += 1
+
+    def get_fields(self):
+        return self.data
+
+    def get_version_fields(self):
+        return self.version, self.data
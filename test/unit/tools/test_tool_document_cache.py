@@ -0,0 +1,56 @@
+import os
+import time
+
+from galaxy.tool_util.parser import get_tool_source
+from galaxy.tools.cache import ToolDocumentCache
+from ..unittest_utils.sample_data import SIMPLE_MACRO, SIMPLE_TOOL_WITH_MACRO
+
+
+def _write_tool(directory, tool_version="1.0"):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "external.xml"), "w") as f:
+        f.write(SIMPLE_MACRO.substitute(tool_version=tool_version))
+    tool_path = os.path.join(directory, "tool.xml")
+    with open(tool_path, "w") as f:
+        f.write(SIMPLE_TOOL_WITH_MACRO)
+    return tool_path
+
+
+def test_tool_document_cache(tmp_path):
+    tool_path = _write_tool(str(tmp_path / "tools"))
+    cache = ToolDocumentCache(str(tmp_path / "cache"))
+    assert cache.get(tool_path) is None
+    tool_source = get_tool_source(tool_path)
+    cache.set(tool_path, tool_source)
+    document = cache.get(tool_path)
+    assert document["document"] == tool_source.to_string()
+    assert document["macro_paths"] == tool_source.macro_paths
+
+    # Touching files doesn't invalidate the cache, changing the macros does
+    time.sleep(0.01)
+    os.utime(tool_path)
+    assert cache.get(tool_path) is not None
+    _write_tool(str(tmp_path / "tools"), tool_version="2.0")
+    assert cache.get(tool_path) is None
+
+    # Readable by another process while this one writes
+    tool_source = get_tool_source(tool_path)
+    cache.set(tool_path, tool_source)
+    other_cache = ToolDocumentCache(str(tmp_path / "cache"))
+    assert other_cache.get(tool_path)["document"] == tool_source.to_string()
+
+    cache.delete(tool_path)
+    assert other_cache.get(tool_path) is None
+    cache.close()
+    other_cache.close()
+
+
+def test_tool_document_cache_preload(tmp_path):
+    tool_paths = [_write_tool(str(tmp_path / f"tools{i}")) for i in range(4)]
+    cache = ToolDocumentCache(str(tmp_path / "cache"))
+    cache.set(tool_paths[0], get_tool_source(tool_paths[0]))
+    assert cache.preload(tool_paths, processes=2) == 3
+    for tool_path in tool_paths:
+        assert cache.get(tool_path)["document"] == get_tool_source(tool_path).to_string()
+    assert cache.preload(tool_paths, processes=2) == 0
+    cache.close()
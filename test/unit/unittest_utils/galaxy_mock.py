@@ -194,6 +194,7 @@ class MockAppConfig(Bunch):
         self.root = root
         self.enable_tool_document_cache = False
         self.tool_cache_data_dir = os.path.join(root, 'tool_cache')
+        self.tool_parse_processes = 1
         self.delay_tool_initialization = True
         self.external_chown_script = None
 
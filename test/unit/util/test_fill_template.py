@@ -3,7 +3,13 @@ import sys
 import pytest
 from Cheetah.NameMapper import NotFound
 
-from galaxy.util.template import fill_template
+from galaxy.util import template
+from galaxy.util.template import (
+    CompiledTemplate,
+    fill_template,
+    precompile_template,
+    TemplateCache,
+)
 
 SIMPLE_TEMPLATE = """#for item in $a_list:
     echo $item
@@ -86,3 +92,55 @@ def test_fix_template_two_to_three():
 def test_fix_template_invalid_cheetah():
     template_str = fill_template(INVALID_CHEETAH_SYNTAX, python_template_version='2', retry=1)
     assert template_str == "1 is 1\n"
+
+
+@pytest.fixture
+def template_cache(monkeypatch):
+    cache = TemplateCache()
+    monkeypatch.setattr(template, 'template_cache', cache)
+    return cache
+
+
+def test_template_cache_hit(template_cache):
+    assert fill_template(SIMPLE_TEMPLATE, {'a_list': [1, 2]}) == FILLED_SIMPLE_TEMPLATE
+    assert (template_cache.hits, template_cache.misses, len(template_cache)) == (0, 1, 1)
+    assert fill_template(SIMPLE_TEMPLATE, {'a_list': [3]}) == "    echo 3\n"
+    assert (template_cache.hits, template_cache.misses, len(template_cache)) == (1, 1, 1)
+
+
+def test_template_cache_remembers_fallback(template_cache):
+    for _ in range(2):
+        assert fill_template(TWO_TO_THREE_TEMPLATE, python_template_version='2', retry=1) == 'a a 1'
+        assert fill_template(INVALID_CHEETAH_SYNTAX, python_template_version='2', retry=1) == "1 is 1\n"
+    assert template_cache.hits == 2
+    assert all(compiled.compiler_class is not template.Compiler for compiled in template_cache._templates.values())
+    assert next(iter(template_cache._templates.values())).futurized
+    # The cached fallback is used without retrying
+    assert fill_template(TWO_TO_THREE_TEMPLATE, python_template_version='2', retry=0) == 'a a 1'
+
+
+def test_template_cache_skips_missing_variable_fallback(template_cache):
+    assert fill_template(LIST_COMPREHENSION_TEMPLATE, python_template_version='2', retry=1) == 'echo 1\n'
+    # Only the template compiled without replacing missing variables is cached
+    assert [compiled.compiler_class for compiled in template_cache._templates.values()] == [template.Compiler]
+
+
+def test_template_cache_eviction():
+    cache = TemplateCache(max_size=2)
+    keys = [TemplateCache.key(f"$a{i}", template.Compiler, '3') for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, CompiledTemplate(template._compile(f"$a{i}", template.Compiler), template.Compiler, False))
+        cache.get(keys[0])
+    assert keys[0] in cache and keys[1] not in cache and keys[2] in cache
+    cache.resize(0)
+    assert len(cache) == 0
+    cache.put(keys[0], CompiledTemplate(None, template.Compiler, False))
+    assert len(cache) == 0
+
+
+def test_precompile_template(template_cache):
+    precompile_template(SIMPLE_TEMPLATE)
+    precompile_template(INVALID_CHEETAH_SYNTAX)
+    assert len(template_cache) == 1
+    assert fill_template(SIMPLE_TEMPLATE, {'a_list': [1, 2]}) == FILLED_SIMPLE_TEMPLATE
+    assert template_cache.hits == 1
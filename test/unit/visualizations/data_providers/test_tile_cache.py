@@ -0,0 +1,173 @@
+import os
+import pickle
+
+import numpy
+
+from galaxy.visualization.data_providers.tile_cache import (
+    DatasetFiles,
+    GenomeTileCache,
+    SUMMARY_BINS,
+    SummarizedData,
+    SummaryPyramid,
+    tile_cached,
+)
+
+
+class MockMetadata:
+    spec = {"columns": None, "index_file": None}
+
+    def __init__(self):
+        self.columns = 3
+        self.index_file = object()
+
+
+class MockDataset:
+    ext = "bed"
+    datatype = None
+
+    def __init__(self, id, file_name):
+        self.id = id
+        self.file_name = file_name
+        self.metadata = MockMetadata()
+
+
+class MockProvider:
+    tile_prefetch = True
+
+    def __init__(self, tile_cache, original_dataset, converted_dataset=None):
+        self.tile_cache = tile_cache
+        self.original_dataset = original_dataset
+        self.converted_dataset = converted_dataset
+        self.calls = []
+
+    @tile_cached
+    def get_data(self, chrom=None, low=None, high=None, start_val=0, **kwargs):
+        self.calls.append((chrom, low, high, start_val, kwargs, self.original_dataset))
+        return {'data': [chrom, low, high], 'start_val': start_val}
+
+
+def _size(value):
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def test_lru_eviction():
+    cache = GenomeTileCache(max_bytes=2 * _size("a" * 100))
+    cache.put("a", "a" * 100)
+    cache.put("b", "b" * 100)
+    assert cache.get("a") == "a" * 100
+    cache.put("c", "c" * 100)
+    assert cache.get("b") is None
+    assert cache.get("a") == "a" * 100
+    assert cache.get("c") == "c" * 100
+    cache.put("d", "d" * 1000)
+    assert "d" not in cache
+    assert cache.current_bytes == 2 * _size("a" * 100)
+
+
+def test_disk_tier(tmp_path):
+    cache = GenomeTileCache(max_bytes=1024, cache_dir=str(tmp_path))
+    cache.put("0123", {"data": [1, 2]})
+    other_cache = GenomeTileCache(max_bytes=1024, cache_dir=str(tmp_path))
+    assert "0123" in other_cache
+    assert other_cache.get("0123") == {"data": [1, 2]}
+    assert other_cache.get("4567") is None
+
+
+def _dir_size(path):
+    return sum(f.stat().st_size for f in path.glob("*/*.pickle"))
+
+
+def test_disk_tier_pruning(tmp_path):
+    value_size = _size("a" * 100)
+    cache = GenomeTileCache(max_bytes=1024, cache_dir=str(tmp_path), max_dir_bytes=10 * value_size)
+    keys = [f"{i:02d}ab" for i in range(10)]
+    for key in keys:
+        cache.put(key, "a" * 100)
+    cache._executor.shutdown(wait=True)
+    cache._executor = None
+    for i, key in enumerate(keys):
+        os.utime(cache._path(key), (i, i))
+    cache.clear()
+    # Reading a result marks it as recently used
+    assert cache.get(keys[0]) == "a" * 100
+    cache.put("10ab", "a" * 100)
+    cache._executor.shutdown(wait=True)
+    assert _dir_size(tmp_path) <= 10 * value_size * 0.9
+    assert [key in cache for key in keys] == [True, False, False] + [True] * 7
+    assert "10ab" in cache
+    # Without a limit results are never removed
+    cache = GenomeTileCache(max_bytes=1024, cache_dir=str(tmp_path))
+    for i in range(20, 40):
+        cache.put(f"{i}ab", "a" * 100)
+    assert cache._executor is None
+    assert _dir_size(tmp_path) > 20 * value_size
+
+
+def test_tile_cached(tmp_path):
+    data_file = tmp_path / "dataset.dat"
+    data_file.write_text("data")
+    cache = GenomeTileCache(max_bytes=1024 * 1024)
+    provider = MockProvider(cache, MockDataset(1, str(data_file)))
+    result = provider.get_data("chr1", 100, 200, 0, _="1")
+    assert result == {'data': ['chr1', 100, 200], 'start_val': 0}
+    result["extra_info"] = None
+    # Wait for the prefetching to finish
+    cache._executor.shutdown(wait=True)
+    cache._executor = None
+    # Neighbouring tiles were prefetched from plain copies of the datasets
+    assert sorted(call[1] for call in provider.calls) == [0, 100, 200]
+    prefetched_datasets = [call[5] for call in provider.calls if call[1] != 100]
+    for dataset in prefetched_datasets:
+        assert isinstance(dataset, DatasetFiles)
+        assert (dataset.id, dataset.file_name, dataset.metadata.columns) == (1, str(data_file), 3)
+        assert "index_file" not in dataset.metadata
+    calls = len(provider.calls)
+    assert provider.get_data("chr1", 100, 200, 0, _="2") == {'data': ['chr1', 100, 200], 'start_val': 0}
+    assert provider.get_data("chr1", "200", "300", 0) == {'data': ['chr1', 200, 300], 'start_val': 0}
+    assert len(provider.calls) == calls
+    # Different filters and datasets are cached separately
+    provider.get_data("chr1", 100, 200, 0, stats=True)
+    MockProvider(cache, MockDataset(2, str(data_file))).get_data("chr1", 100, 200, 0, stats=True)
+    assert len(provider.calls) == calls + 1
+    # Calls without a region are not cached
+    provider.get_data(chrom="chr1")
+    provider.get_data(chrom="chr1")
+    assert len(provider.calls) == calls + 3
+
+
+def _summary(values):
+    summary = SummarizedData(len(values))
+    valid = ~numpy.isnan(values)
+    summary.valid_count[valid] = 1
+    summary.sum_data[valid] = values[valid]
+    summary.sum_squares[valid] = values[valid] ** 2
+    summary.min_val[valid] = values[valid]
+    summary.max_val[valid] = values[valid]
+    return summary
+
+
+def test_summary_pyramid():
+    span = SummaryPyramid.span_for(SUMMARY_BINS * 4)
+    assert span == SUMMARY_BINS * 4
+    assert SummaryPyramid.span_for(1) == SUMMARY_BINS
+    values = numpy.arange(SUMMARY_BINS, dtype=numpy.float64)
+    values[:SUMMARY_BINS // 2] = numpy.nan
+    pyramid = SummaryPyramid(span, _summary(values))
+    assert pyramid.bin_size() == 4
+    assert len(pyramid.levels) > 1
+
+    # Too small intervals for the pyramid
+    assert pyramid.summarize(0, 1000, 1000) is None
+    assert pyramid.summarize(0, span * 2, 1) is None
+
+    summary = pyramid.summarize(0, span, 4)
+    assert list(summary.valid_count) == [0, 0, SUMMARY_BINS // 4, SUMMARY_BINS // 4]
+    expected = [values[SUMMARY_BINS // 2:SUMMARY_BINS * 3 // 4], values[SUMMARY_BINS * 3 // 4:]]
+    assert list(summary.sum_data[2:]) == [e.sum() for e in expected]
+    assert list(summary.min_val[2:]) == [e.min() for e in expected]
+    assert list(summary.max_val[2:]) == [e.max() for e in expected]
+
+    # Interval boundaries in the middle of bins
+    summary = pyramid.summarize(span // 2 + 2, span // 2 + 2 + 4 * 64, 2)
+    assert list(summary.valid_count) == [32, 32]
+    assert summary.sum_data[0] == values[SUMMARY_BINS // 2:SUMMARY_BINS // 2 + 33].sum() - values[SUMMARY_BINS // 2] / 2 - values[SUMMARY_BINS // 2 + 32] / 2
@@ -0,0 +1,39 @@
+from galaxy.workflow.readiness import InvocationWakeupTracker
+
+
+def test_new_and_unparked_invocations_attempted():
+    tracker = InvocationWakeupTracker(full_scan_interval=60)
+    assert tracker.candidates([1, 2], now=100) == [1, 2]
+    # Invocations not waiting on any job are attempted on every iteration
+    tracker.park(1, [], now=100)
+    tracker.park(2, [10, 11], now=100)
+    assert tracker.candidates([1, 2], now=101) == [1]
+    assert tracker.counters.skipped == 1
+
+
+def test_finished_job_wakes_invocation():
+    tracker = InvocationWakeupTracker(full_scan_interval=60)
+    tracker.park(1, [10, 11], now=100)
+    tracker.park(2, [11, 12], now=100)
+    assert sorted(tracker.waiting_job_ids()) == [10, 11, 12]
+    tracker.jobs_finished([11], finish_time=105)
+    assert tracker.candidates([1, 2], now=106) == [1, 2]
+    assert tracker.counters.wakeups == 2
+    assert tracker.scheduled(1, progressed=True, now=107) == 2
+    # No progress, no latency recorded
+    assert tracker.scheduled(2, progressed=False, now=107) is None
+    assert tracker.counters.latency_count == 1
+    tracker.park(1, [12], now=107)
+    tracker.park(2, [12], now=107)
+    assert tracker.candidates([1, 2], now=108) == []
+
+
+def test_full_scan_interval_and_inactive_invocations():
+    tracker = InvocationWakeupTracker(full_scan_interval=60)
+    tracker.park(1, [10], now=100)
+    tracker.park(2, [11], now=100)
+    assert tracker.candidates([1, 2], now=159) == []
+    assert tracker.candidates([1], now=160) == [1]
+    # Invocation 2 is no longer active and forgotten
+    assert tracker.parked_invocation_count == 1
+    assert tracker.waiting_job_ids() == [10]